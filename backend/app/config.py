@@ -1,11 +1,12 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 
 class Settings(BaseSettings):
     #server configuration
     HOST: str = "127.0.0.1"
     PORT: int = 8000
     DEBUG: bool = True
+    WORKERS: int = 1 # worker processes when DEBUG is off
 
     #CORS Configurations
     ALLOWED_ORIGINS:List[str] = [
@@ -15,12 +16,34 @@ class Settings(BaseSettings):
 
     # Database configuration
     DATABASE_URL: str = ""
-    DATABASE_ECHO:bool = True
+    DATABASE_REPLICA_URLS: List[str] = [] # read replicas for the read-only GET routes, e.g. '["postgresql://replica1/app"]'; empty reads from DATABASE_URL
+    DATABASE_ECHO:bool = False # log every statement (through the logging pipeline, see utils/logging_config.py)
+    DATABASE_SLOW_QUERY_MS: float = 200.0 # statements slower than this are logged as warnings, 0 disables
+    DATABASE_POOL_SIZE: int = 20 # connections kept open per worker process
+    DATABASE_MAX_OVERFLOW: int = 10 # extra connections opened under load, closed when returned
+    DATABASE_POOL_TIMEOUT: float = 10.0 # seconds to wait for a free connection before the request fails
+    DATABASE_POOL_RECYCLE_SECONDS: int = 1800 # reopen connections older than this, -1 never
+    DATABASE_POOL_PRE_PING: bool = True # test a connection on checkout, replacing ones the server dropped
+    DATABASE_SQLITE_PROFILE: str = "tuned" # tuned: WAL, synchronous=NORMAL and a busy timeout | default: SQLite's own settings
+    DATABASE_SQLITE_BUSY_TIMEOUT_MS: int = 5000 # how long a SQLite writer waits for the lock before "database is locked"
+    QUERY_PROFILER_ENABLED: bool = True # per-statement stats, slow query and N+1 records for the admin API
+    QUERY_EXPLAIN_SLOW: bool = False # capture the plan of slow SELECTs, once per statement shape
+    QUERY_N_PLUS_ONE_THRESHOLD: int = 10 # one statement shape this many times in a request is flagged, 0 disables
 
     # LiveKit configuration
     LIVEKIT_API_KEY:str = ""
     LIVEKIT_API_SECRET:str = ""
     LIVEKIT_WS_URL: str = ""
+    ROOM_STATS_CACHE_TTL_SECONDS: float = 2.0 # short cache for polled room stats, 0 disables
+    BULK_ROOM_CONCURRENCY: int = 10 # max in-flight LiveKit calls per bulk room request
+    LIVEKIT_REQUEST_DEADLINE_SECONDS: float = 5.0 # total budget per operation, including retries
+    LIVEKIT_RETRY_ATTEMPTS: int = 3 # attempts for idempotent calls on transient errors
+    LIVEKIT_RETRY_BASE_DELAY: float = 0.1
+    LIVEKIT_RETRY_MAX_DELAY: float = 1.0
+    LIVEKIT_BREAKER_FAILURE_THRESHOLD: int = 5 # consecutive transient failures before the circuit opens
+    LIVEKIT_BREAKER_RESET_SECONDS: float = 30.0
+    LIVEKIT_HTTP_POOL_SIZE: int = 100 # max open connections to the LiveKit API
+    LIVEKIT_HTTP_KEEPALIVE_SECONDS: float = 30.0 # idle time before a pooled connection is closed
 
     # LLM configuration
     OPENAI_API_KEY:str = ""
@@ -32,10 +55,41 @@ class Settings(BaseSettings):
     JWT_SECRET_KEY:str = ""
     JWT_ALGORITHM:str = ""
     JWT_EXPIRATION_HOURS:int = 24
+    JWT_KEYS_FILE: str = "" # JWK set with kid-addressed keys (RS256/EdDSA/HS*); replaces JWT_SECRET_KEY/JWT_ALGORITHM when set
+    JWT_KEYS_RELOAD_SECONDS: float = 30.0 # how often the key file is checked for rotation
+    AUTH_TOKEN_CACHE_SIZE: int = 10000 # verified tokens kept until they expire, 0 disables
+    AUTH_AGENT_CACHE_TTL_SECONDS: float = 5.0 # authenticated agent lookups, 0 disables
+    ADMIN_API_KEY: str = "" # X-Admin-Key for /routers/admin, empty disables the admin API
 
     # Transfer Configuration
     MAX_TRANSFER_WAIT_TIME:int = 300 #5 minutes in seconds
     MAX_ACTIVE_CALLS_PER_AGENT:int = 3
+    ACTIVE_TRANSFER_STORE: str = "memory" # memory (single worker) | database | redis
+    REDIS_URL: str = "redis://localhost:6379/0" # only used by the redis transfer store
+    TRANSFER_LEASE_SECONDS: float = 30.0 # timeout lease length; renewed every third of it
+    WORKER_ID: str = "" # lease owner name, defaults to hostname-pid
+
+    # Event stream configuration
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 0.5 # how often each worker checks for events committed elsewhere
+    OUTBOX_RETENTION_SECONDS: int = 3600 # how far back reconnecting clients can replay
+    EVENT_SUBSCRIBER_QUEUE_SIZE: int = 1000 # a client this far behind is disconnected and replays on reconnect
+    EVENT_KEEPALIVE_SECONDS: float = 15.0
+
+    # Archive configuration
+    ARCHIVE_RETENTION_DAYS: int = 30 # completed/failed calls older than this move to the archive tables, 0 keeps everything hot
+    ARCHIVE_INTERVAL_SECONDS: float = 3600.0 # how often each worker runs an archive pass, 0 leaves it to POST /routers/admin/archive
+    ARCHIVE_BATCH_SIZE: int = 500 # calls moved per transaction
+
+    # Logging configuration
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json" # json (one object per line) | text
+    LOG_QUEUE_SIZE: int = 10000 # records waiting to be written; beyond this they are dropped and counted
+    LOG_SAMPLING: Dict[str, float] = {"uvicorn.access": 0.1} # share of INFO/DEBUG records kept per logger; warnings are always kept
+
+    # Tracing configuration
+    TRACING_EXPORTER: str = "" # console | file: spans as OTLP/JSON lines; empty only tags logs and responses with trace ids
+    TRACING_FILE: str = "traces.jsonl" # used by the file exporter
+    TRACING_SAMPLE_RATIO: float = 1.0 # share of new traces recorded; incoming traceparent sampling is honoured
 
     # LLM Configuration
     MAX_SUMMARY_TOKENS:int = 500
@@ -70,6 +124,17 @@ def validate_settings():
     if missing_settings:
         raise ValueError(f"Missing required environment variables: {', '.join(missing_settings)}")
     
+# Multiple workers only share what lives outside the process: the database
+# and the active transfer store. Refuse setups where each worker would keep
+# its own copy of that state.
+def validate_worker_settings(workers: int):
+    if workers <= 1:
+        return
+    if settings.ACTIVE_TRANSFER_STORE == "memory":
+        raise ValueError("WORKERS > 1 needs ACTIVE_TRANSFER_STORE=database or redis")
+    if settings.DATABASE_URL.startswith("sqlite") and ":memory:" in settings.DATABASE_URL:
+        raise ValueError("WORKERS > 1 cannot share an in-memory SQLite database")
+
 # validate on import 
 try:
     validate_settings()
@@ -1,24 +1,124 @@
 # import sqlalchemy tools
-from sqlalchemy import create_engine, Column, String, Integer, JSON, DateTime, ForeignKey, Text, Boolean
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy import create_engine, Column, String, Integer, JSON, DateTime, ForeignKey, Text, Boolean, Index, Table, inspect, literal, text, tuple_
+from sqlalchemy.orm import Session, sessionmaker, relationship
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy import func
+from sqlalchemy.sql import Select
+from sqlalchemy.engine import Row, make_url
+from sqlalchemy import event as sa_event
 
+from contextlib import contextmanager
+from datetime import datetime
 from enum import Enum
+import itertools
+from typing import Dict, List, Optional, Sequence, Tuple
 import uuid
 
 from app.config import settings
+from utils.query_profiler import query_profiler
+
+# Engine options from the DATABASE_POOL_* settings. The pool is per worker
+# process; async routes check connections out on the event loop, so it
+# should cover the requests a worker has in flight at once.
+# In-memory SQLite keeps SQLAlchemy's own single-connection pool.
+def engine_options(url: str) -> Dict:
+    """create_engine keyword arguments for url"""
+    options = {}
+    if url.startswith("sqlite"):
+        options["connect_args"] = {"check_same_thread": False}
+        if _sqlite_in_memory(make_url(url)):
+            return options
+    options.update(
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        pool_recycle=settings.DATABASE_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DATABASE_POOL_PRE_PING,
+    )
+    return options
+
+def _sqlite_in_memory(url) -> bool:
+    return url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+
+# The tuned SQLite profile, set on every new connection:
+#   - journal_mode=WAL: readers no longer block the writer or each other
+#   - synchronous=NORMAL: with WAL, fsync at checkpoints rather than every
+#     commit; a power cut can lose the last commits but not corrupt the file
+#   - busy_timeout: a writer waits for the lock instead of failing at once
+#     with "database is locked"
+def apply_sqlite_profile(engine, profile: str = None):
+    """Set the DATABASE_SQLITE_PROFILE pragmas on engine's connections (SQLite files only)"""
+    profile = profile or settings.DATABASE_SQLITE_PROFILE
+    if engine.dialect.name != "sqlite" or _sqlite_in_memory(engine.url) or profile == "default":
+        return
+    if profile != "tuned":
+        raise ValueError(f"Unknown DATABASE_SQLITE_PROFILE: {profile}")
+
+    @sa_event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(f"PRAGMA busy_timeout={int(settings.DATABASE_SQLITE_BUSY_TIMEOUT_MS)}")
+        finally:
+            cursor.close()
+
+def create_app_engine(url: str, profile: str = None):
+    """An engine configured like the app's: pool settings and the SQLite profile"""
+    # (statement logging is done by utils/logging_config.py, not SQLAlchemy's echo)
+    engine = create_engine(url, **engine_options(url))
+    apply_sqlite_profile(engine, profile)
+    return engine
 
 # create database engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    echo = settings.DATABASE_ECHO,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
-  
-)
+engine = create_app_engine(settings.DATABASE_URL)
+
+# read replicas (DATABASE_REPLICA_URLS), only used by ReadSessionLocal
+replica_engines = [create_app_engine(url) for url in settings.DATABASE_REPLICA_URLS]
+
+# per-statement stats, slow queries and N+1 detection (utils/query_profiler.py)
+for _engine in [engine, *replica_engines]:
+    query_profiler.attach(_engine)
+
+# Session for read-mostly work: SELECTs go to one replica (round robin per
+# session) until the session writes anything - a flush, an UPDATE, a
+# SELECT ... FOR UPDATE, raw SQL - and from then on everything goes to the
+# primary, its bind, so the session reads its own writes. Without replicas
+# it is a plain session on the primary.
+_replica_turn = itertools.count()
+
+class RoutingSession(Session):
+    def __init__(self, replicas: Sequence = (), **kwargs):
+        super().__init__(**kwargs)
+        self.replica = replicas[next(_replica_turn) % len(replicas)] if replicas else None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.replica is not None:
+            if not self._flushing and isinstance(clause, Select) and clause._for_update_arg is None:
+                return self.replica
+            if clause is not None or self._flushing:
+                self.stick_to_primary()
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+    def stick_to_primary(self) -> bool:
+        """Send the rest of the session to the primary; True if it was reading from a replica"""
+        was_on_replica = self.replica is not None
+        self.replica = None
+        return was_on_replica
+
+# A row looked up right after another request created it may not have
+# reached the replica yet: retry a miss on the primary.
+def first_or_primary(db, query):
+    """query.first(), asked again on the primary when a replica doesn't have the row"""
+    row = query.first()
+    if row is None and isinstance(db, RoutingSession) and db.stick_to_primary():
+        row = query.first()
+    return row
 
 # create a session factory
 SessionLocal = sessionmaker(autocommit=False,autoflush=False,bind=engine)
+ReadSessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine, replicas=replica_engines)
 
 # base class for models
 Base = declarative_base()
@@ -48,6 +148,17 @@ class TransferStatus(str, Enum):
     COMPLETED = "completed"
     FAILED = "failed"
 
+class EventType(str, Enum):
+    CALL_CREATED = "call.created"
+    CALL_UPDATED = "call.updated"
+    CALLS_ARCHIVED = "call.archived"
+    AGENT_STATUS_CHANGED = "agent.status_changed"
+    AGENT_UPDATED = "agent.updated"
+    TRANSFER_INITIATED = "transfer.initiated"
+    TRANSFER_IN_PROGRESS = "transfer.in_progress"
+    TRANSFER_COMPLETED = "transfer.completed"
+    TRANSFER_FAILED = "transfer.failed"
+
 # Datebase models
 
 class Agent(Base):
@@ -69,6 +180,12 @@ class Agent(Base):
     transfers_initiated = relationship("Transfer", foreign_keys="Transfer.from_agent_id", back_populates="from_agent")
     transfers_received = relationship("Transfer", foreign_keys="Transfer.to_agent_id", back_populates="to_agent")
 
+    # keyset pagination order (name, id), with and without the status filter
+    __table_args__ = (
+        Index("ix_agents_name_id", "name", "id"),
+        Index("ix_agents_status_name_id", "status", "name", "id"),
+    )
+
 class Call(Base):
     __tablename__ = "calls"
 
@@ -106,6 +223,14 @@ class Call(Base):
     agent_b = relationship("Agent", foreign_keys=[agent_b_id], back_populates="calls_as_agent_b")
     transfers = relationship("Transfer", back_populates="call")
 
+    # keyset pagination order (created_at, id), per filter
+    __table_args__ = (
+        Index("ix_calls_created_at_id", "created_at", "id"),
+        Index("ix_calls_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_calls_agent_a_created_at_id", "agent_a_id", "created_at", "id"),
+        Index("ix_calls_agent_b_created_at_id", "agent_b_id", "created_at", "id"),
+    )
+
 class Transfer(Base):
     __tablename__ = "transfers"
 
@@ -122,9 +247,12 @@ class Transfer(Base):
     summary_shared = Column(Text, nullable=True)
 
     # timings
-    initiated_at = Column(DateTime, default=func.now())
+    initiated_at = Column(DateTime, default=datetime.utcnow) #transfer timestamps are all naive UTC
     completed_at = Column(DateTime, nullable=True)
     duration_seconds = Column(Integer, default=0)
+    timeout_at = Column(DateTime, nullable=True, index=True) #auto-cancel deadline while pending
+    timeout_owner = Column(String(255), nullable=True) #worker holding the timeout lease
+    timeout_lease_expires_at = Column(DateTime, nullable=True)
 
     # Room information
     transfer_room_id = Column(String(255), nullable=True) #Room where agents meet
@@ -165,10 +293,99 @@ class Room(Base):
     # metadata
     extra_metadata = Column(JSON, default=dict)
 
+# Transactional outbox: state changes add their event in the same commit, so
+# an event exists if and only if its change was saved. Every worker tails
+# this table (by id) to push events to its connected clients, and clients
+# that reconnect replay what they missed from here.
+class OutboxEvent(Base):
+    __tablename__ = "outbox_events"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    event_type = Column(String(50), nullable=False)
+
+    # who should hear about it
+    room_ids = Column(JSON, default=list)
+    agent_ids = Column(JSON, default=list) # empty: every agent (e.g. an unassigned waiting call)
+
+    payload = Column(JSON, default=dict)
+    # set here rather than by the database so retention cleanup compares
+    # against the same (UTC) clock
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+    # ids must never be reused: relay cursors and Last-Event-ID point past
+    # old rows, and SQLite otherwise restarts ids once cleanup empties the table
+    __table_args__ = {"sqlite_autoincrement": True}
+
+# Archive tables: finished calls past ARCHIVE_RETENTION_DAYS are moved here
+# with their transfers and rooms (services/archiver.py), keeping the hot
+# tables, their indexes and their status scans small. Each is a copy of its
+# hot table's columns, so columns added to a model later reach its archive
+# too (add_missing_columns), plus archived_at; no foreign keys, and only the
+# indexes the history endpoints use.
+def _archive_table(source, name: str, *indexes) -> Table:
+    columns = [
+        Column(column.name, column.type, primary_key=column.primary_key, nullable=column.nullable)
+        for column in source.columns
+    ]
+    return Table(name, Base.metadata, *columns, Column("archived_at", DateTime, nullable=False), *indexes)
+
+calls_archive = _archive_table(
+    Call.__table__, "calls_archive",
+    Index("ix_calls_archive_created_at_id", "created_at", "id"),
+    Index("ix_calls_archive_status_created_at_id", "status", "created_at", "id"),
+    Index("ix_calls_archive_agent_a_created_at_id", "agent_a_id", "created_at", "id"),
+    Index("ix_calls_archive_agent_b_created_at_id", "agent_b_id", "created_at", "id"),
+)
+transfers_archive = _archive_table(Transfer.__table__, "transfers_archive", Index("ix_transfers_archive_call_id", "call_id"))
+rooms_archive = _archive_table(Room.__table__, "rooms_archive", Index("ix_rooms_archive_call_id", "call_id"))
+
 # database init function
 async def init_db():
     """Initialize all the database tables"""
     Base.metadata.create_all(bind=engine) 
+    add_missing_columns(engine)
+    add_missing_indexes(engine)
+
+# create_all only creates missing tables; columns added to existing models
+# later (all nullable) are added in place so old databases keep working.
+def add_missing_columns(bind):
+    """Add nullable model columns that are missing from existing tables"""
+    inspector = inspect(bind)
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=bind.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                if column.index:
+                    conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table.name}_{column.name} ON {table.name} ({column.name})"))
+
+# Same for composite indexes declared in __table_args__.
+def add_missing_indexes(bind):
+    """Create model indexes that are missing from existing tables"""
+    inspector = inspect(bind)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind)
+
+# Group a unit of work into one commit: everything inside the block is
+# committed together, or rolled back if the block raises.
+@contextmanager
+def transaction(db):
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
 
 # dependency function to get a session 
 def get_db():
@@ -179,11 +396,23 @@ def get_db():
     finally:
         db.close()    
 
+# For GET routes that only read: a session that reads from a replica.
+# Routes whose ETag follows the event versions (the calls listing, agent
+# availability) stay on get_db: the versions come from the primary, and a
+# lagging replica would tag old rows with the new version.
+def get_read_db():
+    """Yields a session reading from a replica (RoutingSession)"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
 
 # helper function for database operations
 
-def create_agent(db, name: str, email: str, skills: list = None ):
-    """Create a new agent"""
+def create_agent(db, name: str, email: str, skills: list = None, commit: bool = True):
+    """Create a new agent; with commit=False it is only flushed into the caller's transaction"""
 
     agent = Agent(
         name = name,
@@ -191,6 +420,9 @@ def create_agent(db, name: str, email: str, skills: list = None ):
         skills = skills or []
     )
     db.add(agent)
+    if not commit:
+        db.flush()
+        return agent
     db.commit()
     db.refresh(agent)
     return agent
@@ -202,9 +434,10 @@ def create_call(
     caller_phone: str = None,
     agent_a_id: str = None,
     call_reason: str = None,
-    priority: str = "normal"
+    priority: str = "normal",
+    commit: bool = True
 ):
-    """Create a new call"""
+    """Create a new call; with commit=False it is only flushed into the caller's transaction"""
     call = Call(
         room_id=room_id,
         caller_name=caller_name,
@@ -214,12 +447,15 @@ def create_call(
         priority=priority
     )
     db.add(call)
+    if not commit:
+        db.flush()
+        return call
     db.commit()
     db.refresh(call)
     return call
 
-def create_transfer(db, call_id: str, from_agent_id: str, to_agent_id: str, reason: str = None):
-    """Create a new transfer"""
+def create_transfer(db, call_id: str, from_agent_id: str, to_agent_id: str, reason: str = None, commit: bool = True):
+    """Create a new transfer; with commit=False it is only flushed into the caller's transaction"""
     transfer = Transfer(
         call_id = call_id,
         from_agent_id = from_agent_id,
@@ -227,6 +463,89 @@ def create_transfer(db, call_id: str, from_agent_id: str, to_agent_id: str, reas
         reason = reason
     )
     db.add(transfer)
+    if not commit:
+        db.flush()
+        return transfer
     db.commit()
     db.refresh(transfer)
-    return transfer
\ No newline at end of file
+    return transfer
+
+# SQLite keeps DateTime as text. Defaults from func.now() are written without
+# a fraction ("12:00:00") while SQLAlchemy binds with one ("12:00:00.000000"),
+# and the two don't compare equal as text, so a whole-second cursor is bound
+# in the stored form to keep rows tied on created_at on the right page.
+def _timestamp_key(db, value: datetime):
+    if value.microsecond == 0 and db.get_bind().dialect.name == "sqlite":
+        return literal(value.strftime("%Y-%m-%d %H:%M:%S"), String)
+    return value
+
+# Keyset pagination: each page continues strictly after the last row of the
+# previous one in a fixed (sort key, id) order, so the database walks the
+# matching index from that point instead of skipping OFFSET rows. Every page
+# costs the same however deep it is. Helpers return up to `limit` rows plus
+# whether more follow.
+
+# Columns the list endpoints return. Pages select just these, as plain rows,
+# so listing never loads transcripts and summaries (unbounded Text) or builds
+# ORM identities that are thrown away once the page is serialized.
+CALL_LIST_COLUMNS = (
+    Call.id, Call.room_id, Call.caller_name, Call.caller_phone, Call.call_reason, Call.status,
+    Call.started_at, Call.duration_seconds, Call.priority, Call.created_at, Call.agent_a_id, Call.agent_b_id
+)
+AGENT_LIST_COLUMNS = (Agent.id, Agent.name, Agent.email, Agent.status, Agent.current_room_id, Agent.skills)
+
+def list_calls_page(
+    db,
+    limit: int,
+    after: Optional[Tuple[datetime, str]] = None,
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    agent_id: Optional[str] = None,
+    created_since: Optional[datetime] = None,
+    archived: bool = False
+) -> Tuple[List[Row], bool]:
+    """Calls newest first, after the (created_at, id) key `after`; rows of CALL_LIST_COLUMNS
+    (from calls_archive, plus archived_at, when archived)"""
+
+    c = calls_archive.c if archived else Call.__table__.c
+    columns = [c[column.key] for column in CALL_LIST_COLUMNS] + ([c.archived_at] if archived else [])
+
+    def page(agent_column=None):
+        query = db.query(*columns)
+        if status:
+            query = query.filter(c.status == status)
+        if priority:
+            query = query.filter(c.priority == priority)
+        if agent_column is not None:
+            query = query.filter(agent_column == agent_id)
+        if created_since:
+            query = query.filter(c.created_at >= created_since)
+        if after:
+            query = query.filter(tuple_(c.created_at, c.id) < tuple_(_timestamp_key(db, after[0]), after[1]))
+        return query.order_by(c.created_at.desc(), c.id.desc()).limit(limit + 1).all()
+
+    if agent_id:
+        # An agent is on a call as agent A or agent B. One ordered range scan
+        # per column, merged here, keeps both on their index; an OR would
+        # need the whole match set sorted on every page.
+        merged = {call.id: call for call in page(c.agent_a_id) + page(c.agent_b_id)}
+        rows = sorted(merged.values(), key=lambda call: (call.created_at, call.id), reverse=True)
+    else:
+        rows = page()
+    return rows[:limit], len(rows) > limit
+
+def list_agents_page(
+    db,
+    limit: int,
+    after: Optional[Tuple[str, str]] = None,
+    status: Optional[str] = None
+) -> Tuple[List[Row], bool]:
+    """Agents by name, after the (name, id) key `after`; rows of AGENT_LIST_COLUMNS"""
+
+    query = db.query(*AGENT_LIST_COLUMNS)
+    if status:
+        query = query.filter(Agent.status == status)
+    if after:
+        query = query.filter(tuple_(Agent.name, Agent.id) > tuple_(*after))
+    rows = query.order_by(Agent.name, Agent.id).limit(limit + 1).all()
+    return rows[:limit], len(rows) > limit
@@ -1,15 +1,69 @@
 # app/dependencies.py
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+import copy
+import hmac
 import jwt
-from datetime import datetime
+from typing import Dict, Optional
 
-from app.database import get_db
+from app.database import get_db, Agent
 from app.config import settings
+from services.event_bus import event_bus
+from utils.auth import decode_access_token
+from utils.cache import TTLCache
 
 security = HTTPBearer()
 
+# Authenticated agent cache.
+# get_current_agent keeps each agent's column values for
+# AUTH_AGENT_CACHE_TTL_SECONDS. On a hit it builds a detached Agent from
+# them and adds it to the request's session - no query, no constructor or
+# merge - so routes still get an ordinary Agent they can read, change and
+# commit. Agent writes on this worker drop the entry right away
+# (forget_agent); every relayed event naming an agent drops it on all
+# workers; the TTL bounds anything else. Values are copied in and out of the
+# cache, so changing an agent's skills list in one request can't leak into
+# the next.
+
+_agent_cache = TTLCache(max_size=10000)
+_agent_mapper = inspect(Agent)
+_AGENT_COLUMNS = tuple(attr.key for attr in _agent_mapper.column_attrs)
+
+def forget_agent(agent_id: Optional[str]):
+    if agent_id:
+        _agent_cache.pop(agent_id)
+
+def clear_agent_cache():
+    _agent_cache.clear()
+
+def _forget_event_agents(event: Dict):
+    for agent_id in event["agent_ids"]:
+        _agent_cache.pop(agent_id)
+
+event_bus.add_listener(_forget_event_agents)
+
+def _load_agent(db: Session, agent_id: str) -> Optional[Agent]:
+    values = _agent_cache.get(agent_id)
+    if values is not None:
+        existing = db.identity_map.get(_agent_mapper.identity_key_from_primary_key((agent_id,)))
+        if existing is not None:
+            return existing
+        agent = _agent_mapper.class_manager.new_instance()
+        agent.__dict__.update(copy.deepcopy(values))
+        make_transient_to_detached(agent)
+        db.add(agent)
+        return agent
+
+    agent = db.query(Agent).filter(Agent.id == agent_id).first()
+    if agent is not None:
+        _agent_cache.set(
+            agent_id, copy.deepcopy({key: getattr(agent, key) for key in _AGENT_COLUMNS}),
+            settings.AUTH_AGENT_CACHE_TTL_SECONDS
+        )
+    return agent
+
 # Validate JWT for agents.
 # Extract agent_id from token and check if the agent exists in DB.
 # Returns the authenticated agent object or raises 401 errors.
@@ -21,11 +75,7 @@ def get_current_agent(
     """Get current authenticated agent from JWT token"""
     
     try:
-        payload = jwt.decode(
-            credentials.credentials,
-            settings.JWT_SECRET_KEY,
-            algorithms=[settings.JWT_ALGORITHM]
-        )
+        payload = decode_access_token(credentials.credentials)
         
         agent_id = payload.get("sub")
         if agent_id is None:
@@ -35,8 +85,7 @@ def get_current_agent(
             )
         
         # Check if agent exists
-        from app.database import Agent
-        agent = db.query(Agent).filter(Agent.id == agent_id).first()
+        agent = _load_agent(db, agent_id)
         if agent is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -50,7 +99,7 @@ def get_current_agent(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token has expired"
         )
-    except jwt.JWTError:
+    except jwt.InvalidTokenError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token"
@@ -67,11 +116,7 @@ def get_current_caller(
     """Get current authenticated caller from JWT token"""
     
     try:
-        payload = jwt.decode(
-            credentials.credentials,
-            settings.JWT_SECRET_KEY,
-            algorithms=[settings.JWT_ALGORITHM]
-        )
+        payload = decode_access_token(credentials.credentials)
         
         caller_id = payload.get("sub")
         if caller_id is None:
@@ -90,8 +135,17 @@ def get_current_caller(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token has expired"
         )
-    except jwt.JWTError:
+    except jwt.InvalidTokenError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token"
-        )
\ No newline at end of file
+        )
+
+# Guard for the admin API: the X-Admin-Key header must match ADMIN_API_KEY.
+# With no key configured the admin routes are off.
+
+def require_admin(x_admin_key: Optional[str] = Header(None)):
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_admin_key or not hmac.compare_digest(x_admin_key.encode(), settings.ADMIN_API_KEY.encode()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin key")
@@ -1,17 +1,31 @@
 from fastapi import FastAPI
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 import uvicorn
-from app.config import settings
+from app.config import settings, validate_worker_settings
 from app.database import init_db
 from fastapi.middleware.cors import CORSMiddleware
-from routers import calls,agents,transfer,rooms
-from fastapi.responses import JSONResponse
+from routers import calls,agents,transfer,rooms,events,admin,history
+from fastapi.responses import JSONResponse, Response
+from services.livekit_service import livekit_service
+from services.transfer_service import transfer_service
+from services.event_bus import event_bus
+from services.archiver import call_archiver
+from services.resilience import UpstreamError, CircuitOpenError
+from utils.serialization import DefaultJSONResponse
+from utils.metrics import REGISTRY, CONTENT_TYPE, MetricsMiddleware
+from utils.tracing import TracingMiddleware, TRACE_ID_HEADER, tracer
+from utils.logging_config import configure_logging
+from utils.query_profiler import QueryProfilerMiddleware
+import math
 
 
 #configure logging
 #its just like console.log in js
-logging.basicConfig(level=logging.INFO)
+#records go through a queue to one writer thread (JSON lines by default),
+#each carrying the trace id of the request it was logged in
+configure_logging()
 logger = logging.getLogger(__name__)
 
 #its like special decorator in python and it turns async function into a context manager
@@ -22,9 +36,18 @@ async def lifespan(app:FastAPI):
     logger.info("Starting up...")
     await init_db()
     logger.info("Database initialized")
+    await livekit_service.start()
+    await transfer_service.start()
+    await event_bus.start()
+    await call_archiver.start()
     yield
     #shutdown
     logger.info("Shutting down...") 
+    await call_archiver.stop()
+    await event_bus.stop()
+    await transfer_service.stop()
+    await livekit_service.close()
+    tracer.shutdown()
 
 
 # Initialize FastAPI app (like Express in Node.js)
@@ -32,7 +55,8 @@ app = FastAPI(
     title="Warm Transfer System",
     description="LiveKit based warm transfer system with LLM integration",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=DefaultJSONResponse  # orjson when installed
 )
 
 # Configure CORS
@@ -55,13 +79,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],             # allow all HTTP methods
     allow_headers=["*"],             # allow all headers
+    expose_headers=["X-Next-Cursor", TRACE_ID_HEADER], # pagination cursor for list endpoints, trace id
 )
 
+# Repeated statement shapes per request (N+1), for the admin query profile
+app.add_middleware(QueryProfilerMiddleware)
+# Request latency and per-request SQL counts for /metrics
+app.add_middleware(MetricsMiddleware)
+# A span per request (outermost, so it covers the metrics too), continuing
+# an incoming traceparent; the trace id goes back in X-Trace-Id
+app.add_middleware(TracingMiddleware)
+
 # Include routers
 app.include_router(calls.router, prefix="/routers/calls", tags=["calls"])
 app.include_router(agents.router, prefix="/routers/agents", tags=["agents"])
 app.include_router(transfer.router, prefix="/routers/transfer", tags=["transfer"])
 app.include_router(rooms.router, prefix="/rooms", tags=["rooms"])
+app.include_router(events.router, prefix="/routers/events", tags=["events"])
+app.include_router(admin.router, prefix="/routers/admin", tags=["admin"])
+app.include_router(history.router, prefix="/routers/history", tags=["history"])
 
 @app.get("/")
 async def root():
@@ -71,6 +107,36 @@ async def root():
 async def health_check():
     return {"status":"healthy" , "message":"service is running"}
 
+# Health of the LiveKit client: circuit breaker state and retry counters
+@app.get("/health/livekit")
+async def livekit_health_check():
+    return livekit_service.health()
+
+# Prometheus scrape endpoint. Gauges mirroring service state are refreshed
+# on each scrape; everything else is recorded as it happens.
+REGISTRY.add_collector(transfer_service.collect_metrics)
+REGISTRY.add_collector(livekit_service.collect_metrics)
+REGISTRY.add_collector(event_bus.collect_metrics)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    await REGISTRY.collect()
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+# Classified upstream failures keep their meaning: 404 for missing resources,
+# 503/504 when LiveKit is unreachable or the circuit is open.
+@app.exception_handler(UpstreamError)
+async def upstream_exception_handler(request, exc):
+    logger.error(f"Upstream error in {exc.service}.{exc.operation}: {str(exc)}")
+    headers = None
+    if isinstance(exc, CircuitOpenError):
+        headers = {"Retry-After": str(max(1, math.ceil(exc.retry_after)))}
+    return JSONResponse(
+        status_code=exc.http_status,
+        content={"detail": str(exc)},
+        headers=headers
+    )
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     logger.error(f"Global exception: {str(exc)}")
@@ -79,12 +145,33 @@ async def global_exception_handler(request, exc):
         content={"detail": "Internal server error"}
     )
 
-# Start FastAPI server with Uvicorn; auto-reloads on code changes
-if __name__ == "__main__":
+# Start FastAPI server with Uvicorn.
+# DEBUG: one auto-reloading process. Otherwise WORKERS processes share the
+# port; tables are created once here so workers don't race on startup.
+def run():
+    if settings.DEBUG:
+        if settings.WORKERS > 1:
+            logger.warning("DEBUG runs a single reloading worker; WORKERS is ignored")
+        uvicorn.run(
+            "app.main:app",
+            host = settings.HOST,
+            port = settings.PORT,
+            reload = True,
+            log_level="info",
+            log_config=None # uvicorn's loggers go through configure_logging too
+        )
+        return
+
+    validate_worker_settings(settings.WORKERS)
+    asyncio.run(init_db())
     uvicorn.run(
-        "app.main:app", 
+        "app.main:app",
         host = settings.HOST,
         port = settings.PORT,
-        reload = settings.DEBUG,
-        log_level="info"
-    )
\ No newline at end of file
+        workers = settings.WORKERS,
+        log_level="info",
+        log_config=None # uvicorn's loggers go through configure_logging too
+    )
+
+if __name__ == "__main__":
+    run()
\ No newline at end of file
@@ -0,0 +1,125 @@
+# Per-request cost of agent authentication (get_current_agent).
+#
+# Issues tokens for a set of agents in a SQLite database and times the
+# dependency, one fresh session per call like a request, three ways:
+#   - uncached:     signature check and agent query on every call
+#   - token_cached: verified-token cache only; the agent is still queried
+#   - cached:       both caches warm: a token lookup and attaching the
+#                   cached agent to the session
+# plus session_begin: starting the session's transaction alone, which the
+# cached path includes and any route that queries pays anyway.
+#
+#   python -m benchmarks.auth
+#   python -m benchmarks.auth --agents 1000 --calls 20000 --output auth.json
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database import Base, Agent
+from app import dependencies
+from app.dependencies import get_current_agent
+from utils import auth
+from utils.auth import create_access_token
+from benchmarks.common import percentile, write_results
+
+
+def micro_summary(latencies):
+    # far below a millisecond when cached, so these are in microseconds
+    return {
+        "mean_us": round(statistics.fmean(latencies) * 1e6, 2),
+        "p50_us": round(percentile(latencies, 50) * 1e6, 2),
+        "p95_us": round(percentile(latencies, 95) * 1e6, 2),
+        "p99_us": round(percentile(latencies, 99) * 1e6, 2),
+    }
+
+
+def per_call(session_factory, credentials, calls: int, before=None):
+    latencies = []
+    for i in range(calls):
+        if before:
+            before()
+        db = session_factory()
+        try:
+            started = time.perf_counter()
+            get_current_agent(credentials[i % len(credentials)], db)
+            latencies.append(time.perf_counter() - started)
+        finally:
+            db.close()
+    return micro_summary(latencies)
+
+
+def session_begin(session_factory, calls: int):
+    latencies = []
+    for _ in range(calls):
+        db = session_factory()
+        try:
+            started = time.perf_counter()
+            db.begin()
+            latencies.append(time.perf_counter() - started)
+        finally:
+            db.close()
+    return micro_summary(latencies)
+
+
+def main(args):
+    settings.JWT_SECRET_KEY = settings.JWT_SECRET_KEY or "benchmark-secret"
+    settings.JWT_ALGORITHM = settings.JWT_ALGORITHM or "HS256"
+    ttl = settings.AUTH_AGENT_CACHE_TTL_SECONDS or 5.0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/auth.db")
+        Base.metadata.create_all(bind=engine)
+        agent_ids = [str(uuid.uuid4()) for _ in range(args.agents)]
+        with engine.begin() as conn:
+            conn.execute(Agent.__table__.insert(), [
+                {"id": agent_id, "name": f"Agent {i}", "email": f"agent{i}@bench.example.com", "skills": ["support"]}
+                for i, agent_id in enumerate(agent_ids)
+            ])
+        credentials = [
+            HTTPAuthorizationCredentials(scheme="Bearer", credentials=create_access_token(agent_id))
+            for agent_id in agent_ids
+        ]
+        session_factory = sessionmaker(bind=engine)
+
+        results = {}
+        settings.AUTH_AGENT_CACHE_TTL_SECONDS = 0
+        results["uncached"] = per_call(session_factory, credentials, args.calls, before=auth.clear_token_cache)
+        results["token_cached"] = per_call(session_factory, credentials, args.calls)
+        settings.AUTH_AGENT_CACHE_TTL_SECONDS = ttl
+        per_call(session_factory, credentials, len(credentials))  # warm the agent cache
+        results["cached"] = per_call(session_factory, credentials, args.calls)
+        results["session_begin"] = session_begin(session_factory, args.calls)
+        engine.dispose()
+
+    auth.clear_token_cache()
+    dependencies.clear_agent_cache()
+    for path, timing in results.items():
+        print(f"{path:<13} p50 {timing['p50_us']:>8} us  p99 {timing['p99_us']:>8} us", file=sys.stderr)
+
+    write_results(args.output, "auth", [{"path": path, **timing} for path, timing in results.items()], params={
+        "agents": args.agents,
+        "calls": args.calls,
+        "algorithm": settings.JWT_ALGORITHM,
+        "agent_cache_ttl_s": ttl,
+    })
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Per-request cost of agent authentication, cached and uncached")
+    parser.add_argument("--agents", type=int, default=200, help="distinct agents (and tokens) in rotation")
+    parser.add_argument("--calls", type=int, default=5000, help="timed calls per path")
+    parser.add_argument("--output", default="-", help="JSON results file ('-' for stdout)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    main(parse_args())
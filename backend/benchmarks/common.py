@@ -0,0 +1,113 @@
+# Shared helpers for the benchmark scripts: latency summaries, a bounded
+# request driver, JSON result files that can be compared across runs, and
+# the latency/failure profile of the fake upstreams.
+
+import asyncio
+import json
+import math
+import platform
+import random
+import statistics
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of samples (0 for an empty list)"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: List[float], errors: int = 0, elapsed: Optional[float] = None) -> Dict:
+    """Throughput and latency (milliseconds) for one measured phase"""
+    count = len(latencies)
+    result = {
+        "requests": count + errors,
+        "errors": errors,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+    if elapsed:
+        result["elapsed_s"] = round(elapsed, 3)
+        result["throughput_rps"] = round(count / elapsed, 1)
+    return result
+
+
+async def drive(
+    requests: List[Callable[[], Awaitable[bool]]],
+    concurrency: int
+) -> Dict:
+    """Run request callables with at most `concurrency` in flight; each returns True on success"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(request):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                ok = await request()
+            except Exception:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(r) for r in requests))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+def environment() -> Dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def write_results(path: Optional[str], name: str, results, params: Dict = None):
+    """Write {benchmark, params, environment, results} as JSON; '-' or None prints it"""
+    document = {"benchmark": name, "params": params or {}, "environment": environment(), "results": results}
+    text = json.dumps(document, indent=2, default=str)
+    if path and path != "-":
+        with open(path, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+class UpstreamProfile:
+    """Latency and failure distribution of a fake upstream (LiveKit, OpenAI)"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 error_status: int = 503, seed: Optional[int] = None):
+        self.latency = latency  # median seconds per request
+        self.jitter = jitter  # sigma of a lognormal around the median; 0 is a fixed latency
+        self.error_rate = error_rate  # share of requests answered with error_status
+        self.error_status = error_status
+        self._rng = random.Random(seed)
+
+    def sample_latency(self) -> float:
+        if self.latency <= 0:
+            return 0.0
+        if not self.jitter:
+            return self.latency
+        return self.latency * math.exp(self._rng.gauss(0, self.jitter))
+
+    def sample_error(self) -> Optional[int]:
+        """An error status for this request, or None"""
+        if self.error_rate and self._rng.random() < self.error_rate:
+            return self.error_status
+        return None
+
+    def describe(self) -> Dict:
+        return {"latency": self.latency, "jitter": self.jitter, "error_rate": self.error_rate, "error_status": self.error_status}
@@ -0,0 +1,56 @@
+# Minimal stand-in for the OpenAI chat completions endpoint so benchmarks can
+# exercise LLMService without network access. Point OPENAI_API_BASE at
+# `<url>/v1`; every request gets the same canned answer after `latency`
+# seconds, or after a delay drawn from `profile` (and maybe an error).
+
+import asyncio
+from collections import Counter
+
+from aiohttp import web
+
+from benchmarks.common import UpstreamProfile
+
+
+class FakeOpenAI:
+    def __init__(self, latency: float = 0.0, reply: str = "Customer needs help with billing; please take over.",
+                 profile: UpstreamProfile = None):
+        self.profile = profile or UpstreamProfile(latency)
+        self.reply = reply
+        self.calls = Counter()
+        self.errors = 0
+        self._runner = None
+        self.url = None
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self._chat_completions)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def _chat_completions(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        self.calls[body.get("model", "")] += 1
+        delay = self.profile.sample_latency()
+        if delay:
+            await asyncio.sleep(delay)
+        status = self.profile.sample_error()
+        if status:
+            self.errors += 1
+            return web.json_response({"error": {"message": "injected fault", "type": "server_error"}}, status=status)
+        return web.json_response({
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body.get("model", ""),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": self.reply}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        })
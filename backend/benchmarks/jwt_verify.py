@@ -0,0 +1,101 @@
+# Access token verification cost: HS256 against EdDSA (and RS256).
+#
+# For each algorithm, builds a key set with one key (utils/jwt_keys.py) and
+# times verifying a token:
+#   - parsed:   the key set's pre-parsed key, what decode_access_token does
+#               on a token cache miss
+#   - reparsed: the key rebuilt from its JWK on every verify, what a
+#               verifier that doesn't keep parsed keys pays
+#   - cached:   decode_access_token with the token already in its cache
+# EdDSA and RS256 need the 'cryptography' package; without it only HS256
+# runs.
+#
+#   python -m benchmarks.jwt_verify
+#   python -m benchmarks.jwt_verify --algorithms HS256 EdDSA --verifies 50000 --output jwt.json
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+
+import jwt
+
+from app.config import settings
+from utils import auth
+from utils.jwt_keys import KeySet, generate_jwk
+from benchmarks.common import percentile, write_results
+
+
+def timed(fn, verifies: int):
+    fn()  # warm up
+    latencies = []
+    for _ in range(verifies):
+        started = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - started)
+    total = sum(latencies)
+    return {
+        "verifies_per_s": round(verifies / total, 1),
+        "mean_us": round(statistics.fmean(latencies) * 1e6, 2),
+        "p50_us": round(percentile(latencies, 50) * 1e6, 2),
+        "p99_us": round(percentile(latencies, 99) * 1e6, 2),
+    }
+
+
+def measure(algorithm: str, verifies: int, tmp: str):
+    jwk = generate_jwk(algorithm, "bench")
+    key_set = KeySet.from_jwks({"active_kid": "bench", "keys": [jwk]})
+    kid, _, signing_key = key_set.signing_key()
+    token = jwt.encode({"sub": "agent1", "exp": int(time.time()) + 3600}, signing_key, algorithm=algorithm, headers={"kid": kid})
+    _, verification_key = key_set.verification_key(kid)
+
+    def reparsed():
+        jwt.decode(token, jwt.PyJWK(jwk, algorithm=algorithm).key, algorithms=[algorithm])
+
+    # decode_access_token against a key file holding this key
+    path = f"{tmp}/{algorithm}.json"
+    with open(path, "w") as f:
+        json.dump({"active_kid": "bench", "keys": [jwk]}, f)
+    settings.JWT_KEYS_FILE = path
+    auth.clear_token_cache()
+
+    return {
+        "algorithm": algorithm,
+        "parsed": timed(lambda: jwt.decode(token, verification_key, algorithms=[algorithm]), verifies),
+        "reparsed": timed(reparsed, verifies),
+        "cached": timed(lambda: auth.decode_access_token(token), verifies),
+    }
+
+
+def main(args):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for algorithm in args.algorithms:
+            try:
+                result = measure(algorithm, args.verifies, tmp)
+            except RuntimeError as e:
+                print(f"{algorithm:<6} skipped: {e}", file=sys.stderr)
+                continue
+            results.append(result)
+            print(f"{algorithm:<6} " + " | ".join(
+                f"{path} {result[path]['verifies_per_s']:>10}/s p50 {result[path]['p50_us']:>7} us"
+                for path in ("parsed", "reparsed", "cached")
+            ), file=sys.stderr)
+    settings.JWT_KEYS_FILE = ""
+    auth.clear_token_cache()
+
+    write_results(args.output, "jwt_verify", results, params={"verifies": args.verifies})
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Access token verification cost by algorithm")
+    parser.add_argument("--algorithms", nargs="+", default=["HS256", "EdDSA", "RS256"])
+    parser.add_argument("--verifies", type=int, default=20000, help="timed verifies per path")
+    parser.add_argument("--output", default="-", help="JSON results file ('-' for stdout)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    main(parse_args())
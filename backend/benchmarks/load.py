@@ -0,0 +1,426 @@
+# End-to-end load harness: the real API process against local stand-ins for
+# LiveKit (test/livekit_stub.py) and OpenAI (benchmarks/fake_openai.py), with
+# configurable latency and error rates for both.
+#
+# Each scenario gets a fresh, seeded database (agents, a history of completed
+# calls and transfers, active calls ready to transfer) and a fresh server:
+#   - inbound_burst:     calls created all at once, each then accepted
+#                        (create, then status -> active)
+#   - transfer_storm:    warm transfers initiated for every active call, each
+#                        completed as soon as it is up
+#   - dashboard_polling: a fleet of dashboards polling the listings with
+#                        If-None-Match, as the frontend does
+#   - mixed:             the polling fleet running through a burst and a storm
+# and reports throughput and p50/p95/p99 latency per endpoint, plus the
+# server's most expensive statements (from the admin query profile).
+#
+#   python -m benchmarks.load
+#   python -m benchmarks.load --scenarios transfer_storm --transfers 500 --llm-latency 0.3 --jitter 0.5
+#   python -m benchmarks.load --livekit-error-rate 0.02 --llm-error-rate 0.05
+#   python -m benchmarks.load --save-baseline load-baseline.json
+#   python -m benchmarks.load --baseline load-baseline.json --tolerance 0.25
+#
+# With --baseline the run exits non-zero when an endpoint's p50 or p95 grew,
+# its throughput fell or its error rate rose beyond the tolerance, so CI can
+# gate on it. Baselines are machine specific: record them where they are
+# checked. A --database-url is used as given (point it at a scratch
+# database); every scenario adds its seed to it.
+#
+# Keep the requests in flight at once (--concurrency, plus the polls that
+# overlap) within each worker's database pool (DATABASE_POOL_SIZE plus
+# DATABASE_MAX_OVERFLOW): the async routes check sessions out on the event
+# loop, and a request waiting for a connection stalls the ones that would
+# return theirs.
+
+import argparse
+import asyncio
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+from sqlalchemy import create_engine
+
+from app.database import Base, Agent, Call, Transfer
+from benchmarks.common import UpstreamProfile, summarize, write_results
+from benchmarks.fake_openai import FakeOpenAI
+from benchmarks.workers import BACKEND_DIR, free_port, server_env, wait_until_ready
+from test.livekit_stub import LiveKitStub
+
+SCENARIOS = ["inbound_burst", "transfer_storm", "dashboard_polling", "mixed"]
+ADMIN_KEY = "load-harness"
+MIN_REGRESSION_MS = 2.0  # latency changes smaller than this are noise, whatever the ratio
+
+
+# --- measurement ------------------------------------------------------
+
+class EndpointStats:
+    """Latency, errors and status codes per endpoint template"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+
+    def record(self, endpoint: str, elapsed: float, status: Optional[int], ok: bool):
+        self.statuses[endpoint][str(status) if status else "transport_error"] += 1
+        if ok:
+            self.latencies[endpoint].append(elapsed)
+        else:
+            self.errors[endpoint] += 1
+
+    def summary(self, elapsed: float) -> Dict:
+        endpoints = {}
+        for endpoint in sorted(set(self.latencies) | set(self.errors)):
+            endpoints[endpoint] = {
+                **summarize(self.latencies[endpoint], self.errors[endpoint], elapsed),
+                "statuses": dict(self.statuses[endpoint]),
+            }
+        return endpoints
+
+
+class LoadClient:
+    def __init__(self, client: httpx.AsyncClient, stats: EndpointStats):
+        self.client = client
+        self.stats = stats
+
+    async def request(self, endpoint: str, method: str, url: str, ok=(200,), **kwargs) -> Optional[httpx.Response]:
+        """One timed request, recorded under `endpoint` (the route template)"""
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.TransportError:
+            self.stats.record(endpoint, time.perf_counter() - started, None, False)
+            return None
+        self.stats.record(endpoint, time.perf_counter() - started, response.status_code, response.status_code in ok)
+        return response
+
+
+async def bounded(tasks, concurrency: int):
+    """Run coroutine factories with at most `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(task):
+        async with semaphore:
+            await task()
+
+    await asyncio.gather(*(one(task) for task in tasks))
+
+
+# --- seeded database --------------------------------------------------
+
+def seed_database(database_url: str, args, rng: random.Random) -> Dict:
+    """Agents, call/transfer history and active calls; returns the active (call, agent) pairs"""
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    run = uuid.UUID(int=rng.getrandbits(128)).hex[:8]
+    now = datetime.utcnow()
+
+    def new_id():
+        return str(uuid.UUID(int=rng.getrandbits(128)))
+
+    # available agents: taken by inbound calls and as transfer targets
+    available = [new_id() for _ in range(args.burst + args.transfers + args.agents)]
+    busy = [new_id() for _ in range(args.transfers)]
+    agents = [
+        {"id": agent_id, "name": f"Agent {i}", "email": f"agent{i}-{run}@load.example.com",
+         "skills": ["billing", "support"], "status": "available"}
+        for i, agent_id in enumerate(available)
+    ] + [
+        {"id": agent_id, "name": f"Busy {i}", "email": f"busy{i}-{run}@load.example.com",
+         "skills": ["support"], "status": "busy", "current_room_id": f"call_active_{run}_{i}"}
+        for i, agent_id in enumerate(busy)
+    ]
+
+    history, transfers = [], []
+    for i in range(args.history):
+        started = now - timedelta(minutes=i)
+        call_id, agent_a = new_id(), rng.choice(available)
+        transferred = rng.random() < 0.2
+        agent_b = rng.choice(available) if transferred else None
+        history.append({
+            "id": call_id, "room_id": f"call_hist_{run}_{i}", "caller_name": f"Caller {i}",
+            "status": "completed", "priority": rng.choice(["low", "normal", "high"]), "agent_a_id": agent_a,
+            "agent_b_id": agent_b, "transcript": "Customer: my bill is wrong. Agent: let me check.",
+            "created_at": started, "started_at": started, "ended_at": started + timedelta(minutes=5),
+            "duration_seconds": 300,
+        })
+        if transferred:
+            transfers.append({
+                "id": new_id(), "call_id": call_id, "from_agent_id": agent_a, "to_agent_id": agent_b,
+                "status": "completed", "reason": "billing", "initiated_at": started + timedelta(minutes=2),
+                "completed_at": started + timedelta(minutes=3), "duration_seconds": 60,
+            })
+
+    active = []
+    for i, agent_id in enumerate(busy):
+        active.append({
+            "id": new_id(), "room_id": f"call_active_{run}_{i}", "caller_name": f"Active {i}",
+            "status": "active", "priority": "normal", "agent_a_id": agent_id,
+            "transcript": "Customer: I need to change my plan.", "created_at": now, "started_at": now,
+            "duration_seconds": 0,
+        })
+
+    with engine.begin() as conn:
+        conn.execute(Agent.__table__.insert(), agents)
+        for table, rows in ((Call.__table__, history), (Call.__table__, active), (Transfer.__table__, transfers)):
+            for offset in range(0, len(rows), 5000):
+                if rows[offset:offset + 5000]:
+                    conn.execute(table.insert(), rows[offset:offset + 5000])
+    engine.dispose()
+    return {"pairs": [(call["id"], call["agent_a_id"]) for call in active]}
+
+
+# --- scenarios --------------------------------------------------------
+
+async def inbound_burst(load: LoadClient, seed: Dict, args):
+    async def call_flow(i):
+        response = await load.request("POST /routers/calls/create", "POST", "/routers/calls/create", json={
+            "caller_name": f"Inbound {i}", "call_reason": "billing", "assign_agent": True
+        })
+        if response is not None and response.status_code == 200:
+            call_id = response.json()["id"]
+            await load.request("PUT /routers/calls/{call_id}/status", "PUT", f"/routers/calls/{call_id}/status",
+                               json={"status": "active"})
+
+    await bounded([lambda i=i: call_flow(i) for i in range(args.burst)], args.concurrency)
+
+
+async def transfer_storm(load: LoadClient, seed: Dict, args):
+    # targets: whoever is still available when the storm starts
+    targets, cursor = [], None
+    while len(targets) < len(seed["pairs"]):
+        params = {"status": "available", "limit": 500, **({"cursor": cursor} if cursor else {})}
+        response = await load.client.get("/routers/agents/", params=params)
+        response.raise_for_status()
+        targets.extend(agent["id"] for agent in response.json())
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+
+    async def transfer_flow(call_id, from_agent_id, to_agent_id):
+        response = await load.request("POST /routers/transfer/initiate", "POST", "/routers/transfer/initiate", json={
+            "call_id": call_id, "from_agent_id": from_agent_id, "to_agent_id": to_agent_id, "reason": "billing"
+        })
+        if response is not None and response.status_code == 200:
+            transfer_id = response.json()["transfer_id"]
+            await load.request("POST /routers/transfer/{transfer_id}/complete", "POST",
+                               f"/routers/transfer/{transfer_id}/complete")
+
+    flows = [
+        lambda pair=pair, target=target: transfer_flow(pair[0], pair[1], target)
+        for pair, target in zip(seed["pairs"], targets)
+    ]
+    await bounded(flows, args.concurrency)
+
+
+POLLED = [
+    ("GET /routers/calls/", "/routers/calls/", {"status": "active", "limit": 50}),
+    ("GET /routers/transfer/agents/available", "/routers/transfer/agents/available", {}),
+    ("GET /routers/transfer/active", "/routers/transfer/active", {}),
+    ("GET /routers/agents/", "/routers/agents/", {"status": "available", "limit": 50}),
+]
+
+
+async def dashboard_polling(load: LoadClient, seed: Dict, args, stop: asyncio.Event = None):
+    stop = stop or asyncio.Event()
+
+    async def dashboard(index: int):
+        etags: Dict[str, str] = {}
+        # dashboards don't start in lockstep
+        await asyncio.sleep(args.poll_interval * index / max(1, args.pollers))
+        while not stop.is_set():
+            for endpoint, url, params in POLLED:
+                headers = {"If-None-Match": etags[endpoint]} if endpoint in etags else {}
+                response = await load.request(endpoint, "GET", url, ok=(200, 304), params=params, headers=headers)
+                if response is not None and response.headers.get("etag"):
+                    etags[endpoint] = response.headers["etag"]
+            try:
+                await asyncio.wait_for(stop.wait(), args.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def stop_after_duration():
+        try:
+            await asyncio.wait_for(stop.wait(), args.duration)
+        except asyncio.TimeoutError:
+            stop.set()
+
+    tasks = [asyncio.create_task(dashboard(i)) for i in range(args.pollers)]
+    if not stop.is_set():
+        tasks.append(asyncio.create_task(stop_after_duration()))
+    await asyncio.gather(*tasks)
+
+
+async def mixed(load: LoadClient, seed: Dict, args):
+    stop = asyncio.Event()
+    polling = asyncio.create_task(dashboard_polling(load, seed, args, stop))
+    try:
+        await inbound_burst(load, seed, args)
+        await transfer_storm(load, seed, args)
+    finally:
+        stop.set()
+        await polling
+
+
+# --- running ----------------------------------------------------------
+
+async def top_statements(client: httpx.AsyncClient, limit: int = 5) -> Dict:
+    try:
+        response = await client.get("/routers/admin/queries", params={"limit": limit}, headers={"X-Admin-Key": ADMIN_KEY})
+    except httpx.TransportError:
+        return {}
+    if response.status_code != 200:
+        return {}
+    report = response.json()
+    return {
+        "statements": [
+            {key: s[key] for key in ("shape", "calls", "mean_ms", "max_ms", "total_ms")} for s in report["statements"]
+        ],
+        "slow_queries": len(report["slow_queries"]),
+        "n_plus_one": [{key: n[key] for key in ("route", "count", "shape")} for n in report["n_plus_one"]],
+    }
+
+
+async def run_scenario(name: str, args, livekit_url: str, openai_url: str, env: Dict = None) -> Dict:
+    """One scenario against a fresh server and database; env overrides the server's settings"""
+    rng = random.Random(args.seed)
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{tmp}/load.db"
+        seed = seed_database(database_url, args, rng)
+        server = server_env(args.workers, port, database_url, livekit_url, openai_url, args.store)
+        server.update({"ADMIN_API_KEY": ADMIN_KEY, "LOG_LEVEL": "WARNING", **(env or {})})
+        log = open(Path(tmp) / "server.log", "w")
+        proc = subprocess.Popen([sys.executable, "-m", "app.main"], cwd=BACKEND_DIR, env=server, stdout=log, stderr=subprocess.STDOUT)
+        try:
+            limits = httpx.Limits(max_connections=args.concurrency + args.pollers, max_keepalive_connections=args.concurrency + args.pollers)
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=args.timeout) as client:
+                await wait_until_ready(client, proc)
+                stats = EndpointStats()
+                started = time.perf_counter()
+                await globals()[name](LoadClient(client, stats), seed, args)
+                elapsed = time.perf_counter() - started
+                database = await top_statements(client)
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+            log.close()
+    return {"scenario": name, "elapsed_s": round(elapsed, 3), "endpoints": stats.summary(elapsed), "database": database}
+
+
+def compare(results: List[Dict], baseline: Dict, tolerance: float) -> List[str]:
+    """Regressions of results against a baseline document, as readable lines"""
+    before = {
+        (result["scenario"], endpoint): stats
+        for result in baseline.get("results", [])
+        for endpoint, stats in result["endpoints"].items()
+    }
+    regressions = []
+    for result in results:
+        for endpoint, stats in result["endpoints"].items():
+            old = before.get((result["scenario"], endpoint))
+            if old is None:
+                continue
+            where = f"{result['scenario']} {endpoint}"
+            for metric in ("p50_ms", "p95_ms"):
+                if stats[metric] > old[metric] * (1 + tolerance) and stats[metric] - old[metric] > MIN_REGRESSION_MS:
+                    regressions.append(f"{where}: {metric} {old[metric]} -> {stats[metric]}")
+            if old.get("throughput_rps") and stats.get("throughput_rps", 0) < old["throughput_rps"] * (1 - tolerance):
+                regressions.append(f"{where}: throughput {old['throughput_rps']} -> {stats.get('throughput_rps', 0)} req/s")
+            old_rate = old["errors"] / max(1, old["requests"])
+            rate = stats["errors"] / max(1, stats["requests"])
+            if rate > old_rate + max(0.01, old_rate * tolerance):
+                regressions.append(f"{where}: error rate {old_rate:.3f} -> {rate:.3f}")
+    return regressions
+
+
+async def run(args) -> List[Dict]:
+    livekit = LiveKitStub(profile=UpstreamProfile(args.livekit_latency, args.jitter, args.livekit_error_rate, seed=args.seed))
+    openai = FakeOpenAI(profile=UpstreamProfile(args.llm_latency, args.jitter, args.llm_error_rate, seed=args.seed))
+    livekit_url = await livekit.start()
+    openai_url = await openai.start()
+    results = []
+    try:
+        for name in args.scenarios:
+            result = await run_scenario(name, args, livekit_url, openai_url)
+            results.append(result)
+            print(f"{name} ({result['elapsed_s']}s)", file=sys.stderr)
+            for endpoint, stats in result["endpoints"].items():
+                print(
+                    f"  {endpoint:<46} {stats['requests']:>6} req {stats.get('throughput_rps', 0):>8} req/s  "
+                    f"p50 {stats['p50_ms']:>8}  p95 {stats['p95_ms']:>8}  p99 {stats['p99_ms']:>8} ms  errors {stats['errors']}",
+                    file=sys.stderr
+                )
+    finally:
+        await livekit.stop()
+        await openai.stop()
+    return results
+
+
+def main(args) -> int:
+    results = asyncio.run(run(args))
+    params = {
+        "scenarios": args.scenarios, "workers": args.workers, "store": args.store, "concurrency": args.concurrency,
+        "burst": args.burst, "transfers": args.transfers, "pollers": args.pollers, "duration": args.duration,
+        "poll_interval": args.poll_interval, "agents": args.agents, "history": args.history, "seed": args.seed,
+        "database": "sqlite" if not args.database_url else args.database_url.split(":")[0],
+        "livekit": UpstreamProfile(args.livekit_latency, args.jitter, args.livekit_error_rate).describe(),
+        "openai": UpstreamProfile(args.llm_latency, args.jitter, args.llm_error_rate).describe(),
+    }
+    write_results(args.output, "load", results, params=params)
+    if args.save_baseline:
+        write_results(args.save_baseline, "load", results, params=params)
+
+    if args.baseline:
+        import json
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"no regressions against {args.baseline} (tolerance {args.tolerance:.0%})", file=sys.stderr)
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end load scenarios against fake LiveKit and OpenAI")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--workers", type=int, default=1, help="API worker processes")
+    parser.add_argument("--store", default="database", choices=["database", "redis"])
+    parser.add_argument("--database-url", default=None, help="defaults to a fresh SQLite file per scenario")
+    parser.add_argument("--concurrency", type=int, default=12, help="in-flight call and transfer flows")
+    parser.add_argument("--burst", type=int, default=300, help="inbound calls per burst")
+    parser.add_argument("--transfers", type=int, default=100, help="active calls seeded for the transfer storm")
+    parser.add_argument("--pollers", type=int, default=50, help="dashboards in the polling fleet")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds the polling scenario runs")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="seconds between a dashboard's polls")
+    parser.add_argument("--agents", type=int, default=100, help="spare available agents on top of those the scenarios use")
+    parser.add_argument("--history", type=int, default=5000, help="completed calls seeded (20%% transferred)")
+    parser.add_argument("--livekit-latency", type=float, default=0.005, help="median seconds per LiveKit call")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="median seconds per OpenAI request")
+    parser.add_argument("--jitter", type=float, default=0.3, help="lognormal sigma of upstream latency, 0 for fixed")
+    parser.add_argument("--livekit-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds before a request counts as failed")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="-", help="JSON results file ('-' for stdout)")
+    parser.add_argument("--save-baseline", default=None, help="also write the results here as the new baseline")
+    parser.add_argument("--baseline", default=None, help="fail on regressions against this results file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative change before it counts as a regression")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
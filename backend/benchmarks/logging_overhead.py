@@ -0,0 +1,165 @@
+# Request throughput with logging off and on (utils/logging_config.py).
+#
+# Drives GET /routers/agents/{id} (one SELECT) in-process against a SQLite
+# file, with an access log line per request the way uvicorn writes one,
+# under each logging setup:
+#   - off:       WARNING and above only, no statement logging
+#   - sync_echo: the old setup - a plain StreamHandler on the root logger and
+#                SQLAlchemy's statement logging (echo), every line written by
+#                the request itself
+#   - pipeline:  JSON lines through the queue, DATABASE_ECHO on, everything kept
+#   - sampled:   the pipeline keeping 10% of access and statement lines
+# Log output goes to a file in a temporary directory, as it would in a
+# container writing to a mounted volume.
+#
+#   python -m benchmarks.logging_overhead
+#   python -m benchmarks.logging_overhead --requests 5000 --concurrency 32 --output logging.json
+
+import argparse
+import asyncio
+import logging
+import sys
+import tempfile
+import uuid
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database import Base, Agent, get_db, get_read_db
+from app.main import app
+from utils.logging_config import configure_logging, stop_logging
+from benchmarks.common import drive, write_results
+
+access_logger = logging.getLogger("uvicorn.access")
+
+
+def with_access_log(asgi_app):
+    async def logged(scope, receive, send):
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        await asgi_app(scope, receive, send_wrapper)
+        access_logger.info('%s - "%s %s HTTP/1.1" %d', "127.0.0.1:5000", scope["method"], scope["path"], status)
+    return logged
+
+
+def configure(mode: str, log_file):
+    stop_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    # what echo=True does, without the extra console handler it also adds
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+    settings.DATABASE_ECHO = False
+    settings.DATABASE_SLOW_QUERY_MS = 0
+
+    if mode == "off":
+        configure_logging(level="WARNING", log_format="json", sampling={}, stream=log_file)
+    elif mode == "sync_echo":
+        handler = logging.StreamHandler(log_file)
+        handler.setFormatter(logging.Formatter("%(levelname)s:%(name)s:%(message)s"))
+        root.addHandler(handler)
+        root.setLevel(logging.INFO)
+        logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO)
+    elif mode == "pipeline":
+        configure_logging(level="INFO", log_format="json", sampling={}, stream=log_file)
+        settings.DATABASE_ECHO = True
+    elif mode == "sampled":
+        configure_logging(level="INFO", log_format="json", sampling={"uvicorn.access": 0.1, "sql": 0.1}, stream=log_file)
+        settings.DATABASE_ECHO = True
+
+
+async def run(mode: str, agent_ids, args, log_file):
+    configure(mode, log_file)
+    transport = httpx.ASGITransport(app=with_access_log(app))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def get(agent_id):
+            return (await client.get(f"/routers/agents/{agent_id}")).status_code == 200
+
+        await drive([lambda a=a: get(a) for a in agent_ids[:50]], args.concurrency)  # warm up
+        result = await drive(
+            [lambda i=i: get(agent_ids[i % len(agent_ids)]) for i in range(args.requests)],
+            args.concurrency
+        )
+    stop_logging()
+    log_file.flush()
+    return result
+
+
+def main(args):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # async routes check connections out on the event loop: a pool smaller
+        # than the concurrency would stall it waiting for sessions to close
+        engine = create_engine(f"sqlite:///{tmp}/logging.db", connect_args={"check_same_thread": False},
+                               pool_size=args.concurrency + 4)
+        Base.metadata.create_all(bind=engine)
+        agent_ids = [str(uuid.uuid4()) for _ in range(200)]
+        with engine.begin() as conn:
+            conn.execute(Agent.__table__.insert(), [
+                {"id": agent_id, "name": f"Agent {i}", "email": f"agent{i}@bench.example.com"}
+                for i, agent_id in enumerate(agent_ids)
+            ])
+        session_factory = sessionmaker(bind=engine)
+
+        def bench_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = bench_db
+        app.dependency_overrides[get_read_db] = bench_db
+        try:
+            # modes take turns, round by round, so drift hits them all alike;
+            # each mode reports its median round by throughput
+            rounds = {mode: [] for mode in args.modes}
+            for _ in range(args.rounds):
+                for mode in args.modes:
+                    with open(f"{tmp}/{mode}.log", "w") as log_file:
+                        result = asyncio.run(run(mode, agent_ids, args, log_file))
+                    with open(f"{tmp}/{mode}.log") as log_file:
+                        result["log_lines"] = sum(1 for _ in log_file)
+                    rounds[mode].append(result)
+            for mode in args.modes:
+                result = sorted(rounds[mode], key=lambda r: r["throughput_rps"])[len(rounds[mode]) // 2]
+                results.append({"mode": mode, **result})
+                print(
+                    f"{mode:<10} {result['throughput_rps']:>8} req/s  p50 {result['p50_ms']:>7} ms  "
+                    f"p99 {result['p99_ms']:>7} ms  {result['log_lines']} lines",
+                    file=sys.stderr
+                )
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+            app.dependency_overrides.pop(get_read_db, None)
+            engine.dispose()
+            logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+            configure_logging()
+
+    write_results(args.output, "logging_overhead", results, params={
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "rounds": args.rounds,
+    })
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Request throughput with logging off and on")
+    parser.add_argument("--modes", nargs="+", default=["off", "sync_echo", "pipeline", "sampled"])
+    parser.add_argument("--requests", type=int, default=3000, help="timed requests per round")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=3, help="runs per mode; the median is reported")
+    parser.add_argument("--output", default="-", help="JSON results file ('-' for stdout)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    main(parse_args())
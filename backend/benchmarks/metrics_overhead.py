@@ -0,0 +1,98 @@
+# What the metrics subsystem (utils/metrics.py) adds to the hot path.
+#
+# Times, per operation:
+#   - observe:    one histogram observation on an existing series
+#   - middleware: a request through MetricsMiddleware around an app that
+#                 answers immediately, against the bare app
+#   - statement:  a SQLite SELECT 1 with the statement listeners in place
+#                 (they are registered on every Engine once utils.metrics is
+#                 imported, so there is no unlistened baseline here)
+#   - render:     one /metrics scrape body with the series recorded above
+#
+#   python -m benchmarks.metrics_overhead
+#   python -m benchmarks.metrics_overhead --iterations 100000 --output metrics.json
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+from sqlalchemy import create_engine, text
+
+from utils.metrics import REGISTRY, HTTP_REQUEST_DURATION, MetricsMiddleware
+from benchmarks.common import percentile, write_results
+
+
+def micro_summary(latencies):
+    return {
+        "mean_us": round(statistics.fmean(latencies) * 1e6, 2),
+        "p50_us": round(percentile(latencies, 50) * 1e6, 2),
+        "p99_us": round(percentile(latencies, 99) * 1e6, 2),
+    }
+
+
+def timed(fn, iterations: int):
+    fn()  # warm up
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - started)
+    return micro_summary(latencies)
+
+
+async def bare_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def timed_requests(app, iterations: int):
+    scope = {"type": "http", "method": "GET", "path": "/bench"}
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    await app(dict(scope), receive, send)  # warm up
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await app(dict(scope), receive, send)
+        latencies.append(time.perf_counter() - started)
+    return micro_summary(latencies)
+
+
+def main(args):
+    results = {}
+    child = HTTP_REQUEST_DURATION.labels("GET", "/bench", 200)
+    results["observe"] = timed(lambda: child.observe(0.004), args.iterations)
+
+    results["bare_request"] = asyncio.run(timed_requests(bare_app, args.iterations))
+    results["middleware_request"] = asyncio.run(timed_requests(MetricsMiddleware(bare_app), args.iterations))
+
+    engine = create_engine("sqlite://")
+    with engine.connect() as conn:
+        statement = text("SELECT 1")
+        results["statement"] = timed(lambda: conn.execute(statement).scalar(), args.iterations)
+    engine.dispose()
+
+    results["render"] = timed(REGISTRY.render, max(1, args.iterations // 100))
+
+    for name, timing in results.items():
+        print(f"{name:<18} p50 {timing['p50_us']:>8} us  p99 {timing['p99_us']:>8} us", file=sys.stderr)
+    write_results(args.output, "metrics_overhead", [{"operation": name, **timing} for name, timing in results.items()],
+                  params={"iterations": args.iterations})
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Hot-path cost of the metrics subsystem")
+    parser.add_argument("--iterations", type=int, default=20000, help="timed iterations per operation")
+    parser.add_argument("--output", default="-", help="JSON results file ('-' for stdout)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    main(parse_args())
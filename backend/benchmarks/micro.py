@@ -0,0 +1,377 @@
+# Microbenchmarks for the service-layer hot paths, one case each, timed the
+# way pytest-benchmark does: a case is warmed up, calibrated to enough
+# iterations per round that one round takes --min-time, then run for
+# --rounds rounds; min/max/mean/stddev/median/iqr and ops are per call.
+#
+# Cases run against an in-memory SQLite database seeded at production-like
+# volumes (--agents, --calls: a history of completed calls, active calls
+# for a third of the agents, recent and stale waiting calls):
+#   - livekit.generate_access_token
+#   - llm.create_summary_prompt            (a transcript of --turns turns)
+#   - transfer.validate_transfer_conditions
+#   - transfer.get_agent_availability      (fresh session per call)
+#   - calls.list_waiting                   list_calls' waiting filter and
+#                                          response, as with DEBUG (the
+#                                          production presence check is a
+#                                          LiveKit call per row)
+#   - serialize.<Model>                    each response model through the
+#                                          path its route uses
+#
+#   python -m benchmarks.micro
+#   python -m benchmarks.micro -k serialize --rounds 50
+#   python -m benchmarks.micro --output micro.json
+#   python -m benchmarks.micro --compare micro.json --tolerance 0.2
+#
+# --compare exits non-zero when a case's median is slower than in the given
+# results file by more than the tolerance.
+
+import argparse
+import json
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base, Agent, Call, Transfer, CALL_LIST_COLUMNS, AGENT_LIST_COLUMNS, list_calls_page
+from models.agent import AgentResponse, AgentListResponse
+from models.call import CallResponse, JoinCallResponse, callListResponse
+from models.room import BulkRoomResponse
+from models.transfer import TransferResponse, TransferStatusResponse, AgentAvailabilityResponse
+from services.livekit_service import livekit_service
+from services.llm_service import llm_service
+from services.transfer_service import transfer_service
+from utils.serialization import model_response, rows_response
+from benchmarks.common import write_results
+
+CASES: Dict[str, Callable] = {}
+
+
+def case(name: str):
+    """Register a case: a function taking the seeded Data and returning the callable to time"""
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+def run_sync(coroutine):
+    # The service coroutines measured here never suspend (the sessions are
+    # sync), so they are driven by hand: an event loop per call would cost
+    # more than most of them.
+    try:
+        coroutine.send(None)
+    except StopIteration as done:
+        return done.value
+    coroutine.close()
+    raise RuntimeError("coroutine suspended; it can't be timed without an event loop")
+
+
+# --- data -------------------------------------------------------------
+
+class Data:
+    def __init__(self, args):
+        self.engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        self.transcript = "\n".join(
+            f"{'Customer' if i % 2 else 'Agent'}: " + "I was charged twice for the same order last month, " * 3
+            for i in range(args.turns)
+        )
+        self._seed(args)
+        self.db = self.Session()
+
+    def _seed(self, args):
+        now = datetime.utcnow()
+        agents = [
+            {"id": str(uuid.uuid4()), "name": f"Agent {i:05d}", "email": f"agent{i}@bench.example.com",
+             "skills": ["billing", "support"], "status": "available" if i % 3 else "busy", "max_concurrent_calls": 3}
+            for i in range(args.agents)
+        ]
+        calls, transfers = [], []
+        for i in range(args.calls):
+            agent = agents[i % len(agents)]
+            started = now - timedelta(hours=1, minutes=i)
+            calls.append({
+                "id": str(uuid.uuid4()), "room_id": f"call_{i}", "caller_name": f"Caller {i}",
+                "caller_phone": "+15550100", "call_reason": "Billing question", "status": "completed",
+                "priority": "normal", "agent_a_id": agent["id"], "agent_b_id": None, "created_at": started,
+                "started_at": started, "ended_at": started + timedelta(minutes=5), "duration_seconds": 300,
+                "transcript": self.transcript, "summary": "Double charge on the last order.",
+            })
+            if i % 5 == 0:
+                transfers.append({
+                    "id": str(uuid.uuid4()), "call_id": calls[-1]["id"], "from_agent_id": agent["id"],
+                    "to_agent_id": agents[(i + 1) % len(agents)]["id"], "status": "completed",
+                    "reason": "billing", "initiated_at": started + timedelta(minutes=2),
+                    "completed_at": started + timedelta(minutes=3), "duration_seconds": 60,
+                })
+        # every third agent is busy on an active call; some available agents have one too
+        for i, agent in enumerate(agents[::3] + agents[1::9]):
+            calls.append({
+                "id": str(uuid.uuid4()), "room_id": f"call_active_{i}", "caller_name": f"Active {i}",
+                "caller_phone": "+15550100", "call_reason": "Plan change", "status": "active",
+                "priority": "normal", "agent_a_id": agent["id"], "agent_b_id": None, "created_at": now,
+                "started_at": now, "ended_at": None, "duration_seconds": 0,
+                "transcript": self.transcript, "summary": None,
+            })
+        for i in range(args.waiting):
+            # half within the ten-minute window the filter keeps, half stale
+            created = now - timedelta(seconds=i * 1200 // args.waiting)
+            calls.append({
+                "id": str(uuid.uuid4()), "room_id": f"call_waiting_{i}", "caller_name": f"Waiting {i}",
+                "caller_phone": "+15550100", "call_reason": "New order", "status": "waiting",
+                "priority": "high" if i % 4 == 0 else "normal", "agent_a_id": None, "agent_b_id": None,
+                "created_at": created, "started_at": None, "ended_at": None, "duration_seconds": 0,
+                "transcript": None, "summary": None,
+            })
+        with self.engine.begin() as conn:
+            conn.execute(Agent.__table__.insert(), agents)
+            for offset in range(0, len(calls), 5000):
+                conn.execute(Call.__table__.insert(), calls[offset:offset + 5000])
+            if transfers:
+                conn.execute(Transfer.__table__.insert(), transfers)
+
+    def close(self):
+        self.db.close()
+        self.engine.dispose()
+
+
+# --- cases ------------------------------------------------------------
+
+@case("livekit.generate_access_token")
+def generate_access_token(data: Data):
+    return lambda: livekit_service.generate_access_token("call_bench", "agent_bench", "Agent Bench", metadata={"role": "agent"})
+
+
+@case("llm.create_summary_prompt")
+def create_summary_prompt(data: Data):
+    caller_info = {"name": "Jane Doe", "phone": "+15550100"}
+    return lambda: llm_service.create_summary_prompt(data.transcript, caller_info, 312, "Billing question")
+
+
+@case("transfer.validate_transfer_conditions")
+def validate_transfer_conditions(data: Data):
+    # the route's objects: an active call, its agent, an available target
+    call = data.db.query(Call).filter(Call.status == "active").first()
+    from_agent = data.db.get(Agent, call.agent_a_id)
+    to_agent = data.db.query(Agent).filter(Agent.status == "available").first()
+
+    def validate():
+        result = run_sync(transfer_service._validate_transfer_conditions(call, from_agent, to_agent, data.db))
+        assert result["valid"], result
+    return validate
+
+
+@case("transfer.get_agent_availability")
+def get_agent_availability(data: Data):
+    def availability():
+        db = data.Session()
+        try:
+            return run_sync(transfer_service.get_agent_availability(db))
+        finally:
+            db.close()
+    return availability
+
+
+@case("calls.list_waiting")
+def list_waiting(data: Data):
+    def waiting():
+        db = data.Session()
+        try:
+            rows, _ = list_calls_page(db, 50, status="waiting", created_since=datetime.utcnow() - timedelta(minutes=10))
+            return rows_response(callListResponse, rows)
+        finally:
+            db.close()
+    return waiting
+
+
+# Response models, each through its route's path: ORM objects validated by
+# model_response, list pages as projection rows through rows_response, and
+# the dict-built responses validated from dicts.
+
+def _transfer_dict(data: Data) -> Dict:
+    transfer = data.db.query(Transfer).first()
+    return {
+        "transfer_id": transfer.id, "status": transfer.status, "call_id": transfer.call_id,
+        "from_agent_id": transfer.from_agent_id, "to_agent_id": transfer.to_agent_id,
+        "initiated_at": transfer.initiated_at, "completed_at": transfer.completed_at,
+        "duration_seconds": transfer.duration_seconds, "transfer_room_id": "transfer_bench",
+        "summary": "Double charge on the last order.", "reason": transfer.reason,
+    }
+
+
+@case("serialize.AgentResponse")
+def serialize_agent(data: Data):
+    agent = data.db.query(Agent).first()
+    return lambda: model_response(AgentResponse, agent)
+
+
+@case("serialize.AgentListResponse[50]")
+def serialize_agent_list(data: Data):
+    rows = data.db.query(*AGENT_LIST_COLUMNS).filter(Agent.status == "available").limit(50).all()
+    return lambda: rows_response(AgentListResponse, rows)
+
+
+@case("serialize.CallResponse")
+def serialize_call(data: Data):
+    call = data.db.query(Call).filter(Call.status == "active").first()
+    return lambda: model_response(CallResponse, call)
+
+
+@case("serialize.callListResponse[50]")
+def serialize_call_list(data: Data):
+    rows = data.db.query(*CALL_LIST_COLUMNS).filter(Call.status == "completed").limit(50).all()
+    return lambda: rows_response(callListResponse, rows)
+
+
+@case("serialize.JoinCallResponse")
+def serialize_join_call(data: Data):
+    joined = {
+        "access_token": livekit_service.generate_access_token("call_bench", "agent_bench"),
+        "room_id": "call_bench",
+        "call_status": "active",
+    }
+    return lambda: model_response(JoinCallResponse, joined)
+
+
+@case("serialize.TransferResponse")
+def serialize_transfer(data: Data):
+    transfer = _transfer_dict(data)
+    return lambda: model_response(TransferResponse, transfer)
+
+
+@case("serialize.TransferStatusResponse")
+def serialize_transfer_status(data: Data):
+    transfer = _transfer_dict(data)
+    return lambda: model_response(TransferStatusResponse, transfer)
+
+
+@case("serialize.AgentAvailabilityResponse[all]")
+def serialize_availability(data: Data):
+    agents = run_sync(transfer_service.get_agent_availability(data.db))
+    return lambda: model_response(AgentAvailabilityResponse, agents, many=True)
+
+
+@case("serialize.BulkRoomResponse[50]")
+def serialize_bulk_rooms(data: Data):
+    bulk = {
+        "results": [
+            {"room_id": f"call_{i}", "success": True, "result": {"num_participants": 2, "active_recording": False}}
+            for i in range(50)
+        ],
+        "succeeded": 50,
+        "failed": 0,
+    }
+    return lambda: model_response(BulkRoomResponse, bulk)
+
+
+# --- runner -----------------------------------------------------------
+
+def calibrate(fn, min_time: float) -> int:
+    """Iterations per round so that a round takes at least min_time"""
+    iterations = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            return iterations
+        iterations = iterations * 10 if elapsed <= 0 else max(iterations + 1, int(iterations * min_time / elapsed * 1.2))
+
+
+def measure(fn, rounds: int, min_time: float, warmup: int) -> Dict:
+    for _ in range(warmup):
+        fn()
+    iterations = calibrate(fn, min_time)
+    times: List[float] = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        times.append((time.perf_counter() - started) / iterations)
+    quartiles = statistics.quantiles(times, n=4) if len(times) > 1 else [times[0]] * 3
+    mean = statistics.fmean(times)
+    # per call in microseconds; ops is calls per second
+    return {
+        "min_us": round(min(times) * 1e6, 3),
+        "max_us": round(max(times) * 1e6, 3),
+        "mean_us": round(mean * 1e6, 3),
+        "stddev_us": round(statistics.stdev(times) * 1e6, 3) if len(times) > 1 else 0.0,
+        "median_us": round(statistics.median(times) * 1e6, 3),
+        "iqr_us": round((quartiles[2] - quartiles[0]) * 1e6, 3),
+        "ops": round(1 / mean, 1),
+        "rounds": rounds,
+        "iterations": iterations,
+    }
+
+
+def compare(results: List[Dict], baseline: Dict, tolerance: float) -> List[str]:
+    before = {result["name"]: result for result in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        old = before.get(result["name"])
+        if old and result["median_us"] > old["median_us"] * (1 + tolerance):
+            regressions.append(f"{result['name']}: median {old['median_us']} -> {result['median_us']} us")
+    return regressions
+
+
+def main(args) -> int:
+    names = [name for name in CASES if not args.k or any(k in name for k in args.k)]
+    if not names:
+        print(f"no cases match {args.k}", file=sys.stderr)
+        return 2
+
+    data = Data(args)
+    results = []
+    try:
+        for name in names:
+            result = {"name": name, "group": name.split(".")[0], **measure(CASES[name](data), args.rounds, args.min_time, args.warmup)}
+            results.append(result)
+            print(
+                f"{name:<42} median {result['median_us']:>11} us  iqr {result['iqr_us']:>9}  "
+                f"min {result['min_us']:>11}  {result['ops']:>11} ops/s",
+                file=sys.stderr
+            )
+    finally:
+        data.close()
+
+    write_results(args.output, "micro", results, params={
+        "agents": args.agents, "calls": args.calls, "waiting": args.waiting, "turns": args.turns,
+        "rounds": args.rounds, "min_time": args.min_time, "warmup": args.warmup,
+    })
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the service-layer hot paths")
+    parser.add_argument("-k", action="append", help="only cases whose name contains this (repeatable)")
+    parser.add_argument("--agents", type=int, default=1000)
+    parser.add_argument("--calls", type=int, default=50000, help="completed calls in the history (a fifth transferred)")
+    parser.add_argument("--waiting", type=int, default=400, help="waiting calls, half of them stale")
+    parser.add_argument("--turns", type=int, default=60, help="transcript turns for the summary prompt")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--min-time", type=float, default=0.005, help="seconds one round takes at least")
+    parser.add_argument("--warmup", type=int, default=10, help="untimed calls before calibrating")
+    parser.add_argument("--output", default="-", help="JSON results file ('-' for stdout)")
+    parser.add_argument("--compare", default=None, help="fail if slower than this results file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown of a median")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
@@ -0,0 +1,151 @@
+# Page latency of the calls listing by depth: OFFSET vs keyset pagination.
+#
+# Fills a calls table (a million rows by default) and, for each depth, times
+# fetching one page that starts that many rows in:
+#   - offset: ORDER BY created_at DESC, id DESC LIMIT n OFFSET depth
+#   - keyset: list_calls_page() after the (created_at, id) key of the row
+#             just before that depth, which is what the API runs for a cursor
+# for the unfiltered listing and the status and agent filters. OFFSET
+# grows with depth; keyset should stay flat.
+#
+#   python -m benchmarks.pagination
+#   python -m benchmarks.pagination --rows 200000 --depths 0 1000 100000 --output pagination.json
+#   python -m benchmarks.pagination --database-url postgresql://localhost/bench_scratch
+#
+# SQLite gets a fresh file per run. A --database-url is used as given: point
+# it at a scratch database, the benchmark fills it with test data.
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, Agent, Call, CallStatus, PriorityLevel, list_calls_page
+from benchmarks.common import summarize, write_results
+
+AGENTS = 200
+BATCH_SIZE = 10000
+
+
+def fill(engine, rows: int, seed: int = 7):
+    """Insert `rows` calls spread over agents, statuses and priorities"""
+    rng = random.Random(seed)
+    agent_ids = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(AGENTS)]
+    statuses = [status.value for status in CallStatus]
+    priorities = [priority.value for priority in PriorityLevel]
+    started = datetime(2024, 1, 1)
+
+    with engine.begin() as conn:
+        conn.execute(Agent.__table__.insert(), [
+            {"id": agent_id, "name": f"Agent {i}", "email": f"agent{i}@bench.example.com"}
+            for i, agent_id in enumerate(agent_ids)
+        ])
+    for offset in range(0, rows, BATCH_SIZE):
+        batch = []
+        for i in range(offset, min(rows, offset + BATCH_SIZE)):
+            batch.append({
+                "id": str(uuid.UUID(int=rng.getrandbits(128))),
+                "room_id": f"call_{i}",
+                "status": rng.choice(statuses),
+                "priority": rng.choice(priorities),
+                "agent_a_id": rng.choice(agent_ids),
+                "agent_b_id": rng.choice(agent_ids) if rng.random() < 0.2 else None,
+                "duration_seconds": 0,
+                "created_at": started + timedelta(seconds=i * 0.25),
+            })
+        with engine.begin() as conn:
+            conn.execute(Call.__table__.insert(), batch)
+    return agent_ids
+
+
+def offset_page(db, limit: int, depth: int, status=None, agent_id=None):
+    query = db.query(Call)
+    if status:
+        query = query.filter(Call.status == status)
+    if agent_id:
+        query = query.filter((Call.agent_a_id == agent_id) | (Call.agent_b_id == agent_id))
+    return query.order_by(Call.created_at.desc(), Call.id.desc()).offset(depth).limit(limit).all()
+
+
+def timed(fn, repeat: int):
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - started)
+    return summarize(latencies)
+
+
+def measure(session_factory, args, agent_id: str):
+    scenarios = {
+        "all": {},
+        "status": {"status": CallStatus.COMPLETED.value},
+        "agent": {"agent_id": agent_id},
+    }
+    results = []
+    db = session_factory()
+    try:
+        for scenario, filters in scenarios.items():
+            for depth in args.depths:
+                # the key of the row just before `depth` is what a client's cursor holds
+                after = None
+                if depth:
+                    previous = offset_page(db, 1, depth - 1, **filters)
+                    if not previous:
+                        continue
+                    after = (previous[0].created_at, previous[0].id)
+
+                offset = timed(lambda: offset_page(db, args.limit, depth, **filters), args.repeat)
+                keyset = timed(lambda: list_calls_page(db, args.limit, after=after, **filters), args.repeat)
+                db.expunge_all()
+                results.append({"filter": scenario, "depth": depth, "offset": offset, "keyset": keyset})
+                print(
+                    f"{scenario:<7} depth={depth:<8} offset p50 {offset['p50_ms']:>9} ms | "
+                    f"keyset p50 {keyset['p50_ms']:>7} ms",
+                    file=sys.stderr
+                )
+    finally:
+        db.close()
+    return results
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{tmp}/pagination.db"
+        engine = create_engine(database_url)
+        Base.metadata.create_all(bind=engine)
+
+        started = time.perf_counter()
+        agent_ids = fill(engine, args.rows)
+        print(f"inserted {args.rows} calls in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+        results = measure(sessionmaker(bind=engine), args, agent_ids[0])
+        engine.dispose()
+
+    write_results(args.output, "pagination", results, params={
+        "rows": args.rows,
+        "limit": args.limit,
+        "repeat": args.repeat,
+        "database": "sqlite" if not args.database_url else args.database_url.split(":")[0],
+    })
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="OFFSET vs keyset page latency on a large calls table")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 1000, 10000, 100000, 500000, 900000])
+    parser.add_argument("--limit", type=int, default=50, help="rows per page")
+    parser.add_argument("--repeat", type=int, default=20, help="timed fetches per depth")
+    parser.add_argument("--database-url", default=None, help="defaults to a fresh SQLite file")
+    parser.add_argument("--output", default="-", help="JSON results file ('-' for stdout)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    main(parse_args())
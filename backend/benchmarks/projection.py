@@ -0,0 +1,132 @@
+# Cost of a calls list page: full ORM rows vs the column projection.
+#
+# Fills a calls table whose rows carry long transcripts and summaries, then
+# times one page (query + callListResponse serialization) both ways:
+#   - orm:        db.query(Call) - every column, ORM identities
+#   - projection: list_calls_page() - CALL_LIST_COLUMNS as plain rows
+# and records the peak Python memory allocated while building the page.
+#
+#   python -m benchmarks.projection
+#   python -m benchmarks.projection --rows 20000 --transcript-kb 64 --limits 50 500
+#   python -m benchmarks.projection --database-url postgresql://localhost/bench_scratch
+#
+# SQLite gets a fresh file per run. A --database-url is used as given: point
+# it at a scratch database, the benchmark fills it with test data.
+
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, Call, list_calls_page
+from models.call import callListResponse
+from benchmarks.common import summarize, write_results
+
+BATCH_SIZE = 1000
+
+
+def fill(engine, rows: int, transcript_kb: int):
+    transcript = ("caller: I need help with my invoice. agent: let me check that for you. " * 16 * transcript_kb)[:transcript_kb * 1024]
+    started = datetime(2024, 1, 1)
+    for offset in range(0, rows, BATCH_SIZE):
+        with engine.begin() as conn:
+            conn.execute(Call.__table__.insert(), [
+                {
+                    "id": str(uuid.uuid4()),
+                    "room_id": f"call_{i}",
+                    "caller_name": f"Caller {i}",
+                    "status": "completed",
+                    "priority": "normal",
+                    "duration_seconds": 300,
+                    "transcript": transcript,
+                    "summary": transcript[:2048],
+                    "created_at": started + timedelta(seconds=i * 0.25),
+                }
+                for i in range(offset, min(rows, offset + BATCH_SIZE))
+            ])
+
+
+def orm_page(db, limit: int):
+    calls = db.query(Call).order_by(Call.created_at.desc(), Call.id.desc()).limit(limit).all()
+    return [callListResponse.model_validate(call) for call in calls]
+
+
+def projection_page(db, limit: int):
+    rows, _ = list_calls_page(db, limit)
+    return [callListResponse.model_validate(row) for row in rows]
+
+
+def measure_page(session_factory, fetch, limit: int, repeat: int):
+    # a fresh session per fetch, like a request
+    latencies = []
+    for _ in range(repeat):
+        db = session_factory()
+        try:
+            started = time.perf_counter()
+            fetch(db, limit)
+            latencies.append(time.perf_counter() - started)
+        finally:
+            db.close()
+
+    # memory separately: tracing allocations slows everything down
+    db = session_factory()
+    try:
+        tracemalloc.start()
+        fetch(db, limit)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        db.close()
+
+    result = summarize(latencies)
+    result["peak_kb"] = round(peak / 1024, 1)
+    return result
+
+
+def main(args):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{tmp}/projection.db"
+        engine = create_engine(database_url)
+        Base.metadata.create_all(bind=engine)
+        fill(engine, args.rows, args.transcript_kb)
+        session_factory = sessionmaker(bind=engine)
+
+        for limit in args.limits:
+            orm = measure_page(session_factory, orm_page, limit, args.repeat)
+            projection = measure_page(session_factory, projection_page, limit, args.repeat)
+            results.append({"limit": limit, "orm": orm, "projection": projection})
+            print(
+                f"limit={limit:<5} orm p50 {orm['p50_ms']:>8} ms peak {orm['peak_kb']:>9} KB | "
+                f"projection p50 {projection['p50_ms']:>8} ms peak {projection['peak_kb']:>8} KB",
+                file=sys.stderr
+            )
+        engine.dispose()
+
+    write_results(args.output, "projection", results, params={
+        "rows": args.rows,
+        "transcript_kb": args.transcript_kb,
+        "repeat": args.repeat,
+        "database": "sqlite" if not args.database_url else args.database_url.split(":")[0],
+    })
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Calls list page cost: full ORM rows vs column projection")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--transcript-kb", type=int, default=32, help="transcript size per call")
+    parser.add_argument("--limits", type=int, nargs="+", default=[50, 200, 500], help="page sizes")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--database-url", default=None, help="defaults to a fresh SQLite file")
+    parser.add_argument("--output", default="-", help="JSON results file ('-' for stdout)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    main(parse_args())
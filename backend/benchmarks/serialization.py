@@ -0,0 +1,132 @@
+# Per-row cost of turning database rows into a JSON response body.
+#
+# For callListResponse, AgentListResponse and CallResponse, times:
+#   - response_model: what the routes used to do - from_orm() per row, then
+#                     FastAPI's re-validation against response_model,
+#                     jsonable_encoder and json.dumps
+#   - model_response: one TypeAdapter validation, pydantic-core JSON
+#   - rows_response:  trusted projection rows encoded straight by orjson
+#                     (list models only; needs orjson)
+# The rows come from an in-memory SQLite database: ORM objects for
+# CallResponse, projection rows for the list models, as the routes get them.
+#
+#   python -m benchmarks.serialization
+#   python -m benchmarks.serialization --rows 500 --repeat 200 --output serialization.json
+
+import argparse
+import json
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base, Agent, Call, CALL_LIST_COLUMNS, AGENT_LIST_COLUMNS
+from models.agent import AgentListResponse
+from models.call import CallResponse, callListResponse
+from utils.serialization import model_response, rows_response, orjson
+from benchmarks.common import percentile, write_results
+
+
+def seed(db, rows: int):
+    started = datetime(2024, 1, 1)
+    for i in range(rows):
+        db.add(Agent(id=str(uuid.uuid4()), name=f"Agent {i}", email=f"agent{i}@bench.example.com", skills=["billing", "support"]))
+        db.add(Call(
+            id=str(uuid.uuid4()), room_id=f"call_{i}", caller_name=f"Caller {i}", caller_phone="+15550100",
+            call_reason="Billing question", status="active", priority="normal", duration_seconds=120,
+            started_at=started + timedelta(seconds=i), created_at=started + timedelta(seconds=i),
+            updated_at=started + timedelta(seconds=i), transcript="caller: hello. agent: hi. " * 20,
+            summary="Billing question about the last invoice.", extra_metadata={"source": "web"}
+        ))
+    db.commit()
+
+
+@lru_cache(maxsize=None)
+def response_field(model, many: bool) -> TypeAdapter:
+    # FastAPI builds the response_model field once per route
+    return TypeAdapter(List[model] if many else model)
+
+
+def response_model_path(model, data, many: bool) -> bytes:
+    # from_orm in the route, then FastAPI: dump, validate against response_model, encode
+    items = [model.from_orm(row) for row in data] if many else model.from_orm(data)
+    adapter = response_field(model, many)
+    dumped = [item.model_dump() for item in items] if many else items.model_dump()
+    return json.dumps(jsonable_encoder(adapter.validate_python(dumped))).encode()
+
+
+def per_row(fn, rows: int, repeat: int):
+    fn()  # warm up adapters and caches
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - started) / rows)
+    # per-row figures are far below a millisecond, so these are in microseconds
+    return {
+        "mean_us": round(statistics.fmean(latencies) * 1e6, 3),
+        "p50_us": round(percentile(latencies, 50) * 1e6, 3),
+        "p95_us": round(percentile(latencies, 95) * 1e6, 3),
+    }
+
+
+def main(args):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    seed(db, args.rows)
+
+    call_rows = db.query(*CALL_LIST_COLUMNS).all()
+    agent_rows = db.query(*AGENT_LIST_COLUMNS).all()
+    calls = db.query(Call).all()
+
+    cases = [
+        ("callListResponse", callListResponse, call_rows, True),
+        ("AgentListResponse", AgentListResponse, agent_rows, True),
+        ("CallResponse", CallResponse, calls, False),
+    ]
+    results = []
+    for name, model, data, many in cases:
+        result = {"model": name}
+        if many:
+            result["response_model"] = per_row(lambda: response_model_path(model, data, True), len(data), args.repeat)
+            result["model_response"] = per_row(lambda: model_response(model, data, many=True), len(data), args.repeat)
+            if orjson is not None:
+                result["rows_response"] = per_row(lambda: rows_response(model, data), len(data), args.repeat)
+        else:
+            # one object per request: time them one at a time
+            result["response_model"] = per_row(lambda: [response_model_path(model, row, False) for row in data], len(data), args.repeat)
+            result["model_response"] = per_row(lambda: [model_response(model, row) for row in data], len(data), args.repeat)
+        results.append(result)
+        print(f"{name:<18} " + " | ".join(
+            f"{path} {timing['p50_us']} us/row" for path, timing in result.items() if path != "model"
+        ), file=sys.stderr)
+
+    db.close()
+    engine.dispose()
+    write_results(args.output, "serialization", results, params={
+        "rows": args.rows,
+        "repeat": args.repeat,
+        "orjson": orjson is not None,
+    })
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Per-row serialization cost of the API response models")
+    parser.add_argument("--rows", type=int, default=200, help="rows per measured batch")
+    parser.add_argument("--repeat", type=int, default=50, help="measured batches per path")
+    parser.add_argument("--output", default="-", help="JSON results file ('-' for stdout)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    main(parse_args())
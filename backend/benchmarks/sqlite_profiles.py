@@ -0,0 +1,83 @@
+# Concurrent writes against one SQLite file under each DATABASE_SQLITE_PROFILE.
+#
+# Runs the load harness's write scenarios (benchmarks/load.py) with several
+# worker processes sharing the file, once per profile:
+#   - inbound_burst:  calls router - POST /routers/calls/create, then
+#                     PUT /routers/calls/{id}/status
+#   - transfer_storm: transfer router - POST /routers/transfer/initiate, then
+#                     POST /routers/transfer/{id}/complete
+# and reports throughput, latency and errors per endpoint. Writers in
+# different processes contend for SQLite's single write lock; under the
+# default profile readers also hold writers off, and requests that wait
+# past the busy timeout fail with "database is locked" (500s here).
+#
+#   python -m benchmarks.sqlite_profiles
+#   python -m benchmarks.sqlite_profiles --workers 8 --burst 600 --transfers 200 --concurrency 24
+
+import argparse
+import asyncio
+import sys
+
+from benchmarks.common import write_results
+from benchmarks.fake_openai import FakeOpenAI
+from benchmarks.load import parse_args as load_args, run_scenario
+from test.livekit_stub import LiveKitStub
+
+PROFILES = ["default", "tuned"]
+
+
+async def run(args):
+    livekit, openai = LiveKitStub(), FakeOpenAI()
+    livekit_url = await livekit.start()
+    openai_url = await openai.start()
+    scenario_args = load_args([
+        "--workers", str(args.workers), "--store", "database", "--concurrency", str(args.concurrency),
+        "--burst", str(args.burst), "--transfers", str(args.transfers), "--history", str(args.history),
+        "--pollers", "0", "--timeout", str(args.timeout),
+    ])
+    results = []
+    try:
+        for profile in args.profiles:
+            env = {"DATABASE_SQLITE_PROFILE": profile}
+            for name in ("inbound_burst", "transfer_storm"):
+                result = await run_scenario(name, scenario_args, livekit_url, openai_url, env=env)
+                results.append({"profile": profile, **result})
+                for endpoint, stats in result["endpoints"].items():
+                    print(
+                        f"{profile:<8} {endpoint:<46} {stats.get('throughput_rps', 0):>8} req/s  "
+                        f"p50 {stats['p50_ms']:>8}  p99 {stats['p99_ms']:>8} ms  errors {stats['errors']}",
+                        file=sys.stderr
+                    )
+    finally:
+        await livekit.stop()
+        await openai.stop()
+    return results
+
+
+def main(args):
+    results = asyncio.run(run(args))
+    write_results(args.output, "sqlite_profiles", results, params={
+        "profiles": args.profiles,
+        "workers": args.workers,
+        "concurrency": args.concurrency,
+        "burst": args.burst,
+        "transfers": args.transfers,
+        "history": args.history,
+    })
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent writes to SQLite under each connection profile")
+    parser.add_argument("--profiles", nargs="+", choices=PROFILES, default=PROFILES)
+    parser.add_argument("--workers", type=int, default=4, help="API worker processes sharing the file")
+    parser.add_argument("--concurrency", type=int, default=16, help="in-flight call and transfer flows")
+    parser.add_argument("--burst", type=int, default=400, help="calls created")
+    parser.add_argument("--transfers", type=int, default=150, help="transfers initiated and completed")
+    parser.add_argument("--history", type=int, default=5000, help="completed calls seeded")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds before a request counts as failed")
+    parser.add_argument("--output", default="-", help="JSON results file ('-' for stdout)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,188 @@
+# Throughput of call creation and transfer initiation across worker counts.
+#
+# For each worker count the harness starts the API with `python -m app.main`
+# (the production launcher, DEBUG off, shared transfer store), seeds agents
+# and active calls over HTTP, then measures:
+#   - calls:     POST /routers/calls/create
+#   - transfers: POST /routers/transfer/initiate, one per seeded call
+# LiveKit and OpenAI are local stand-ins, so the numbers reflect the API,
+# the database and the worker model rather than network latency.
+#
+#   python -m benchmarks.workers --workers 1 2 4 8 --requests 400 --concurrency 32
+#   python -m benchmarks.workers --database-url postgresql://localhost/bench_scratch
+#
+# SQLite gets a fresh file per run. A --database-url is used as given: point
+# it at a scratch database, the benchmark fills it with test data.
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.common import drive, write_results
+from benchmarks.fake_openai import FakeOpenAI
+from test.livekit_stub import LiveKitStub
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def server_env(workers: int, port: int, database_url: str, livekit_url: str, openai_url: str, store: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "HOST": "127.0.0.1",
+        "PORT": str(port),
+        "DEBUG": "false",
+        "WORKERS": str(workers),
+        "DATABASE_URL": database_url,
+        "DATABASE_ECHO": "false",
+        "ACTIVE_TRANSFER_STORE": store,
+        "LIVEKIT_WS_URL": livekit_url,
+        "LIVEKIT_API_KEY": "bench",
+        "LIVEKIT_API_SECRET": "bench-secret-bench-secret-bench-secret",
+        "OPENAI_API_KEY": "bench",
+        "OPENAI_API_BASE": f"{openai_url}/v1",
+        "JWT_SECRET_KEY": "bench",
+        "JWT_ALGORITHM": "HS256",
+    })
+    return env
+
+
+async def wait_until_ready(client: httpx.AsyncClient, proc: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with code {proc.returncode}")
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("server did not become ready")
+
+
+async def seed(client: httpx.AsyncClient, pairs: int, run_id: str):
+    """Create `pairs` active calls, each with a busy agent and a free target agent"""
+    for i in range(2 * pairs):
+        response = await client.post("/routers/agents/", json={
+            "name": f"Agent {i}", "email": f"agent{i}-{run_id}@bench.example.com", "skills": ["billing"]
+        })
+        response.raise_for_status()
+
+    calls = []
+    for i in range(pairs):
+        response = await client.post("/routers/calls/create", json={"caller_name": f"Caller {i}", "assign_agent": True})
+        response.raise_for_status()
+        call = response.json()
+        (await client.put(f"/routers/calls/{call['id']}/status", json={"status": "active"})).raise_for_status()
+        calls.append(call)
+
+    targets, cursor = [], None
+    while True:
+        params = {"status": "available", "limit": 500, **({"cursor": cursor} if cursor else {})}
+        response = await client.get("/routers/agents/", params=params)
+        response.raise_for_status()
+        targets.extend(agent["id"] for agent in response.json())
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    return [(call["id"], call["agent_a_id"], target) for call, target in zip(calls, targets)]
+
+
+async def measure(workers: int, args, livekit_url: str, openai_url: str) -> dict:
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{tmp}/bench.db"
+        env = server_env(workers, port, database_url, livekit_url, openai_url, args.store)
+        log = open(Path(tmp) / "server.log", "w")
+        proc = subprocess.Popen([sys.executable, "-m", "app.main"], cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+        try:
+            limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+                await wait_until_ready(client, proc)
+                pairs = await seed(client, args.requests, f"{workers}-{int(time.time())}")
+
+                def create_call(i):
+                    async def request():
+                        response = await client.post("/routers/calls/create", json={"caller_name": f"Load {i}", "assign_agent": False})
+                        return response.status_code == 200
+                    return request
+
+                def initiate_transfer(call_id, from_agent_id, to_agent_id):
+                    async def request():
+                        response = await client.post("/routers/transfer/initiate", json={
+                            "call_id": call_id, "from_agent_id": from_agent_id,
+                            "to_agent_id": to_agent_id, "reason": "benchmark"
+                        })
+                        return response.status_code == 200
+                    return request
+
+                calls = await drive([create_call(i) for i in range(args.requests)], args.concurrency)
+                transfers = await drive([initiate_transfer(*pair) for pair in pairs], args.concurrency)
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+            log.close()
+    return {"workers": workers, "calls": calls, "transfers": transfers}
+
+
+async def main(args):
+    livekit = LiveKitStub()
+    openai = FakeOpenAI(latency=args.llm_latency)
+    livekit_url = await livekit.start()
+    openai_url = await openai.start()
+    results = []
+    try:
+        for workers in args.workers:
+            result = await measure(workers, args, livekit_url, openai_url)
+            results.append(result)
+            print(
+                f"workers={workers:<2} "
+                f"calls {result['calls']['throughput_rps']:>8} req/s p95 {result['calls']['p95_ms']:>8} ms "
+                f"errors {result['calls']['errors']:<4} | "
+                f"transfers {result['transfers']['throughput_rps']:>8} req/s p95 {result['transfers']['p95_ms']:>8} ms "
+                f"errors {result['transfers']['errors']}",
+                file=sys.stderr
+            )
+    finally:
+        await livekit.stop()
+        await openai.stop()
+    write_results(args.output, "workers", results, params={
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "store": args.store,
+        "database": "sqlite" if not args.database_url else args.database_url.split(":")[0],
+        "llm_latency": args.llm_latency,
+    })
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Call and transfer throughput across worker counts")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--requests", type=int, default=200, help="calls created and transfers initiated per run")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--store", default="database", choices=["database", "redis"])
+    parser.add_argument("--database-url", default=None, help="defaults to a fresh SQLite file per run")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds the fake OpenAI waits per request")
+    parser.add_argument("--output", default="-", help="JSON results file ('-' for stdout)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,27 @@
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import datetime
+
+from models.call import CallResponse, callListResponse
+
+# A call in the archived history list (routers/history.py)
+class ArchivedCallListResponse(callListResponse):
+    archived_at: datetime
+
+# A transfer of an archived call
+class ArchivedTransferResponse(BaseModel):
+    id: str
+    status: str
+    from_agent_id: str
+    to_agent_id: str
+    reason: Optional[str] = None
+    summary_shared: Optional[str] = None
+    initiated_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    duration_seconds: Optional[int] = None
+    transfer_room_id: Optional[str] = None
+
+# Full details of an archived call, with its transfers
+class ArchivedCallResponse(CallResponse):
+    archived_at: datetime
+    transfers: List[ArchivedTransferResponse] = []
@@ -0,0 +1,31 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List, Any
+
+# Maximum number of rooms accepted by a single bulk request
+MAX_BULK_ROOMS = 500
+
+# Request model for running the same operation against many rooms at once
+class BulkRoomRequest(BaseModel):
+    room_ids: List[str] = Field(..., min_length=1, max_length=MAX_BULK_ROOMS, description="LiveKit room IDs to operate on")
+
+# Request model for fetching stats for many rooms
+class BulkRoomStatsRequest(BulkRoomRequest):
+    include_participants: bool = Field(False, description="Include the per-participant breakdown for each room")
+
+# Request model for broadcasting a data message to many rooms
+class BulkSendDataRequest(BulkRoomRequest):
+    data: str = Field(..., description="Data message to send")
+    participant_identity: Optional[str] = Field(None, description="Only deliver to this participant in each room")
+
+# Outcome of a bulk operation for a single room
+class BulkRoomResult(BaseModel):
+    room_id: str
+    success: bool
+    result: Optional[Any] = None
+    error: Optional[str] = None
+
+# Response model returned for every bulk room operation
+class BulkRoomResponse(BaseModel):
+    results: List[BulkRoomResult]
+    succeeded: int
+    failed: int
@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, Query
+import asyncio
+import logging
+
+from app.dependencies import require_admin
+from utils.query_profiler import query_profiler
+from services.archiver import call_archiver
+
+# Operator endpoints, behind ADMIN_API_KEY. The query profile is per worker
+# process: with several workers, each answers for itself.
+router = APIRouter(dependencies=[Depends(require_admin)])
+logger = logging.getLogger(__name__)
+
+# Statement profile of this worker: the statements with the most total
+# time, recent slow queries (parameters redacted, plans when captured) and
+# requests that repeated one statement shape (N+1).
+
+@router.get("/queries")
+async def get_query_profile(limit: int = Query(20, ge=1, le=200)):
+    """Statement stats, slow queries and N+1 findings"""
+    return query_profiler.report(limit)
+
+# Start a fresh measurement window, e.g. before a load test.
+
+@router.post("/queries/reset")
+async def reset_query_profile():
+    """Clear the statement profile"""
+    query_profiler.reset()
+    logger.info("Query profile reset")
+    return {"success": True}
+
+# Run an archive pass now rather than waiting for the next interval, e.g.
+# after lowering ARCHIVE_RETENTION_DAYS. Unlike the query profile this acts on
+# the shared database.
+
+@router.post("/archive")
+async def run_archive():
+    """Move finished calls past the retention window to the archive"""
+    moved = await asyncio.to_thread(call_archiver.archive_once)
+    logger.info("Archive pass run from the admin API", extra=moved)
+    return {"success": True, "archived": moved}
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import logging
 
-from app.database import get_db, Agent, AgentStatus,create_agent as db_create_agent
+from app.database import get_db, get_read_db, first_or_primary, Agent, AgentStatus, EventType, create_agent as db_create_agent, list_agents_page
+from utils.pagination import encode_cursor, decode_cursor, InvalidCursor, NEXT_CURSOR_HEADER
+from utils.serialization import model_response, rows_response
+from services.event_bus import record_agent_event
+from app.dependencies import forget_agent
 from models.agent import (
     AgentCreateRequest, AgentResponse, AgentUpdateRequest,
     AgentListResponse, AgentStatusUpdate
@@ -31,10 +35,14 @@ async def create_agent(
             db=db,
             name=request.name,
             email=request.email,
-            skills=request.skills
+            skills=request.skills,
+            commit=False
         )
+        record_agent_event(db, agent, EventType.AGENT_UPDATED)
+        db.commit()
+        db.refresh(agent)
         
-        return AgentResponse.model_validate(agent)
+        return model_response(AgentResponse, agent)
         
     except HTTPException:
         raise
@@ -42,36 +50,41 @@ async def create_agent(
         logger.error(f"Error creating agent: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-# Retrieve a list of all agents, optionally filtering by status (available/busy).
+# List agents by name, optionally filtering by status (available/busy).
+# Keyset-paginated on (name, id); X-Next-Cursor holds the next page's cursor.
 
 @router.get("/", response_model=List[AgentListResponse])
 async def list_agents(
     status: Optional[AgentStatus] = None,
-    db: Session = Depends(get_db)
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
 ):
     """List all agents with optional filtering"""
-    
-    query = db.query(Agent)
-    if status:
-        query = query.filter(Agent.status == status.value)
-    
-    agents = query.order_by(Agent.name).all()
-    return [AgentListResponse.from_orm(agent) for agent in agents]
+
+    try:
+        after = decode_cursor(cursor, (str, str))
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    agents, has_more = list_agents_page(db, limit, after=after, status=status.value if status else None)
+    headers = {NEXT_CURSOR_HEADER: encode_cursor(agents[-1].name, agents[-1].id)} if has_more else None
+    return rows_response(AgentListResponse, agents, headers=headers)
 
 # Fetch full details of a specific agent by their ID.
 
 @router.get("/{agent_id}", response_model=AgentResponse)
 async def get_agent(
     agent_id: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get details for a specific agent"""
     
-    agent = db.query(Agent).filter(Agent.id == agent_id).first()
+    agent = first_or_primary(db, db.query(Agent).filter(Agent.id == agent_id))
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
     
-    return AgentResponse.from_orm(agent)
+    return model_response(AgentResponse, agent)
 
 # Update agent’s name, skills, or max concurrent calls.
 
@@ -94,10 +107,12 @@ async def update_agent(
     if request.max_concurrent_calls:
         agent.max_concurrent_calls = request.max_concurrent_calls
     
+    record_agent_event(db, agent, EventType.AGENT_UPDATED)
     db.commit()
+    forget_agent(agent_id)
     db.refresh(agent)
     
-    return AgentResponse.from_orm(agent)
+    return model_response(AgentResponse, agent)
 
 # Change agent’s current status (available, busy) and clear room if available.
 
@@ -118,8 +133,10 @@ async def update_agent_status(
     # If setting to available, clear current room
     if status_update.status == AgentStatus.AVAILABLE:
         agent.current_room_id = None
-    
+
+    record_agent_event(db, agent)
     db.commit()
+    forget_agent(agent_id)
     
     return {"message": "Agent status updated successfully"}
 
@@ -140,7 +157,9 @@ async def delete_agent(
     if agent.status == AgentStatus.BUSY:
         raise HTTPException(status_code=400, detail="Cannot delete agent who is currently on a call")
     
+    record_agent_event(db, agent, EventType.AGENT_UPDATED)
     db.delete(agent)
     db.commit()
+    forget_agent(agent_id)
     
     return {"message": "Agent deleted successfully"}
\ No newline at end of file
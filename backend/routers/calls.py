@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 import logging
+import time
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, timedelta
@@ -8,10 +9,17 @@ from models.call import (
     CallCreateRequest, CallResponse,JoinCallResponse,JoinCallRequest, CallUpdateRequest, callListResponse
 )
 from app.database import (  
-    get_db, Agent, AgentStatus, create_call, Call, CallStatus
+    get_db, get_read_db, first_or_primary, Agent, AgentStatus, create_call, Call, CallStatus, EventType, PriorityLevel, list_calls_page
 )
 from services.livekit_service import livekit_service
+from services.resilience import UpstreamError
+from services.event_bus import record_call_event, record_agent_event
 from app.config import settings
+from utils.pagination import encode_cursor, decode_cursor, InvalidCursor, NEXT_CURSOR_HEADER
+from utils.serialization import model_response, rows_response
+from utils.conditional import (
+    check_not_modified, caching_headers, content_etag, etag_matches, not_modified_response, MAX_WAIT_SECONDS
+)
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -49,6 +57,7 @@ async def create_new_call(
 
         # find available agent if requested
         agent_id = None
+        available_agent = None
         if request.assign_agent:
             available_agent = db.query(Agent).filter(Agent.status == AgentStatus.AVAILABLE.value).first()
 
@@ -65,8 +74,12 @@ async def create_new_call(
             caller_phone=request.caller_phone,
             agent_a_id=agent_id,
             call_reason=request.call_reason,
-            priority=request.priority
+            priority=request.priority,
+            commit=False
         )
+        record_call_event(db, EventType.CALL_CREATED, call)
+        if available_agent:
+            record_agent_event(db, available_agent)
 
         # generate accesss token for caller
         caller_token = livekit_service.generate_access_token(
@@ -77,26 +90,9 @@ async def create_new_call(
 
         db.commit()
 
-        return CallResponse(
-                id=call.id,
-                room_id=room_id,
-                caller_name=request.caller_name,
-                caller_phone=request.caller_phone,
-                call_reason=request.call_reason,
-                status=call.status,
-                agent_a_id=agent_id,
-                agent_b_id=getattr(call, "agent_b_id", None),  # 
-                access_token=caller_token,
-                created_at=call.created_at,
-                updated_at=getattr(call, "updated_at", None),
-                started_at=getattr(call, "started_at", None),
-                ended_at=getattr(call, "ended_at", None),
-                duration_seconds=getattr(call, "duration_seconds", None),
-                transcript=getattr(call, "transcript", None),
-                summary=getattr(call, "summary", None),
-                summary_generated_at=getattr(call, "summary_generated_at", None),
-                extra_metadata=getattr(call, "extra_metadata", None),
-        )
+        response = CallResponse.model_validate(call)
+        response.access_token = caller_token
+        return model_response(CallResponse, response)
 
     except Exception as e:
         logger.error(f"Error creating call: {str(e)}")
@@ -133,6 +129,8 @@ async def join_existing_call(
                 # Assign agent to call if not already assigned
                 if not call.agent_a_id:
                     call.agent_a_id = agent.id
+                record_call_event(db, EventType.CALL_UPDATED, call)
+                record_agent_event(db, agent)
                 db.commit()
         
         return JoinCallResponse(
@@ -152,58 +150,87 @@ async def join_existing_call(
 @router.get("/{call_id}", response_model=CallResponse)
 async def get_call_details(
     call_id: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get details for a specific call"""
     
-    call = db.query(Call).filter(Call.id == call_id).first()
+    call = first_or_primary(db, db.query(Call).filter(Call.id == call_id))
     if not call:
         raise HTTPException(status_code=404, detail="Call not found")
     
-    return CallResponse.from_orm(call)
+    return model_response(CallResponse, call)
 
-# List all calls, optionally filtered by status, with a limit on results.
+# List calls newest first, filtered by status, priority and/or agent.
+# Pages are keyset-paginated on (created_at, id): when more calls follow,
+# the X-Next-Cursor response header holds the cursor for the next page.
+# Conditional GET: the ETag follows the calls version, so If-None-Match gets
+# a 304 without a query while no call changed (?wait=N long-polls for a
+# change). The waiting listing also ages calls out, so its tag changes every
+# minute too; in production it filters on LiveKit presence, which no event
+# versions, so there the tag is a hash of the filtered body instead.
 
 @router.get("/", response_model=List[callListResponse])
 async def list_calls(
+    request: Request,
     status: Optional[CallStatus] = None,
-    limit: int = 50,
+    priority: Optional[PriorityLevel] = None,
+    agent_id: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    wait: float = Query(0, ge=0, le=MAX_WAIT_SECONDS),
     db: Session = Depends(get_db)
 ):
     """List all calls with optional filtering. For WAITING, only include recent calls
     that currently have a caller connected to the LiveKit room to avoid stale entries."""
 
-    query = db.query(Call)
-    if status:
-        query = query.filter(Call.status == status.value)
+    try:
+        after = decode_cursor(cursor, (datetime, str))
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-    calls = query.order_by(Call.created_at.desc()).limit(limit).all()
+    presence_filtered = status == CallStatus.WAITING and not settings.DEBUG
+    etag = None
+    if not presence_filtered:
+        suffix = f".{int(time.time() // 60)}" if status == CallStatus.WAITING else ""
+        etag, not_modified = await check_not_modified(request, ("calls",), wait, suffix)
+        if not_modified:
+            return not_modified
 
-    # For waiting calls, filter to recent and (in production) with a live caller connected
-    if status == CallStatus.WAITING:
-        now = datetime.utcnow()
-        ten_min_ago = now - timedelta(minutes=10)
-        # Always apply recency filter
-        recent_calls = [c for c in calls if c.created_at and c.created_at >= ten_min_ago]
+    # Waiting calls older than ten minutes are stale
+    created_since = datetime.utcnow() - timedelta(minutes=10) if status == CallStatus.WAITING else None
 
-        if settings.DEBUG:
-            # In DEBUG/local, LiveKit may not reflect participants correctly; include recent waiting calls
-            return [callListResponse.from_orm(call) for call in recent_calls]
+    calls, has_more = list_calls_page(
+        db,
+        limit,
+        after=after,
+        status=status.value if status else None,
+        priority=priority.value if priority else None,
+        agent_id=agent_id,
+        created_since=created_since
+    )
+    headers = {NEXT_CURSOR_HEADER: encode_cursor(calls[-1].created_at, calls[-1].id)} if has_more else {}
 
+    # For waiting calls, in production only keep those with a live caller connected
+    if presence_filtered:
+        # A failed participant check raises a classified UpstreamError (503/504)
+        # instead of silently including or hiding the call.
         filtered = []
-        for c in recent_calls:
-            try:
-                parts = await livekit_service.list_participants(c.room_id)
-                has_caller = any((p.identity or "").startswith("caller_") for p in parts)
-                if has_caller:
-                    filtered.append(c)
-            except Exception as e:
-                logger.warning(f"list_calls waiting filter: failed to check participants for room {c.room_id}: {e}")
-                # In production, if participants check fails, include to avoid hiding valid calls
+        for c in calls:
+            parts = await livekit_service.list_participants(c.room_id)
+            has_caller = any((p.get("identity") or "").startswith("caller_") for p in parts)
+            if has_caller:
                 filtered.append(c)
-        return [callListResponse.from_orm(call) for call in filtered]
+        calls = filtered
 
-    return [callListResponse.from_orm(call) for call in calls]
+        response = rows_response(callListResponse, calls, headers=headers)
+        etag = content_etag(response.body)
+        if etag_matches(request, etag):
+            return not_modified_response(etag)
+        response.headers.update(caching_headers(etag))
+        return response
+
+    headers.update(caching_headers(etag))
+    return rows_response(callListResponse, calls, headers=headers)
 
 # Update the status of a call, record transcript, and free agents if completed.
 
@@ -235,6 +262,11 @@ async def update_call_status(
             if call.agent_b:
                 call.agent_b.status = AgentStatus.AVAILABLE.value
                 call.agent_b.current_room_id = None
+            for agent in (call.agent_a, call.agent_b):
+                if agent:
+                    record_agent_event(db, agent)
+
+        record_call_event(db, EventType.CALL_UPDATED, call)
     
     if status_update.transcript:
         call.transcript = status_update.transcript
@@ -257,8 +289,11 @@ async def end_call(
         raise HTTPException(status_code=404, detail="Call not found")
     
     try:
-        # Close LiveKit room
-        await livekit_service.close_room(call.room_id)
+        # Close LiveKit room; the call still ends if LiveKit is unreachable
+        try:
+            await livekit_service.close_room(call.room_id)
+        except UpstreamError as e:
+            logger.warning(f"Could not close room {call.room_id}: {str(e)}")
         
         # Update call status
         call.status = CallStatus.COMPLETED.value
@@ -271,6 +306,11 @@ async def end_call(
         if call.agent_b:
             call.agent_b.status = AgentStatus.AVAILABLE.value
             call.agent_b.current_room_id = None
+
+        record_call_event(db, EventType.CALL_UPDATED, call)
+        for agent in (call.agent_a, call.agent_b):
+            if agent:
+                record_agent_event(db, agent)
         
         db.commit()
         
@@ -0,0 +1,123 @@
+from fastapi import APIRouter, Request, WebSocket, Query
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Dict, List, Optional
+import asyncio
+import json
+import logging
+
+from app.config import settings
+from services.event_bus import event_bus, Subscription
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Push channel for call, agent and transfer changes.
+# Clients subscribe with an agent id and/or room id and get every matching
+# event as it is committed, instead of polling the list/status endpoints.
+# After a disconnect they resume from the last event id they saw; anything
+# missed in between is replayed from the outbox.
+
+def _resume_from(request_value: Optional[int], header: Optional[str]) -> Optional[int]:
+    if request_value is not None:
+        return request_value
+    if header and header.isdigit():
+        return int(header)
+    return None
+
+def _format_sse(event: Dict) -> str:
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+async def sse_stream(subscription: Subscription, backlog: List[Dict], after_id: int = 0) -> AsyncIterator[str]:
+    """Server-sent events: the backlog, then live events, with keepalive comments"""
+    last_id = after_id
+    try:
+        yield "retry: 3000\n\n"
+        for event in backlog:
+            last_id = event["id"]
+            yield _format_sse(event)
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), settings.EVENT_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if event is None:
+                break
+            # already sent as part of the backlog
+            if event["id"] <= last_id:
+                continue
+            last_id = event["id"]
+            yield _format_sse(event)
+    finally:
+        event_bus.unsubscribe(subscription)
+
+# Route: GET /routers/events/stream?agent_id=...&room_id=...
+# Purpose: Server-sent event stream; resumes after Last-Event-ID (header or query).
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    agent_id: Optional[str] = None,
+    room_id: Optional[str] = None,
+    last_event_id: Optional[int] = Query(None, ge=0)
+):
+    """Stream call, agent and transfer events"""
+
+    after_id = _resume_from(last_event_id, request.headers.get("last-event-id"))
+    # subscribe before reading the backlog so nothing falls in between
+    subscription = event_bus.subscribe(agent_id, room_id)
+    backlog = event_bus.replay(after_id, agent_id, room_id) if after_id is not None else []
+
+    return StreamingResponse(
+        sse_stream(subscription, backlog, after_id or 0),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Route: WS /routers/events/ws?agent_id=...&room_id=...&last_event_id=...
+# Purpose: Same events as JSON messages over a WebSocket.
+
+@router.websocket("/ws")
+async def events_websocket(
+    websocket: WebSocket,
+    agent_id: Optional[str] = None,
+    room_id: Optional[str] = None,
+    last_event_id: Optional[int] = None
+):
+    """Stream call, agent and transfer events over a WebSocket"""
+
+    await websocket.accept()
+    subscription = event_bus.subscribe(agent_id, room_id)
+    receiver = asyncio.create_task(websocket.receive())
+    getter = None
+    try:
+        last_id = last_event_id or 0
+        if last_event_id is not None:
+            for event in event_bus.replay(last_event_id, agent_id, room_id):
+                last_id = event["id"]
+                await websocket.send_json(event)
+
+        while True:
+            getter = asyncio.create_task(subscription.get())
+            done, _ = await asyncio.wait({getter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver in done:
+                # clients don't send anything; this is how a disconnect shows up
+                if receiver.result()["type"] == "websocket.disconnect":
+                    break
+                receiver = asyncio.create_task(websocket.receive())
+                if getter not in done:
+                    getter.cancel()
+                    continue
+            event = getter.result()
+            if event is None:
+                await websocket.close()
+                break
+            if event["id"] <= last_id:
+                continue
+            last_id = event["id"]
+            await websocket.send_json(event)
+    finally:
+        event_bus.unsubscribe(subscription)
+        for task in (getter, receiver):
+            if task is not None and not task.done():
+                task.cancel()
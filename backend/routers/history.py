@@ -0,0 +1,70 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import datetime
+from enum import Enum
+import logging
+
+from app.database import get_read_db, calls_archive, transfers_archive, list_calls_page
+from models.history import ArchivedCallListResponse, ArchivedCallResponse
+from utils.pagination import encode_cursor, decode_cursor, InvalidCursor, NEXT_CURSOR_HEADER
+from utils.serialization import model_response, rows_response
+
+# History of archived calls (services/archiver.py): completed and failed
+# calls past the retention window, with their transfers. Recent calls are
+# still served by /routers/calls. Archived rows never change, so these read
+# from a replica when one is configured.
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+class ArchivedCallStatus(str, Enum):
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+# List archived calls newest first, filtered by status and/or agent.
+# Keyset-paginated on (created_at, id) like the calls listing.
+
+@router.get("/calls", response_model=List[ArchivedCallListResponse])
+async def list_archived_calls(
+    status: Optional[ArchivedCallStatus] = None,
+    agent_id: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """List archived calls"""
+
+    try:
+        after = decode_cursor(cursor, (datetime, str))
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    calls, has_more = list_calls_page(
+        db, limit, after=after, status=status.value if status else None, agent_id=agent_id, archived=True
+    )
+    headers = {NEXT_CURSOR_HEADER: encode_cursor(calls[-1].created_at, calls[-1].id)} if has_more else None
+    return rows_response(ArchivedCallListResponse, calls, headers=headers)
+
+# Full details of one archived call, transcript and summary included, with its transfers.
+
+@router.get("/calls/{call_id}", response_model=ArchivedCallResponse)
+async def get_archived_call(
+    call_id: str,
+    db: Session = Depends(get_read_db)
+):
+    """Get an archived call with its transfers"""
+
+    call = db.execute(select(calls_archive).where(calls_archive.c.id == call_id)).first()
+    if not call:
+        raise HTTPException(status_code=404, detail="Archived call not found")
+
+    transfers = db.execute(
+        select(transfers_archive)
+        .where(transfers_archive.c.call_id == call_id)
+        .order_by(transfers_archive.c.initiated_at)
+    ).all()
+    return model_response(ArchivedCallResponse, {
+        **call._mapping,
+        "transfers": [dict(transfer._mapping) for transfer in transfers],
+    })
@@ -1,11 +1,86 @@
 from fastapi import APIRouter, HTTPException
-from typing import Optional
+from typing import Optional, List, Dict, Literal
 import logging
 from services.livekit_service import livekit_service
+from services.resilience import UpstreamError
+from models.room import (
+    BulkRoomRequest, BulkRoomStatsRequest, BulkSendDataRequest, BulkRoomResponse
+)
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+TrackTypeFilter = Literal["audio", "video", "all"]
+
+def _bulk_response(results: List[Dict]) -> Dict:
+    succeeded = sum(1 for r in results if r["success"])
+    return {"results": results, "succeeded": succeeded, "failed": len(results) - succeeded}
+
+# Bulk routes are declared before the /{room_id}/... routes so that
+# "bulk" is never captured as a room id.
+
+# Route: POST /bulk/stats
+# Purpose: Fetch statistics for many rooms in one request.
+# Example: Supervisor dashboard loading stats for every active call at once.
+
+@router.post("/bulk/stats", response_model=BulkRoomResponse)
+async def bulk_room_stats(request: BulkRoomStatsRequest):
+    """Get statistics for many LiveKit rooms"""
+
+    async def fetch_stats(room_id: str):
+        stats = await livekit_service.get_room_stats(room_id, include_participants=request.include_participants)
+        if not stats:
+            raise LookupError("Room not found")
+        return stats
+
+    try:
+        results = await livekit_service.run_for_rooms(request.room_ids, fetch_stats)
+        return _bulk_response(results)
+
+    except Exception as e:
+        logger.error(f"Error getting bulk room stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Route: POST /bulk/close
+# Purpose: Close many rooms in one request.
+# Example: Shift-change cleanup of all rooms left open by a team.
+
+@router.post("/bulk/close", response_model=BulkRoomResponse)
+async def bulk_close_rooms(request: BulkRoomRequest):
+    """Close/delete many LiveKit rooms"""
+
+    async def close(room_id: str):
+        if not await livekit_service.close_room(room_id):
+            raise RuntimeError("Room not found")
+
+    try:
+        results = await livekit_service.run_for_rooms(request.room_ids, close)
+        return _bulk_response(results)
+
+    except Exception as e:
+        logger.error(f"Error closing rooms: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Route: POST /bulk/send-data
+# Purpose: Broadcast the same data message to many rooms.
+# Example: Incident notice pushed to every live call.
+
+@router.post("/bulk/send-data", response_model=BulkRoomResponse)
+async def bulk_send_data(request: BulkSendDataRequest):
+    """Send a data message to participants in many rooms"""
+
+    async def send(room_id: str):
+        if not await livekit_service.send_data_to_participants(room_id, request.data, request.participant_identity):
+            raise RuntimeError("Failed to send data")
+
+    try:
+        results = await livekit_service.run_for_rooms(request.room_ids, send)
+        return _bulk_response(results)
+
+    except Exception as e:
+        logger.error(f"Error sending bulk data: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Route: GET /{room_id}/info
 # Purpose: Fetch information about a specific LiveKit room.
 # Example: Returns room metadata such as ID, name, creation time, etc
@@ -23,6 +98,8 @@ async def get_room_info(room_id: str):
     
     except HTTPException:
         raise      
+    except UpstreamError:
+        raise
     except Exception as e:
         logger.error(f"Error getting room info: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -41,6 +118,8 @@ async def get_room_participants(room_id: str):
     
     except HTTPException:
         raise      
+    except UpstreamError:
+        raise
     except Exception as e:
         logger.error(f"Error getting room participants: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -48,17 +127,20 @@ async def get_room_participants(room_id: str):
 # Route: GET /{room_id}/stats
 # Purpose: Get statistics about the room (e.g., active streams, bandwidth).
 # Example: Returns analytics/metrics for monitoring usage of the room.
+# Pass include_participants=false to skip the per-participant breakdown.
 
 @router.get("/{room_id}/stats")
-async def get_room_stats(room_id: str):
+async def get_room_stats(room_id: str, include_participants: bool = True):
     """Get detailed statistics for a LiveKit room"""
     
     try:
-        stats = await livekit_service.get_room_stats(room_id)
+        stats = await livekit_service.get_room_stats(room_id, include_participants=include_participants)
         return stats
    
     except HTTPException:
         raise      
+    except UpstreamError:
+        raise
     except Exception as e:
         logger.error(f"Error getting room stats: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -74,12 +156,14 @@ async def close_room(room_id: str):
     try:
         success = await livekit_service.close_room(room_id)
         if not success:
-            raise HTTPException(status_code=500, detail="Failed to close room")
+            raise HTTPException(status_code=404, detail="Room not found")
         
         return {"message": "Room closed successfully"}
     
     except HTTPException:
         raise      
+    except UpstreamError:
+        raise
     except Exception as e:
         logger.error(f"Error closing room: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -87,28 +171,58 @@ async def close_room(room_id: str):
 # Route: POST /{room_id}/mute
 # Purpose: Mute a specific participant's track (audio/video) inside the room.
 # Example: Admin can mute a participant's microphone remotely.
+# track_type accepts "audio", "video" or "all".
 
 @router.post("/{room_id}/mute")
 async def mute_participant(
     room_id: str,
     participant_identity: str,
-    track_type: str = "audio"
+    track_type: TrackTypeFilter = "audio"
 ):
     """Mute a participant in a room"""
     
     try:
         success = await livekit_service.mute_participant(room_id, participant_identity, track_type)
         if not success:
-            raise HTTPException(status_code=500, detail="Failed to mute participant")
+            raise HTTPException(status_code=404, detail="Participant not found")
         
         return {"message": "Participant muted successfully"}
     
     except HTTPException:
         raise      
+    except UpstreamError:
+        raise
     except Exception as e:
         logger.error(f"Error muting participant: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Route: POST /{room_id}/unmute
+# Purpose: Unmute a participant's track (audio/video) inside the room.
+# Example: Supervisor restores a participant's microphone after moderation.
+
+@router.post("/{room_id}/unmute")
+async def unmute_participant(
+    room_id: str,
+    participant_identity: str,
+    track_type: TrackTypeFilter = "audio"
+):
+    """Unmute a participant in a room"""
+    
+    try:
+        success = await livekit_service.unmute_participant(room_id, participant_identity, track_type)
+        if not success:
+            raise HTTPException(status_code=404, detail="Participant not found")
+        
+        return {"message": "Participant unmuted successfully"}
+    
+    except HTTPException:
+        raise      
+    except UpstreamError:
+        raise
+    except Exception as e:
+        logger.error(f"Error unmuting participant: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Route: POST /{room_id}/remove
 # Purpose: Remove (kick) a participant out of a room.
 # Example: Used by admin to forcefully remove a disruptive user.
@@ -129,6 +243,8 @@ async def remove_participant(
     
     except HTTPException:
         raise      
+    except UpstreamError:
+        raise
     except Exception as e:
         logger.error(f"Error removing participant: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -154,6 +270,8 @@ async def send_data_to_room(
     
     except HTTPException:
         raise      
+    except UpstreamError:
+        raise
     except Exception as e:
         logger.error(f"Error sending data: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
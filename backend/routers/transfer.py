@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
 import logging
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from services.transfer_service import transfer_service
+from utils.conditional import check_not_modified, caching_headers, MAX_WAIT_SECONDS
 from models.transfer import (
     TransferRequest, TransferResponse, TransferStatusResponse,
     AgentAvailabilityResponse
@@ -100,7 +101,7 @@ async def cancel_transfer(
 @router.get("/{transfer_id}/status", response_model=TransferStatusResponse)
 async def get_transfer_status(
     transfer_id: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get the status of a transfer"""
     
@@ -120,15 +121,24 @@ async def get_transfer_status(
         logger.error(f"Error getting transfer status: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 # List all agents who are available for new transfers along with their current load.
+# Conditional: If-None-Match gets a 304 while no agent, call or transfer changed;
+# ?wait=N long-polls for a change first.
 
 @router.get("/agents/available", response_model=List[AgentAvailabilityResponse])
 async def get_available_agents(
+    request: Request,
+    response: Response,
+    wait: float = Query(0, ge=0, le=MAX_WAIT_SECONDS),
     db: Session = Depends(get_db)
 ):
     """Get list of available agents for transfer"""
     
     try:
+        etag, not_modified = await check_not_modified(request, ("agents", "calls"), wait)
+        if not_modified:
+            return not_modified
         agents = await transfer_service.get_agent_availability(db)
+        response.headers.update(caching_headers(etag))
         return agents
    
     except HTTPException:
@@ -139,13 +149,22 @@ async def get_available_agents(
         raise HTTPException(status_code=500, detail=str(e))
 
 # List all transfers that are currently in progress.
+# Conditional on transfer events, like the available agents above.
 
 @router.get("/active")
-async def get_active_transfers():
+async def get_active_transfers(
+    request: Request,
+    response: Response,
+    wait: float = Query(0, ge=0, le=MAX_WAIT_SECONDS)
+):
     """Get list of all active transfers"""
     
     try:
-        transfers = transfer_service.get_active_transfers()
+        etag, not_modified = await check_not_modified(request, ("transfers",), wait)
+        if not_modified:
+            return not_modified
+        transfers = await transfer_service.get_active_transfers()
+        response.headers.update(caching_headers(etag))
         return {"active_transfers": transfers}
    
     except HTTPException:
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import DateTime, exists, func, literal, select
+from sqlalchemy.exc import IntegrityError
+
+from app.config import settings
+from app.database import (
+    Call, Transfer, Room, CallStatus, EventType, SessionLocal, calls_archive, transfers_archive, rooms_archive,
+    transaction
+)
+from services.event_bus import record_event
+from services.transfer_store import PENDING_TRANSFER_STATUSES
+from utils.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+ARCHIVED_ROWS = Counter("archived_rows_total", "Rows moved from the hot tables to the archive tables", ("table",))
+
+FINISHED_CALL_STATUSES = [CallStatus.COMPLETED.value, CallStatus.FAILED.value]
+
+# Moves completed and failed calls older than ARCHIVE_RETENTION_DAYS, with
+# their transfers and rooms, into the archive tables (app/database.py),
+# ARCHIVE_BATCH_SIZE calls per transaction: copy, then delete from the hot
+# table, so a call is always in exactly one of the two. A call with a
+# transfer still pending stays hot. Each batch records a call.archived
+# outbox event in the same transaction, which moves the calls and transfers
+# versions on every worker so cached listings are revalidated.
+#
+# Every worker runs a pass each ARCHIVE_INTERVAL_SECONDS. Two workers
+# picking the same batch can't both move it: the second one's copy hits the
+# archive's primary key and its transaction rolls back. A batch that
+# conflicts is logged and skipped for the rest of the pass; later batches
+# still run.
+
+class CallArchiver:
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self.retention_days = settings.ARCHIVE_RETENTION_DAYS
+        self.interval = settings.ARCHIVE_INTERVAL_SECONDS
+        self.batch_size = settings.ARCHIVE_BATCH_SIZE
+        self._task: Optional[asyncio.Task] = None
+
+    def archive_once(self, now: datetime = None) -> Dict[str, int]:
+        """Archive every call past the retention window; returns rows moved per table"""
+        totals = {"calls": 0, "transfers": 0, "rooms": 0}
+        if self.retention_days <= 0:
+            return totals
+        cutoff = (now or datetime.utcnow()) - timedelta(days=self.retention_days)
+        skipped: List[str] = []
+        while True:
+            call_ids, moved = self._archive_batch(cutoff, skipped)
+            if moved is None:
+                skipped.extend(call_ids)
+            else:
+                for table, count in moved.items():
+                    totals[table] += count
+            if len(call_ids) < self.batch_size:
+                break
+        return totals
+
+    def _archive_batch(self, cutoff: datetime, skipped: List[str]) -> Tuple[List[str], Optional[Dict[str, int]]]:
+        """Move one batch; returns its call ids and rows moved per table, None if it was skipped"""
+        moved = {"calls": 0, "transfers": 0, "rooms": 0}
+        calls = []
+        db = self.session_factory()
+        try:
+            with transaction(db):
+                pending_transfer = exists().where(
+                    Transfer.call_id == Call.id, Transfer.status.in_(PENDING_TRANSFER_STATUSES)
+                )
+                query = db.query(Call.id, Call.room_id, Call.agent_a_id, Call.agent_b_id).filter(
+                    Call.status.in_(FINISHED_CALL_STATUSES),
+                    Call.created_at < cutoff,
+                    func.coalesce(Call.ended_at, Call.created_at) < cutoff,
+                    ~pending_transfer
+                )
+                if skipped:
+                    query = query.filter(Call.id.notin_(skipped))
+                calls = query.order_by(Call.created_at).limit(self.batch_size).all()
+                if not calls:
+                    return [], moved
+                call_ids = [call.id for call in calls]
+
+                archived_at = literal(datetime.utcnow(), DateTime).label("archived_at")
+                # children first: transfers and rooms reference the call
+                for table, model, archive, key in (
+                    ("transfers", Transfer, transfers_archive, Transfer.call_id),
+                    ("rooms", Room, rooms_archive, Room.call_id),
+                    ("calls", Call, calls_archive, Call.id),
+                ):
+                    columns = list(model.__table__.columns)
+                    db.execute(archive.insert().from_select(
+                        [column.name for column in columns] + ["archived_at"],
+                        select(*columns, archived_at).where(key.in_(call_ids))
+                    ))
+                    moved[table] = db.query(model).filter(key.in_(call_ids)).delete(synchronize_session=False)
+
+                # the calls (and transfers) listings changed: cached ETags must not match anymore
+                record_event(
+                    db, EventType.CALLS_ARCHIVED, {"call_ids": call_ids, **moved},
+                    room_ids=[call.room_id for call in calls],
+                    agent_ids=sorted({agent_id for call in calls for agent_id in (call.agent_a_id, call.agent_b_id) if agent_id})
+                )
+        except IntegrityError as e:
+            call_ids = [call.id for call in calls]
+            logger.warning("Archive batch conflicts with rows already archived; skipping it", extra={
+                "call_ids": call_ids, "error": str(e.orig)
+            })
+            return call_ids, None
+        finally:
+            db.close()
+
+        for table, count in moved.items():
+            ARCHIVED_ROWS.labels(table).inc(count)
+        return call_ids, moved
+
+    async def start(self):
+        if self.interval <= 0 or self.retention_days <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="call-archiver")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(self):
+        # workers started together don't all archive at the same moment
+        await asyncio.sleep(random.uniform(0, min(self.interval, 60.0)))
+        while True:
+            try:
+                moved = await asyncio.to_thread(self.archive_once)
+                if moved["calls"]:
+                    logger.info("Archived finished calls", extra=moved)
+            except Exception as e:
+                logger.error(f"Archiving calls failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+# Create singleton instance
+call_archiver = CallArchiver()
@@ -0,0 +1,124 @@
+import asyncio
+import heapq
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Heap-based deadline scheduler driven by a single background task.
+# Each pending deadline costs one heap tuple and one dict entry, no matter how
+# far in the future it is, so tens of thousands of outstanding transfers don't
+# mean tens of thousands of sleeping tasks. Cancellation is lazy: the dict is
+# the source of truth and stale heap entries are skipped (and compacted away
+# once they outnumber the live ones).
+
+class DeadlineScheduler:
+    def __init__(
+        self,
+        on_expire: Callable[[str], Awaitable[None]],
+        name: str = "deadlines",
+        max_concurrency: int = 16,
+        clock: Callable[[], float] = time.time
+    ):
+        self.name = name
+        self._on_expire = on_expire
+        self._clock = clock
+        self._heap: List[Tuple[float, str]] = []
+        self._deadlines: Dict[str, float] = {}
+        self._max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._in_flight: Set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._deadlines
+
+    def schedule(self, key: str, deadline: float):
+        """Set (or move) the deadline for key; deadline is epoch seconds"""
+        self._deadlines[key] = deadline
+        heapq.heappush(self._heap, (deadline, key))
+        self._maybe_compact()
+        if self._wakeup is not None and self._heap[0] == (deadline, key):
+            self._wakeup.set()
+
+    def cancel(self, key: str) -> bool:
+        """Drop key's deadline; returns False if none was pending"""
+        removed = self._deadlines.pop(key, None) is not None
+        if removed:
+            self._maybe_compact()
+        return removed
+
+    def keys(self) -> List[str]:
+        return list(self._deadlines)
+
+    def deadline_for(self, key: str) -> Optional[float]:
+        return self._deadlines.get(key)
+
+    def pop_due(self, now: Optional[float] = None) -> List[str]:
+        """Remove and return every key whose deadline has passed"""
+        now = self._clock() if now is None else now
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, key = heapq.heappop(self._heap)
+            if self._deadlines.get(key) == deadline:
+                del self._deadlines[key]
+                due.append(key)
+        return due
+
+    def next_deadline(self) -> Optional[float]:
+        while self._heap and self._deadlines.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def _maybe_compact(self):
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._deadlines):
+            self._heap = [(deadline, key) for key, deadline in self._deadlines.items()]
+            heapq.heapify(self._heap)
+
+    async def start(self):
+        """Start the background loop (idempotent)"""
+        if self._task is not None and not self._task.done():
+            return
+        self._wakeup = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        self._task = asyncio.create_task(self._run(), name=f"{self.name}-scheduler")
+
+    async def stop(self):
+        """Stop the loop and any expiry handlers still running; pending deadlines are kept"""
+        tasks = [t for t in [self._task, *self._in_flight] if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._wakeup = None
+        self._in_flight.clear()
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            for key in self.pop_due():
+                self._dispatch(key)
+
+            next_at = self.next_deadline()
+            timeout = None if next_at is None else max(0.0, next_at - self._clock())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _dispatch(self, key: str):
+        task = asyncio.create_task(self._fire(key))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _fire(self, key: str):
+        async with self._semaphore:
+            try:
+                await self._on_expire(key)
+            except Exception as e:
+                logger.error(f"{self.name}: expiry handler failed for {key}: {str(e)}")
@@ -0,0 +1,380 @@
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set
+
+from sqlalchemy import event as sa_event, func, or_
+from sqlalchemy.orm import Session
+
+from app.database import OutboxEvent, EventType, Call, Agent, Transfer, SessionLocal
+from app.config import settings
+from utils.metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+EVENT_SUBSCRIBERS = Gauge("event_bus_subscribers", "Connected event stream clients on this worker")
+EVENTS_PUBLISHED = Counter("event_bus_events_published_total", "Outbox events relayed to this worker's subscribers")
+SUBSCRIBERS_DROPPED = Counter("event_bus_subscribers_dropped_total", "Event stream clients disconnected for falling behind")
+
+# --- recording events (inside the caller's transaction) ---------------------
+
+def record_event(
+    db: Session,
+    event_type: EventType,
+    payload: Dict,
+    room_ids: Iterable[Optional[str]] = (),
+    agent_ids: Iterable[Optional[str]] = ()
+) -> OutboxEvent:
+    """Add an event to the session; it is saved (and later pushed) with the caller's commit"""
+    outbox_event = OutboxEvent(
+        event_type=event_type.value,
+        payload=payload,
+        room_ids=[room_id for room_id in room_ids if room_id],
+        agent_ids=[agent_id for agent_id in agent_ids if agent_id]
+    )
+    db.add(outbox_event)
+    db.info["outbox_pending"] = True
+    return outbox_event
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+def record_call_event(db: Session, event_type: EventType, call: Call) -> OutboxEvent:
+    return record_event(
+        db,
+        event_type,
+        {
+            "call_id": call.id,
+            "room_id": call.room_id,
+            "status": call.status,
+            "agent_a_id": call.agent_a_id,
+            "agent_b_id": call.agent_b_id,
+            "caller_name": call.caller_name,
+        },
+        room_ids=[call.room_id],
+        agent_ids=[call.agent_a_id, call.agent_b_id]
+    )
+
+def record_agent_event(db: Session, agent: Agent, event_type: EventType = EventType.AGENT_STATUS_CHANGED) -> OutboxEvent:
+    return record_event(
+        db,
+        event_type,
+        {"agent_id": agent.id, "status": agent.status, "current_room_id": agent.current_room_id},
+        room_ids=[agent.current_room_id],
+        agent_ids=[agent.id]
+    )
+
+def record_transfer_event(db: Session, event_type: EventType, transfer: Transfer, call: Optional[Call] = None) -> OutboxEvent:
+    return record_event(
+        db,
+        event_type,
+        {
+            "transfer_id": transfer.id,
+            "call_id": transfer.call_id,
+            "status": transfer.status,
+            "from_agent_id": transfer.from_agent_id,
+            "to_agent_id": transfer.to_agent_id,
+            "transfer_room_id": transfer.transfer_room_id,
+            "call_room_id": call.room_id if call is not None else None,
+            "call_status": call.status if call is not None else None,
+            "completed_at": _iso(transfer.completed_at),
+        },
+        room_ids=[call.room_id if call is not None else None, transfer.transfer_room_id],
+        agent_ids=[transfer.from_agent_id, transfer.to_agent_id]
+    )
+
+def event_to_dict(row: OutboxEvent) -> Dict:
+    return {
+        "id": row.id,
+        "type": row.event_type,
+        "room_ids": row.room_ids or [],
+        "agent_ids": row.agent_ids or [],
+        "payload": row.payload or {},
+        "created_at": _iso(row.created_at),
+    }
+
+# --- delivering events --------------------------------------------------------
+
+class Subscription:
+    """One connected client; events matching its filter are queued for it"""
+
+    def __init__(self, agent_id: Optional[str] = None, room_id: Optional[str] = None, max_queue: int = 1000):
+        self.agent_id = agent_id
+        self.room_id = room_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.closed = False
+
+    # No filter: everything. Otherwise events naming the agent or room, plus
+    # events addressed to no agent in particular (an unassigned waiting call)
+    # for agent subscribers.
+    def matches(self, event: Dict) -> bool:
+        if self.agent_id is None and self.room_id is None:
+            return True
+        if self.room_id is not None and self.room_id in event["room_ids"]:
+            return True
+        if self.agent_id is not None and (self.agent_id in event["agent_ids"] or not event["agent_ids"]):
+            return True
+        return False
+
+    async def get(self) -> Optional[Dict]:
+        """Next event, or None once the subscription was closed"""
+        return await self.queue.get()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        # make room for the sentinel so the reader wakes up and stops
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+# In-process fan-out fed by the outbox relay.
+# The relay tails outbox_events by id: one indexed query per poll per worker,
+# however many clients are connected. Commits made by this worker wake it up
+# immediately; events committed by other workers arrive within one poll
+# interval. Ids skipped because a lower-id transaction committed late are
+# re-checked for a few seconds so they aren't missed.
+#
+# The relay also keeps a change counter per collection, bumped for every
+# event that touches it, so polled listings can answer "nothing changed"
+# (and wait for a change) without querying. Counters are per process: the
+# version token carries an instance id so one worker's tokens never match
+# another's, or this worker's after a restart.
+
+class EventBus:
+    GAP_TIMEOUT_SECONDS = 5.0
+    BATCH_SIZE = 500
+    CLEANUP_INTERVAL_SECONDS = 60.0
+    # collection -> event type prefixes that change it
+    COLLECTIONS = {
+        "calls": ("call.", "transfer."),
+        "agents": ("agent.", "transfer."),
+        "transfers": ("transfer.", "call.archived"),
+    }
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self.poll_interval = settings.OUTBOX_POLL_INTERVAL_SECONDS
+        self.retention_seconds = settings.OUTBOX_RETENTION_SECONDS
+        self.max_queue = settings.EVENT_SUBSCRIBER_QUEUE_SIZE
+        self._subscriptions: Set[Subscription] = set()
+        self._cursor: Optional[int] = None
+        self._gaps: Dict[int, float] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_cleanup = 0.0
+        self.events_published = 0
+        self.subscribers_dropped = 0
+        self.instance_id = uuid.uuid4().hex[:12]
+        self._versions: Dict[str, int] = {collection: 0 for collection in self.COLLECTIONS}
+        self._changed: Optional[asyncio.Event] = None
+        self._listeners: List[Callable[[Dict], None]] = []
+
+    # --- subscriptions ----------------------------------------------------
+
+    def subscribe(self, agent_id: Optional[str] = None, room_id: Optional[str] = None) -> Subscription:
+        subscription = Subscription(agent_id, room_id, self.max_queue)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscriptions.discard(subscription)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscriptions)
+
+    def add_listener(self, listener: Callable[[Dict], None]):
+        """Call listener(event) for every relayed event, before subscribers get it"""
+        self._listeners.append(listener)
+
+    def publish(self, event: Dict):
+        """Hand an event to every matching subscriber on this worker"""
+        self.events_published += 1
+        for subscription in list(self._subscriptions):
+            if not subscription.matches(event):
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # the client replays from the outbox when it reconnects
+                logger.warning("Event subscriber fell behind; disconnecting it")
+                self.subscribers_dropped += 1
+                self.unsubscribe(subscription)
+                subscription.close()
+
+    # --- change versions ----------------------------------------------------
+
+    def _bump_versions(self, event_type: str):
+        changed = False
+        for collection, prefixes in self.COLLECTIONS.items():
+            if event_type.startswith(prefixes):
+                self._versions[collection] += 1
+                changed = True
+        if changed and self._changed is not None:
+            self._changed.set()
+            self._changed = None
+
+    def version_token(self, collections: Sequence[str]) -> Optional[str]:
+        """Opaque version of the given collections, or None while the relay isn't running"""
+        # Without the relay nothing bumps the counters; a token would go stale
+        if self._task is None or self._task.done():
+            return None
+        return f"{self.instance_id}-{sum(self._versions[collection] for collection in collections)}"
+
+    async def wait_for_change(self, collections: Sequence[str], token: str, timeout: float) -> bool:
+        """Wait until the collections' version differs from token; False on timeout"""
+        deadline = time.monotonic() + timeout
+        while self.version_token(collections) == token:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if self._changed is None:
+                self._changed = asyncio.Event()
+            try:
+                await asyncio.wait_for(self._changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    def replay(self, after_id: int, agent_id: Optional[str] = None, room_id: Optional[str] = None) -> List[Dict]:
+        """Stored events after after_id that match the filter, oldest first"""
+        matcher = Subscription(agent_id, room_id)
+        db = self.session_factory()
+        try:
+            rows = db.query(OutboxEvent).filter(OutboxEvent.id > after_id).order_by(OutboxEvent.id).all()
+            return [event for event in map(event_to_dict, rows) if matcher.matches(event)]
+        finally:
+            db.close()
+
+    # --- relay ------------------------------------------------------------
+
+    def notify(self):
+        """Wake the relay (safe to call from any thread)"""
+        if self._wakeup is None or self._loop is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._wakeup.set()
+        else:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def start(self):
+        if self._task is not None and not self._task.done():
+            return
+        db = self.session_factory()
+        try:
+            self._cursor = db.query(func.max(OutboxEvent.id)).scalar() or 0
+        finally:
+            db.close()
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="outbox-relay")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self._wakeup = None
+        self._loop = None
+        if self._changed is not None:
+            # long-polls return; the version token is gone now
+            self._changed.set()
+            self._changed = None
+        for subscription in list(self._subscriptions):
+            subscription.close()
+        self._subscriptions.clear()
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                while self.poll_once() >= self.BATCH_SIZE:
+                    pass
+                if time.monotonic() - self._last_cleanup >= self.CLEANUP_INTERVAL_SECONDS:
+                    self.cleanup()
+            except Exception as e:
+                logger.error(f"Outbox relay poll failed: {str(e)}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def poll_once(self) -> int:
+        """Publish events committed since the last poll; returns how many were read"""
+        if self._cursor is None:
+            self._cursor = 0
+        now = time.monotonic()
+        self._gaps = {gap_id: seen for gap_id, seen in self._gaps.items() if now - seen < self.GAP_TIMEOUT_SECONDS}
+
+        db = self.session_factory()
+        try:
+            condition = OutboxEvent.id > self._cursor
+            if self._gaps:
+                condition = or_(condition, OutboxEvent.id.in_(list(self._gaps)))
+            rows = db.query(OutboxEvent).filter(condition).order_by(OutboxEvent.id).limit(self.BATCH_SIZE).all()
+            events = [event_to_dict(row) for row in rows]
+        finally:
+            db.close()
+
+        for event in events:
+            if event["id"] in self._gaps:
+                del self._gaps[event["id"]]
+            elif event["id"] > self._cursor:
+                for missing in range(self._cursor + 1, event["id"]):
+                    self._gaps[missing] = now
+                self._cursor = event["id"]
+            self._bump_versions(event["type"])
+            for listener in self._listeners:
+                try:
+                    listener(event)
+                except Exception as e:
+                    logger.error(f"Event listener failed: {str(e)}")
+            self.publish(event)
+        return len(events)
+
+    def cleanup(self):
+        """Delete events older than the replay window"""
+        self._last_cleanup = time.monotonic()
+        cutoff = datetime.utcnow() - timedelta(seconds=self.retention_seconds)
+        db = self.session_factory()
+        try:
+            db.query(OutboxEvent).filter(OutboxEvent.created_at < cutoff).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def collect_metrics(self):
+        EVENT_SUBSCRIBERS.set(self.subscriber_count)
+        EVENTS_PUBLISHED.set(self.events_published)
+        SUBSCRIBERS_DROPPED.set(self.subscribers_dropped)
+
+    def snapshot(self) -> Dict:
+        return {
+            "subscribers": self.subscriber_count,
+            "cursor": self._cursor,
+            "events_published": self.events_published,
+            "subscribers_dropped": self.subscribers_dropped,
+            "versions": dict(self._versions),
+        }
+
+# Create singleton instance
+event_bus = EventBus()
+
+# Commits that carried an event wake this worker's relay straight away.
+@sa_event.listens_for(Session, "after_commit")
+def _wake_relay_after_commit(session):
+    if session.info.pop("outbox_pending", False):
+        event_bus.notify()
+
+@sa_event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_events(session):
+    session.info.pop("outbox_pending", None)
@@ -1,20 +1,58 @@
 import logging
 from app.config import settings
 from datetime import timedelta, datetime
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Callable, Awaitable, Any
+import asyncio
+import copy
+import time
 import uuid
+import aiohttp
+
+from services.resilience import (
+    ResilientExecutor, RetryPolicy, CircuitBreaker,
+    UpstreamError, UpstreamNotFound, UpstreamRejected, UpstreamUnavailable, UpstreamTimeout
+)
 
 logger = logging.getLogger(__name__)
 
 # LiveKit imports
 try:
-    from livekit.api import AccessToken, VideoGrants, CreateRoomRequest, RoomParticipantIdentity, TrackType, MuteRoomTrackRequest, SendDataRequest
+    from livekit.api import AccessToken, VideoGrants, CreateRoomRequest, ListRoomsRequest, ListParticipantsRequest, RoomParticipantIdentity, TrackType, MuteRoomTrackRequest, SendDataRequest, DeleteRoomRequest, TwirpError
 except ImportError:
     try:
-        from livekit import AccessToken, VideoGrants, CreateRoomRequest, RoomParticipantIdentity, TrackType, MuteRoomTrackRequest, SendDataRequest
+        from livekit import AccessToken, VideoGrants, CreateRoomRequest, ListRoomsRequest, ListParticipantsRequest, RoomParticipantIdentity, TrackType, MuteRoomTrackRequest, SendDataRequest, DeleteRoomRequest, TwirpError
     except ImportError:
         raise ImportError("LiveKit SDK not found. Install livekit-server-sdk.")
 
+# Twirp error codes that mean "try again later" rather than "your request is wrong"
+TRANSIENT_ERROR_CODES = {"unavailable", "resource_exhausted", "deadline_exceeded", "aborted", "internal", "dataloss"}
+
+# Deadlines (seconds) for operations that legitimately take longer than the default
+OPERATION_DEADLINES = {
+    "create_room": 10.0,
+}
+
+# Map raw SDK / transport exceptions to classified upstream errors.
+# Returns None for anything that isn't a LiveKit failure so it propagates as-is.
+
+def classify_livekit_error(exc: BaseException, operation: str) -> Optional[UpstreamError]:
+    if isinstance(exc, UpstreamError):
+        return exc
+    if isinstance(exc, asyncio.TimeoutError):
+        return UpstreamTimeout(f"LiveKit {operation} timed out")
+    if isinstance(exc, TwirpError):
+        code = getattr(exc, "code", "unknown")
+        status = getattr(exc, "status", 0) or 0
+        message = f"LiveKit {operation} failed: {code} {getattr(exc, 'message', '')}".strip()
+        if code == "not_found" or status == 404:
+            return UpstreamNotFound(message)
+        if status >= 500 or code in TRANSIENT_ERROR_CODES:
+            return UpstreamUnavailable(message)
+        return UpstreamRejected(message)
+    if isinstance(exc, (aiohttp.ClientError, ConnectionError, OSError)):
+        return UpstreamUnavailable(f"LiveKit {operation} unreachable: {str(exc)}")
+    return None
+
 class LiveKitService:
     def __init__(self):
         self.api_key = settings.LIVEKIT_API_KEY
@@ -22,18 +60,70 @@ class LiveKitService:
         self.ws_url = settings.LIVEKIT_WS_URL
         self._api = None
         self._room_service = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._init_lock = asyncio.Lock()
+        # room stats cache: (room_name, include_participants) -> (expires_at, stats)
+        self._stats_cache: Dict[tuple, tuple] = {}
+        # retries, deadlines and circuit breaking shared by every LiveKit API call
+        self._executor = ResilientExecutor(
+            "livekit",
+            classify_livekit_error,
+            retry=RetryPolicy(
+                max_attempts=settings.LIVEKIT_RETRY_ATTEMPTS,
+                base_delay=settings.LIVEKIT_RETRY_BASE_DELAY,
+                max_delay=settings.LIVEKIT_RETRY_MAX_DELAY
+            ),
+            breaker=CircuitBreaker(
+                "livekit",
+                failure_threshold=settings.LIVEKIT_BREAKER_FAILURE_THRESHOLD,
+                reset_timeout=settings.LIVEKIT_BREAKER_RESET_SECONDS
+            ),
+            deadline=settings.LIVEKIT_REQUEST_DEADLINE_SECONDS
+        )
+
+    async def start(self):
+        """
+        Create the LiveKit client and its pooled HTTP session.
+        Called once from the app's startup hook so the first request doesn't
+        pay for client construction and TLS setup.
+        """
+        if not self.ws_url:
+            logger.warning("LIVEKIT_WS_URL is not set; LiveKit client not started")
+            return
+        await self._ensure_api_initialized()
 
     async def _ensure_api_initialized(self):
-        if self._api is None:
+        if self._api is not None:
+            return
+        # concurrent first requests must not each build their own client
+        async with self._init_lock:
+            if self._api is not None:
+                return
             try:
                 from livekit import api as livekit_api
+            except ImportError:
+                raise ImportError("LiveKit API could not be initialized.")
+
+            # one keep-alive connection pool shared by every LiveKit service client
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=settings.LIVEKIT_HTTP_POOL_SIZE,
+                    keepalive_timeout=settings.LIVEKIT_HTTP_KEEPALIVE_SECONDS,
+                    ttl_dns_cache=300
+                ),
+                timeout=aiohttp.ClientTimeout(total=settings.LIVEKIT_REQUEST_DEADLINE_SECONDS)
+            )
+            try:
                 self._api = livekit_api.LiveKitAPI(
                     url=self.ws_url,
                     api_key=self.api_key,
-                    api_secret=self.api_secret
+                    api_secret=self.api_secret,
+                    session=session
                 )
-            except ImportError:
-                raise ImportError("LiveKit API could not be initialized.")
+            except Exception:
+                await session.close()
+                raise
+            self._session = session
             self._room_service = self._api.room
 
     async def get_api(self):
@@ -44,6 +134,22 @@ class LiveKitService:
         await self._ensure_api_initialized()
         return self._room_service
 
+    async def _call(self, operation: str, fn, idempotent: bool):
+        """Issue a LiveKit API call through the shared resilience layer"""
+        return await self._executor.call(
+            operation,
+            fn,
+            idempotent=idempotent,
+            deadline=OPERATION_DEADLINES.get(operation)
+        )
+
+    def health(self) -> Dict:
+        """Circuit breaker state and call counters for the LiveKit client"""
+        return self._executor.snapshot()
+
+    def collect_metrics(self):
+        self._executor.collect_metrics()
+
     def generate_access_token(
         self,
         room_name: str,
@@ -82,7 +188,11 @@ class LiveKitService:
                 max_participants=max_participants,
                 metadata=str(metadata) if metadata else None
             )
-            room = await room_service.create_room(room_options)
+            room = await self._call(
+                "create_room",
+                lambda: room_service.create_room(room_options),
+                idempotent=False
+            )
             return {
                 "room_id": room.name,
                 "sid": room.sid,
@@ -97,9 +207,13 @@ class LiveKitService:
     async def get_room(self, room_name: str) -> Optional[Dict]:
         try:
             room_service = await self.get_room_service()
-            rooms = await room_service.list_rooms([room_name])
-            if rooms:
-                room = rooms[0]
+            response = await self._call(
+                "list_rooms",
+                lambda: room_service.list_rooms(ListRoomsRequest(names=[room_name])),
+                idempotent=True
+            )
+            if response.rooms:
+                room = response.rooms[0]
                 return {
                     "room_id": room.name,
                     "sid": room.sid,
@@ -109,135 +223,301 @@ class LiveKitService:
                     "metadata": room.metadata
                 }
             return None
+        except UpstreamNotFound:
+            return None
         except Exception as e:
             logger.error(f"Error getting room {room_name}: {str(e)}")
-            return None
+            raise
+
+    async def _fetch_participants(self, room_name: str) -> list:
+        """Raw participant protos for a room; empty if the room doesn't exist"""
+        room_service = await self.get_room_service()
+        try:
+            response = await self._call(
+                "list_participants",
+                lambda: room_service.list_participants(ListParticipantsRequest(room=room_name)),
+                idempotent=True
+            )
+        except UpstreamNotFound:
+            return []
+        return list(response.participants)
 
     async def list_participants(self, room_name: str) -> List[Dict]:
         try:
-            room_service = await self.get_room_service()
-            participants = await room_service.list_participants(room_name)
-            return [
-                {
-                    "identity": p.identity,
-                    "name": p.name,
-                    "state": p.state.name if hasattr(p.state, 'name') else str(p.state),
-                    "tracks": [
-                        {
-                            "sid": t.sid,
-                            "name": t.name,
-                            "type": t.type.name if hasattr(t.type, 'name') else str(t.type),
-                            "muted": t.muted
-                        } for t in p.tracks
-                    ],
-                    "metadata": p.metadata,
-                    "joined_at": p.joined_at,
-                    "is_publisher": p.is_publisher
-                } for p in participants
-            ]
+            participants = await self._fetch_participants(room_name)
+            return [self._serialize_participant(p) for p in participants]
         except Exception as e:
             logger.error(f"Error listing participants in room {room_name}: {str(e)}")
-            return []
+            raise
+
+    @staticmethod
+    def _track_type_name(track_type) -> str:
+        if hasattr(track_type, "name"):
+            return track_type.name
+        # protobuf enums come back as plain ints
+        try:
+            return TrackType.Name(track_type)
+        except Exception:
+            return str(track_type)
+
+    def _serialize_participant(self, p) -> Dict:
+        return {
+            "identity": p.identity,
+            "name": p.name,
+            "state": p.state.name if hasattr(p.state, 'name') else str(p.state),
+            "tracks": [
+                {
+                    "sid": t.sid,
+                    "name": t.name,
+                    "type": self._track_type_name(t.type),
+                    "muted": t.muted
+                } for t in p.tracks
+            ],
+            "metadata": p.metadata,
+            "joined_at": p.joined_at,
+            "is_publisher": p.is_publisher
+        }
 
     async def remove_participant(self, room_name: str, participant_identity: str) -> bool:
         try:
             room_service = await self.get_room_service()
-            await room_service.remove_participants(
-                RoomParticipantIdentity(room=room_name, identity=participant_identity)
+            await self._call(
+                "remove_participant",
+                lambda: room_service.remove_participant(
+                    RoomParticipantIdentity(room=room_name, identity=participant_identity)
+                ),
+                idempotent=True
             )
+            self.invalidate_room_stats(room_name)
             return True
+        except UpstreamNotFound as e:
+            if e.attempts > 1:
+                # an earlier attempt removed them; only its answer was lost
+                self.invalidate_room_stats(room_name)
+                return True
+            logger.warning(f"Participant {participant_identity} not found in room {room_name}")
+            return False
         except Exception as e:
             logger.error(f"Error removing participant {participant_identity} from room {room_name}: {str(e)}")
-            return False
+            raise
 
-    async def mute_participant(self, room_name: str, participant_identity: str) -> bool:
+    async def mute_participant(
+        self,
+        room_name: str,
+        participant_identity: str,
+        track_type: Optional[str] = None,
+        muted: bool = True
+    ) -> bool:
         """
-        Mute all tracks of a participant.
-        This uses the latest LiveKit SDK signature.
+        Mute (or unmute) a participant's published tracks.
+        track_type limits the change to "audio" or "video" tracks; None or
+        "all" applies it to every track. Per-track requests run concurrently.
         """
         try:
             room_service = await self.get_room_service()
-            participants = await room_service.list_participants(room_name)
-            participant = next((p for p in participants if p.identity == participant_identity), None)
-            if not participant:
+            try:
+                participant = await self._call(
+                    "get_participant",
+                    lambda: room_service.get_participant(
+                        RoomParticipantIdentity(room=room_name, identity=participant_identity)
+                    ),
+                    idempotent=True
+                )
+            except UpstreamNotFound:
                 logger.warning(f"Participant {participant_identity} not found in room {room_name}")
                 return False
 
-            # Mute each track individually
-            for track in participant.tracks:
-                await room_service.mute_published_track(
-                    MuteRoomTrackRequest(
-                        room=room_name,
-                        identity=participant_identity,
-                        track_sid=track.sid,
-                        muted=True
-                    )
+            wanted = None if not track_type or track_type.lower() == "all" else track_type.upper()
+            tracks = [
+                t for t in participant.tracks
+                if wanted is None or self._track_type_name(t.type) == wanted
+            ]
+
+            def mute_track(track_sid: str):
+                request = MuteRoomTrackRequest(
+                    room=room_name,
+                    identity=participant_identity,
+                    track_sid=track_sid,
+                    muted=muted
                 )
+                return self._call(
+                    "mute_published_track",
+                    lambda: room_service.mute_published_track(request),
+                    idempotent=True
+                )
+
+            await asyncio.gather(*(mute_track(track.sid) for track in tracks))
+            self.invalidate_room_stats(room_name)
             return True
         except Exception as e:
-            logger.error(f"Error muting participant {participant_identity}: {str(e)}")
-            return False
+            action = "muting" if muted else "unmuting"
+            logger.error(f"Error {action} participant {participant_identity}: {str(e)}")
+            raise
+
+    async def unmute_participant(self, room_name: str, participant_identity: str, track_type: Optional[str] = None) -> bool:
+        """Unmute a participant's published tracks"""
+        return await self.mute_participant(room_name, participant_identity, track_type, muted=False)
 
     async def send_data_to_participants(self, room_name: str, data: str, participant_identity: Optional[str] = None) -> bool:
         try:
             room_service = await self.get_room_service()
             destinations = [participant_identity] if participant_identity else None
-            await room_service.send_data(
-                SendDataRequest(
-                    room=room_name,
-                    data=data.encode(),
-                    destination_sids=destinations
-                )
+            request = SendDataRequest(
+                room=room_name,
+                data=data.encode(),
+                destination_sids=destinations
+            )
+            # not retried: a retry after a lost response would deliver the message twice
+            await self._call(
+                "send_data",
+                lambda: room_service.send_data(request),
+                idempotent=False
             )
             return True
+        except UpstreamNotFound:
+            logger.warning(f"Room {room_name} not found when sending data")
+            return False
         except Exception as e:
             logger.error(f"Error sending data: {str(e)}")
-            return False
+            raise
+
+    async def run_for_rooms(
+        self,
+        room_ids: List[str],
+        operation: Callable[[str], Awaitable[Any]],
+        concurrency: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Run an operation against many rooms with bounded concurrency.
+        Duplicate room IDs are collapsed; each room gets its own result entry
+        so one failing room never fails the whole batch.
+        """
+        semaphore = asyncio.Semaphore(concurrency or settings.BULK_ROOM_CONCURRENCY)
+
+        async def run(room_id: str) -> Dict:
+            async with semaphore:
+                try:
+                    result = await operation(room_id)
+                    return {"room_id": room_id, "success": True, "result": result}
+                except Exception as e:
+                    logger.error(f"Bulk operation failed for room {room_id}: {str(e)}")
+                    return {"room_id": room_id, "success": False, "error": str(e)}
+
+        return list(await asyncio.gather(*(run(room_id) for room_id in dict.fromkeys(room_ids))))
 
     def generate_room_id(self, prefix: str = "room") -> str:
         return f"{prefix}_{uuid.uuid4().hex[:8]}_{int(datetime.now().timestamp())}"
 
-    async def get_room_stats(self, room_name: str) -> Dict:
+    async def get_room_stats(self, room_name: str, include_participants: bool = True) -> Dict:
+        """
+        Aggregate room statistics.
+        Room info and participants are fetched concurrently and counted in a
+        single pass; results are cached for ROOM_STATS_CACHE_TTL_SECONDS so
+        polling dashboards don't hit LiveKit on every request. Callers get a
+        copy, never the cached dict.
+        """
+        cache_key = (room_name, include_participants)
+        cached = self._stats_cache.get(cache_key)
+        if cached and cached[0] > time.monotonic():
+            return copy.deepcopy(cached[1])
+
         try:
-            room_info = await self.get_room(room_name)
-            participants = await self.list_participants(room_name)
+            room_info, raw_participants = await asyncio.gather(
+                self.get_room(room_name),
+                self._fetch_participants(room_name)
+            )
             if not room_info:
                 return {}
 
-            active_publishers = sum(1 for p in participants if p.get("is_publisher"))
-            audio_tracks = sum(1 for p in participants for t in p.get("tracks", []) if t.get("type") == "AUDIO")
-            video_tracks = sum(1 for p in participants for t in p.get("tracks", []) if t.get("type") == "VIDEO")
+            participant_count = 0
+            active_publishers = 0
+            audio_tracks = 0
+            video_tracks = 0
+            participants = []
+            for p in raw_participants:
+                participant_count += 1
+                if p.is_publisher:
+                    active_publishers += 1
+                for t in p.tracks:
+                    track_type = self._track_type_name(t.type)
+                    if track_type == "AUDIO":
+                        audio_tracks += 1
+                    elif track_type == "VIDEO":
+                        video_tracks += 1
+                if include_participants:
+                    participants.append(self._serialize_participant(p))
 
-            return {
+            stats = {
                 "room_info": room_info,
-                "participant_count": len(participants),
+                "participant_count": participant_count,
                 "active_publishers": active_publishers,
                 "audio_tracks": audio_tracks,
-                "video_tracks": video_tracks,
-                "participants": participants
+                "video_tracks": video_tracks
             }
+            if include_participants:
+                stats["participants"] = participants
+
+            if settings.ROOM_STATS_CACHE_TTL_SECONDS > 0:
+                self._prune_stats_cache()
+                self._stats_cache[cache_key] = (
+                    time.monotonic() + settings.ROOM_STATS_CACHE_TTL_SECONDS,
+                    copy.deepcopy(stats)
+                )
+            return stats
         except Exception as e:
             logger.error(f"Error getting room stats for {room_name}: {str(e)}")
-            return {}
+            raise
+
+    def _prune_stats_cache(self):
+        now = time.monotonic()
+        expired = [key for key, (expires_at, _) in self._stats_cache.items() if expires_at <= now]
+        for key in expired:
+            del self._stats_cache[key]
+
+    def invalidate_room_stats(self, room_name: str):
+        """Drop cached stats for a room after it changes"""
+        self._stats_cache.pop((room_name, True), None)
+        self._stats_cache.pop((room_name, False), None)
 
     async def close(self):
-        if self._api and hasattr(self._api, '_session'):
-            try:
-                await self._api._session.close()
-            except Exception as e:
-                logger.error(f"Error closing API session: {e}")
+        """Close the LiveKit client and its HTTP session (called on app shutdown)"""
+        async with self._init_lock:
+            api, session = self._api, self._session
+            self._api = None
+            self._room_service = None
+            self._session = None
+        try:
+            if api:
+                await api.aclose()
+            if session and not session.closed:
+                await session.close()
+        except Exception as e:
+            logger.error(f"Error closing API session: {e}")
 
 # close room
-    async def close_room(self, room_id: str):
-        """Close a specific LiveKit room"""
+    async def close_room(self, room_id: str) -> bool:
+        """Close a specific LiveKit room; False if it doesn't exist"""
         try:
-            # Later you can replace this with an actual LiveKit API call:
-            # await self.room_service.delete_room(room_id=room_id)
-            logger.info(f"Closed room {room_id}")
+            room_service = await self.get_room_service()
+            await self._call(
+                "delete_room",
+                lambda: room_service.delete_room(DeleteRoomRequest(room=room_id)),
+                idempotent=True
+            )
+            logger.info("Closed room", extra={"room_id": room_id})
             return True
+        except UpstreamNotFound as e:
+            if e.attempts > 1:
+                # an earlier attempt deleted it; only its answer was lost
+                logger.info("Closed room", extra={"room_id": room_id})
+                return True
+            logger.warning(f"Room {room_id} not found when closing it")
+            return False
         except Exception as e:
             logger.error(f"Error closing room {room_id}: {e}")
-            return False
+            raise
+        finally:
+            self.invalidate_room_stats(room_id)
 
 
 # Singleton factory
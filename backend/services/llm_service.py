@@ -1,11 +1,21 @@
 import logging
+import time
 from app.config import settings
 import openai
 from typing import Dict,List
 import json
+from utils.metrics import Counter, Histogram
+from utils.tracing import span, SPAN_KIND_CLIENT
 
 logger= logging.getLogger(__name__)
 
+LLM_REQUEST_DURATION = Histogram(
+    "llm_request_duration_seconds", "LLM API request latency by method and outcome", ("method", "outcome")
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "LLM tokens used by method and kind (prompt/completion)", ("method", "kind")
+)
+
 class LLMService:
     def __init__(self):
         self.provider = settings.DEFAULT_LLM_PROVIDER
@@ -46,6 +56,28 @@ class LLMService:
             logger.error(f"Error generating call summary: {str(e)}")
             return self._create_fallback_summary(transcript, caller_info)
 
+# Every chat completion goes through here: one place to time and trace
+# requests and count the tokens they used, per calling method.
+
+    async def _chat(self, method: str, **params):
+        started = time.perf_counter()
+        outcome = "error"
+        with span(f"llm.{method}", {"llm.provider": self.provider, "llm.model": params.get("model")},
+                  kind=SPAN_KIND_CLIENT) as llm_span:
+            try:
+                response = await openai.ChatCompletion.acreate(**params)
+                outcome = "ok"
+            finally:
+                LLM_REQUEST_DURATION.labels(method, outcome).observe(time.perf_counter() - started)
+
+            usage = getattr(response, "usage", None)
+            for kind in ("prompt_tokens", "completion_tokens"):
+                count = getattr(usage, kind, None)
+                if isinstance(count, int):
+                    LLM_TOKENS.labels(method, kind.split("_")[0]).inc(count)
+                    llm_span.set_attribute(f"llm.usage.{kind}", count)
+        return response
+
 # Create a structured prompt for the LLM to summarize a call,
 # including optional caller info, call duration, and the transcript,
 # and specify the output format for a warm transfer summary.
@@ -104,7 +136,8 @@ class LLMService:
         """Generate summary using OpenAi API"""
 
         try:
-            response = await openai.ChatCompletion.acreate(
+            response = await self._chat(
+                "summary",
                 model = "gpt-3.5-turbo",
                 messages = [
                     {"role":"system", "content":"You are a professional call center analyst specializing in creating clear, actionable call summaries for agent handoffs."},
@@ -177,7 +210,8 @@ class LLMService:
     """
         try:
             if self.provider == "openai":
-                response = await openai.ChatCompletion.acreate(
+                response = await self._chat(
+                    "transfer_context",
                     model="gpt-3.5-turbo",
                         messages=[
                             {"role": "system", "content": "You are helping create professional agent-to-agent transfer communications."},
@@ -219,7 +253,8 @@ class LLMService:
     """
         try:
             if self.provider == "openai":
-                response = await openai.ChatCompletion.acreate(
+                response = await self._chat(
+                    "sentiment",
                     model="gpt-3.5-turbo",
                         messages=[
                             {"role": "system", "content": "You are an expert in customer sentiment analysis. Always respond with valid JSON."},
@@ -0,0 +1,278 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+from utils.metrics import Counter, Gauge, Histogram
+from utils.tracing import span, current_span, SPAN_KIND_CLIENT
+
+logger = logging.getLogger(__name__)
+
+UPSTREAM_CALL_DURATION = Histogram(
+    "upstream_call_duration_seconds",
+    "External API latency by service and operation, retries included; outcome is ok or the error class",
+    ("service", "operation", "outcome")
+)
+BREAKER_STATE = Gauge("circuit_breaker_state", "1 for the breaker's current state, 0 for the others", ("breaker", "state"))
+BREAKER_REJECTIONS = Counter("circuit_breaker_rejections_total", "Calls rejected by an open circuit", ("breaker",))
+BREAKER_OPENED = Counter("circuit_breaker_opened_total", "Times the circuit opened", ("breaker",))
+UPSTREAM_RETRIES = Counter("upstream_retries_total", "Retried upstream attempts", ("service",))
+
+T = TypeVar("T")
+
+# Classified upstream errors.
+# Services translate raw SDK/transport exceptions into one of these so callers
+# can tell "not there" apart from "couldn't ask", and routers can map them to
+# a meaningful HTTP status instead of a blanket 500.
+
+class UpstreamError(Exception):
+    """Base class for failures talking to an external service"""
+    transient = False
+    http_status = 502
+
+    def __init__(self, message: str, service: str = "", operation: str = ""):
+        super().__init__(message)
+        self.service = service
+        self.operation = operation
+        # set by ResilientExecutor: >1 means an earlier attempt may have taken
+        # effect even though its answer was lost
+        self.attempts = 1
+
+class UpstreamNotFound(UpstreamError):
+    """The upstream resource does not exist"""
+    http_status = 404
+
+class UpstreamRejected(UpstreamError):
+    """The upstream refused the request (bad input, auth, precondition)"""
+    http_status = 502
+
+class UpstreamUnavailable(UpstreamError):
+    """Connection failures, 5xx responses and overload - safe to retry"""
+    transient = True
+    http_status = 503
+
+class UpstreamTimeout(UpstreamUnavailable):
+    """The operation did not finish within its deadline"""
+    http_status = 504
+
+class CircuitOpenError(UpstreamUnavailable):
+    """Calls are short-circuited while the upstream is known to be failing"""
+
+    def __init__(self, message: str, service: str = "", operation: str = "", retry_after: float = 0.0):
+        super().__init__(message, service, operation)
+        self.retry_after = retry_after
+
+# Jittered exponential backoff ("full jitter"): the delay before retry n is
+# uniform in [0, min(max_delay, base_delay * 2**(n-1))].
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 3
+    base_delay: float = 0.1
+    max_delay: float = 2.0
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before the retry that follows the given (1-based) attempt"""
+        cap = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, cap)
+
+# Consecutive-failure circuit breaker.
+# closed -> open after failure_threshold transient failures in a row;
+# open -> half_open once reset_timeout has passed, letting one probe through;
+# the probe's outcome closes or re-opens the circuit.
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self.total_failures = 0
+        self.total_rejections = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self._state
+
+    def before_call(self, operation: str = ""):
+        """Raise CircuitOpenError if the call must not go out"""
+        state = self.state
+        if state == self.CLOSED:
+            return
+        if state == self.HALF_OPEN and not self._probe_in_flight:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = True
+            return
+        self.total_rejections += 1
+        retry_after = max(0.0, self.reset_timeout - (self._clock() - self._opened_at)) if self._opened_at is not None else 0.0
+        raise CircuitOpenError(
+            f"{self.name} circuit is open",
+            service=self.name,
+            operation=operation,
+            retry_after=retry_after
+        )
+
+    def record_success(self):
+        if self._state != self.CLOSED:
+            logger.info(f"{self.name} circuit closed")
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+
+    def release_probe(self):
+        """Let another probe through when the last one ended without a verdict"""
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.total_failures += 1
+        self._consecutive_failures += 1
+        self._probe_in_flight = False
+        if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                self.times_opened += 1
+                logger.warning(f"{self.name} circuit opened after {self._consecutive_failures} consecutive failures")
+            self._state = self.OPEN
+            self._opened_at = self._clock()
+
+    def snapshot(self) -> Dict:
+        """Exportable view of the breaker for health and metrics endpoints"""
+        return {
+            "name": self.name,
+            "state": self.state,
+            "consecutive_failures": self._consecutive_failures,
+            "total_failures": self.total_failures,
+            "total_rejections": self.total_rejections,
+            "times_opened": self.times_opened
+        }
+
+# Runs upstream calls with a per-operation deadline, retries transient
+# failures of idempotent operations, and feeds outcomes to the breaker.
+# `classify` maps a raw exception to an UpstreamError, or returns None for
+# exceptions that are not upstream failures (those propagate unchanged).
+
+class ResilientExecutor:
+    def __init__(
+        self,
+        name: str,
+        classify: Callable[[BaseException, str], Optional[UpstreamError]],
+        retry: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        deadline: float = 10.0
+    ):
+        self.name = name
+        self.classify = classify
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker(name)
+        self.deadline = deadline
+        self.total_calls = 0
+        self.total_retries = 0
+
+    async def call(
+        self,
+        operation: str,
+        fn: Callable[[], Awaitable[T]],
+        *,
+        idempotent: bool,
+        deadline: Optional[float] = None
+    ) -> T:
+        started = time.perf_counter()
+        outcome = "ok"
+        with span(f"{self.name}.{operation}", {"peer.service": self.name, "idempotent": idempotent},
+                  kind=SPAN_KIND_CLIENT) as call_span:
+            try:
+                return await self._call(operation, fn, idempotent, deadline)
+            except asyncio.CancelledError:
+                outcome = "cancelled"
+                raise
+            except Exception as e:
+                outcome = type(e).__name__ if isinstance(e, UpstreamError) else "error"
+                raise
+            finally:
+                call_span.set_attribute("outcome", outcome)
+                UPSTREAM_CALL_DURATION.labels(self.name, operation, outcome).observe(time.perf_counter() - started)
+
+    async def _call(
+        self,
+        operation: str,
+        fn: Callable[[], Awaitable[T]],
+        idempotent: bool,
+        deadline: Optional[float]
+    ) -> T:
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + (deadline or self.deadline)
+        self.total_calls += 1
+        attempt = 0
+
+        while True:
+            attempt += 1
+            current_span().set_attribute("attempts", attempt)
+            self.breaker.before_call(operation)
+            remaining = deadline_at - loop.time()
+            try:
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                result = await asyncio.wait_for(fn(), timeout=remaining)
+            except asyncio.CancelledError:
+                # the caller gave up: no verdict on the upstream, but a
+                # half-open probe must not stay claimed forever
+                self.breaker.release_probe()
+                raise
+            except Exception as exc:
+                error = self.classify(exc, operation)
+                if error is None:
+                    self.breaker.release_probe()
+                    raise
+                error.service = error.service or self.name
+                error.operation = error.operation or operation
+                error.attempts = attempt
+
+                if error.transient:
+                    self.breaker.record_failure()
+                else:
+                    # a definitive answer means the upstream itself is healthy
+                    self.breaker.record_success()
+
+                if not (error.transient and idempotent and attempt < self.retry.max_attempts):
+                    raise error from exc
+
+                delay = self.retry.backoff(attempt)
+                if loop.time() + delay >= deadline_at:
+                    raise error from exc
+                self.total_retries += 1
+                logger.warning(f"{self.name}.{operation} attempt {attempt} failed ({error}); retrying in {delay:.3f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            self.breaker.record_success()
+            return result
+
+    # Copy breaker state and counters into the metrics; runs on every scrape.
+
+    def collect_metrics(self):
+        breaker = self.breaker.snapshot()
+        for state in (CircuitBreaker.CLOSED, CircuitBreaker.OPEN, CircuitBreaker.HALF_OPEN):
+            BREAKER_STATE.labels(breaker["name"], state).set(1 if breaker["state"] == state else 0)
+        BREAKER_REJECTIONS.labels(breaker["name"]).set(breaker["total_rejections"])
+        BREAKER_OPENED.labels(breaker["name"]).set(breaker["times_opened"])
+        UPSTREAM_RETRIES.labels(self.name).set(self.total_retries)
+
+    def snapshot(self) -> Dict:
+        return {
+            "breaker": self.breaker.snapshot(),
+            "total_calls": self.total_calls,
+            "total_retries": self.total_retries
+        }
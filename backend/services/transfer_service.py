@@ -1,33 +1,175 @@
+import asyncio
 import logging
+import os
+import socket
+from contextlib import contextmanager
 from typing import Dict,List
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.database import (
-    Call, Agent, Transfer, CallStatus, AgentStatus, TransferStatus,
-    get_db, create_transfer
+    Call, Agent, Transfer, CallStatus, AgentStatus, TransferStatus, EventType,
+    SessionLocal, create_transfer, first_or_primary, transaction
 )
 from services.livekit_service import livekit_service
-from datetime import datetime
+from services.resilience import UpstreamError
+from datetime import datetime, timedelta, timezone
 from services.llm_service import llm_service
-import asyncio
+from services.deadline_scheduler import DeadlineScheduler
+from services.event_bus import record_transfer_event
+from services.transfer_store import (
+    ActiveTransferStore, PENDING_TRANSFER_STATUSES, create_active_transfer_store, transfer_info
+)
 from app.config import settings
+from utils.metrics import Gauge, Histogram
+from utils.tracing import span
 
 logger = logging.getLogger(__name__)
 
+TRANSFER_PHASE_DURATION = Histogram(
+    "transfer_phase_duration_seconds", "Warm transfer initiation time by phase", ("phase",)
+)
+ACTIVE_TRANSFERS = Gauge("active_transfers", "Transfers initiated or in progress")
+ARMED_TRANSFER_DEADLINES = Gauge("transfer_deadlines_armed", "Transfer timeouts this worker holds the lease on")
+
+
+# One step of a transfer: timed into the phase histogram and traced as a
+# child span of the transfer, so a slow transfer shows which step was slow.
+@contextmanager
+def _phase(name: str):
+    with TRANSFER_PHASE_DURATION.labels(name).time(), span(f"transfer.{name}"):
+        yield
+
+# Allowed transfer status changes: initiated -> in_progress -> completed,
+# and any pending transfer can fail (cancel, timeout, initiation error).
+TRANSFER_TRANSITIONS = {
+    TransferStatus.INITIATED.value: {TransferStatus.IN_PROGRESS.value, TransferStatus.FAILED.value},
+    TransferStatus.IN_PROGRESS.value: {TransferStatus.COMPLETED.value, TransferStatus.FAILED.value},
+    TransferStatus.COMPLETED.value: set(),
+    TransferStatus.FAILED.value: set(),
+}
+
+class InvalidTransferTransition(ValueError):
+    """The transfer is not in a state that allows the requested change"""
+
+class TransferConflict(ValueError):
+    """The call or an agent changed state while the transfer was being set up"""
+
 class TransferService:
-    def __init__(self):
-        self.active_transfers = {} #tracks ongoing transfer
-        self.transfer_timeouts = {} #tracks transfer timeouts
-
-    # This function manages the entire warm transfer:
-    # 1. Get the call and agent details
-    # 2. Check if transfer is possible
-    # 3. Update the call and agent status in the database
-    # 4. Save the transfer record
-    # 5. Ask the AI to create a call summary and transfer message
-    # 6. Create a special LiveKit room for both agents
-    # 7. Generate tokens so agents can join the room
-    # 8. Return all transfer details to the frontend
-    # If anything fails, mark the transfer as failed
+    RECOVERY_BATCH_SIZE = 500
+
+    def __init__(self, session_factory=SessionLocal, store: ActiveTransferStore = None):
+        self.session_factory = session_factory
+        # active transfers and timeout leases live in the store so every
+        # worker process sees the same picture
+        self.store = store or create_active_transfer_store(session_factory=session_factory)
+        self.worker_id = settings.WORKER_ID or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = settings.TRANSFER_LEASE_SECONDS
+        # one background loop for the deadlines this worker holds leases on;
+        # deadlines are also persisted on transfers.timeout_at so they survive restarts
+        self.timeout_scheduler = DeadlineScheduler(self._handle_transfer_timeout, name="transfer-timeouts")
+        self._lease_task = None
+
+    # Start the timeout loop and claim deadlines for pending transfers nobody
+    # holds a lease on (left over from a restart or a dead worker); overdue
+    # ones are cancelled straight away.
+
+    async def start(self):
+        """Start transfer timeouts and recover pending transfers from the database"""
+
+        db = self.session_factory()
+        try:
+            recovered = await self.recover_pending_transfers(db)
+        finally:
+            db.close()
+        await self.timeout_scheduler.start()
+        if self._lease_task is None:
+            self._lease_task = asyncio.create_task(self._lease_loop(), name="transfer-leases")
+        if recovered:
+            logger.info(f"Recovered {recovered} pending transfer timeouts")
+
+    async def stop(self):
+        """Stop the timeout loop and hand our leases back (deadlines stay persisted)"""
+
+        if self._lease_task is not None:
+            self._lease_task.cancel()
+            await asyncio.gather(self._lease_task, return_exceptions=True)
+            self._lease_task = None
+        await self.timeout_scheduler.stop()
+        for transfer_id in self.timeout_scheduler.keys():
+            try:
+                await self.store.release_lease(transfer_id, self.worker_id)
+            except Exception as e:
+                logger.warning(f"Could not release timeout lease for {transfer_id}: {str(e)}")
+            self.timeout_scheduler.cancel(transfer_id)
+
+    async def recover_pending_transfers(self, db: Session) -> int:
+        """Claim and arm timeouts for pending transfers without a live lease"""
+
+        # runs on every lease tick: read just what's needed to arm a deadline
+        pending = db.query(Transfer.id, Transfer.timeout_at, Transfer.initiated_at).filter(
+            Transfer.status.in_(PENDING_TRANSFER_STATUSES)
+        ).all()
+        unarmed = {row.id: row for row in pending if row.id not in self.timeout_scheduler}
+        if not unarmed:
+            return 0
+
+        claimed = await self.store.claim_leases(self.worker_id, list(unarmed), self.lease_seconds)
+        for start in range(0, len(claimed), self.RECOVERY_BATCH_SIZE):
+            batch = claimed[start:start + self.RECOVERY_BATCH_SIZE]
+            rows = db.query(
+                Transfer.id, Transfer.call_id, Transfer.transfer_room_id, Transfer.from_agent_id,
+                Transfer.to_agent_id, Transfer.status, Transfer.initiated_at
+            ).filter(Transfer.id.in_(batch)).all()
+            for transfer in rows:
+                deadline = unarmed[transfer.id]
+                # transfers created before timeout_at existed fall back to initiated_at
+                timeout_at = deadline.timeout_at or (
+                    (deadline.initiated_at or datetime.utcnow()) + timedelta(seconds=settings.MAX_TRANSFER_WAIT_TIME)
+                )
+                await self.store.add(transfer.id, transfer_info(transfer))
+                self._set_transfer_timeout(transfer.id, timeout_at)
+        return len(claimed)
+
+    # Every third of a lease: renew the leases behind our armed deadlines,
+    # drop the ones another worker took over, and pick up orphaned ones.
+
+    async def _lease_loop(self):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await self.maintain_leases()
+            except Exception as e:
+                logger.error(f"Error maintaining transfer timeout leases: {str(e)}")
+
+    async def maintain_leases(self):
+        """Renew held timeout leases and claim lapsed ones"""
+
+        armed = self.timeout_scheduler.keys()
+        if armed:
+            held = set(await self.store.renew_leases(self.worker_id, armed, self.lease_seconds))
+            for transfer_id in armed:
+                if transfer_id not in held:
+                    self.timeout_scheduler.cancel(transfer_id)
+
+        db = self.session_factory()
+        try:
+            await self.recover_pending_transfers(db)
+        finally:
+            db.close()
+
+    # This function manages the entire warm transfer as two state transitions:
+    # 1. Get the call and agent details and check if transfer is possible
+    # 2. -> initiated (one transaction): call becomes transferring, both
+    #    agents busy, transfer record saved. The call and target agent are
+    #    claimed with conditional updates so two concurrent transfers can't
+    #    both win.
+    # 3. Outside any transaction: ask the AI for a call summary, create a
+    #    special LiveKit room for both agents, generate access tokens
+    # 4. -> in_progress (one transaction): record summary and room
+    # 5. Return all transfer details to the frontend
+    # If a step after 2 fails, the transfer moves to failed and the call and
+    # agents are put back the way they were.
+    # The whole initiation is one span; each step is a child span (_phase).
 
     async def initiate_warm_transfer(
         self,
@@ -39,114 +181,140 @@ class TransferService:
     ) -> Dict :
         """Initiate a warm transfer process"""
 
-        logger.info(f"Initiating warm transfer for call {call_id} from {from_agent_id} to {to_agent_id}")
+        with span("transfer.initiate", {"call.id": call_id, "transfer.from_agent_id": from_agent_id,
+                                        "transfer.to_agent_id": to_agent_id}) as transfer_span:
+            result = await self._initiate_warm_transfer(call_id, from_agent_id, to_agent_id, reason, db)
+            transfer_span.set_attribute("transfer.success", result["success"])
+            transfer_span.set_attribute("transfer.id", result.get("transfer_id"))
+            return result
 
-        try:
-            # get call and agents from database
-            call = db.query(Call).filter(Call.id == call_id).first()
-            from_agent = db.query(Agent).filter(Agent.id == from_agent_id).first()
-            to_agent = db.query(Agent).filter(Agent.id == to_agent_id).first()
+    async def _initiate_warm_transfer(self, call_id, from_agent_id, to_agent_id, reason, db) -> Dict:
+        logger.info("Initiating warm transfer", extra={"call_id": call_id, "from_agent_id": from_agent_id, "to_agent_id": to_agent_id})
 
-            if not call or not from_agent or not to_agent:
-                raise ValueError("call or agent not found")
-            
-            # validate transfer condition
-            validate_result = await self._validate_transfer_conditions(
-                call, from_agent, to_agent, db
-            )
+        try:
+            with _phase("validate"):
+                # get call and agents from database
+                call = db.query(Call).filter(Call.id == call_id).first()
+                from_agent = db.query(Agent).filter(Agent.id == from_agent_id).first()
+                to_agent = db.query(Agent).filter(Agent.id == to_agent_id).first()
+
+                if not call or not from_agent or not to_agent:
+                    raise ValueError("call or agent not found")
+                
+                # validate transfer condition
+                validate_result = await self._validate_transfer_conditions(
+                    call, from_agent, to_agent, db
+                )
 
             if not validate_result["valid"]:
                 return {"success":False , "error": validate_result["error"]}
-            
-            # update call status to transferring
-            call.status = CallStatus.TRANSFERRING.value
-            db.commit()
-
-            # create transfer record
-            transfer = create_transfer(
-                db=db,
-                call_id=call_id,
-                from_agent_id=from_agent_id,
-                to_agent_id=to_agent_id,
-                reason=reason
-            )
 
-            # generate call summary using LLM
-            summary = await self._generate_transfer_summary(call,db)
-            transfer.summary_shared = summary
+            # transition: -> initiated
+            with _phase("initiated"), transaction(db):
+                if not self._claim_status(db, Call, call_id, CallStatus.ACTIVE.value, CallStatus.TRANSFERRING.value):
+                    raise TransferConflict("Call is not in active state")
+                if not self._claim_status(db, Agent, to_agent_id, AgentStatus.AVAILABLE.value, AgentStatus.BUSY.value):
+                    raise TransferConflict("Target agent is not available")
+                from_agent.status = AgentStatus.BUSY.value
+
+                transfer = create_transfer(
+                    db=db,
+                    call_id=call_id,
+                    from_agent_id=from_agent_id,
+                    to_agent_id=to_agent_id,
+                    reason=reason,
+                    commit=False
+                )
+                transfer.timeout_at = datetime.utcnow() + timedelta(seconds=settings.MAX_TRANSFER_WAIT_TIME)
+                record_transfer_event(db, EventType.TRANSFER_INITIATED, transfer, call)
+
+        except TransferConflict as e:
+            return {"success":False, "error":str(e)}
+        except Exception as e:
+            logger.error(f"Error initiating warm transfer {str(e)}")
+            return {"success":False, "error":str(e)}
+
+        # from here on the transfer exists; arm its timeout so it can't be stranded
+        await self.store.add(transfer.id, transfer_info(transfer))
+        if await self.store.acquire_lease(transfer.id, self.worker_id, self.lease_seconds):
+            self._set_transfer_timeout(transfer.id, transfer.timeout_at)
 
-            # create transfer room for agent-to-agnet conversation
-            transfer_room_id = livekit_service.generate_room_id("transfer")
-            transfer_room = await livekit_service.create_room(
-                room_name = transfer_room_id,
-                max_participants = 3,
-                metadata = {"type":"transfer", "call_id":call_id, "transfer_id":transfer.id}
-            )
+        transfer_room_id = None
+        try:
+            # generate call summary using LLM (saved with the next transition)
+            with _phase("summary"):
+                summary = await self._generate_transfer_summary(call)
 
-            transfer.transfer_room_id = transfer_room_id
-            db.commit()
+            # create transfer room for agent-to-agnet conversation
+            with _phase("room"):
+                transfer_room_id = livekit_service.generate_room_id("transfer")
+                await livekit_service.create_room(
+                    room_name = transfer_room_id,
+                    max_participants = 3,
+                    metadata = {"type":"transfer", "call_id":call_id, "transfer_id":transfer.id}
+                )
 
             # generate  access token for both agents
-            from_agent_token = livekit_service.generate_access_token(
-                room_name = transfer_room_id,
-                participant_identity = f"agent_{from_agent.id}",
-                participant_name = from_agent.name
-            )
+            with _phase("tokens"):
+                from_agent_token = livekit_service.generate_access_token(
+                    room_name = transfer_room_id,
+                    participant_identity = f"agent_{from_agent.id}",
+                    participant_name = from_agent.name
+                )
+
+                to_agent_token = livekit_service.generate_access_token(
+                    room_name = transfer_room_id,
+                    participant_identity = f"agent_{to_agent.id}",
+                    participant_name = to_agent.name
+                )
+
+            # transition: initiated -> in_progress
+            with _phase("in_progress"), transaction(db):
+                self._transition(db, transfer, TransferStatus.IN_PROGRESS)
+                transfer.summary_shared = summary
+                transfer.transfer_room_id = transfer_room_id
+                record_transfer_event(db, EventType.TRANSFER_IN_PROGRESS, transfer, call)
 
-            to_agent_token = livekit_service.generate_access_token(
-                room_name = transfer_room_id,
-                participant_identity = f"agent_{to_agent.id}",
-                participant_name = to_agent.name
-            )
-
-            # update agent statuses
-            to_agent.status = AgentStatus.BUSY.value
-            from_agent.status = AgentStatus.BUSY.value
-            db.commit()
-
-            # store transfer in active transfers
-            self.active_transfers[transfer.id] = {
-                "call_id": call_id,
-                "transfer_room_id": transfer_room_id,
-                "from_agent_id": from_agent_id,
-                "to_agent_id": to_agent_id,
-                "status": TransferStatus.INITIATED.value,
-                "created_at": datetime.now()
-            }
+        except Exception as e:
+            logger.error(f"Error initiating warm transfer {str(e)}")
+            await self._fail_transfer(transfer, call, from_agent, to_agent, db)
+            if transfer_room_id:
+                await self._close_transfer_room(transfer_room_id)
+            return {"success":False, "error":str(e)}
 
-            # set timeout for transfer completion
-            await self._set_transfer_timeout(transfer.id)
+        await self.store.add(transfer.id, transfer_info(transfer))
 
-            # generate transfer context for speaking
+        # generate transfer context for speaking
+        with _phase("context"):
             transfer_context = await llm_service.generate_transfer_context(
                 summary=summary,
                 transfer_reason = reason or "Specialized assistance required",
                 agent_skills = to_agent.skills
             )
 
-            return {
-                "success":True,
-                 "transfer_id": transfer.id,
-                "transfer_room_id": transfer_room_id,
-                "from_agent_token": from_agent_token,
-                "to_agent_token": to_agent_token,
-                "summary": summary,
-                "transfer_context": transfer_context,
-                "call_room_id": call.room_id
-            }
-        
-        except Exception as e:
-            logger.error(f"Error initiating warm transfer {str(e)}")
-            # rollback any changes
-
-            if 'transfer' in locals():
-                transfer.status = TransferStatus.FAILED.value
-                db.commit()
-            return {"success":False, "error":str(e)}    
+        return {
+            "success":True,
+             "transfer_id": transfer.id,
+            "status": transfer.status,
+            "call_id": call_id,
+            "from_agent_id": from_agent_id,
+            "to_agent_id": to_agent_id,
+            "initiated_at": transfer.initiated_at,
+            "completed_at": transfer.completed_at,
+            "duration_seconds": transfer.duration_seconds or 0,
+            "reason": reason,
+            "transfer_room_id": transfer_room_id,
+            "from_agent_token": from_agent_token,
+            "to_agent_token": to_agent_token,
+            "summary": summary,
+            "transfer_context": transfer_context,
+            "call_room_id": call.room_id
+        }
 
-    # Finalize the warm transfer:
-    # move customer from Agent A to Agent B, update call/agent records,
-    # close transfer room, cancel timers, and return new call details.
+    # Finalize the warm transfer (in_progress -> completed):
+    # move customer from Agent A to Agent B and update call/agent records in
+    # one transaction; then remove Agent A from the call room, close the
+    # transfer room, cancel timers, and return new call details.
 
     async def complete_warm_transfer(
             self,
@@ -155,7 +323,7 @@ class TransferService:
     )->Dict:
         """Complete the warm transfer by moving customer to agent b"""
 
-        logger.info(f"Completing warm transfer {transfer_id}")
+        logger.info("Completing warm transfer", extra={"transfer_id": transfer_id})
 
         try:
             # get transfer record
@@ -167,9 +335,23 @@ class TransferService:
             from_agent = db.query(Agent).filter(Agent.id == transfer.from_agent_id).first()
             to_agent = db.query(Agent).filter(Agent.id == transfer.to_agent_id).first()
 
-            # update call to assign agent b
-            call.agent_b_id = transfer.to_agent_id
-            call.status = CallStatus.ACTIVE.value
+            with transaction(db):
+                self._transition(db, transfer, TransferStatus.COMPLETED)
+                transfer.completed_at = datetime.utcnow()
+                transfer.timeout_at = None
+                transfer.duration_seconds = int(
+                    (transfer.completed_at - transfer.initiated_at).total_seconds()
+                )
+
+                # update call to assign agent b
+                call.agent_b_id = transfer.to_agent_id
+                call.status = CallStatus.ACTIVE.value
+
+                # update agent statuses
+                from_agent.status = AgentStatus.AVAILABLE.value
+                from_agent.current_room_id = None
+                to_agent.current_room_id = call.room_id
+                record_transfer_event(db, EventType.TRANSFER_COMPLETED, transfer, call)
 
             # generate access token for agent b to join the original call 
             to_agent_call_token = livekit_service.generate_access_token(
@@ -178,39 +360,23 @@ class TransferService:
                 participant_name = to_agent.name
             )
 
-            # remove agent a from original call room
-            await livekit_service.remove_participant(
-                room_name = call.room_id,
-                participant_identity = f"agent_{from_agent.id}"
-            )
-
-            # update transfer status
-            transfer.status = TransferStatus.COMPLETED.value
-            transfer.completed_at = datetime.now()
-            transfer.duration_seconds = int(
-                (datetime.now() - transfer.initiated_at).total_seconds()
-            )
+            # remove from active transfers and cancel timeout
+            await self._forget_transfer(transfer_id)
 
-            # update agent statuses
-            from_agent.status = AgentStatus.AVAILABLE.value
-            from_agent.current_room_id = None
-            to_agent.current_room_id = call.room_id
-
-            db.commit()
+            # remove agent a from original call room; best effort, the handoff
+            # is already recorded and must not fail because LiveKit is briefly unreachable
+            try:
+                await livekit_service.remove_participant(
+                    room_name = call.room_id,
+                    participant_identity = f"agent_{from_agent.id}"
+                )
+            except UpstreamError as e:
+                logger.warning(f"Could not remove agent {from_agent.id} from room {call.room_id}: {str(e)}")
 
             # clean up transfer room
-            await livekit_service.close_room(transfer.transfer_room_id)
-
-            # remove from active transfers
-            if transfer_id in self.active_transfers:
-                del self.active_transfers[transfer_id]
+            await self._close_transfer_room(transfer.transfer_room_id)
 
-            # cancel timeout
-            if transfer_id in self.transfer_timeouts:
-                self.transfer_timeouts[transfer_id].cancel()
-                del self.transfer_timeouts[transfer_id]
-
-            logger.info(f"Warm transfer {transfer_id} completed successfully")
+            logger.info("Warm transfer completed", extra={"transfer_id": transfer_id})
 
             return {
                 "success": True,
@@ -223,9 +389,9 @@ class TransferService:
             logger.error(f"Error completing warm transfer : {str(e)}")
             return {"success":False, "error":str(e)}
         
-    # Cancel an ongoing transfer:
-    # mark transfer as failed, reset agent statuses,
-    # clean up transfer room and tracking, and return result.
+    # Cancel an ongoing transfer (initiated/in_progress -> failed):
+    # mark transfer as failed and put the call and agents back in one
+    # transaction, then clean up transfer room and tracking.
 
     async def cancel_transfer(
             self,
@@ -235,52 +401,99 @@ class TransferService:
     )->Dict:
         """Cancel an ongoing transfer"""
 
-        logger.info(f"Cancelling transfer {transfer_id}")
+        logger.info("Cancelling transfer", extra={"transfer_id": transfer_id})
 
         try:
             transfer = db.query(Transfer).filter(Transfer.id == transfer_id).first()
             if not transfer:
                 return {"success":False, "error":"Transfer not found"}
             
-            # update transfer status
-            transfer.status = TransferStatus.FAILED.value
-            transfer.completed_at = datetime.now()
-
             # get related records
             call = db.query(Call).filter(Call.id == transfer.call_id).first()
             from_agent = db.query(Agent).filter(Agent.id == transfer.from_agent_id).first()
             to_agent = db.query(Agent).filter(Agent.id == transfer.to_agent_id).first()
 
-            # reset call ststus
-            from_agent.status = AgentStatus.BUSY.value
-            to_agent.status = AgentStatus.AVAILABLE.value
+            with transaction(db):
+                self._apply_failure(db, transfer, call, from_agent, to_agent)
 
-            db.commit()
+            # clean up tracking
+            await self._forget_transfer(transfer_id)
 
             # clean up transfer room
             if transfer.transfer_room_id:
-                await livekit_service.close_room(transfer.transfer_room_id)
-
-            # clean up tracking
-            if transfer_id in self.active_transfers:
-                del self.active_transfers[transfer_id]
-            
-            if transfer_id in self.transfer_timeouts:
-                self.transfer_timeouts[transfer_id].cancel()
-                del self.transfer_timeouts[transfer_id]
+                await self._close_transfer_room(transfer.transfer_room_id)
                 
             return {"success":True, "message":"Transfer cancelled"}
 
         except Exception as e:
             logger.error(f"Error cancelling transfer: {str(e)}")
             return {"success":False, "error":str(e)}
+
+    # State machine helpers.
+    # Every status change goes through _transition, which rejects moves the
+    # table above doesn't allow (completing a cancelled transfer, cancelling
+    # a completed one, ...). The change itself is a conditional update on the
+    # status that was read, so when completion and a timeout race on two
+    # workers only the first one to write wins; the other raises and its
+    # transaction rolls back.
+
+    def _transition(self, db: Session, transfer: Transfer, new_status: TransferStatus):
+        """Move transfer to new_status or raise InvalidTransferTransition"""
+        # rows that were never flushed carry the column default
+        current = transfer.status or TransferStatus.INITIATED.value
+        if new_status.value not in TRANSFER_TRANSITIONS.get(current, set()):
+            raise InvalidTransferTransition(f"Cannot move transfer from {current} to {new_status.value}")
+        if not self._claim_status(db, Transfer, transfer.id, current, new_status.value):
+            raise InvalidTransferTransition(f"Transfer is no longer {current}")
+        transfer.status = new_status.value
+
+    def _claim_status(self, db: Session, model, row_id: str, expected: str, new: str) -> bool:
+        """Conditionally update model.status; False if the row was no longer in `expected`"""
+        return bool(
+            db.query(model)
+            .filter(model.id == row_id, model.status == expected)
+            .update({model.status: new}, synchronize_session="fetch")
+        )
+
+    def _apply_failure(self, db: Session, transfer: Transfer, call: Call, from_agent: Agent, to_agent: Agent):
+        """-> failed: the call goes back to agent a, agent b is freed"""
+        self._transition(db, transfer, TransferStatus.FAILED)
+        transfer.completed_at = datetime.utcnow()
+        transfer.timeout_at = None
+
+        # reset call ststus
+        if call is not None and call.status == CallStatus.TRANSFERRING.value:
+            call.status = CallStatus.ACTIVE.value
+        from_agent.status = AgentStatus.BUSY.value
+        to_agent.status = AgentStatus.AVAILABLE.value
+        record_transfer_event(db, EventType.TRANSFER_FAILED, transfer, call)
+
+    async def _fail_transfer(self, transfer: Transfer, call: Call, from_agent: Agent, to_agent: Agent, db: Session):
+        """Record a failed initiation; a transfer someone else already finished is left alone"""
+        db.rollback()
+        try:
+            db.refresh(transfer)
+            with transaction(db):
+                self._apply_failure(db, transfer, call, from_agent, to_agent)
+        except InvalidTransferTransition:
+            return
+        except Exception as e:
+            logger.error(f"Could not mark transfer {transfer.id} as failed: {str(e)}")
+            return
+        await self._forget_transfer(transfer.id)
+
+    async def _close_transfer_room(self, room_name: str):
+        try:
+            await livekit_service.close_room(room_name)
+        except UpstreamError as e:
+            logger.warning(f"Could not close transfer room {room_name}: {str(e)}")
     
     # Get the current status and details of a transfer from the database.
 
     async def get_transfer_status(self, transfer_id: str, db: Session = None) -> Dict:
         """Get current transfer status"""
         
-        transfer = db.query(Transfer).filter(Transfer.id == transfer_id).first()
+        transfer = first_or_primary(db, db.query(Transfer).filter(Transfer.id == transfer_id))
         if not transfer:
             return {"error": "Transfer not found"}
         
@@ -341,7 +554,7 @@ class TransferService:
     # return existing summary, generate a new one if transcript is available,
     # otherwise provide a simple fallback summary.
 
-    async def _generate_transfer_summary(self, call: Call, db: Session) -> str:
+    async def _generate_transfer_summary(self, call: Call) -> str:
         """Generate or retrieve call summary for transfer"""
         
         if call.summary:
@@ -361,10 +574,9 @@ class TransferService:
                 call_reason=call.call_reason
             )
             
-            # Save summary to database
+            # Saved with the transition that records the transfer room
             call.summary = summary
             call.summary_generated_at = datetime.now()
-            db.commit()
             
             return summary
         
@@ -373,35 +585,59 @@ class TransferService:
 
     # Set a timeout for warm transfer; auto-cancel if not completed in time.
 
-    async def _set_transfer_timeout(self, transfer_id:str):
+    # timeout_at is naive UTC, the same base as initiated_at (func.now()),
+    # so recovered deadlines don't shift with the server's UTC offset.
+
+    def _set_transfer_timeout(self, transfer_id: str, timeout_at: datetime):
         """Set timeout for transfer completion"""
+        self.timeout_scheduler.schedule(transfer_id, timeout_at.replace(tzinfo=timezone.utc).timestamp())
+
+    # Drop a finished transfer from the store, whichever worker holds its
+    # lease; the holder's armed deadline then finds nothing to cancel.
 
-        async def timeout_handler():
-            await asyncio.sleep(settings.MAX_TRANSFER_WAIT_TIME)
+    async def _forget_transfer(self, transfer_id: str):
+        self.timeout_scheduler.cancel(transfer_id)
+        await self.store.remove(transfer_id)
+        await self.store.release_lease(transfer_id)
 
-            if transfer_id in self.active_transfers:
-                logger.warning(f"Transfer {transfer_id} timed out")
+    # Called by the scheduler when a deadline passes. Only the lease holder
+    # fires, and the database decides: a transfer completed or cancelled
+    # elsewhere in the meantime is left alone.
 
-                # get database session    
-                db = next(get_db())
-                try:
-                    await self.cancel_transfer(
-                        transfer_id=transfer_id,
-                        reason="Transfer timed out",
-                        db=db
-                    )
-                finally:
-                    db.close()    
+    async def _handle_transfer_timeout(self, transfer_id: str):
+        """Cancel a transfer whose deadline has passed"""
 
-        # create and store timeout tasks
-        timeout_task = asyncio.create_task(timeout_handler())
-        self.transfer_timeouts[transfer_id] = timeout_task
+        if not await self.store.acquire_lease(transfer_id, self.worker_id, self.lease_seconds):
+            logger.info(f"Timeout for transfer {transfer_id} is owned by another worker")
+            return
+
+        db = self.session_factory()
+        try:
+            transfer = db.query(Transfer).filter(Transfer.id == transfer_id).first()
+            if not transfer or transfer.status not in PENDING_TRANSFER_STATUSES:
+                await self._forget_transfer(transfer_id)
+                return
+
+            logger.warning(f"Transfer {transfer_id} timed out")
+            await self.cancel_transfer(
+                transfer_id=transfer_id,
+                reason="Transfer timed out",
+                db=db
+            )
+        finally:
+            db.close()
 
     # Get a list of all currently active transfers.
 
-    def get_active_transfers(self)->List[Dict]:
+    async def get_active_transfers(self)->List[Dict]:
         """Get list of all active transfers"""
-        return list(self.active_transfers.values())
+        return await self.store.list_active()
+
+    # Refresh the transfer gauges; runs on every /metrics scrape.
+
+    async def collect_metrics(self):
+        ACTIVE_TRANSFERS.set(len(await self.store.list_active()))
+        ARMED_TRANSFER_DEADLINES.set(len(self.timeout_scheduler.keys()))
 
     # Get all available agents with their details and remaining call capacity.
 
@@ -411,14 +647,23 @@ class TransferService:
         available_agents = db.query(Agent).filter(
             Agent.status == AgentStatus.AVAILABLE.value
         ).all()
+
+        # Count current active calls, for all available agents in one query
+        # (not one per agent)
+        active_counts = dict(
+            db.query(Call.agent_a_id, func.count(Call.id))
+            .join(Agent, Agent.id == Call.agent_a_id)
+            .filter(
+                Agent.status == AgentStatus.AVAILABLE.value,
+                Call.status.in_([CallStatus.ACTIVE.value, CallStatus.TRANSFERRING.value])
+            )
+            .group_by(Call.agent_a_id)
+            .all()
+        ) if available_agents else {}
         
         agent_list = []
         for agent in available_agents:
-            # Count current active calls
-            active_calls = db.query(Call).filter(
-                Call.agent_a_id == agent.id,
-                Call.status.in_([CallStatus.ACTIVE.value, CallStatus.TRANSFERRING.value])
-            ).count()
+            active_calls = active_counts.get(agent.id, 0)
             
             agent_list.append({
                 "id": agent.id,
@@ -427,7 +672,7 @@ class TransferService:
                 "skills": agent.skills,
                 "active_calls": active_calls,
                 "max_calls": agent.max_concurrent_calls,
-                "available_capacity": agent.max_concurrent_calls - active_calls
+                "availability_capacity": agent.max_concurrent_calls - active_calls
             })
         
         return agent_list
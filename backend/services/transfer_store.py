@@ -0,0 +1,301 @@
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import or_
+from app.database import Transfer, TransferStatus, SessionLocal
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# transfers that are still in flight (and can still time out)
+PENDING_TRANSFER_STATUSES = [TransferStatus.INITIATED.value, TransferStatus.IN_PROGRESS.value]
+
+# Shared state for in-flight transfers.
+# The store answers two questions for every worker process: which transfers
+# are active right now, and which worker owns each transfer's timeout.
+# Timeout ownership is a lease: the owner renews it while it keeps the
+# deadline armed, and if the owner dies the lease lapses and another worker
+# claims it. Only the lease holder may fire a timeout.
+
+class ActiveTransferStore(ABC):
+    """Interface for tracking active transfers and leasing their timeouts"""
+
+    @abstractmethod
+    async def add(self, transfer_id: str, info: Dict):
+        ...
+
+    @abstractmethod
+    async def remove(self, transfer_id: str):
+        ...
+
+    @abstractmethod
+    async def list_active(self) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    async def acquire_lease(self, transfer_id: str, owner: str, ttl: float) -> bool:
+        """Take (or extend) the timeout lease; False if another owner holds it"""
+
+    @abstractmethod
+    async def renew_leases(self, owner: str, transfer_ids: Iterable[str], ttl: float) -> List[str]:
+        """Extend owner's leases; returns the ids owner still holds"""
+
+    @abstractmethod
+    async def release_lease(self, transfer_id: str, owner: Optional[str] = None):
+        """Drop the lease; with an owner, only if that owner holds it"""
+
+    async def claim_leases(self, owner: str, transfer_ids: Iterable[str], ttl: float) -> List[str]:
+        """Acquire every free or lapsed lease among transfer_ids"""
+        return [tid for tid in transfer_ids if await self.acquire_lease(tid, owner, ttl)]
+
+    async def close(self):
+        pass
+
+# Single-process store; the default, and what tests use.
+
+class InMemoryActiveTransferStore(ActiveTransferStore):
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._active: Dict[str, Dict] = {}
+        self._leases: Dict[str, tuple] = {} # transfer_id -> (owner, expires_at)
+
+    async def add(self, transfer_id: str, info: Dict):
+        self._active[transfer_id] = info
+
+    async def remove(self, transfer_id: str):
+        self._active.pop(transfer_id, None)
+
+    async def list_active(self) -> List[Dict]:
+        return list(self._active.values())
+
+    async def acquire_lease(self, transfer_id: str, owner: str, ttl: float) -> bool:
+        now = self._clock()
+        current = self._leases.get(transfer_id)
+        if current and current[0] != owner and current[1] > now:
+            return False
+        self._leases[transfer_id] = (owner, now + ttl)
+        return True
+
+    async def renew_leases(self, owner: str, transfer_ids: Iterable[str], ttl: float) -> List[str]:
+        now = self._clock()
+        held = []
+        for transfer_id in transfer_ids:
+            current = self._leases.get(transfer_id)
+            if current and current[0] == owner and current[1] > now:
+                self._leases[transfer_id] = (owner, now + ttl)
+                held.append(transfer_id)
+        return held
+
+    async def release_lease(self, transfer_id: str, owner: Optional[str] = None):
+        current = self._leases.get(transfer_id)
+        if current and (owner is None or current[0] == owner):
+            del self._leases[transfer_id]
+
+# Uses the transfers table itself: active transfers are the pending rows and
+# the lease lives in transfers.timeout_owner / timeout_lease_expires_at, taken
+# with a conditional UPDATE so two workers can never both win.
+
+class DatabaseActiveTransferStore(ActiveTransferStore):
+    CLAIM_BATCH_SIZE = 500
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+
+    async def add(self, transfer_id: str, info: Dict):
+        # the transfer row is already the record
+        pass
+
+    async def remove(self, transfer_id: str):
+        pass
+
+    async def list_active(self) -> List[Dict]:
+        db = self.session_factory()
+        try:
+            transfers = db.query(Transfer).filter(Transfer.status.in_(PENDING_TRANSFER_STATUSES)).all()
+            return [transfer_info(transfer) for transfer in transfers]
+        finally:
+            db.close()
+
+    def _claimable(self, owner: str, now: datetime):
+        return [
+            Transfer.status.in_(PENDING_TRANSFER_STATUSES),
+            or_(
+                Transfer.timeout_owner.is_(None),
+                Transfer.timeout_owner == owner,
+                Transfer.timeout_lease_expires_at < now
+            )
+        ]
+
+    def _held(self, db, owner: str, transfer_ids: List[str], now: datetime) -> List[str]:
+        return [
+            row.id for row in db.query(Transfer.id).filter(
+                Transfer.id.in_(transfer_ids),
+                Transfer.status.in_(PENDING_TRANSFER_STATUSES),
+                Transfer.timeout_owner == owner,
+                Transfer.timeout_lease_expires_at > now
+            )
+        ]
+
+    async def acquire_lease(self, transfer_id: str, owner: str, ttl: float) -> bool:
+        return bool(await self.claim_leases(owner, [transfer_id], ttl))
+
+    async def claim_leases(self, owner: str, transfer_ids: Iterable[str], ttl: float) -> List[str]:
+        transfer_ids = list(transfer_ids)
+        if not transfer_ids:
+            return []
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=ttl)
+        db = self.session_factory()
+        try:
+            claimed = []
+            for start in range(0, len(transfer_ids), self.CLAIM_BATCH_SIZE):
+                batch = transfer_ids[start:start + self.CLAIM_BATCH_SIZE]
+                db.query(Transfer).filter(Transfer.id.in_(batch), *self._claimable(owner, now)).update(
+                    {Transfer.timeout_owner: owner, Transfer.timeout_lease_expires_at: expires_at},
+                    synchronize_session=False
+                )
+                db.commit()
+                claimed.extend(self._held(db, owner, batch, now))
+            return claimed
+        finally:
+            db.close()
+
+    async def renew_leases(self, owner: str, transfer_ids: Iterable[str], ttl: float) -> List[str]:
+        transfer_ids = list(transfer_ids)
+        if not transfer_ids:
+            return []
+        now = datetime.utcnow()
+        db = self.session_factory()
+        try:
+            held = []
+            for start in range(0, len(transfer_ids), self.CLAIM_BATCH_SIZE):
+                batch = transfer_ids[start:start + self.CLAIM_BATCH_SIZE]
+                db.query(Transfer).filter(
+                    Transfer.id.in_(batch),
+                    Transfer.status.in_(PENDING_TRANSFER_STATUSES),
+                    Transfer.timeout_owner == owner,
+                    Transfer.timeout_lease_expires_at >= now
+                ).update(
+                    {Transfer.timeout_lease_expires_at: now + timedelta(seconds=ttl)},
+                    synchronize_session=False
+                )
+                db.commit()
+                held.extend(self._held(db, owner, batch, now))
+            return held
+        finally:
+            db.close()
+
+    async def release_lease(self, transfer_id: str, owner: Optional[str] = None):
+        db = self.session_factory()
+        try:
+            query = db.query(Transfer).filter(Transfer.id == transfer_id)
+            if owner is not None:
+                query = query.filter(Transfer.timeout_owner == owner)
+            query.update(
+                {Transfer.timeout_owner: None, Transfer.timeout_lease_expires_at: None},
+                synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+# Redis (or any server speaking its protocol: Valkey, KeyDB, a local
+# stand-in) for deployments that already run one. Active transfers live in a
+# hash; each lease is a key with a TTL, so lapsed leases disappear on their
+# own. Compare-and-set steps run as Lua scripts to stay atomic.
+
+_ACQUIRE_SCRIPT = """
+local current = redis.call('get', KEYS[1])
+if current == false or current == ARGV[1] then
+    redis.call('set', KEYS[1], ARGV[1], 'PX', ARGV[2])
+    return 1
+end
+return 0
+"""
+
+_RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+class RedisActiveTransferStore(ActiveTransferStore):
+    def __init__(self, url: str = None, prefix: str = "warm-transfer", client=None):
+        if client is None:
+            try:
+                import redis.asyncio as redis_asyncio
+            except ImportError:
+                raise ImportError("Redis transfer store requires the redis package. Install redis>=4.2.")
+            client = redis_asyncio.from_url(url or settings.REDIS_URL, decode_responses=True)
+        self.client = client
+        self.active_key = f"{prefix}:active-transfers"
+        self.lease_prefix = f"{prefix}:transfer-lease:"
+        self._acquire = client.register_script(_ACQUIRE_SCRIPT)
+        self._renew = client.register_script(_RENEW_SCRIPT)
+        self._release = client.register_script(_RELEASE_SCRIPT)
+
+    def _lease_key(self, transfer_id: str) -> str:
+        return f"{self.lease_prefix}{transfer_id}"
+
+    async def add(self, transfer_id: str, info: Dict):
+        await self.client.hset(self.active_key, transfer_id, json.dumps(info, default=str))
+
+    async def remove(self, transfer_id: str):
+        await self.client.hdel(self.active_key, transfer_id)
+
+    async def list_active(self) -> List[Dict]:
+        return [json.loads(value) for value in await self.client.hvals(self.active_key)]
+
+    async def acquire_lease(self, transfer_id: str, owner: str, ttl: float) -> bool:
+        return bool(await self._acquire(keys=[self._lease_key(transfer_id)], args=[owner, int(ttl * 1000)]))
+
+    async def renew_leases(self, owner: str, transfer_ids: Iterable[str], ttl: float) -> List[str]:
+        return [
+            tid for tid in transfer_ids
+            if await self._renew(keys=[self._lease_key(tid)], args=[owner, int(ttl * 1000)])
+        ]
+
+    async def release_lease(self, transfer_id: str, owner: Optional[str] = None):
+        if owner is None:
+            await self.client.delete(self._lease_key(transfer_id))
+        else:
+            await self._release(keys=[self._lease_key(transfer_id)], args=[owner])
+
+    async def close(self):
+        await self.client.aclose()
+
+# Shape shared by every store and returned from GET /routers/transfer/active.
+
+def transfer_info(transfer: Transfer) -> Dict:
+    return {
+        "transfer_id": transfer.id,
+        "call_id": transfer.call_id,
+        "transfer_room_id": transfer.transfer_room_id,
+        "from_agent_id": transfer.from_agent_id,
+        "to_agent_id": transfer.to_agent_id,
+        "status": transfer.status,
+        "created_at": transfer.initiated_at
+    }
+
+def create_active_transfer_store(kind: str = None, session_factory=SessionLocal) -> ActiveTransferStore:
+    """Build the store selected by ACTIVE_TRANSFER_STORE"""
+    kind = (kind or settings.ACTIVE_TRANSFER_STORE).lower()
+    if kind == "memory":
+        return InMemoryActiveTransferStore()
+    if kind == "database":
+        return DatabaseActiveTransferStore(session_factory)
+    if kind == "redis":
+        return RedisActiveTransferStore(settings.REDIS_URL)
+    raise ValueError(f"Unknown ACTIVE_TRANSFER_STORE: {kind}")
@@ -0,0 +1,55 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.main import app
+from app.database import Base, get_db, get_read_db
+
+
+# A real in-memory database behind the routers, for tests that need actual
+# query behaviour (ordering, pagination) rather than a mocked session.
+@pytest.fixture
+def sqlite_db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_read_db] = lambda: db
+    yield db
+    app.dependency_overrides.pop(get_db, None)
+    app.dependency_overrides.pop(get_read_db, None)
+    db.close()
+    engine.dispose()
+
+
+# LiveKit clients refuse to build without credentials; tests that talk to the
+# stub server shouldn't depend on them being set in the environment.
+@pytest.fixture
+def livekit_credentials(monkeypatch):
+    from app.config import settings
+    monkeypatch.setattr(settings, "LIVEKIT_API_KEY", "test-key")
+    monkeypatch.setattr(settings, "LIVEKIT_API_SECRET", "test-secret-test-secret-test-secret")
+
+
+# A running outbox relay over sqlite_db, standing in for the app's, so the
+# conditional GET routes have versions to compare against.
+@pytest_asyncio.fixture
+async def relay(sqlite_db, monkeypatch):
+    from services.event_bus import EventBus
+    bus = EventBus(sessionmaker(bind=sqlite_db.get_bind()))
+    monkeypatch.setattr("utils.conditional.event_bus", bus)
+    await bus.start()
+    yield bus
+    await bus.stop()
+
+
+# Spans recorded by the app's tracer while the test runs.
+@pytest.fixture
+def spans(monkeypatch):
+    from utils.tracing import tracer, InMemorySpanExporter
+    exporter = InMemorySpanExporter()
+    monkeypatch.setattr(tracer, "exporter", exporter)
+    monkeypatch.setattr(tracer, "sample_ratio", 1.0)
+    return exporter.spans
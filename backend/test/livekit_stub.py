@@ -0,0 +1,169 @@
+# Local stand-in for the LiveKit RoomService Twirp API.
+# Serves real protobuf responses so LiveKitService is exercised through the
+# actual SDK client, and lets tests queue faults (HTTP errors, slow responses,
+# dropped connections, lost responses) per method. Load runs can also give it
+# a profile (benchmarks.common.UpstreamProfile) that delays and fails calls at
+# random.
+
+import asyncio
+from collections import Counter, defaultdict, deque
+
+from aiohttp import web
+from livekit.protocol import models, room as room_proto
+
+PREFIX = "/twirp/livekit.RoomService/"
+
+
+class LiveKitStub:
+    def __init__(self, profile=None):
+        self.profile = profile
+        self.rooms = {}
+        self.participants = defaultdict(list)
+        self.calls = Counter()
+        self.received = defaultdict(list)
+        self.connections = set()
+        self._faults = defaultdict(deque)
+        self._runner = None
+        self.url = None
+
+    # --- state helpers -------------------------------------------------
+
+    def add_room(self, name: str, num_participants: int = 0):
+        self.rooms[name] = models.Room(name=name, sid=f"RM_{name}", num_participants=num_participants, max_participants=10)
+
+    def add_participant(self, room: str, identity: str, track_types=(0,)):
+        tracks = [
+            models.TrackInfo(sid=f"TR_{identity}_{i}", type=t, name=f"track{i}")
+            for i, t in enumerate(track_types)
+        ]
+        self.participants[room].append(
+            models.ParticipantInfo(identity=identity, name=identity, tracks=tracks, is_publisher=bool(tracks))
+        )
+
+    # --- fault injection -----------------------------------------------
+
+    def fail(self, method: str, status: int = 503, code: str = "unavailable", times: int = 1):
+        """Answer the next `times` calls to `method` with a Twirp error"""
+        for _ in range(times):
+            self._faults[method].append(("error", status, code))
+
+    def delay(self, method: str, seconds: float, times: int = 1):
+        """Stall the next `times` calls to `method` before answering"""
+        for _ in range(times):
+            self._faults[method].append(("delay", seconds, None))
+
+    def drop(self, method: str, times: int = 1):
+        """Close the connection without answering the next `times` calls"""
+        for _ in range(times):
+            self._faults[method].append(("drop", None, None))
+
+    def lose_response(self, method: str, times: int = 1):
+        """Carry out the next `times` calls to `method`, then drop the connection before answering"""
+        for _ in range(times):
+            self._faults[method].append(("lose", None, None))
+
+    # --- server --------------------------------------------------------
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_post(PREFIX + "{method}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        method = request.match_info["method"]
+        body = await request.read()
+        self.calls[method] += 1
+        self.connections.add(request.transport.get_extra_info("peername"))
+
+        if self._faults[method]:
+            kind, arg, code = self._faults[method].popleft()
+            if kind == "error":
+                return web.json_response({"code": code, "msg": "injected fault"}, status=arg)
+            if kind == "delay":
+                await asyncio.sleep(arg)
+            if kind == "drop":
+                request.transport.close()
+                return web.Response(status=500)
+            if kind == "lose":
+                handler = getattr(self, f"_{method}", None)
+                if handler is not None:
+                    handler(body)
+                request.transport.close()
+                return web.Response(status=500)
+        elif self.profile is not None:
+            delay = self.profile.sample_latency()
+            if delay:
+                await asyncio.sleep(delay)
+            status = self.profile.sample_error()
+            if status:
+                return web.json_response({"code": "unavailable", "msg": "injected fault"}, status=status)
+
+        handler = getattr(self, f"_{method}", None)
+        if handler is None:
+            return web.json_response({"code": "bad_route", "msg": method}, status=404)
+        result = handler(body)
+        if isinstance(result, web.StreamResponse):
+            return result
+        return web.Response(body=result.SerializeToString(), content_type="application/protobuf")
+
+    def _not_found(self, what: str) -> web.Response:
+        return web.json_response({"code": "not_found", "msg": f"{what} not found"}, status=404)
+
+    def _ListRooms(self, body):
+        req = room_proto.ListRoomsRequest.FromString(body)
+        names = list(req.names) or list(self.rooms)
+        return room_proto.ListRoomsResponse(rooms=[self.rooms[n] for n in names if n in self.rooms])
+
+    def _CreateRoom(self, body):
+        req = room_proto.CreateRoomRequest.FromString(body)
+        self.add_room(req.name)
+        return self.rooms[req.name]
+
+    def _ListParticipants(self, body):
+        req = room_proto.ListParticipantsRequest.FromString(body)
+        if req.room not in self.rooms:
+            return self._not_found("room")
+        return room_proto.ListParticipantsResponse(participants=self.participants[req.room])
+
+    def _GetParticipant(self, body):
+        req = room_proto.RoomParticipantIdentity.FromString(body)
+        for p in self.participants.get(req.room, []):
+            if p.identity == req.identity:
+                return p
+        return self._not_found("participant")
+
+    def _MutePublishedTrack(self, body):
+        req = room_proto.MuteRoomTrackRequest.FromString(body)
+        self.received["MutePublishedTrack"].append(req)
+        return room_proto.MuteRoomTrackResponse()
+
+    def _RemoveParticipant(self, body):
+        req = room_proto.RoomParticipantIdentity.FromString(body)
+        before = len(self.participants.get(req.room, []))
+        self.participants[req.room] = [p for p in self.participants.get(req.room, []) if p.identity != req.identity]
+        if len(self.participants[req.room]) == before:
+            return self._not_found("participant")
+        return room_proto.RemoveParticipantResponse()
+
+    def _SendData(self, body):
+        req = room_proto.SendDataRequest.FromString(body)
+        self.received["SendData"].append(req)
+        return room_proto.SendDataResponse()
+
+    def _DeleteRoom(self, body):
+        req = room_proto.DeleteRoomRequest.FromString(body)
+        if req.room not in self.rooms:
+            return self._not_found("room")
+        self.rooms.pop(req.room)
+        self.participants.pop(req.room, None)
+        return room_proto.DeleteRoomResponse()
@@ -0,0 +1,131 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database import (
+    Base, Agent, RoutingSession, create_app_engine, create_agent, engine_options, first_or_primary
+)
+
+
+def _pragma(engine, name):
+    with engine.connect() as conn:
+        return conn.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_engine_options_follow_the_pool_settings(monkeypatch):
+    monkeypatch.setattr(settings, "DATABASE_POOL_SIZE", 7)
+    monkeypatch.setattr(settings, "DATABASE_POOL_RECYCLE_SECONDS", 60)
+
+    options = engine_options("postgresql://db/app")
+    assert options["pool_size"] == 7
+    assert options["pool_recycle"] == 60
+    assert options["pool_pre_ping"] is settings.DATABASE_POOL_PRE_PING
+    assert "connect_args" not in options
+
+    assert engine_options("sqlite:////tmp/app.db")["connect_args"] == {"check_same_thread": False}
+    # in-memory SQLite keeps its single-connection pool
+    assert engine_options("sqlite://") == {"connect_args": {"check_same_thread": False}}
+
+
+def test_tuned_sqlite_profile_is_set_on_every_connection(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DATABASE_SQLITE_BUSY_TIMEOUT_MS", 1234)
+    engine = create_app_engine(f"sqlite:///{tmp_path}/tuned.db", profile="tuned")
+    try:
+        assert _pragma(engine, "journal_mode") == "wal"
+        assert _pragma(engine, "synchronous") == 1  # NORMAL
+        assert _pragma(engine, "busy_timeout") == 1234
+    finally:
+        engine.dispose()
+
+    default = create_app_engine(f"sqlite:///{tmp_path}/default.db", profile="default")
+    try:
+        assert _pragma(default, "journal_mode") == "delete"
+    finally:
+        default.dispose()
+
+    with pytest.raises(ValueError):
+        create_app_engine(f"sqlite:///{tmp_path}/other.db", profile="fast")
+
+
+def test_tuned_profile_commits_while_a_read_is_open(tmp_path, monkeypatch):
+    # without WAL the commit waits for the reader and fails with "database is locked"
+    monkeypatch.setattr(settings, "DATABASE_SQLITE_BUSY_TIMEOUT_MS", 200)
+    engine = create_app_engine(f"sqlite:///{tmp_path}/wal.db", profile="tuned")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(Agent.__table__.insert(), {"id": "a1", "name": "Ann", "email": "ann@example.com"})
+
+    reader = engine.raw_connection()
+    try:
+        cursor = reader.cursor()
+        cursor.execute("BEGIN")
+        cursor.execute("SELECT name FROM agents").fetchall()
+
+        with engine.begin() as conn:
+            conn.execute(Agent.__table__.update().values(name="Anne"))
+
+        # the open read still sees its snapshot
+        assert cursor.execute("SELECT name FROM agents").fetchone()[0] == "Ann"
+    finally:
+        reader.rollback()
+        reader.close()
+        engine.dispose()
+
+
+# A primary and a replica as two SQLite files; the replica lags: it only
+# has the agents created before it was "replicated".
+@pytest.fixture
+def primary_and_replica(tmp_path):
+    primary = create_app_engine(f"sqlite:///{tmp_path}/primary.db")
+    replica = create_app_engine(f"sqlite:///{tmp_path}/replica.db")
+    for engine in (primary, replica):
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(Agent.__table__.insert(), {"id": "a1", "name": "Ann", "email": "ann@example.com"})
+    with primary.begin() as conn:
+        conn.execute(Agent.__table__.insert(), {"id": "a2", "name": "Bob", "email": "bob@example.com"})
+    yield primary, replica
+    primary.dispose()
+    replica.dispose()
+
+
+def test_routing_session_reads_from_the_replica_until_it_writes(primary_and_replica):
+    primary, replica = primary_and_replica
+    db = sessionmaker(class_=RoutingSession, bind=primary, replicas=[replica])()
+    try:
+        assert db.query(Agent).count() == 1  # the replica
+
+        create_agent(db, "Cy", "cy@example.com", commit=False)
+        db.flush()
+        # sticky: the rest of the session reads its own writes on the primary
+        assert db.query(Agent).count() == 3
+        db.rollback()
+        assert db.query(Agent).count() == 2
+    finally:
+        db.close()
+
+    db = sessionmaker(class_=RoutingSession, bind=primary, replicas=[replica])()
+    try:
+        assert len(db.query(Agent).with_for_update().all()) == 2
+        assert db.query(Agent).count() == 2
+    finally:
+        db.close()
+
+
+def test_lookup_missing_on_the_replica_is_retried_on_the_primary(primary_and_replica):
+    primary, replica = primary_and_replica
+    db = sessionmaker(class_=RoutingSession, bind=primary, replicas=[replica])()
+    try:
+        assert first_or_primary(db, db.query(Agent).filter(Agent.id == "a2")).name == "Bob"
+        assert first_or_primary(db, db.query(Agent).filter(Agent.id == "missing")) is None
+    finally:
+        db.close()
+
+    # without replicas a session is a plain primary session
+    db = sessionmaker(class_=RoutingSession, bind=primary)()
+    try:
+        assert db.replica is None
+        assert db.query(Agent).count() == 2
+    finally:
+        db.close()
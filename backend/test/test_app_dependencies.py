@@ -0,0 +1,131 @@
+import pytest
+import jwt
+from datetime import timedelta
+from unittest.mock import patch
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import create_engine, event as sa_event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.config import settings
+from app.database import Base, Agent, AgentStatus
+from app import dependencies
+from app.dependencies import get_current_agent, get_current_caller, forget_agent
+from utils import auth
+from utils.auth import create_access_token, decode_access_token
+
+
+@pytest.fixture(autouse=True)
+def jwt_settings(monkeypatch):
+    monkeypatch.setattr(settings, "JWT_SECRET_KEY", "testsecret")
+    monkeypatch.setattr(settings, "JWT_ALGORITHM", "HS256")
+    monkeypatch.setattr(settings, "AUTH_AGENT_CACHE_TTL_SECONDS", 60.0)
+    auth.clear_token_cache()
+    dependencies.clear_agent_cache()
+    yield
+    auth.clear_token_cache()
+    dependencies.clear_agent_cache()
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+    statements = []
+    sa_event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+    session = session_factory()
+    session.statements = statements
+    session.factory = session_factory
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _bearer(token):
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+def test_verified_tokens_are_decoded_once_until_the_secret_changes(monkeypatch):
+    token = create_access_token("agent1")
+    with patch("utils.auth.jwt.decode", wraps=jwt.decode) as decode:
+        assert decode_access_token(token)["sub"] == "agent1"
+        assert decode_access_token(token)["sub"] == "agent1"
+        assert decode.call_count == 1
+
+        monkeypatch.setattr(settings, "JWT_SECRET_KEY", "rotated")
+        with pytest.raises(jwt.InvalidSignatureError):
+            decode_access_token(token)
+
+
+def test_expired_and_invalid_tokens_are_rejected_with_401():
+    expired = create_access_token("caller1", expires_delta=timedelta(seconds=-1))
+    with pytest.raises(HTTPException) as excinfo:
+        get_current_caller(_bearer(expired))
+    assert excinfo.value.detail == "Token has expired"
+
+    with pytest.raises(HTTPException) as excinfo:
+        get_current_caller(_bearer("not.a.jwt"))
+    assert excinfo.value.status_code == 401
+    assert excinfo.value.detail == "Invalid token"
+
+
+def test_agent_is_served_from_cache_and_still_usable_in_the_session(db):
+    db.add(Agent(id="agent1", name="Alice", email="alice@example.com", skills=["billing"]))
+    db.commit()
+    token = create_access_token("agent1")
+
+    first = get_current_agent(_bearer(token), db)
+    assert first.name == "Alice"
+    db.close()
+
+    request_db = db.factory()
+    db.statements.clear()
+    agent = get_current_agent(_bearer(token), request_db)
+    assert db.statements == []  # no query, no signature check
+    assert agent in request_db and agent.skills == ["billing"]
+
+    # a cached agent is an ordinary persistent instance: changes are saved
+    agent.status = AgentStatus.BUSY.value
+    request_db.commit()
+    request_db.close()
+    assert db.factory().get(Agent, "agent1").status == AgentStatus.BUSY.value
+
+
+def test_agent_cache_is_dropped_by_writes_and_relayed_events(db):
+    db.add(Agent(id="agent1", name="Alice", email="alice@example.com"))
+    db.commit()
+    token = create_access_token("agent1")
+    get_current_agent(_bearer(token), db)
+
+    forget_agent("agent1")
+    db.statements.clear()
+    get_current_agent(_bearer(token), db)
+    assert len(db.statements) == 1
+
+    dependencies._forget_event_agents({"agent_ids": ["agent1"]})
+    db.statements.clear()
+    get_current_agent(_bearer(token), db)
+    assert len(db.statements) == 1
+
+    db.query(Agent).delete()
+    db.commit()
+    forget_agent("agent1")
+    with pytest.raises(HTTPException) as excinfo:
+        get_current_agent(_bearer(token), db)
+    assert excinfo.value.detail == "Agent not found"
+
+
+def test_cached_agent_skills_are_a_copy_per_request(db):
+    db.add(Agent(id="agent1", name="Alice", email="alice@example.com", skills=["billing"]))
+    db.commit()
+    token = create_access_token("agent1")
+    get_current_agent(_bearer(token), db)
+    db.close()
+
+    first_db = db.factory()
+    get_current_agent(_bearer(token), first_db).skills.append("sales")
+    first_db.close()
+
+    assert get_current_agent(_bearer(token), db.factory()).skills == ["billing"]
@@ -1,5 +1,6 @@
 # test/test_main.py
 import pytest
+from unittest.mock import AsyncMock, patch
 from fastapi.testclient import TestClient
 from app.main import app
 
@@ -14,3 +15,45 @@ def test_health_check_endpoint():
     response = client.get("/health")
     assert response.status_code == 200
     assert response.json() == {"status": "healthy", "message": "service is running"}
+
+
+def test_lifespan_starts_and_closes_livekit_client():
+    with patch("app.main.livekit_service.start", new=AsyncMock()) as mock_start, \
+        patch("app.main.livekit_service.close", new=AsyncMock()) as mock_close, \
+        patch("app.main.transfer_service.start", new=AsyncMock()), \
+        patch("app.main.transfer_service.stop", new=AsyncMock()), \
+        patch("app.main.event_bus.start", new=AsyncMock()), \
+        patch("app.main.event_bus.stop", new=AsyncMock()), \
+        patch("app.main.init_db", new=AsyncMock()):
+        with TestClient(app) as lifespan_client:
+            mock_start.assert_awaited_once()
+            mock_close.assert_not_awaited()
+            assert lifespan_client.get("/health").status_code == 200
+        mock_close.assert_awaited_once()
+
+
+def test_run_starts_configured_worker_count():
+    from app import main
+
+    with patch.object(main.settings, "DEBUG", False), \
+        patch.object(main.settings, "WORKERS", 4), \
+        patch.object(main.settings, "ACTIVE_TRANSFER_STORE", "database"), \
+        patch("app.main.init_db", new=AsyncMock()) as mock_init, \
+        patch("app.main.uvicorn.run") as mock_run:
+        main.run()
+
+    mock_init.assert_awaited_once()
+    assert mock_run.call_args.kwargs["workers"] == 4
+    assert "reload" not in mock_run.call_args.kwargs
+
+
+def test_run_refuses_workers_with_in_process_state():
+    from app import main
+
+    with patch.object(main.settings, "DEBUG", False), \
+        patch.object(main.settings, "WORKERS", 2), \
+        patch.object(main.settings, "ACTIVE_TRANSFER_STORE", "memory"), \
+        patch("app.main.uvicorn.run") as mock_run:
+        with pytest.raises(ValueError):
+            main.run()
+    mock_run.assert_not_called()
@@ -6,8 +6,8 @@ from datetime import datetime, timezone
 from types import SimpleNamespace
 
 from app.main import app
-from app.database import get_db, AgentStatus
-from models.agent import AgentCreateRequest, AgentUpdateRequest, AgentStatusUpdate, AgentResponse
+from app.database import get_db, get_read_db, AgentStatus, Agent, AGENT_LIST_COLUMNS
+from models.agent import AgentCreateRequest, AgentUpdateRequest, AgentStatusUpdate, AgentResponse, AgentListResponse
 
 
 @pytest.fixture
@@ -19,6 +19,7 @@ def override_get_db():
 @pytest.fixture(autouse=True)
 def override_dependency(override_get_db):
     app.dependency_overrides[get_db] = lambda: override_get_db
+    app.dependency_overrides[get_read_db] = lambda: override_get_db
     yield
     app.dependency_overrides.clear()
 
@@ -46,7 +47,7 @@ async def test_create_agent_success(override_get_db):
 
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
-        with patch("routers.agents.db_create_agent", return_value=mock_agent_data):
+        with patch("routers.agents.db_create_agent", return_value=SimpleNamespace(**mock_agent_data)):
             # Ensure email uniqueness check returns None
             override_get_db.query.return_value.filter.return_value.first.return_value = None
             response = await ac.post("/routers/agents/", json=request_data)
@@ -69,7 +70,7 @@ async def test_list_agents(override_get_db):
         current_room_id=None,
         skills=["support"],
     )
-    mock_db.query().order_by().all.return_value = [mock_agent]
+    mock_db.query().order_by().limit().all.return_value = [mock_agent]
 
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
@@ -143,6 +144,7 @@ async def test_update_agent_success(override_get_db):
 async def test_update_agent_status_success(override_get_db):
     mock_db = override_get_db
     mock_agent = SimpleNamespace(
+        id="agent1",
         status=AgentStatus.BUSY.value,
         current_room_id="room123"
     )
@@ -164,7 +166,9 @@ async def test_update_agent_status_success(override_get_db):
 async def test_delete_agent_success(override_get_db):
     mock_db = override_get_db
     mock_agent = SimpleNamespace(
-        status=AgentStatus.AVAILABLE.value
+        id="agent1",
+        status=AgentStatus.AVAILABLE.value,
+        current_room_id=None
     )
     mock_db.query().filter().first.return_value = mock_agent
 
@@ -175,3 +179,37 @@ async def test_delete_agent_success(override_get_db):
     assert response.status_code == 200
     body = response.json()
     assert body["message"] == "Agent deleted successfully"
+
+
+@pytest.mark.asyncio
+async def test_list_agents_pages_by_name_then_id(sqlite_db):
+    names = ["Sam", "Alex", "Sam", "Sam", "Blake"]
+    for i, name in enumerate(names):
+        sqlite_db.add(Agent(name=name, email=f"agent{i}@example.com", status=AgentStatus.AVAILABLE.value))
+    sqlite_db.add(Agent(name="Busy", email="busy@example.com", status=AgentStatus.BUSY.value))
+    sqlite_db.commit()
+
+    seen, cursors, cursor = [], set(), None
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        while True:
+            params = {"status": "available", "limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = await ac.get("/routers/agents/", params=params)
+            assert response.status_code == 200
+            seen.extend((agent["name"], agent["id"]) for agent in response.json())
+            cursor = response.headers.get("x-next-cursor")
+            if not cursor:
+                break
+            assert cursor not in cursors
+            cursors.add(cursor)
+
+        assert (await ac.get("/routers/agents/", params={"cursor": "not-a-cursor"})).status_code == 400
+
+    assert seen == sorted(seen)
+    assert [name for name, _ in seen] == ["Alex", "Blake", "Sam", "Sam", "Sam"]
+
+
+def test_agent_list_columns_match_response_model():
+    assert {column.key for column in AGENT_LIST_COLUMNS} == set(AgentListResponse.model_fields)
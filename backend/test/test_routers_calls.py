@@ -4,7 +4,10 @@ from unittest.mock import patch, AsyncMock, MagicMock
 from datetime import datetime, timezone
 
 from app.main import app
-from app.database import CallStatus,get_db
+from sqlalchemy import event as sa_event
+
+from app.database import CallStatus,get_db, get_read_db, Agent, Call, CALL_LIST_COLUMNS
+from models.call import callListResponse
 
 @pytest.fixture
 def override_get_db():
@@ -14,6 +17,7 @@ def override_get_db():
 @pytest.fixture(autouse=True)
 def override_dependency(override_get_db):
     app.dependency_overrides[get_db] = lambda: override_get_db
+    app.dependency_overrides[get_read_db] = lambda: override_get_db
     yield
     app.dependency_overrides.clear()
 
@@ -49,6 +53,7 @@ async def test_create_new_call_success(override_get_db):
             summary=None,
             summary_generated_at=None,
             extra_metadata=None,
+            access_token=None,       # not a Call column; set by the route
         )
 
         request_data = {
@@ -68,7 +73,7 @@ async def test_create_new_call_success(override_get_db):
         body = response.json()
         assert body["caller_name"] == "Alice"
         assert body["room_id"] == "room123"
-        assert "access_token" in body
+        assert body["access_token"] == "fake_token"
         assert body["status"] == CallStatus.ACTIVE.value
 
 
@@ -100,5 +105,140 @@ async def test_join_existing_call_success(override_get_db):
         body = response.json()
         assert body["room_id"] == "room123"
         assert body["call_status"] == CallStatus.ACTIVE.value
-        assert "access_token" in body
+        assert body["access_token"] == "fake_token"
+
+
+async def _walk_calls(ac, **params):
+    seen, cursors, cursor = [], set(), None
+    while True:
+        page = dict(params, **({"cursor": cursor} if cursor else {}))
+        response = await ac.get("/routers/calls/", params=page)
+        assert response.status_code == 200
+        seen.extend(response.json())
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return seen
+        # a cursor that doesn't move forward would page forever
+        assert cursor not in cursors
+        cursors.add(cursor)
+
+
+@pytest.mark.asyncio
+async def test_list_calls_keyset_pages_cover_every_call_once(sqlite_db):
+    sqlite_db.add_all([Agent(id="a1", name="A1", email="a1@example.com"), Agent(id="a2", name="A2", email="a2@example.com")])
+    # created in the same second, so the pages split rows tied on created_at
+    for i in range(7):
+        sqlite_db.add(Call(
+            room_id=f"room{i}",
+            status=CallStatus.ACTIVE.value if i % 2 else CallStatus.COMPLETED.value,
+            priority="high" if i < 3 else "normal",
+            agent_a_id="a1" if i < 4 else "a2",
+            agent_b_id="a1" if i == 5 else None,
+        ))
+    sqlite_db.commit()
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        everything = await _walk_calls(ac, limit=3)
+        for_a1 = await _walk_calls(ac, agent_id="a1", limit=2)
+        active_high = await _walk_calls(ac, status="active", priority="high", limit=1)
+        assert (await ac.get("/routers/calls/", params={"cursor": "bad"})).status_code == 400
+
+    keys = [(call["created_at"], call["id"]) for call in everything]
+    assert len(keys) == 7 and len(set(keys)) == 7
+    assert keys == sorted(keys, reverse=True)
+    assert sorted(call["room_id"] for call in for_a1) == ["room0", "room1", "room2", "room3", "room5"]
+    assert [call["room_id"] for call in active_high] == ["room1"]
+
+
+@pytest.mark.asyncio
+async def test_list_calls_selects_only_listed_columns(sqlite_db):
+    assert {column.key for column in CALL_LIST_COLUMNS} == set(callListResponse.model_fields)
+    sqlite_db.add(Call(room_id="room1", transcript="x" * 100000, summary="long summary"))
+    sqlite_db.commit()
+
+    statements = []
+    record = lambda conn, cursor, statement, *args: statements.append(statement)
+    sa_event.listen(sqlite_db.get_bind(), "before_cursor_execute", record)
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            response = await ac.get("/routers/calls/")
+    finally:
+        sa_event.remove(sqlite_db.get_bind(), "before_cursor_execute", record)
+
+    assert [call["room_id"] for call in response.json()] == ["room1"]
+    assert statements and not any("transcript" in s or "summary" in s for s in statements)
+
+
+def _add_call(db, room_id):
+    from services.event_bus import record_call_event
+    from app.database import EventType
+    call = Call(room_id=room_id, caller_name="Caller", status=CallStatus.ACTIVE.value, priority="normal", duration_seconds=0)
+    db.add(call)
+    db.flush()
+    record_call_event(db, EventType.CALL_CREATED, call)
+    db.commit()
+    return call
+
+
+@pytest.mark.asyncio
+async def test_list_calls_conditional_get_and_long_poll(sqlite_db, relay):
+    import asyncio
+    _add_call(sqlite_db, "room-1")
+    relay.poll_once()
+
+    calls_queries = []
+    engine = sqlite_db.get_bind()
+    listener = lambda conn, cursor, statement, *args: calls_queries.append(statement) if "FROM calls" in statement else None
+    sa_event.listen(engine, "before_cursor_execute", listener)
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as ac:
+            first = await ac.get("/routers/calls/")
+            etag = first.headers["etag"]
+            assert first.status_code == 200 and len(first.json()) == 1
+            assert first.headers["cache-control"] == "no-cache"
+
+            calls_queries.clear()
+            unchanged = await ac.get("/routers/calls/", headers={"If-None-Match": etag})
+            assert unchanged.status_code == 304
+            assert unchanged.headers["etag"] == etag
+            assert calls_queries == []  # answered without touching the database
+
+            # long-poll without a change: 304 once the wait runs out
+            timed_out = await ac.get("/routers/calls/", params={"wait": 0.1}, headers={"If-None-Match": etag})
+            assert timed_out.status_code == 304
+
+            # long-poll with a change: answered as soon as the relay sees it
+            async def add_later():
+                await asyncio.sleep(0.1)
+                _add_call(sqlite_db, "room-2")
+            adder = asyncio.create_task(add_later())
+            changed = await ac.get("/routers/calls/", params={"wait": 10}, headers={"If-None-Match": etag})
+            await adder
+            assert changed.status_code == 200
+            assert {call["room_id"] for call in changed.json()} == {"room-1", "room-2"}
+            assert changed.headers["etag"] != etag
+    finally:
+        sa_event.remove(engine, "before_cursor_execute", listener)
+
+
+@pytest.mark.asyncio
+async def test_waiting_calls_filtered_on_livekit_presence_get_a_content_etag(sqlite_db, relay):
+    from app.config import settings
+    sqlite_db.add(Call(room_id="room-w", caller_name="Caller", status=CallStatus.WAITING.value, priority="normal", duration_seconds=0))
+    sqlite_db.commit()
+
+    transport = ASGITransport(app=app)
+    with patch.object(settings, "DEBUG", False), \
+         patch("routers.calls.livekit_service.list_participants", AsyncMock(return_value=[{"identity": "caller_1"}])) as participants:
+        async with AsyncClient(transport=transport, base_url="http://test") as ac:
+            first = await ac.get("/routers/calls/", params={"status": "waiting"})
+            again = await ac.get("/routers/calls/", params={"status": "waiting"}, headers={"If-None-Match": first.headers["etag"]})
+
+            participants.return_value = []  # the caller left: no event, but the body changes
+            left = await ac.get("/routers/calls/", params={"status": "waiting"}, headers={"If-None-Match": first.headers["etag"]})
 
+    assert first.status_code == 200 and len(first.json()) == 1
+    assert again.status_code == 304
+    assert left.status_code == 200 and left.json() == []
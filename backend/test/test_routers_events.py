@@ -0,0 +1,84 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from starlette.requests import Request
+
+from app.main import app
+from app.database import Base, EventType
+from services.event_bus import EventBus, record_event
+from routers.events import stream_events
+
+
+@pytest.fixture
+def bus():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = factory()
+    record_event(db, EventType.CALL_CREATED, {"call_id": "c1"}, room_ids=["room1"], agent_ids=["a1"])
+    record_event(db, EventType.CALL_CREATED, {"call_id": "c2"}, room_ids=["room2"], agent_ids=["a2"])
+    record_event(db, EventType.CALL_CREATED, {"call_id": "waiting"}, room_ids=["room3"])
+    db.commit()
+    db.close()
+
+    event_bus = EventBus(factory)
+    with patch("routers.events.event_bus", event_bus):
+        yield event_bus
+    engine.dispose()
+
+
+def _request(last_event_id=None):
+    headers = [(b"last-event-id", str(last_event_id).encode())] if last_event_id is not None else []
+    return Request({"type": "http", "method": "GET", "path": "/routers/events/stream", "headers": headers, "query_string": b""})
+
+
+def _parse(chunk):
+    fields = dict(line.split(": ", 1) for line in chunk.strip().split("\n"))
+    return fields["event"], json.loads(fields["data"])
+
+
+@pytest.mark.asyncio
+async def test_sse_replays_after_last_event_id_then_streams_live(bus):
+    response = await stream_events(_request(last_event_id=1), agent_id="a1", room_id=None, last_event_id=None)
+    assert response.media_type == "text/event-stream"
+    body = response.body_iterator
+
+    assert (await body.__anext__()).startswith("retry:")
+    # event 1 was already seen; c2 belongs to another agent
+    event_type, event = _parse(await body.__anext__())
+    assert (event_type, event["payload"]["call_id"]) == ("call.created", "waiting")
+
+    bus.publish({"id": 4, "type": "transfer.initiated", "room_ids": [], "agent_ids": ["a1"], "payload": {"transfer_id": "t1"}})
+    bus.publish({"id": 5, "type": "transfer.initiated", "room_ids": [], "agent_ids": ["a2"], "payload": {"transfer_id": "t2"}})
+    bus.publish({"id": 6, "type": "call.updated", "room_ids": ["room1"], "agent_ids": ["a1"], "payload": {"call_id": "c1"}})
+    event_type, event = _parse(await asyncio.wait_for(body.__anext__(), 1))
+    assert (event_type, event["id"]) == ("transfer.initiated", 4)
+    event_type, event = _parse(await asyncio.wait_for(body.__anext__(), 1))
+    assert (event_type, event["id"]) == ("call.updated", 6)
+
+    await body.aclose()
+    assert bus.subscriber_count == 0
+
+
+@pytest.mark.asyncio
+async def test_sse_sends_keepalive_when_idle(bus):
+    with patch("routers.events.settings.EVENT_KEEPALIVE_SECONDS", 0.01):
+        response = await stream_events(_request(), agent_id=None, room_id="room9", last_event_id=None)
+        body = response.body_iterator
+        await body.__anext__()
+        assert await asyncio.wait_for(body.__anext__(), 1) == ": keepalive\n\n"
+        await body.aclose()
+
+
+def test_websocket_replays_filtered_backlog(bus):
+    client = TestClient(app)
+    with client.websocket_connect("/routers/events/ws?room_id=room2&last_event_id=0") as websocket:
+        event = websocket.receive_json()
+    assert event["payload"]["call_id"] == "c2"
+    assert event["type"] == "call.created"
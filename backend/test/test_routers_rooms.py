@@ -59,8 +59,8 @@ async def test_close_room_failure():
     with patch("routers.rooms.livekit_service.close_room", new=AsyncMock(return_value=False)):
         async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
             response = await ac.delete("/rooms/room1")
-    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
-    assert response.json()["detail"] == "Failed to close room"
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json()["detail"] == "Room not found"
 
 
 @pytest.mark.asyncio
@@ -72,13 +72,47 @@ async def test_mute_participant_success():
     assert response.json() == {"message": "Participant muted successfully"}
 
 
+@pytest.mark.asyncio
+async def test_mute_participant_passes_track_type():
+    mock_mute = AsyncMock(return_value=True)
+    with patch("routers.rooms.livekit_service.mute_participant", new=mock_mute):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            response = await ac.post("/rooms/room1/mute", params={"participant_identity": "user1", "track_type": "video"})
+    assert response.status_code == 200
+    mock_mute.assert_awaited_once_with("room1", "user1", "video")
+
+
+@pytest.mark.asyncio
+async def test_mute_participant_rejects_unknown_track_type():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post("/rooms/room1/mute", params={"participant_identity": "user1", "track_type": "data"})
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_unmute_participant_success():
+    with patch("routers.rooms.livekit_service.unmute_participant", new=AsyncMock(return_value=True)):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            response = await ac.post("/rooms/room1/unmute", params={"participant_identity": "user1"})
+    assert response.status_code == 200
+    assert response.json() == {"message": "Participant unmuted successfully"}
+
+
 @pytest.mark.asyncio
 async def test_mute_participant_failure():
     with patch("routers.rooms.livekit_service.mute_participant", new=AsyncMock(return_value=False)):
         async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
             response = await ac.post("/rooms/room1/mute", params={"participant_identity": "user1"})
-    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
-    assert response.json()["detail"] == "Failed to mute participant"
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json()["detail"] == "Participant not found"
+
+
+@pytest.mark.asyncio
+async def test_unmute_missing_participant_is_404():
+    with patch("routers.rooms.livekit_service.unmute_participant", new=AsyncMock(return_value=False)):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            response = await ac.post("/rooms/room1/unmute", params={"participant_identity": "ghost", "track_type": "video"})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
 
 
 @pytest.mark.asyncio
@@ -115,3 +149,50 @@ async def test_send_data_to_room_failure():
             response = await ac.post("/rooms/room1/send-data", params={"data": "hello"})
     assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
     assert response.json()["detail"] == "Failed to send data"
+
+
+@pytest.mark.asyncio
+async def test_bulk_room_stats_partial_failure():
+    async def fake_stats(room_id, include_participants=False):
+        return {"room_info": {"room_id": room_id}} if room_id != "missing" else {}
+
+    with patch("routers.rooms.livekit_service.get_room_stats", new=AsyncMock(side_effect=fake_stats)):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            response = await ac.post("/rooms/bulk/stats", json={"room_ids": ["room1", "missing", "room1"]})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["succeeded"] == 1
+    assert body["failed"] == 1
+    assert [r["room_id"] for r in body["results"]] == ["room1", "missing"]
+    assert body["results"][1]["error"] == "Room not found"
+
+
+@pytest.mark.asyncio
+async def test_bulk_close_rooms():
+    mock_close = AsyncMock(return_value=True)
+    with patch("routers.rooms.livekit_service.close_room", new=mock_close):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            response = await ac.post("/rooms/bulk/close", json={"room_ids": ["room1", "room2", "room3"]})
+    assert response.status_code == 200
+    assert response.json()["succeeded"] == 3
+    assert mock_close.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_bulk_send_data_not_captured_by_room_route():
+    mock_send = AsyncMock(return_value=False)
+    with patch("routers.rooms.livekit_service.send_data_to_participants", new=mock_send):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            response = await ac.post("/rooms/bulk/send-data", json={"room_ids": ["room1"], "data": "incident"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["failed"] == 1
+    assert body["results"][0]["error"] == "Failed to send data"
+    mock_send.assert_awaited_once_with("room1", "incident", None)
+
+
+@pytest.mark.asyncio
+async def test_bulk_request_requires_room_ids():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post("/rooms/bulk/close", json={"room_ids": []})
+    assert response.status_code == 422
@@ -6,7 +6,7 @@ from datetime import datetime, timezone
 import asyncio
 
 from app.main import app
-from app.database import get_db, CallStatus, AgentStatus, TransferStatus
+from app.database import get_db, get_read_db, CallStatus, AgentStatus, TransferStatus
 from models.transfer import TransferRequest, TransferResponse, TransferStatusResponse, AgentAvailabilityResponse
 
 
@@ -19,6 +19,7 @@ def override_get_db():
 @pytest.fixture(autouse=True)
 def override_dependency(override_get_db):
     app.dependency_overrides[get_db] = lambda: override_get_db
+    app.dependency_overrides[get_read_db] = lambda: override_get_db
     yield
     app.dependency_overrides.clear()
 
@@ -246,7 +247,7 @@ async def test_get_active_transfers_success(override_get_db):
 
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
-        with patch("routers.transfer.transfer_service.get_active_transfers", return_value=mock_service_response):
+        with patch("routers.transfer.transfer_service.get_active_transfers", new=AsyncMock(return_value=mock_service_response)):
             response = await ac.get("/routers/transfer/active")
 
     assert response.status_code == 200
@@ -262,7 +263,7 @@ async def test_get_active_transfers_empty(override_get_db):
 
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
-        with patch("routers.transfer.transfer_service.get_active_transfers", return_value=mock_service_response):
+        with patch("routers.transfer.transfer_service.get_active_transfers", new=AsyncMock(return_value=mock_service_response)):
             response = await ac.get("/routers/transfer/active")
 
     assert response.status_code == 200
@@ -335,4 +336,26 @@ async def test_get_available_agents_server_error(override_get_db):
 
     assert response.status_code == 500
     body = response.json()
-    assert "detail" in body
\ No newline at end of file
+    assert "detail" in body
+
+@pytest.mark.asyncio
+async def test_active_transfers_conditional_get(sqlite_db, relay):
+    from services.event_bus import record_event
+    from app.database import EventType
+    transport = ASGITransport(app=app)
+    active = AsyncMock(return_value=[{"transfer_id": "t1"}])
+    with patch("routers.transfer.transfer_service.get_active_transfers", active):
+        async with AsyncClient(transport=transport, base_url="http://test") as ac:
+            first = await ac.get("/routers/transfer/active")
+            etag = first.headers["etag"]
+            unchanged = await ac.get("/routers/transfer/active", headers={"If-None-Match": etag})
+
+            record_event(sqlite_db, EventType.TRANSFER_COMPLETED, {"transfer_id": "t1"})
+            sqlite_db.commit()
+            relay.poll_once()
+            changed = await ac.get("/routers/transfer/active", headers={"If-None-Match": etag})
+
+    assert first.status_code == 200
+    assert unchanged.status_code == 304
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+    assert active.await_count == 2  # the 304 never reached the store
@@ -50,15 +50,15 @@ async def test_initiate_warm_transfer_success():
     llm_service.generate_call_summary = mock_generate_call_summary
     llm_service.generate_transfer_context = mock_generate_transfer_context
 
-    # Mock LiveKit service
-    livekit_service.generate_room_id = lambda x: "transfer_room_1"
-    livekit_service.create_room = AsyncMock(return_value={"sid": "room_sid"})
-    livekit_service.generate_access_token = lambda **kwargs: "token"
-
-    # Run the service
-    result = await transfer_service.initiate_warm_transfer(
-        "call1", "agent1", "agent2", "Reason", db=mock_db
-    )
+    # Mock LiveKit service (the singleton instance the transfer service uses)
+    with patch.object(livekit_service.livekit_service, "generate_room_id", return_value="transfer_room_1"), \
+        patch.object(livekit_service.livekit_service, "create_room", new=AsyncMock(return_value={"sid": "room_sid"})), \
+        patch.object(livekit_service.livekit_service, "generate_access_token", return_value="token"):
+
+        # Run the service
+        result = await transfer_service.initiate_warm_transfer(
+            "call1", "agent1", "agent2", "Reason", db=mock_db
+        )
 
     assert result["success"] is True
     assert result["summary"] == "Test Summary"
@@ -95,4 +95,374 @@ async def test_cancel_transfer_success():
     result = await transfer_service.cancel_transfer("transfer1", db=mock_db)
 
     assert result["success"] is True
-    assert result["message"] == "Transfer cancelled"
\ No newline at end of file
+    assert result["message"] == "Transfer cancelled"
+
+# --- timeout recovery against a real (in-memory) database -----------------
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, text, event as sa_event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database import Base, Call, Agent, Transfer, TransferStatus, add_missing_columns
+from app.config import settings
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+def _seed_transfers(db):
+    now = datetime.utcnow()
+    db.add_all([
+        Agent(id="a1", name="Alice", email="a1@example.com", status="busy"),
+        Agent(id="a2", name="Bob", email="a2@example.com", status="busy"),
+        Call(id="c1", room_id="room1", status="transferring", agent_a_id="a1"),
+        Transfer(id="overdue", call_id="c1", from_agent_id="a1", to_agent_id="a2",
+                 status=TransferStatus.INITIATED.value, timeout_at=now - timedelta(minutes=1)),
+        Transfer(id="pending", call_id="c1", from_agent_id="a1", to_agent_id="a2",
+                 status=TransferStatus.IN_PROGRESS.value, timeout_at=now + timedelta(minutes=5)),
+        Transfer(id="done", call_id="c1", from_agent_id="a1", to_agent_id="a2",
+                 status=TransferStatus.COMPLETED.value, timeout_at=now - timedelta(minutes=1)),
+    ])
+    db.commit()
+
+
+@pytest.mark.asyncio
+async def test_start_recovers_pending_transfer_timeouts(session_factory):
+    db = session_factory()
+    _seed_transfers(db)
+    db.close()
+
+    service = TransferService(session_factory=session_factory)
+    with patch("services.transfer_service.livekit_service.close_room", new=AsyncMock(return_value=True)):
+        await service.start()
+        try:
+            await asyncio.sleep(0.1)
+            assert "pending" in service.timeout_scheduler
+            assert "overdue" not in service.timeout_scheduler
+            active = await service.get_active_transfers()
+        finally:
+            await service.stop()
+
+    db = session_factory()
+    statuses = {t.id: t.status for t in db.query(Transfer).all()}
+    assert statuses == {
+        "overdue": TransferStatus.FAILED.value,
+        "pending": TransferStatus.IN_PROGRESS.value,
+        "done": TransferStatus.COMPLETED.value,
+    }
+    assert db.query(Agent).filter(Agent.id == "a2").first().status == "available"
+    assert db.query(Transfer).filter(Transfer.id == "overdue").first().timeout_at is None
+    db.close()
+
+    assert [t["transfer_id"] for t in active] == ["pending"]
+    # a clean shutdown hands the lease back for another worker to claim
+    assert "pending" not in service.timeout_scheduler
+
+
+@pytest.mark.asyncio
+async def test_recovery_reads_only_deadline_columns(session_factory):
+    db = session_factory()
+    _seed_transfers(db)
+    statements = []
+    engine = db.get_bind()
+    record = lambda conn, cursor, statement, *args: statements.append(statement)
+    sa_event.listen(engine, "before_cursor_execute", record)
+    try:
+        service = TransferService(session_factory=session_factory)
+        assert await service.recover_pending_transfers(db) == 2
+    finally:
+        sa_event.remove(engine, "before_cursor_execute", record)
+        db.close()
+
+    reads = [s for s in statements if s.lstrip().upper().startswith("SELECT") and "FROM transfers" in s]
+    assert reads and not any("summary_shared" in s for s in reads)
+
+
+@pytest.mark.asyncio
+async def test_recovered_deadline_does_not_depend_on_server_timezone(session_factory, monkeypatch):
+    db = session_factory()
+    db.add_all([
+        Agent(id="a1", name="Alice", email="a1@example.com", status="busy"),
+        Agent(id="a2", name="Bob", email="a2@example.com", status="busy"),
+        Call(id="c1", room_id="room1", status="transferring", agent_a_id="a1"),
+        # predates timeout_at: the deadline comes from initiated_at (func.now(), UTC)
+        Transfer(id="legacy", call_id="c1", from_agent_id="a1", to_agent_id="a2", status=TransferStatus.INITIATED.value),
+    ])
+    db.commit()
+
+    monkeypatch.setenv("TZ", "Asia/Kolkata")
+    time.tzset()
+    try:
+        service = TransferService(session_factory=session_factory)
+        assert await service.recover_pending_transfers(db) == 1
+        expected = time.time() + settings.MAX_TRANSFER_WAIT_TIME
+        assert abs(service.timeout_scheduler.deadline_for("legacy") - expected) < 5
+    finally:
+        monkeypatch.delenv("TZ")
+        time.tzset()
+        db.close()
+
+
+@pytest.mark.asyncio
+async def test_timeout_ignores_transfer_completed_elsewhere(session_factory):
+    db = session_factory()
+    _seed_transfers(db)
+    db.close()
+
+    service = TransferService(session_factory=session_factory)
+    with patch.object(service, "cancel_transfer", new=AsyncMock()) as mock_cancel:
+        await service._handle_transfer_timeout("done")
+    mock_cancel.assert_not_awaited()
+
+
+def test_add_missing_columns_upgrades_old_schema():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE transfers (id VARCHAR PRIMARY KEY, call_id VARCHAR NOT NULL, status VARCHAR(20))"))
+
+    add_missing_columns(engine)
+
+    with engine.connect() as conn:
+        columns = {row[1] for row in conn.execute(text("PRAGMA table_info(transfers)"))}
+    assert {"timeout_at", "timeout_owner", "timeout_lease_expires_at"} <= columns
+    engine.dispose()
+
+
+# --- transfer state machine against a real database ------------------------
+
+from contextlib import contextmanager
+from sqlalchemy import event
+from app.database import CallStatus, AgentStatus, OutboxEvent
+from services.transfer_store import transfer_info
+
+
+def _event_types(db):
+    return [e.event_type for e in db.query(OutboxEvent).order_by(OutboxEvent.id)]
+
+
+def _seed_active_call(db):
+    db.add_all([
+        Agent(id="a1", name="Alice", email="a1@example.com", status="busy", current_room_id="room1"),
+        Agent(id="a2", name="Bob", email="a2@example.com", status="available"),
+        Call(id="c1", room_id="room1", status="active", agent_a_id="a1", caller_name="Carol"),
+    ])
+    db.commit()
+
+
+@contextmanager
+def _fake_upstreams(create_room=None):
+    lk = livekit_service.livekit_service
+    with patch.object(lk, "create_room", new=create_room or AsyncMock(return_value={"room_id": "transfer_1"})), \
+        patch.object(lk, "generate_room_id", return_value="transfer_1"), \
+        patch.object(lk, "generate_access_token", return_value="token"), \
+        patch.object(lk, "remove_participant", new=AsyncMock(return_value=True)), \
+        patch.object(lk, "close_room", new=AsyncMock(return_value=True)) as close_room, \
+        patch.object(llm_service, "generate_transfer_context", new=AsyncMock(return_value="context")):
+        yield close_room
+
+
+def _count_commits(db):
+    commits = []
+    event.listen(db, "after_commit", lambda session: commits.append(1))
+    return commits
+
+
+def _state(db):
+    db.expire_all()
+    transfer = db.query(Transfer).first()
+    return (
+        transfer.status if transfer else None,
+        db.query(Call).filter(Call.id == "c1").first().status,
+        db.query(Agent).filter(Agent.id == "a1").first().status,
+        db.query(Agent).filter(Agent.id == "a2").first().status,
+    )
+
+
+@pytest.mark.asyncio
+async def test_transfer_lifecycle_commits_once_per_transition(session_factory):
+    db = session_factory()
+    _seed_active_call(db)
+    service = TransferService(session_factory=session_factory)
+    commits = _count_commits(db)
+
+    with _fake_upstreams():
+        result = await service.initiate_warm_transfer("c1", "a1", "a2", "billing", db=db)
+        assert result["success"] is True
+        assert len(commits) == 2  # -> initiated, -> in_progress
+        assert _state(db) == ("in_progress", "transferring", "busy", "busy")
+
+        result = await service.complete_warm_transfer(result["transfer_id"], db=db)
+        assert result["success"] is True
+        assert len(commits) == 3
+    assert _state(db) == ("completed", "active", "available", "busy")
+    assert db.query(Call).first().agent_b_id == "a2"
+    # each transition carried its event in the same commit
+    assert _event_types(db) == ["transfer.initiated", "transfer.in_progress", "transfer.completed"]
+    db.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_room_creation_rolls_transfer_back(session_factory):
+    db = session_factory()
+    _seed_active_call(db)
+    service = TransferService(session_factory=session_factory)
+
+    with _fake_upstreams(create_room=AsyncMock(side_effect=RuntimeError("livekit down"))):
+        result = await service.initiate_warm_transfer("c1", "a1", "a2", db=db)
+
+    assert result == {"success": False, "error": "livekit down"}
+    assert _state(db) == ("failed", "active", "busy", "available")
+    assert _event_types(db) == ["transfer.initiated", "transfer.failed"]
+    assert db.query(Transfer).first().timeout_at is None
+    assert await service.get_active_transfers() == []
+    assert service.timeout_scheduler.keys() == []
+    db.close()
+
+
+@pytest.mark.asyncio
+async def test_initiated_transfer_is_stored_like_every_other(session_factory):
+    db = session_factory()
+    _seed_active_call(db)
+    service = TransferService(session_factory=session_factory)
+    stored = []
+
+    async def create_room(**kwargs):
+        # the transfer is initiated and tracked by now; the room is next
+        stored.extend(await service.store.list_active())
+        return {"room_id": "transfer_1"}
+
+    with _fake_upstreams(create_room=AsyncMock(side_effect=create_room)):
+        result = await service.initiate_warm_transfer("c1", "a1", "a2", db=db)
+
+    transfer = db.get(Transfer, result["transfer_id"])
+    assert stored == [{**transfer_info(transfer), "status": "initiated", "transfer_room_id": None}]
+    assert stored[0]["created_at"] == transfer.initiated_at
+    db.close()
+
+
+@pytest.mark.asyncio
+async def test_target_agent_taken_concurrently_leaves_nothing_behind(session_factory):
+    db = session_factory()
+    _seed_active_call(db)
+    service = TransferService(session_factory=session_factory)
+
+    # another worker grabs agent b between validation and the claim
+    other = session_factory()
+    other.query(Agent).filter(Agent.id == "a2").update({Agent.status: "busy"})
+    other.commit()
+    other.close()
+
+    with patch.object(service, "_validate_transfer_conditions", new=AsyncMock(return_value={"valid": True})), \
+        _fake_upstreams() as close_room:
+        result = await service.initiate_warm_transfer("c1", "a1", "a2", db=db)
+
+    assert result == {"success": False, "error": "Target agent is not available"}
+    assert _state(db) == (None, "active", "busy", "busy")
+    assert _event_types(db) == []
+    close_room.assert_not_awaited()
+    db.close()
+
+
+@pytest.mark.asyncio
+async def test_cancel_restores_call_and_finished_transfers_are_final(session_factory):
+    db = session_factory()
+    _seed_active_call(db)
+    service = TransferService(session_factory=session_factory)
+
+    with _fake_upstreams():
+        transfer_id = (await service.initiate_warm_transfer("c1", "a1", "a2", db=db))["transfer_id"]
+        assert (await service.cancel_transfer(transfer_id, db=db))["success"] is True
+        assert _state(db) == ("failed", "active", "busy", "available")
+
+        completed = await service.complete_warm_transfer(transfer_id, db=db)
+        cancelled_again = await service.cancel_transfer(transfer_id, db=db)
+
+    assert completed == {"success": False, "error": "Cannot move transfer from failed to completed"}
+    assert cancelled_again["success"] is False
+    assert _state(db) == ("failed", "active", "busy", "available")
+    db.close()
+
+
+@pytest.mark.asyncio
+async def test_completion_racing_a_timeout_only_one_wins(session_factory):
+    db = session_factory()
+    _seed_active_call(db)
+    service = TransferService(session_factory=session_factory)
+
+    with _fake_upstreams():
+        transfer_id = (await service.initiate_warm_transfer("c1", "a1", "a2", db=db))["transfer_id"]
+
+        # completion has read the transfer as in_progress (held in its
+        # session) when the timeout fires on another worker and fails it
+        db.expire_all()
+        read = [db.get(Transfer, transfer_id), *db.query(Call), *db.query(Agent)]
+        assert read[0].status == TransferStatus.IN_PROGRESS.value
+        await service._handle_transfer_timeout(transfer_id)
+
+        result = await service.complete_warm_transfer(transfer_id, db=db)
+
+    assert result == {"success": False, "error": "Transfer is no longer in_progress"}
+    assert _state(db) == ("failed", "active", "busy", "available")
+    assert db.query(Call).first().agent_b_id is None
+    assert _event_types(db) == ["transfer.initiated", "transfer.in_progress", "transfer.failed"]
+    db.close()
+
+
+@pytest.mark.asyncio
+async def test_transfer_timestamps_are_utc_whatever_the_server_timezone(session_factory, monkeypatch):
+    db = session_factory()
+    _seed_active_call(db)
+    db.add(Agent(id="a3", name="Dan", email="a3@example.com", status="available"))
+    db.commit()
+    service = TransferService(session_factory=session_factory)
+
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    try:
+        with _fake_upstreams():
+            completed_id = (await service.initiate_warm_transfer("c1", "a1", "a2", db=db))["transfer_id"]
+            await service.complete_warm_transfer(completed_id, db=db)
+            # a second transfer of the call, cancelled this time
+            cancelled_id = (await service.initiate_warm_transfer("c1", "a1", "a3", db=db))["transfer_id"]
+            await service.cancel_transfer(cancelled_id, db=db)
+    finally:
+        monkeypatch.delenv("TZ")
+        time.tzset()
+
+    db.expire_all()
+    now = datetime.utcnow()
+    for transfer_id in (completed_id, cancelled_id):
+        transfer = db.get(Transfer, transfer_id)
+        assert abs((transfer.initiated_at - now).total_seconds()) < 5
+        assert abs((transfer.completed_at - now).total_seconds()) < 5
+    assert 0 <= db.get(Transfer, completed_id).duration_seconds < 5
+    db.close()
+
+
+@pytest.mark.asyncio
+async def test_transfer_steps_are_traced_under_one_span(session_factory, spans):
+    db = session_factory()
+    _seed_active_call(db)
+    service = TransferService(session_factory=session_factory)
+
+    with _fake_upstreams():
+        result = await service.initiate_warm_transfer("c1", "a1", "a2", "billing", db=db)
+    assert result["success"] is True
+
+    root = next(s for s in spans if s.name == "transfer.initiate")
+    assert root.attributes["transfer.id"] == result["transfer_id"]
+    steps = [s.name for s in spans if s.parent_id == root.span_id]
+    for step in ("validate", "initiated", "summary", "room", "tokens", "in_progress", "context"):
+        assert f"transfer.{step}" in steps
+    # the steps' SQL is traced under them, all in one trace
+    validate = next(s for s in spans if s.name == "transfer.validate")
+    assert any(s.name == "db.statement" and s.parent_id == validate.span_id for s in spans)
+    assert {s.trace_id for s in spans} == {root.trace_id}
+    db.close()
@@ -0,0 +1,124 @@
+import logging
+import pytest
+from datetime import datetime, timedelta
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+from app.database import (
+    Agent, Call, Transfer, Room, OutboxEvent, CallStatus, TransferStatus, calls_archive, transfers_archive,
+    rooms_archive
+)
+from app.main import app
+from services.archiver import CallArchiver
+from services.event_bus import EventBus
+
+NOW = datetime(2024, 6, 1, 12, 0, 0)
+
+
+def _call(call_id, status, age_days, **fields):
+    created = NOW - timedelta(days=age_days)
+    return Call(
+        id=call_id, room_id=f"room_{call_id}", status=status, created_at=created,
+        ended_at=created + timedelta(minutes=5), transcript="caller: hi", **fields
+    )
+
+
+@pytest.fixture
+def history(sqlite_db):
+    sqlite_db.add_all([Agent(id="a1", name="A1", email="a1@example.com"), Agent(id="a2", name="A2", email="a2@example.com")])
+    sqlite_db.add_all([
+        _call("old-done", CallStatus.COMPLETED.value, 40, agent_a_id="a1", agent_b_id="a2"),
+        _call("old-failed", CallStatus.FAILED.value, 50, agent_a_id="a2"),
+        _call("old-pending", CallStatus.COMPLETED.value, 45, agent_a_id="a1"),
+        _call("old-active", CallStatus.ACTIVE.value, 60, agent_a_id="a1"),
+        _call("recent-done", CallStatus.COMPLETED.value, 3, agent_a_id="a1"),
+    ])
+    sqlite_db.add_all([
+        Transfer(id="t1", call_id="old-done", from_agent_id="a1", to_agent_id="a2",
+                 status=TransferStatus.COMPLETED.value, initiated_at=NOW - timedelta(days=40)),
+        Transfer(id="t2", call_id="old-pending", from_agent_id="a1", to_agent_id="a2",
+                 status=TransferStatus.INITIATED.value, initiated_at=NOW - timedelta(days=45)),
+        Room(id="r1", livekit_room_id="room_old-done", name="room_old-done", call_id="old-done"),
+    ])
+    sqlite_db.commit()
+    archiver = CallArchiver(session_factory=sessionmaker(bind=sqlite_db.get_bind()))
+    archiver.retention_days = 30
+    archiver.batch_size = 1  # several batches
+    return archiver
+
+
+def test_archive_moves_finished_calls_past_retention_with_transfers_and_rooms(sqlite_db, history):
+    moved = history.archive_once(now=NOW)
+
+    assert moved == {"calls": 2, "transfers": 1, "rooms": 1}
+    sqlite_db.expire_all()
+    # recent, unfinished and mid-transfer calls stay hot
+    assert sorted(call.id for call in sqlite_db.query(Call)) == ["old-active", "old-pending", "recent-done"]
+    assert [transfer.id for transfer in sqlite_db.query(Transfer)] == ["t2"]
+    assert sqlite_db.query(Room).count() == 0
+
+    archived = sqlite_db.execute(select(calls_archive.c.id, calls_archive.c.transcript, calls_archive.c.archived_at)).all()
+    assert sorted(row.id for row in archived) == ["old-done", "old-failed"]
+    assert all(row.transcript == "caller: hi" and row.archived_at for row in archived)
+    assert sqlite_db.execute(select(transfers_archive.c.id)).scalars().all() == ["t1"]
+    assert sqlite_db.execute(select(rooms_archive.c.id)).scalars().all() == ["r1"]
+
+    # nothing left to move
+    assert history.archive_once(now=NOW) == {"calls": 0, "transfers": 0, "rooms": 0}
+
+
+def test_archived_batches_move_the_calls_and_transfers_versions(sqlite_db, history):
+    bus = EventBus(session_factory=sessionmaker(bind=sqlite_db.get_bind()))
+    bus.poll_once()
+    before = dict(bus._versions)
+
+    history.archive_once(now=NOW)
+
+    events = sqlite_db.query(OutboxEvent).filter(OutboxEvent.event_type == "call.archived").order_by(OutboxEvent.id).all()
+    assert [event.payload["call_ids"] for event in events] == [["old-failed"], ["old-done"]]
+    assert events[1].room_ids == ["room_old-done"] and events[1].agent_ids == ["a1", "a2"]
+    bus.poll_once()
+    assert bus._versions["calls"] == before["calls"] + 2
+    assert bus._versions["transfers"] == before["transfers"] + 2
+    assert bus._versions["agents"] == before["agents"]
+
+
+def test_conflicting_batch_is_skipped_and_the_pass_goes_on(sqlite_db, history, caplog):
+    # old-failed, the oldest and so the first batch, is already in the archive
+    sqlite_db.execute(calls_archive.insert().values(id="old-failed", room_id="room_old-failed", archived_at=NOW))
+    sqlite_db.commit()
+
+    with caplog.at_level(logging.WARNING, logger="services.archiver"):
+        moved = history.archive_once(now=NOW)
+
+    assert moved == {"calls": 1, "transfers": 1, "rooms": 1}
+    sqlite_db.expire_all()
+    assert sorted(call.id for call in sqlite_db.query(Call)) == ["old-active", "old-failed", "old-pending", "recent-done"]
+    [warning] = [r for r in caplog.records if r.name == "services.archiver"]
+    assert warning.call_ids == ["old-failed"]
+
+
+@pytest.mark.asyncio
+async def test_history_endpoints_serve_archived_calls(sqlite_db, history):
+    history.archive_once(now=NOW)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        first = await ac.get("/routers/history/calls", params={"limit": 1})
+        second = await ac.get("/routers/history/calls", params={"limit": 1, "cursor": first.headers["x-next-cursor"]})
+        for_a2 = await ac.get("/routers/history/calls", params={"agent_id": "a2"})
+        failed = await ac.get("/routers/history/calls", params={"status": "failed"})
+        detail = await ac.get("/routers/history/calls/old-done")
+        missing = await ac.get("/routers/history/calls/recent-done")
+
+    assert [call["id"] for call in first.json() + second.json()] == ["old-done", "old-failed"]
+    assert "x-next-cursor" not in second.headers
+    assert sorted(call["id"] for call in for_a2.json()) == ["old-done", "old-failed"]
+    assert [call["id"] for call in failed.json()] == ["old-failed"]
+    assert first.json()[0]["archived_at"]
+
+    assert detail.status_code == 200
+    assert detail.json()["transcript"] == "caller: hi"
+    assert [transfer["id"] for transfer in detail.json()["transfers"]] == ["t1"]
+    # recent calls are still served by /routers/calls
+    assert missing.status_code == 404
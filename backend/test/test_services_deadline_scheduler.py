@@ -0,0 +1,112 @@
+import asyncio
+import time
+import pytest
+
+from services.deadline_scheduler import DeadlineScheduler
+
+
+async def _noop(key):
+    return None
+
+
+def test_pop_due_returns_keys_in_deadline_order():
+    scheduler = DeadlineScheduler(_noop)
+    scheduler.schedule("late", 30)
+    scheduler.schedule("early", 10)
+    scheduler.schedule("middle", 20)
+
+    assert scheduler.pop_due(now=25) == ["early", "middle"]
+    assert len(scheduler) == 1
+    assert scheduler.next_deadline() == 30
+
+
+def test_cancel_and_reschedule():
+    scheduler = DeadlineScheduler(_noop)
+    scheduler.schedule("t1", 10)
+    scheduler.schedule("t2", 10)
+    assert scheduler.cancel("t1") is True
+    assert scheduler.cancel("t1") is False
+
+    # moving a deadline later leaves a stale heap entry that must not fire
+    scheduler.schedule("t2", 50)
+    assert scheduler.pop_due(now=20) == []
+    assert scheduler.pop_due(now=50) == ["t2"]
+    assert len(scheduler) == 0
+
+
+def test_many_deadlines_stay_compact():
+    scheduler = DeadlineScheduler(_noop)
+    for i in range(50_000):
+        scheduler.schedule(f"t{i}", 1_000 + i)
+    assert len(scheduler) == 50_000
+
+    for i in range(0, 50_000, 2):
+        scheduler.cancel(f"t{i}")
+    assert len(scheduler) == 25_000
+    # stale entries get compacted away instead of accumulating
+    assert len(scheduler._heap) <= 2 * len(scheduler)
+
+    due = scheduler.pop_due(now=1_000 + 99)
+    assert due == [f"t{i}" for i in range(1, 100, 2)]
+
+
+@pytest.mark.asyncio
+async def test_background_loop_fires_due_deadlines():
+    fired = []
+
+    async def on_expire(key):
+        fired.append(key)
+
+    scheduler = DeadlineScheduler(on_expire)
+    await scheduler.start()
+    try:
+        now = time.time()
+        scheduler.schedule("overdue", now - 60)
+        scheduler.schedule("soon", now + 0.05)
+        scheduler.schedule("cancelled", now + 0.05)
+        scheduler.cancel("cancelled")
+        scheduler.schedule("later", now + 60)
+
+        await asyncio.sleep(0.2)
+        assert fired == ["overdue", "soon"]
+        assert "later" in scheduler
+    finally:
+        await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_earlier_deadline_wakes_sleeping_loop():
+    fired = asyncio.Event()
+
+    async def on_expire(key):
+        fired.set()
+
+    scheduler = DeadlineScheduler(on_expire)
+    await scheduler.start()
+    try:
+        scheduler.schedule("far", time.time() + 3600)
+        await asyncio.sleep(0.01)
+        scheduler.schedule("near", time.time() + 0.02)
+        await asyncio.wait_for(fired.wait(), timeout=1)
+    finally:
+        await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_failing_handler_does_not_stop_loop():
+    fired = []
+
+    async def on_expire(key):
+        fired.append(key)
+        if key == "bad":
+            raise RuntimeError("boom")
+
+    scheduler = DeadlineScheduler(on_expire)
+    await scheduler.start()
+    try:
+        scheduler.schedule("bad", time.time())
+        scheduler.schedule("good", time.time() + 0.02)
+        await asyncio.sleep(0.1)
+        assert fired == ["bad", "good"]
+    finally:
+        await scheduler.stop()
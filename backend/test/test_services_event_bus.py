@@ -0,0 +1,205 @@
+import asyncio
+import time
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base, OutboxEvent, EventType
+from services.event_bus import EventBus, Subscription, record_event
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+def _commit_event(session_factory, event_type=EventType.CALL_UPDATED, room_ids=(), agent_ids=(), event_id=None, **payload):
+    db = session_factory()
+    event = record_event(db, event_type, payload, room_ids=room_ids, agent_ids=agent_ids)
+    if event_id is not None:
+        event.id = event_id
+    db.commit()
+    event_id = event.id
+    db.close()
+    return event_id
+
+
+def _drain(subscription):
+    events = []
+    while not subscription.queue.empty():
+        events.append(subscription.queue.get_nowait())
+    return events
+
+
+def test_subscription_filters():
+    call_for_a1 = {"room_ids": ["room1"], "agent_ids": ["a1"]}
+    unassigned = {"room_ids": ["room2"], "agent_ids": []}
+
+    assert Subscription().matches(call_for_a1)
+    assert Subscription(agent_id="a1").matches(call_for_a1)
+    assert not Subscription(agent_id="a2").matches(call_for_a1)
+    assert Subscription(agent_id="a2").matches(unassigned)
+    assert Subscription(room_id="room1").matches(call_for_a1)
+    assert not Subscription(room_id="room1").matches(unassigned)
+
+
+@pytest.mark.asyncio
+async def test_relay_publishes_committed_events_to_matching_subscribers(session_factory):
+    bus = EventBus(session_factory)
+    await bus.start()
+    try:
+        for_a1 = bus.subscribe(agent_id="a1")
+        for_room2 = bus.subscribe(room_id="room2")
+
+        _commit_event(session_factory, room_ids=["room1"], agent_ids=["a1"], call_id="c1")
+        _commit_event(session_factory, room_ids=["room2"], agent_ids=["a2"], call_id="c2")
+        await asyncio.sleep(bus.poll_interval + 0.1)
+
+        assert [e["payload"]["call_id"] for e in _drain(for_a1)] == ["c1"]
+        assert [e["payload"]["call_id"] for e in _drain(for_room2)] == ["c2"]
+    finally:
+        await bus.stop()
+
+
+@pytest.mark.asyncio
+async def test_relay_starts_after_existing_events_and_replay_fills_in(session_factory):
+    old_id = _commit_event(session_factory, agent_ids=["a1"], call_id="old")
+    bus = EventBus(session_factory)
+    await bus.start()
+    try:
+        subscription = bus.subscribe(agent_id="a1")
+        assert bus.poll_once() == 0
+        assert _drain(subscription) == []
+        assert [e["id"] for e in bus.replay(0, agent_id="a1")] == [old_id]
+        assert bus.replay(old_id, agent_id="a1") == []
+    finally:
+        await bus.stop()
+
+
+def test_late_committing_lower_id_is_not_skipped(session_factory):
+    bus = EventBus(session_factory)
+    subscription = bus.subscribe()
+    bus._cursor = 0
+
+    # id 2 is committed first; id 1 belongs to a transaction still in flight
+    _commit_event(session_factory, event_id=2, call_id="second")
+    bus.poll_once()
+    assert bus._gaps.keys() == {1}
+
+    _commit_event(session_factory, event_id=1, call_id="first")
+    bus.poll_once()
+    assert [e["payload"]["call_id"] for e in _drain(subscription)] == ["second", "first"]
+    assert bus._gaps == {}
+    assert bus._cursor == 2
+
+
+def test_rolled_back_events_are_never_published(session_factory):
+    bus = EventBus(session_factory)
+    subscription = bus.subscribe()
+    bus._cursor = 0
+
+    db = session_factory()
+    record_event(db, EventType.CALL_CREATED, {"call_id": "never"})
+    db.rollback()
+    db.close()
+
+    assert bus.poll_once() == 0
+    assert db.query(OutboxEvent).count() == 0
+    assert _drain(subscription) == []
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_is_disconnected_not_blocking(session_factory):
+    bus = EventBus(session_factory)
+    bus.max_queue = 2
+    slow = bus.subscribe()
+    fast = bus.subscribe()
+
+    for i in range(3):
+        bus.publish({"id": i + 1, "room_ids": [], "agent_ids": [], "payload": {}})
+        fast.queue.get_nowait()
+
+    assert slow.closed
+    assert await slow.get() is None
+    assert bus.subscriber_count == 1
+    assert bus.snapshot()["subscribers_dropped"] == 1
+
+
+def test_ids_are_not_reused_after_cleanup_empties_the_outbox(session_factory):
+    bus = EventBus(session_factory)
+    _commit_event(session_factory, call_id="a")
+    last_id = _commit_event(session_factory, call_id="b")
+
+    bus.retention_seconds = -60
+    bus.cleanup()
+    assert _commit_event(session_factory, call_id="c") > last_id
+
+
+def test_cleanup_keeps_events_inside_retention_in_any_timezone(session_factory, monkeypatch):
+    monkeypatch.setenv("TZ", "Asia/Kolkata")
+    time.tzset()
+    try:
+        _commit_event(session_factory, call_id="recent")
+        EventBus(session_factory).cleanup()
+    finally:
+        monkeypatch.delenv("TZ")
+        time.tzset()
+
+    db = session_factory()
+    assert db.query(OutboxEvent).count() == 1
+    db.close()
+
+
+@pytest.mark.asyncio
+async def test_versions_move_only_for_the_collections_an_event_touches(session_factory):
+    bus = EventBus(session_factory)
+    assert bus.version_token(("calls",)) is None  # not tracked until the relay runs
+
+    await bus.start()
+    try:
+        calls, agents, transfers = (bus.version_token((name,)) for name in ("calls", "agents", "transfers"))
+
+        _commit_event(session_factory, EventType.CALL_UPDATED, call_id="c1")
+        bus.poll_once()
+        assert bus.version_token(("calls",)) != calls
+        assert bus.version_token(("agents",)) == agents
+        assert bus.version_token(("transfers",)) == transfers
+
+        calls = bus.version_token(("calls",))
+        _commit_event(session_factory, EventType.TRANSFER_INITIATED, transfer_id="t1")
+        bus.poll_once()
+        assert all(bus.version_token((name,)) != before for name, before in
+                   (("calls", calls), ("agents", agents), ("transfers", transfers)))
+
+        # another process (or this one restarted) never produces the same token
+        assert EventBus(session_factory).instance_id != bus.instance_id
+    finally:
+        await bus.stop()
+    assert bus.version_token(("calls",)) is None
+
+
+@pytest.mark.asyncio
+async def test_wait_for_change_wakes_on_a_relayed_event_and_times_out_otherwise(session_factory):
+    bus = EventBus(session_factory)
+    await bus.start()
+    try:
+        token = bus.version_token(("agents",))
+        assert await bus.wait_for_change(("agents",), token, 0.05) is False
+
+        waiter = asyncio.create_task(bus.wait_for_change(("agents",), token, 5))
+        await asyncio.sleep(0.05)
+        _commit_event(session_factory, EventType.CALL_UPDATED, call_id="c1")
+        bus.poll_once()
+        await asyncio.sleep(0.05)
+        assert not waiter.done()  # a calls event doesn't change agents
+
+        started = time.monotonic()
+        _commit_event(session_factory, EventType.AGENT_STATUS_CHANGED, agent_id="a1")
+        assert await waiter is True
+        assert time.monotonic() - started < 1  # woken by the commit, not a timeout
+    finally:
+        await bus.stop()
@@ -1,7 +1,12 @@
+import asyncio
 import pytest
 from types import SimpleNamespace
 from unittest.mock import AsyncMock, patch
+from livekit.api import TwirpError
 from services.livekit_service import LiveKitService
+from test.livekit_stub import LiveKitStub
+
+pytestmark = pytest.mark.usefixtures("livekit_credentials")
 
 @pytest.mark.asyncio
 async def test_generate_access_token():
@@ -51,7 +56,7 @@ async def test_get_room():
     )
 
     mock_room_service = AsyncMock()
-    mock_room_service.list_rooms.return_value = [mock_room]
+    mock_room_service.list_rooms.return_value = SimpleNamespace(rooms=[mock_room])
 
     with patch.object(service, 'get_room_service', return_value=mock_room_service):
         result = await service.get_room("room1")
@@ -73,13 +78,102 @@ async def test_list_participants():
     )
 
     mock_room_service = AsyncMock()
-    mock_room_service.list_participants.return_value = [mock_participant]
+    mock_room_service.list_participants.return_value = SimpleNamespace(participants=[mock_participant])
 
     with patch.object(service, 'get_room_service', return_value=mock_room_service):
         participants = await service.list_participants("room1")
         assert len(participants) == 1
         assert participants[0]["identity"] == "user1"
 
+def _stats_room_service():
+    mock_room = SimpleNamespace(
+        name="room1",
+        sid="sid123",
+        num_participants=2,
+        max_participants=10,
+        creation_time="2025-09-18T00:00:00Z",
+        metadata=None
+    )
+    caller = SimpleNamespace(
+        identity="caller_1",
+        name="Caller",
+        state=SimpleNamespace(name="ACTIVE"),
+        tracks=[SimpleNamespace(sid="t1", name="mic", type=0, muted=False)],
+        metadata=None,
+        joined_at=0,
+        is_publisher=True
+    )
+    agent = SimpleNamespace(
+        identity="agent_1",
+        name="Agent",
+        state=SimpleNamespace(name="ACTIVE"),
+        tracks=[
+            SimpleNamespace(sid="t2", name="mic", type=0, muted=False),
+            SimpleNamespace(sid="t3", name="cam", type=1, muted=False),
+        ],
+        metadata=None,
+        joined_at=0,
+        is_publisher=True
+    )
+    mock_room_service = AsyncMock()
+    mock_room_service.list_rooms.return_value = SimpleNamespace(rooms=[mock_room])
+    mock_room_service.list_participants.return_value = SimpleNamespace(participants=[caller, agent])
+    return mock_room_service
+
+@pytest.mark.asyncio
+async def test_get_room_stats():
+    service = LiveKitService()
+    mock_room_service = _stats_room_service()
+
+    with patch.object(service, 'get_room_service', return_value=mock_room_service):
+        stats = await service.get_room_stats("room1")
+
+    assert stats["room_info"]["room_id"] == "room1"
+    assert stats["participant_count"] == 2
+    assert stats["active_publishers"] == 2
+    assert stats["audio_tracks"] == 2
+    assert stats["video_tracks"] == 1
+    assert stats["participants"][1]["tracks"][1]["type"] == "VIDEO"
+
+@pytest.mark.asyncio
+async def test_get_room_stats_without_participants():
+    service = LiveKitService()
+    mock_room_service = _stats_room_service()
+
+    with patch.object(service, 'get_room_service', return_value=mock_room_service):
+        stats = await service.get_room_stats("room1", include_participants=False)
+
+    assert stats["participant_count"] == 2
+    assert "participants" not in stats
+
+@pytest.mark.asyncio
+async def test_get_room_stats_cached_until_invalidated():
+    service = LiveKitService()
+    mock_room_service = _stats_room_service()
+
+    with patch.object(service, 'get_room_service', return_value=mock_room_service):
+        first = await service.get_room_stats("room1")
+        first["participants"].clear()
+        second = await service.get_room_stats("room1")
+        # served from the cache, unaffected by what the first caller did with its copy
+        assert second["participant_count"] == len(second["participants"]) == 2
+        assert mock_room_service.list_participants.await_count == 1
+
+        service.invalidate_room_stats("room1")
+        await service.get_room_stats("room1")
+        assert mock_room_service.list_participants.await_count == 2
+
+@pytest.mark.asyncio
+async def test_get_room_stats_missing_room_not_cached():
+    service = LiveKitService()
+    mock_room_service = _stats_room_service()
+    mock_room_service.list_rooms.return_value = SimpleNamespace(rooms=[])
+
+    with patch.object(service, 'get_room_service', return_value=mock_room_service):
+        assert await service.get_room_stats("room1") == {}
+        assert await service.get_room_stats("room1") == {}
+    assert mock_room_service.list_rooms.await_count == 2
+
 @pytest.mark.asyncio
 async def test_remove_participant():
     service = LiveKitService()
@@ -105,12 +199,60 @@ async def test_mute_participant():
     
     # Mock room service
     mock_room_service = AsyncMock()
-    mock_room_service.list_participants.return_value = [mock_participant]
+    mock_room_service.get_participant.return_value = mock_participant
     mock_room_service.mute_published_track.return_value = None
 
     with patch.object(service, 'get_room_service', return_value=mock_room_service):
         result = await service.mute_participant("room1", "user1")
         assert result is True
+    mock_room_service.list_participants.assert_not_awaited()
+
+
+def _participant_with_tracks():
+    return SimpleNamespace(
+        identity="user1",
+        tracks=[
+            SimpleNamespace(sid="mic", type=0),
+            SimpleNamespace(sid="cam", type=1),
+            SimpleNamespace(sid="screen_audio", type=0),
+        ]
+    )
+
+@pytest.mark.asyncio
+async def test_mute_participant_filters_by_track_type():
+    service = LiveKitService()
+    mock_room_service = AsyncMock()
+    mock_room_service.get_participant.return_value = _participant_with_tracks()
+
+    with patch.object(service, 'get_room_service', return_value=mock_room_service):
+        assert await service.mute_participant("room1", "user1", "audio") is True
+
+    muted_sids = [c.args[0].track_sid for c in mock_room_service.mute_published_track.await_args_list]
+    assert muted_sids == ["mic", "screen_audio"]
+    assert all(c.args[0].muted for c in mock_room_service.mute_published_track.await_args_list)
+
+@pytest.mark.asyncio
+async def test_unmute_participant():
+    service = LiveKitService()
+    mock_room_service = AsyncMock()
+    mock_room_service.get_participant.return_value = _participant_with_tracks()
+
+    with patch.object(service, 'get_room_service', return_value=mock_room_service):
+        assert await service.unmute_participant("room1", "user1", "video") is True
+
+    requests = [c.args[0] for c in mock_room_service.mute_published_track.await_args_list]
+    assert [r.track_sid for r in requests] == ["cam"]
+    assert requests[0].muted is False
+
+@pytest.mark.asyncio
+async def test_mute_participant_not_found():
+    service = LiveKitService()
+    mock_room_service = AsyncMock()
+    mock_room_service.get_participant.side_effect = TwirpError("not_found", "participant not found", status=404)
+
+    with patch.object(service, 'get_room_service', return_value=mock_room_service):
+        assert await service.mute_participant("room1", "ghost") is False
+    mock_room_service.mute_published_track.assert_not_awaited()
 
 
 @pytest.mark.asyncio
@@ -122,3 +264,97 @@ async def test_send_data_to_participants():
     with patch.object(service, 'get_room_service', return_value=mock_room_service):
         result = await service.send_data_to_participants("room1", "hello world")
         assert result is True
+
+
+@pytest.mark.asyncio
+async def test_run_for_rooms_bounds_concurrency():
+    service = LiveKitService()
+    in_flight = 0
+    peak = 0
+
+    async def operation(room_id):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if room_id == "bad":
+            raise RuntimeError("boom")
+        return room_id
+
+    results = await service.run_for_rooms(["r1", "r2", "bad", "r3", "r4"], operation, concurrency=2)
+
+    assert peak == 2
+    assert [r["success"] for r in results] == [True, True, False, True, True]
+    assert results[2]["error"] == "boom"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_calls_build_one_client():
+    service = LiveKitService()
+    service.ws_url = "http://127.0.0.1:7880"
+    created = []
+
+    from livekit import api as livekit_api
+    real_api = livekit_api.LiveKitAPI
+
+    def counting_api(*args, **kwargs):
+        created.append(kwargs.get("session"))
+        return real_api(*args, **kwargs)
+
+    with patch.object(livekit_api, "LiveKitAPI", side_effect=counting_api):
+        services = await asyncio.gather(*(service.get_room_service() for _ in range(20)))
+
+    assert len(created) == 1
+    assert created[0] is service._session
+    assert all(s is services[0] for s in services)
+    await service.close()
+    assert service._session is None and created[0].closed
+
+
+@pytest.mark.asyncio
+async def test_start_prebuilds_client_and_close_allows_restart():
+    service = LiveKitService()
+    service.ws_url = "http://127.0.0.1:7880"
+
+    await service.start()
+    api = service._api
+    assert api is not None
+    # first request after startup reuses the client built at startup
+    assert await service.get_api() is api
+
+    await service.close()
+    assert service._api is None
+    await service.start()
+    assert service._api is not None and service._api is not api
+    await service.close()
+
+
+@pytest.mark.asyncio
+async def test_start_without_url_is_noop():
+    service = LiveKitService()
+    service.ws_url = ""
+    await service.start()
+    assert service._api is None
+
+
+@pytest.mark.asyncio
+async def test_requests_reuse_pooled_connections():
+    stub = LiveKitStub()
+    await stub.start()
+    stub.add_room("room1")
+    service = LiveKitService()
+    service.ws_url = stub.url
+    try:
+        await service.start()
+        for _ in range(25):
+            await service.get_room("room1")
+        # keep-alive: sequential requests ride a single socket
+        assert len(stub.connections) == 1
+
+        await asyncio.gather(*(service.get_room("room1") for _ in range(10)))
+        assert len(stub.connections) <= 10
+        assert stub.calls["ListRooms"] == 35
+    finally:
+        await service.close()
+        await stub.stop()
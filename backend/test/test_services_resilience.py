@@ -0,0 +1,323 @@
+import asyncio
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient, ASGITransport
+from unittest.mock import patch
+
+from services.resilience import (
+    RetryPolicy, CircuitBreaker, ResilientExecutor, CircuitOpenError,
+    UpstreamUnavailable, UpstreamRejected, UpstreamTimeout
+)
+from services.livekit_service import LiveKitService, classify_livekit_error
+from test.livekit_stub import LiveKitStub
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _classify(exc, operation):
+    if isinstance(exc, ConnectionError):
+        return UpstreamUnavailable(str(exc))
+    if isinstance(exc, PermissionError):
+        return UpstreamRejected(str(exc))
+    if isinstance(exc, asyncio.TimeoutError):
+        return UpstreamTimeout(str(exc))
+    return None
+
+
+def _fast_retry(attempts=3):
+    return RetryPolicy(max_attempts=attempts, base_delay=0.001, max_delay=0.002)
+
+
+def test_backoff_is_jittered_and_capped():
+    policy = RetryPolicy(max_attempts=5, base_delay=0.1, max_delay=0.3)
+    delays = [policy.backoff(attempt) for attempt in range(1, 6) for _ in range(50)]
+    assert all(0 <= d <= 0.3 for d in delays)
+    assert len(set(delays)) > 1
+
+
+def test_circuit_breaker_opens_and_recovers():
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=10, clock=clock)
+
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError) as exc_info:
+        breaker.before_call()
+    assert exc_info.value.retry_after == 10
+
+    clock.now = 10
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.before_call()  # the single probe
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.snapshot()["times_opened"] == 1
+
+
+def test_circuit_breaker_reopens_when_probe_fails():
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=5, clock=clock)
+    breaker.record_failure()
+    clock.now = 5
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+@pytest.mark.asyncio
+async def test_executor_retries_idempotent_transient_errors():
+    executor = ResilientExecutor("test", _classify, retry=_fast_retry())
+    attempts = 0
+
+    async def flaky():
+        nonlocal attempts
+        attempts += 1
+        if attempts < 3:
+            raise ConnectionError("reset")
+        return "ok"
+
+    assert await executor.call("op", flaky, idempotent=True) == "ok"
+    assert attempts == 3
+    assert executor.total_retries == 2
+
+
+@pytest.mark.asyncio
+async def test_executor_does_not_retry_non_idempotent_or_rejected_calls():
+    executor = ResilientExecutor("test", _classify, retry=_fast_retry())
+    attempts = 0
+
+    async def failing(exc):
+        nonlocal attempts
+        attempts += 1
+        raise exc
+
+    with pytest.raises(UpstreamUnavailable):
+        await executor.call("op", lambda: failing(ConnectionError("reset")), idempotent=False)
+    with pytest.raises(UpstreamRejected):
+        await executor.call("op", lambda: failing(PermissionError("denied")), idempotent=True)
+    assert attempts == 2
+
+
+@pytest.mark.asyncio
+async def test_executor_enforces_deadline():
+    executor = ResilientExecutor("test", _classify, retry=_fast_retry(), deadline=0.05)
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    with pytest.raises(UpstreamTimeout):
+        await executor.call("op", slow, idempotent=True)
+
+
+@pytest.mark.asyncio
+async def test_executor_propagates_unclassified_errors():
+    executor = ResilientExecutor("test", _classify, retry=_fast_retry())
+
+    async def broken():
+        raise ValueError("bug")
+
+    with pytest.raises(ValueError):
+        await executor.call("op", broken, idempotent=True)
+    assert executor.breaker.snapshot()["total_failures"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_probe_lets_the_next_probe_through():
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=5, clock=clock)
+    executor = ResilientExecutor("test", _classify, retry=_fast_retry(1), breaker=breaker)
+    breaker.record_failure()
+    clock.now = 5
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    probe = asyncio.create_task(executor.call("op", hang, idempotent=True))
+    await asyncio.sleep(0)
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+
+    async def ok():
+        return "up"
+
+    assert await executor.call("op", ok, idempotent=True) == "up"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+# --- LiveKitService against the fault-injecting stub server ---------------
+
+@pytest_asyncio.fixture
+async def stub():
+    server = LiveKitStub()
+    await server.start()
+    yield server
+    await server.stop()
+
+
+@pytest_asyncio.fixture
+async def service(stub, livekit_credentials):
+    svc = LiveKitService()
+    svc.ws_url = stub.url
+    svc._executor.retry = _fast_retry()
+    svc._executor.deadline = 2.0
+    yield svc
+    await svc.close()
+
+
+@pytest.mark.asyncio
+async def test_get_room_retries_through_transient_failures(stub, service):
+    stub.add_room("room1", num_participants=2)
+    stub.fail("ListRooms", status=503, code="unavailable", times=2)
+
+    room = await service.get_room("room1")
+
+    assert room["room_id"] == "room1"
+    assert room["num_participants"] == 2
+    assert stub.calls["ListRooms"] == 3
+
+
+@pytest.mark.asyncio
+async def test_get_room_missing_is_none_but_outage_raises(stub, service):
+    assert await service.get_room("missing") is None
+
+    stub.fail("ListRooms", status=500, code="internal", times=3)
+    with pytest.raises(UpstreamUnavailable):
+        await service.get_room("missing")
+
+
+@pytest.mark.asyncio
+async def test_dropped_connection_is_retried(stub, service):
+    stub.add_room("room1")
+    stub.add_participant("room1", "caller_1")
+    stub.drop("ListParticipants")
+
+    participants = await service.list_participants("room1")
+
+    assert [p["identity"] for p in participants] == ["caller_1"]
+    assert stub.calls["ListParticipants"] == 2
+
+
+@pytest.mark.asyncio
+async def test_list_participants_for_unknown_room_is_empty(stub, service):
+    assert await service.list_participants("missing") == []
+    assert stub.calls["ListParticipants"] == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_upstream_hits_operation_deadline(stub, service):
+    stub.add_room("room1")
+    stub.delay("ListRooms", 1.0, times=3)
+    service._executor.deadline = 0.2
+
+    with pytest.raises(UpstreamTimeout):
+        await service.get_room("room1")
+
+
+@pytest.mark.asyncio
+async def test_send_data_is_not_retried(stub, service):
+    stub.add_room("room1")
+    stub.fail("SendData", status=503, code="unavailable")
+
+    with pytest.raises(UpstreamUnavailable):
+        await service.send_data_to_participants("room1", "hello")
+    assert stub.calls["SendData"] == 1
+
+
+@pytest.mark.asyncio
+async def test_permission_error_is_not_retried(stub, service):
+    stub.fail("ListRooms", status=401, code="unauthenticated")
+
+    with pytest.raises(UpstreamRejected):
+        await service.get_room("room1")
+    assert stub.calls["ListRooms"] == 1
+    assert service.health()["breaker"]["state"] == "closed"
+
+
+@pytest.mark.asyncio
+async def test_bulk_close_deletes_rooms_and_reports_missing_ones(stub, service):
+    from app.main import app
+
+    stub.add_room("room1")
+    with patch("routers.rooms.livekit_service", service):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            response = await ac.post("/rooms/bulk/close", json={"room_ids": ["room1", "missing"]})
+
+    body = response.json()
+    assert "room1" not in stub.rooms
+    assert (body["succeeded"], body["failed"]) == (1, 1)
+    assert [r["success"] for r in body["results"]] == [True, False]
+    stub.fail("DeleteRoom", status=503, code="unavailable", times=3)
+    with pytest.raises(UpstreamUnavailable):
+        await service.close_room("room2")
+
+
+@pytest.mark.asyncio
+async def test_close_room_whose_answer_was_lost_is_closed(stub, service):
+    stub.add_room("room1")
+    stub.lose_response("DeleteRoom")
+
+    # the retry finds the room gone: the first attempt deleted it
+    assert await service.close_room("room1") is True
+    assert stub.calls["DeleteRoom"] == 2
+    assert await service.close_room("room1") is False
+
+
+@pytest.mark.asyncio
+async def test_remove_participant_whose_answer_was_lost_is_removed(stub, service):
+    stub.add_room("room1")
+    stub.add_participant("room1", "agent_a")
+    stub.lose_response("RemoveParticipant")
+
+    assert await service.remove_participant("room1", "agent_a") is True
+    assert stub.calls["RemoveParticipant"] == 2
+    assert await service.remove_participant("room1", "agent_a") is False
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_and_stops_hitting_upstream(stub, service):
+    service._executor.breaker.failure_threshold = 3
+    stub.fail("ListRooms", status=503, code="unavailable", times=10)
+
+    with pytest.raises(UpstreamUnavailable):
+        await service.get_room("room1")
+    with pytest.raises(CircuitOpenError):
+        await service.get_room("room1")
+
+    assert stub.calls["ListRooms"] == 3
+    assert service.health()["breaker"]["state"] == "open"
+
+
+@pytest.mark.asyncio
+async def test_room_routes_map_upstream_errors(stub, service):
+    from app.main import app
+
+    service._executor.breaker.failure_threshold = 1
+    stub.fail("ListRooms", status=503, code="unavailable")
+
+    with patch("routers.rooms.livekit_service", service), patch("app.main.livekit_service", service):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            outage = await ac.get("/rooms/room1/info")
+            health = await ac.get("/health/livekit")
+
+    assert outage.status_code == 503
+    assert "Retry-After" in outage.headers
+    assert health.json()["breaker"]["state"] == "open"
+
+
+def test_classify_livekit_error():
+    from livekit.api import TwirpError
+
+    assert classify_livekit_error(TwirpError("not_found", "x", status=404), "op").http_status == 404
+    assert classify_livekit_error(TwirpError("unavailable", "x", status=503), "op").transient
+    assert not classify_livekit_error(TwirpError("invalid_argument", "x", status=400), "op").transient
+    assert classify_livekit_error(ValueError("bug"), "op") is None
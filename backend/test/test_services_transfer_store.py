@@ -0,0 +1,203 @@
+import pytest
+import time
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base, Call, Agent, Transfer, TransferStatus
+from services.transfer_store import (
+    ActiveTransferStore, InMemoryActiveTransferStore, DatabaseActiveTransferStore, RedisActiveTransferStore,
+    create_active_transfer_store
+)
+from services.transfer_service import TransferService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = factory()
+    db.add_all([
+        Agent(id="a1", name="Alice", email="a1@example.com", status="busy"),
+        Agent(id="a2", name="Bob", email="a2@example.com", status="busy"),
+        Call(id="c1", room_id="room1", status="transferring", agent_a_id="a1"),
+        Transfer(id="t1", call_id="c1", from_agent_id="a1", to_agent_id="a2",
+                 status=TransferStatus.INITIATED.value, timeout_at=datetime.utcnow() + timedelta(minutes=5)),
+        Transfer(id="t2", call_id="c1", from_agent_id="a1", to_agent_id="a2",
+                 status=TransferStatus.IN_PROGRESS.value, timeout_at=datetime.utcnow() + timedelta(minutes=5)),
+        Transfer(id="done", call_id="c1", from_agent_id="a1", to_agent_id="a2",
+                 status=TransferStatus.COMPLETED.value),
+    ])
+    db.commit()
+    db.close()
+    yield factory
+    engine.dispose()
+
+
+def _expire_leases(session_factory):
+    db = session_factory()
+    db.query(Transfer).update({Transfer.timeout_lease_expires_at: datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+    db.close()
+
+
+@pytest.mark.asyncio
+async def test_in_memory_lease_is_exclusive_until_it_lapses():
+    clock = FakeClock()
+    store = InMemoryActiveTransferStore(clock=clock)
+
+    assert await store.acquire_lease("t1", "w1", ttl=30)
+    assert await store.acquire_lease("t1", "w1", ttl=30)
+    assert not await store.acquire_lease("t1", "w2", ttl=30)
+
+    clock.now += 31
+    assert await store.renew_leases("w1", ["t1"], ttl=30) == []
+    assert await store.acquire_lease("t1", "w2", ttl=30)
+
+    await store.release_lease("t1", "w1")
+    assert not await store.acquire_lease("t1", "w1", ttl=30)
+    await store.release_lease("t1")
+    assert await store.acquire_lease("t1", "w1", ttl=30)
+
+
+@pytest.mark.asyncio
+async def test_database_store_lists_pending_transfers(session_factory):
+    store = DatabaseActiveTransferStore(session_factory)
+    active = await store.list_active()
+    assert sorted(t["transfer_id"] for t in active) == ["t1", "t2"]
+
+
+@pytest.mark.asyncio
+async def test_database_leases_have_a_single_owner(session_factory):
+    worker_a = DatabaseActiveTransferStore(session_factory)
+    worker_b = DatabaseActiveTransferStore(session_factory)
+
+    assert sorted(await worker_a.claim_leases("a", ["t1", "t2", "done"], ttl=30)) == ["t1", "t2"]
+    assert await worker_b.claim_leases("b", ["t1", "t2"], ttl=30) == []
+    assert sorted(await worker_a.renew_leases("a", ["t1", "t2"], ttl=30)) == ["t1", "t2"]
+
+    # worker a stops renewing; once the leases lapse b takes them over
+    _expire_leases(session_factory)
+    assert await worker_b.acquire_lease("t1", "b", ttl=30)
+    assert await worker_a.renew_leases("a", ["t1", "t2"], ttl=30) == []
+
+    await worker_b.release_lease("t1", "a")
+    assert not await worker_a.acquire_lease("t1", "a", ttl=30)
+    await worker_b.release_lease("t1", "b")
+    assert await worker_a.acquire_lease("t1", "a", ttl=30)
+
+
+@pytest.mark.asyncio
+async def test_database_lease_expiry_is_utc_whatever_the_server_timezone(session_factory, monkeypatch):
+    store = DatabaseActiveTransferStore(session_factory)
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    try:
+        assert await store.acquire_lease("t1", "a", ttl=30)
+    finally:
+        monkeypatch.delenv("TZ")
+        time.tzset()
+
+    db = session_factory()
+    expires_at = db.get(Transfer, "t1").timeout_lease_expires_at
+    db.close()
+    assert abs((expires_at - datetime.utcnow()).total_seconds() - 30) < 5
+
+
+@pytest.mark.asyncio
+async def test_redis_store_leases_and_active_set():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    store = RedisActiveTransferStore(client=fakeredis.FakeAsyncRedis(decode_responses=True))
+
+    await store.add("t1", {"transfer_id": "t1", "created_at": datetime.utcnow()})
+    await store.add("t2", {"transfer_id": "t2"})
+    await store.remove("t2")
+    assert [t["transfer_id"] for t in await store.list_active()] == ["t1"]
+
+    assert await store.acquire_lease("t1", "w1", ttl=30)
+    assert not await store.acquire_lease("t1", "w2", ttl=30)
+    assert await store.renew_leases("w1", ["t1", "t2"], ttl=30) == ["t1"]
+    await store.release_lease("t1", "w2")
+    assert not await store.acquire_lease("t1", "w2", ttl=30)
+    await store.release_lease("t1", "w1")
+    assert await store.acquire_lease("t1", "w2", ttl=30)
+    await store.close()
+
+
+def test_unknown_store_kind_is_rejected():
+    assert isinstance(create_active_transfer_store("memory"), InMemoryActiveTransferStore)
+    with pytest.raises(ValueError):
+        create_active_transfer_store("etcd")
+    # a store has to implement the whole interface
+    with pytest.raises(TypeError):
+        ActiveTransferStore()
+
+
+# --- two workers sharing the database store --------------------------------
+
+def _worker(session_factory, name):
+    service = TransferService(session_factory=session_factory, store=DatabaseActiveTransferStore(session_factory))
+    service.worker_id = name
+    return service
+
+
+@pytest.mark.asyncio
+async def test_only_one_worker_arms_each_timeout(session_factory):
+    worker_a = _worker(session_factory, "a")
+    worker_b = _worker(session_factory, "b")
+
+    assert await worker_a.recover_pending_transfers(session_factory()) == 2
+    assert await worker_b.recover_pending_transfers(session_factory()) == 0
+    assert sorted(worker_a.timeout_scheduler.keys()) == ["t1", "t2"]
+    assert worker_b.timeout_scheduler.keys() == []
+
+    # both workers report the same active transfers
+    assert len(await worker_a.get_active_transfers()) == len(await worker_b.get_active_transfers()) == 2
+
+
+@pytest.mark.asyncio
+async def test_transfer_completed_on_other_worker_is_not_cancelled(session_factory):
+    worker_a = _worker(session_factory, "a")
+    worker_b = _worker(session_factory, "b")
+    await worker_a.recover_pending_transfers(session_factory())
+
+    db = session_factory()
+    db.query(Transfer).filter(Transfer.id == "t1").update({Transfer.status: TransferStatus.COMPLETED.value})
+    db.commit()
+    db.close()
+    await worker_b._forget_transfer("t1")
+
+    with patch.object(worker_a, "cancel_transfer", new=AsyncMock()) as mock_cancel:
+        await worker_a._handle_transfer_timeout("t1")
+    mock_cancel.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_lapsed_lease_moves_timeout_to_live_worker(session_factory):
+    worker_a = _worker(session_factory, "a")
+    worker_b = _worker(session_factory, "b")
+    await worker_a.recover_pending_transfers(session_factory())
+
+    # worker a dies without releasing; its leases lapse
+    _expire_leases(session_factory)
+    await worker_b.maintain_leases()
+    assert sorted(worker_b.timeout_scheduler.keys()) == ["t1", "t2"]
+
+    # a comes back, loses its leases on the next renewal and fires nothing
+    await worker_a.maintain_leases()
+    assert worker_a.timeout_scheduler.keys() == []
+    with patch.object(worker_a, "cancel_transfer", new=AsyncMock()) as mock_cancel:
+        await worker_a._handle_transfer_timeout("t1")
+    mock_cancel.assert_not_awaited()
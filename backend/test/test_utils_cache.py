@@ -0,0 +1,39 @@
+from utils.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_their_ttl():
+    clock = FakeClock()
+    cache = TTLCache(clock=clock)
+    cache.set("a", 1, ttl=10)
+    cache.set("b", 2, ttl=0)  # not cached
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    clock.now = 10
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_full_cache_drops_expired_then_oldest_entries():
+    clock = FakeClock()
+    cache = TTLCache(max_size=4, clock=clock)
+    cache.set("short", 0, ttl=1)
+    for key in "abc":
+        cache.set(key, key, ttl=100)
+    clock.now = 5
+
+    cache.set("d", "d", ttl=100)  # the expired entry makes room
+    assert [cache.get(key) for key in "abcd"] == ["a", "b", "c", "d"]
+
+    cache.set("e", "e", ttl=100)  # nothing expired: the oldest goes
+    assert cache.get("a") is None
+    assert [cache.get(key) for key in "bcde"] == ["b", "c", "d", "e"]
@@ -0,0 +1,91 @@
+import json
+import pytest
+import jwt
+
+from app.config import settings
+from utils import auth
+from utils.auth import create_access_token, decode_access_token, verify_access_token
+from utils.jwt_keys import KeySet, generate_jwk, public_jwks, main as keys_main
+
+
+@pytest.fixture
+def key_file(tmp_path, monkeypatch):
+    path = tmp_path / "keys.json"
+    monkeypatch.setattr(settings, "JWT_KEYS_FILE", str(path))
+    monkeypatch.setattr(settings, "JWT_KEYS_RELOAD_SECONDS", 0.0)
+    monkeypatch.setattr(settings, "JWT_SECRET_KEY", "unused")
+    monkeypatch.setattr(settings, "JWT_ALGORITHM", "HS256")
+    auth._key_files.clear()
+    auth.clear_token_cache()
+    yield path
+    auth._key_files.clear()
+    auth.clear_token_cache()
+
+
+def _keys(path, *args):
+    keys_main([*args, "--file", str(path)])
+
+
+def test_rotation_keeps_old_tokens_valid_until_the_old_key_is_removed(key_file):
+    _keys(key_file, "generate", "--alg", "HS256", "--kid", "k1", "--activate")
+    old_token = create_access_token("agent1")
+    assert jwt.get_unverified_header(old_token)["kid"] == "k1"
+
+    # overlap: a new active key, the old one still listed
+    _keys(key_file, "generate", "--alg", "HS256", "--kid", "k2", "--activate")
+    new_token = create_access_token("agent1")
+    assert jwt.get_unverified_header(new_token)["kid"] == "k2"
+    assert decode_access_token(old_token)["sub"] == "agent1"
+    assert decode_access_token(new_token)["sub"] == "agent1"
+
+    # the old key retired: its tokens stop verifying, cached or not
+    _keys(key_file, "remove", "--kid", "k1")
+    with pytest.raises(jwt.InvalidSignatureError):
+        decode_access_token(old_token)
+    assert verify_access_token(old_token) is None
+    assert decode_access_token(new_token)["sub"] == "agent1"
+
+
+def test_tokens_without_a_known_kid_or_with_another_algorithm_are_rejected(key_file):
+    _keys(key_file, "generate", "--alg", "HS256", "--kid", "k1", "--activate")
+    key_set = auth.current_key_set()
+    algorithm, secret = key_set.verification_key("k1")
+
+    no_kid = jwt.encode({"sub": "agent1"}, secret, algorithm="HS256")
+    unknown_kid = jwt.encode({"sub": "agent1"}, secret, algorithm="HS256", headers={"kid": "nope"})
+    other_algorithm = jwt.encode({"sub": "agent1"}, secret, algorithm="HS512", headers={"kid": "k1"})
+    for token in (no_kid, unknown_kid, other_algorithm):
+        with pytest.raises(jwt.InvalidTokenError):
+            decode_access_token(token)
+
+
+def test_key_set_validation():
+    hs_key = generate_jwk("HS256", "k1")
+    with pytest.raises(ValueError):
+        KeySet.from_jwks({"active_kid": "missing", "keys": [hs_key]})
+    with pytest.raises(ValueError):
+        KeySet.from_jwks({"keys": [{**hs_key, "kid": None}]})
+    with pytest.raises(RuntimeError):
+        KeySet.from_jwks({"keys": [hs_key]}).signing_key()
+    # shared secrets are never published
+    assert public_jwks({"keys": [hs_key]}) == {"keys": []}
+
+
+@pytest.mark.parametrize("algorithm", ["EdDSA", "RS256"])
+def test_asymmetric_keys_sign_and_a_public_set_verifies(key_file, tmp_path, monkeypatch, algorithm):
+    pytest.importorskip("cryptography")
+    _keys(key_file, "generate", "--alg", algorithm, "--kid", "k1", "--activate")
+    token = create_access_token("agent1")
+
+    public = public_jwks(json.loads(key_file.read_text()))
+    assert all("d" not in jwk for jwk in public["keys"])
+    with pytest.raises(ValueError):
+        KeySet.from_jwks({**public, "active_kid": "k1"})  # nothing to sign with
+
+    public_file = tmp_path / "public.json"
+    public_file.write_text(json.dumps(public))
+    monkeypatch.setattr(settings, "JWT_KEYS_FILE", str(public_file))
+    auth.clear_token_cache()
+    assert decode_access_token(token)["sub"] == "agent1"
+    with pytest.raises(RuntimeError):
+        create_access_token("agent1")
@@ -0,0 +1,96 @@
+import io
+import json
+import logging
+import queue
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.config import settings
+from utils.logging_config import (
+    configure_logging, stop_logging, SamplingFilter, NonBlockingQueueHandler, LOG_RECORDS_DROPPED
+)
+from utils.tracing import Tracer
+
+
+@pytest.fixture
+def log_stream():
+    stream = io.StringIO()
+    configure_logging(level="INFO", log_format="json", sampling={}, stream=stream)
+    yield stream
+    configure_logging()
+
+
+def _lines(stream):
+    stop_logging()  # flushes the queue
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_records_are_json_lines_with_extra_fields_and_trace_id(log_stream):
+    logger = logging.getLogger("logging-test")
+    with Tracer().span("request") as request_span:
+        logger.info("Transfer completed", extra={"transfer_id": "t1"})
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("Failed %s", "badly")
+
+    first, second = _lines(log_stream)
+    assert first["message"] == "Transfer completed"
+    assert first["level"] == "INFO" and first["logger"] == "logging-test"
+    assert first["transfer_id"] == "t1"
+    assert first["trace_id"] == request_span.trace_id
+    assert second["message"] == "Failed badly"
+    assert "ValueError: boom" in second["exc"]
+    assert "trace_id" not in second
+
+
+def test_sampling_keeps_warnings_and_whole_traces():
+    sampler = SamplingFilter({"chatty": 0.0, "half": 0.5})
+
+    def record(name, level=logging.INFO, trace_id="-"):
+        rec = logging.makeLogRecord({"name": name, "levelno": level})
+        rec.trace_id = trace_id
+        return rec
+
+    assert not sampler.filter(record("chatty"))
+    assert not sampler.filter(record("chatty.child"))
+    assert sampler.filter(record("chatty", logging.WARNING))
+    assert sampler.filter(record("other"))
+    # the same trace is kept or dropped as a whole
+    assert sampler.filter(record("half", trace_id="10" + "0" * 30))
+    assert sampler.filter(record("half.child", trace_id="10" + "0" * 30))
+    assert not sampler.filter(record("half", trace_id="f0" + "0" * 30))
+    kept = record("half", trace_id="00" + "1" * 30)
+    assert sampler.filter(kept) and kept.sample_rate == 0.5
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(1))
+    dropped = LOG_RECORDS_DROPPED.labels().value
+    for i in range(3):
+        handler.handle(logging.makeLogRecord({"msg": f"line {i}"}))
+    assert handler.queue.qsize() == 1
+    assert LOG_RECORDS_DROPPED.labels().value - dropped == 2
+
+
+def test_only_slow_statements_are_logged_unless_echo_is_on(monkeypatch, caplog):
+    engine = create_engine("sqlite://")
+    monkeypatch.setattr(settings, "DATABASE_ECHO", False)
+    with caplog.at_level(logging.INFO, logger="sql"), engine.connect() as conn:
+        monkeypatch.setattr(settings, "DATABASE_SLOW_QUERY_MS", 10_000)
+        conn.execute(text("SELECT 1"))
+        assert [r for r in caplog.records if r.name == "sql"] == []
+
+        monkeypatch.setattr(settings, "DATABASE_SLOW_QUERY_MS", 0.000001)
+        conn.execute(text("SELECT 2"))
+        slow = [r for r in caplog.records if r.name == "sql"]
+        assert len(slow) == 1 and slow[0].levelno == logging.WARNING
+        assert slow[0].statement == "SELECT 2"
+
+        monkeypatch.setattr(settings, "DATABASE_SLOW_QUERY_MS", 0)
+        monkeypatch.setattr(settings, "DATABASE_ECHO", True)
+        conn.execute(text("SELECT 3"))
+        echoed = [r for r in caplog.records if r.name == "sql"][-1]
+        assert echoed.levelno == logging.INFO and echoed.getMessage() == "SELECT 3"
+    engine.dispose()
@@ -0,0 +1,118 @@
+import asyncio
+import pytest
+from httpx import AsyncClient, ASGITransport
+from unittest.mock import patch, MagicMock
+
+from app.main import app
+from app.database import Agent
+from utils.metrics import Registry, Metric, Counter, Gauge, Histogram, WORKER
+from services.llm_service import LLMService
+from services.resilience import ResilientExecutor, UpstreamUnavailable
+
+
+def _sample(text, prefix):
+    """Value of the first rendered sample line starting with prefix"""
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+def test_metric_types_must_define_their_children():
+    class Summary(Metric):
+        type = "summary"
+
+    with pytest.raises(TypeError):
+        Summary("latency_summary", "Latency", registry=Registry())
+
+
+def test_render_in_prometheus_text_format():
+    registry = Registry()
+    requests = Counter("requests_total", "Requests", ("route",), registry=registry)
+    in_flight = Gauge("in_flight", "In flight", registry=registry)
+    latency = Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0), registry=registry)
+
+    requests.labels("/a").inc()
+    requests.labels("/a").inc(2)
+    in_flight.set(4)
+    for value in (0.05, 0.5, 5):
+        latency.observe(value)
+
+    text = registry.render()
+    worker = f'worker="{WORKER}"'
+    assert "# TYPE requests_total counter" in text
+    assert f'requests_total{{{worker},route="/a"}} 3' in text
+    assert f"in_flight{{{worker}}} 4" in text
+    # buckets are cumulative, with +Inf equal to the count
+    assert f'latency_seconds_bucket{{{worker},le="0.1"}} 1' in text
+    assert f'latency_seconds_bucket{{{worker},le="1"}} 2' in text
+    assert f'latency_seconds_bucket{{{worker},le="+Inf"}} 3' in text
+    assert f"latency_seconds_count{{{worker}}} 3" in text
+    assert f"latency_seconds_sum{{{worker}}} 5.55" in text
+
+    with pytest.raises(ValueError):
+        requests.labels()
+    with pytest.raises(ValueError):
+        Counter("requests_total", "again", registry=registry)
+
+
+@pytest.mark.asyncio
+async def test_requests_are_timed_by_route_template_with_their_sql(sqlite_db):
+    sqlite_db.add(Agent(id="agent-1", name="Alice", email="alice@example.com"))
+    sqlite_db.commit()
+
+    route = 'route="/routers/agents/{agent_id}"'
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        before = (await ac.get("/metrics")).text
+        for _ in range(3):
+            assert (await ac.get("/routers/agents/agent-1")).status_code == 200
+        response = await ac.get("/metrics")
+
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    count_prefix = f'http_request_duration_seconds_count{{worker="{WORKER}",method="GET",{route},status="200"}}'
+    queries_prefix = f'db_queries_per_request_sum{{worker="{WORKER}",{route}}}'
+    assert _sample(text, count_prefix) - (_sample(before, count_prefix) or 0) == 3
+    # one SELECT per request
+    assert _sample(text, queries_prefix) - (_sample(before, queries_prefix) or 0) == 3
+    assert "agent-1" not in text
+    assert "active_transfers{" in text and 'circuit_breaker_state{' in text
+
+
+@pytest.mark.asyncio
+async def test_llm_requests_record_latency_and_tokens():
+    from services.llm_service import LLM_TOKENS, LLM_REQUEST_DURATION
+    response = MagicMock()
+    response.choices = [MagicMock(message=MagicMock(content="Summary"))]
+    response.usage = MagicMock(prompt_tokens=120, completion_tokens=30)
+
+    async def acreate(*args, **kwargs):
+        return response
+
+    prompt_tokens = LLM_TOKENS.labels("summary", "prompt").value
+    requests = LLM_REQUEST_DURATION.labels("summary", "ok").counts[-1] + sum(LLM_REQUEST_DURATION.labels("summary", "ok").counts[:-1])
+    with patch("openai.ChatCompletion.acreate", new=acreate):
+        assert await LLMService().generate_call_summary("transcript") == "Summary"
+
+    assert LLM_TOKENS.labels("summary", "prompt").value - prompt_tokens == 120
+    assert sum(LLM_REQUEST_DURATION.labels("summary", "ok").counts) - requests == 1
+
+
+@pytest.mark.asyncio
+async def test_upstream_calls_are_timed_by_operation_and_outcome():
+    from services.resilience import UPSTREAM_CALL_DURATION
+    executor = ResilientExecutor("metrics-test", classify=lambda exc, op: UpstreamUnavailable(str(exc)))
+
+    async def ok():
+        return "done"
+
+    async def down():
+        raise ConnectionError("refused")
+
+    await executor.call("get_room", ok, idempotent=False)
+    with pytest.raises(UpstreamUnavailable):
+        await executor.call("get_room", down, idempotent=False)
+
+    assert sum(UPSTREAM_CALL_DURATION.labels("metrics-test", "get_room", "ok").counts) == 1
+    assert sum(UPSTREAM_CALL_DURATION.labels("metrics-test", "get_room", "UpstreamUnavailable").counts) == 1
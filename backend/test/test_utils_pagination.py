@@ -0,0 +1,18 @@
+import pytest
+from datetime import datetime
+
+from utils.pagination import encode_cursor, decode_cursor, InvalidCursor
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 1, 12, 30, 15, 250000)
+    cursor = encode_cursor(created_at, "call-1")
+    assert "=" not in cursor
+    assert decode_cursor(cursor, (datetime, str)) == (created_at, "call-1")
+    assert decode_cursor(None, (datetime, str)) is None
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor("only-one"), encode_cursor("x", "call-1")])
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, (datetime, str))
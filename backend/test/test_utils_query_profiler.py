@@ -0,0 +1,119 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import text
+
+from app.config import settings
+from app.main import app
+from app.database import Agent, Call
+from utils.query_profiler import (
+    QueryProfiler, QueryBudgetExceeded, query_budget, query_profiler, statement_shape, redact_parameters
+)
+
+
+@pytest.fixture
+def profiler(sqlite_db, monkeypatch):
+    """The app's profiler, attached to the test database and starting empty"""
+    monkeypatch.setattr(settings, "QUERY_PROFILER_ENABLED", True)
+    engine = sqlite_db.get_bind()
+    query_profiler.reset()
+    query_profiler.attach(engine)
+    yield query_profiler
+    query_profiler.detach(engine)
+    query_profiler.reset()
+
+
+def _seed_agents_with_calls(db, agents: int):
+    for i in range(agents):
+        db.add(Agent(id=f"a{i}", name=f"Agent {i}", email=f"a{i}@example.com", status="available"))
+        db.add(Call(room_id=f"room{i}", status="active", agent_a_id=f"a{i}", priority="normal", duration_seconds=0))
+    db.commit()
+
+
+def test_statement_shapes_and_redaction():
+    assert statement_shape("SELECT *  FROM calls\n WHERE id = 'abc' AND n > 10") == \
+        statement_shape("SELECT * FROM calls WHERE id = 'x''y' AND n > 2")
+    assert statement_shape("SELECT * FROM calls WHERE id IN (?, ?, ?)") == \
+        statement_shape("SELECT * FROM calls WHERE id IN (%(id_1)s, %(id_2)s)") == \
+        "SELECT * FROM calls WHERE id IN (?, ...)"
+    assert statement_shape("SELECT a FROM t1 WHERE b = :b_1") == "SELECT a FROM t1 WHERE b = ?"
+    assert redact_parameters(("secret", 3, None)) == ["str", "int", "NoneType"]
+    assert redact_parameters({"email": "a@b.c"}) == {"email": "str"}
+    assert redact_parameters([("a",), ("b",)], executemany=True) == "<2 rows>"
+
+
+def test_slow_queries_are_kept_redacted_with_their_plan(sqlite_db, profiler, monkeypatch):
+    monkeypatch.setattr(settings, "DATABASE_SLOW_QUERY_MS", 0.000001)
+    monkeypatch.setattr(settings, "QUERY_EXPLAIN_SLOW", True)
+    sqlite_db.execute(text("SELECT id FROM calls WHERE room_id = :room"), {"room": "secret-room"}).all()
+
+    report = profiler.report()
+    slow = next(q for q in report["slow_queries"] if "FROM calls" in q["statement"])
+    assert slow["parameters"] == ["str"]
+    assert "secret-room" not in str(report)
+    assert slow["plan"] and any("calls" in line for line in slow["plan"])
+    stats = next(s for s in report["statements"] if s["shape"] == slow["shape"])
+    assert stats["calls"] == 1 and stats["slow"] == 1
+
+
+def test_repeated_statement_in_one_request_is_flagged(sqlite_db, monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_N_PLUS_ONE_THRESHOLD", 5)
+    profiler = QueryProfiler()
+    profiler.attach(sqlite_db.get_bind())
+    try:
+        with profiler.request("GET /calls"):
+            for i in range(6):
+                sqlite_db.execute(text("SELECT count(*) FROM calls WHERE agent_a_id = :a"), {"a": f"a{i}"}).scalar()
+        with profiler.request("GET /other"):
+            sqlite_db.execute(text("SELECT 1")).scalar()
+    finally:
+        profiler.detach(sqlite_db.get_bind())
+
+    [finding] = profiler.report()["n_plus_one"]
+    assert finding["route"] == "GET /calls" and finding["count"] == 6
+    assert finding["shape"] == "SELECT count(*) FROM calls WHERE agent_a_id = ?"
+
+
+@pytest.mark.asyncio
+async def test_admin_query_profile_needs_the_admin_key(sqlite_db, profiler, monkeypatch):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        monkeypatch.setattr(settings, "ADMIN_API_KEY", "")
+        assert (await ac.get("/routers/admin/queries")).status_code == 404
+
+        monkeypatch.setattr(settings, "ADMIN_API_KEY", "admin-key")
+        assert (await ac.get("/routers/admin/queries", headers={"X-Admin-Key": "wrong"})).status_code == 403
+
+        await ac.get("/routers/agents/")
+        response = await ac.get("/routers/admin/queries", headers={"X-Admin-Key": "admin-key"})
+        assert response.status_code == 200
+        assert any("FROM agents" in s["shape"] for s in response.json()["statements"])
+
+        assert (await ac.post("/routers/admin/queries/reset", headers={"X-Admin-Key": "admin-key"})).status_code == 200
+        assert profiler.report()["statements"] == []
+
+
+# Query budgets of the polled listings: constant in the number of rows
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path,budget", [
+    ("/routers/calls/", 1),
+    ("/routers/agents/", 1),
+    ("/routers/transfer/agents/available", 2),
+])
+async def test_listing_query_budgets(sqlite_db, path, budget):
+    _seed_agents_with_calls(sqlite_db, 12)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        with query_budget(sqlite_db.get_bind(), max_queries=budget, max_repeats=1):
+            response = await ac.get(path)
+    assert response.status_code == 200
+
+
+def test_query_budget_reports_the_statements(sqlite_db):
+    with pytest.raises(QueryBudgetExceeded, match="3 queries, budget 2"):
+        with query_budget(sqlite_db.get_bind(), max_queries=2):
+            for _ in range(3):
+                sqlite_db.execute(text("SELECT 1")).scalar()
+    with pytest.raises(QueryBudgetExceeded, match="Repeated statements"):
+        with query_budget(sqlite_db.get_bind(), max_queries=10, max_repeats=2):
+            for i in range(3):
+                sqlite_db.execute(text(f"SELECT {i}")).scalar()
@@ -0,0 +1,71 @@
+import json
+import warnings
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from pydantic import Field, ValidationError, field_validator
+
+from models.call import callListResponse, CallResponse
+from utils.serialization import DefaultJSONResponse, model_response, rows_response
+
+
+def _row(i, **overrides):
+    values = dict(
+        id=f"call{i}", room_id=f"room{i}", caller_name="Alice", caller_phone=None, call_reason="Billing",
+        status="active", started_at=datetime(2024, 5, 1, 12, 0, 0, 123456), duration_seconds=30,
+        priority="high", created_at=datetime(2024, 5, 1, 11, 59, 0), agent_a_id="a1", agent_b_id=None,
+    )
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def test_trusted_rows_encode_like_validated_models():
+    rows = [_row(i) for i in range(3)]
+
+    fast = rows_response(callListResponse, rows, headers={"X-Next-Cursor": "abc"})
+    validated = model_response(callListResponse, rows, many=True)
+
+    assert json.loads(fast.body) == json.loads(validated.body)
+    assert fast.headers["x-next-cursor"] == "abc"
+    assert fast.media_type == "application/json"
+
+
+def test_model_response_validates_once_and_rejects_bad_data():
+    response = model_response(CallResponse, _row(1, access_token="token"), status_code=201)
+    body = json.loads(response.body)
+    assert response.status_code == 201
+    assert (body["status"], body["access_token"], body["transcript"]) == ("active", "token", None)
+
+    with pytest.raises(ValidationError):
+        model_response(CallResponse, _row(1, status="not-a-status"))
+
+
+def test_rows_missing_a_field_are_an_error_not_null():
+    row = _row(1)
+    del row.priority
+
+    with pytest.raises((AttributeError, ValidationError)):
+        rows_response(callListResponse, [row])
+
+
+class _UpperCaller(callListResponse):
+    caller_name: str = Field(serialization_alias="callerName")
+
+    @field_validator("caller_name")
+    @classmethod
+    def upper(cls, value):
+        return value.upper()
+
+
+def test_models_with_validators_or_aliases_are_validated():
+    body = json.loads(rows_response(_UpperCaller, [_row(1)]).body)
+    assert body[0]["callerName"] == "ALICE"
+    assert "caller_name" not in body[0]
+
+
+def test_default_response_class_renders_without_deprecation_warnings():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        response = DefaultJSONResponse({"at": "2024-05-01T12:00:00", "n": 1})
+    assert json.loads(response.body) == {"at": "2024-05-01T12:00:00", "n": 1}
+    assert response.media_type == "application/json"
@@ -0,0 +1,48 @@
+import logging
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import StaticPool
+
+from app.config import settings
+from utils import statement_timing
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def seen():
+    events = []
+    hooks = dict(
+        on_start=lambda statement: events.append(("start", statement)),
+        on_end=lambda statement: events.append(("end", statement)),
+        on_error=lambda statement, exc: events.append(("error", statement)),
+    )
+    statement_timing.subscribe(**hooks)
+    yield events
+    statement_timing.unsubscribe(**hooks)
+
+
+def test_each_statement_is_timed_once_for_every_subscriber(engine, seen, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "DATABASE_SLOW_QUERY_MS", 0.000001)
+    with caplog.at_level(logging.WARNING, logger="sql"), engine.connect() as conn:
+        conn.execute(text("SELECT 1")).scalar()
+
+    [(_, started), (_, finished)] = seen
+    assert started is finished
+    assert finished.kind == "SELECT" and finished.duration > 0 and finished.slow
+    # the slow query is logged once, by the SQL log
+    assert [r.message for r in caplog.records if r.name == "sql"] == ["Slow query"]
+
+
+def test_failed_statements_reach_on_error_only(engine, seen):
+    with engine.connect() as conn, pytest.raises(OperationalError):
+        conn.execute(text("SELECT * FROM missing"))
+
+    assert [kind for kind, _ in seen] == ["start", "error"]
+    assert engine.raw_connection().info.get("statements") == []
@@ -0,0 +1,109 @@
+import json
+import logging
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from app.main import app
+from app.database import Agent
+from utils.tracing import (
+    Tracer, JsonLinesSpanExporter, parse_traceparent, span, tracer, SPAN_KIND_SERVER
+)
+from services.resilience import ResilientExecutor, UpstreamUnavailable
+
+
+def test_traceparent_parsing():
+    assert parse_traceparent("00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01") == (
+        "4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7", True
+    )
+    assert parse_traceparent("00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-00")[2] is False
+    for invalid in (None, "", "garbage", "00-" + "0" * 32 + "-00f067aa0ba902b7-01",
+                    "01-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"):
+        assert parse_traceparent(invalid) is None
+
+
+@pytest.mark.asyncio
+async def test_request_span_continues_incoming_trace_with_sql_children(sqlite_db, spans):
+    sqlite_db.add(Agent(id="agent-1", name="Alice", email="alice@example.com"))
+    sqlite_db.commit()
+    trace_id, parent_id = "4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7"
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.get("/routers/agents/agent-1", headers={"traceparent": f"00-{trace_id}-{parent_id}-01"})
+
+    assert response.status_code == 200
+    assert response.headers["x-trace-id"] == trace_id
+    request_span = next(s for s in spans if s.kind == SPAN_KIND_SERVER)
+    assert request_span.name == "GET /routers/agents/{agent_id}"
+    assert request_span.parent_id == parent_id
+    assert request_span.attributes["http.response.status_code"] == 200
+    assert response.headers["traceresponse"] == f"00-{trace_id}-{request_span.span_id}-01"
+    statements = [s for s in spans if s.name == "db.statement"]
+    assert statements and all(s.parent_id == request_span.span_id for s in statements)
+    assert statements[0].attributes["db.operation"] == "SELECT"
+
+
+@pytest.mark.asyncio
+async def test_unsampled_requests_still_get_a_trace_id_for_logs(sqlite_db, monkeypatch, caplog):
+    monkeypatch.setattr(tracer, "exporter", None)
+    seen = []
+
+    @app.get("/tracing-test-log")
+    async def logs_something():
+        logging.getLogger("tracing-test").info("inside the request")
+        with span("nested") as nested:
+            seen.append(nested)
+        return {}
+
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as ac:
+            with caplog.at_level(logging.INFO, logger="tracing-test"):
+                response = await ac.get("/tracing-test-log")
+    finally:
+        app.router.routes.pop()
+
+    trace_id = response.headers["x-trace-id"]
+    assert len(trace_id) == 32
+    record = next(r for r in caplog.records if r.name == "tracing-test")
+    assert record.trace_id == trace_id
+    # nothing is recorded, the request's span simply stays current
+    assert seen[0].trace_id == trace_id and not seen[0].sampled
+
+
+def test_spans_export_as_otlp_json_lines(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    exporter = JsonLinesSpanExporter(str(path))
+    local = Tracer(exporter)
+
+    with local.span("outer", {"call.id": "c1", "attempt": 2}) as outer:
+        with local.span("inner"):
+            pass
+    exporter.shutdown()
+
+    lines = path.read_text().splitlines()
+    assert len(lines) == 1
+    request = json.loads(lines[0])
+    resource = request["resourceSpans"][0]
+    assert {"key": "service.name", "value": {"stringValue": "warm-transfer-backend"}} in resource["resource"]["attributes"]
+    exported = {s["name"]: s for s in resource["scopeSpans"][0]["spans"]}
+    assert exported["inner"]["parentSpanId"] == outer.span_id
+    assert exported["outer"]["traceId"] == outer.trace_id
+    assert {"key": "attempt", "value": {"intValue": "2"}} in exported["outer"]["attributes"]
+    assert int(exported["outer"]["endTimeUnixNano"]) >= int(exported["inner"]["endTimeUnixNano"])
+
+
+@pytest.mark.asyncio
+async def test_failed_upstream_call_span_records_the_error(spans):
+    executor = ResilientExecutor("tracing-test", classify=lambda exc, op: UpstreamUnavailable(str(exc)))
+
+    async def down():
+        raise ConnectionError("refused")
+
+    with pytest.raises(UpstreamUnavailable):
+        await executor.call("get_room", down, idempotent=False)
+
+    call_span = next(s for s in spans if s.name == "tracing-test.get_room")
+    assert call_span.status == 2
+    assert call_span.attributes["outcome"] == "UpstreamUnavailable"
+    assert call_span.attributes["attempts"] == 1
@@ -1,8 +1,35 @@
+import hashlib
+import logging
+import time
 import jwt
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional
 from jwt.exceptions import ExpiredSignatureError, InvalidSignatureError, DecodeError
 from app.config import settings
+from utils.cache import TTLCache
+from utils.jwt_keys import KeySet, KeySetFile
+
+logger = logging.getLogger(__name__)
+
+# Tokens without an exp claim are re-verified at least this often
+UNBOUNDED_TOKEN_CACHE_SECONDS = 300.0
+
+# Signing keys.
+# With JWT_KEYS_FILE set, tokens are signed with the key set's active key
+# and carry its kid (see utils/jwt_keys.py); otherwise with the shared
+# JWT_SECRET_KEY and JWT_ALGORITHM, as before.
+
+_key_files: Dict[str, KeySetFile] = {}
+
+def current_key_set() -> Optional[KeySet]:
+    """The configured key set, or None in shared-secret mode"""
+    path = settings.JWT_KEYS_FILE
+    if not path:
+        return None
+    key_file = _key_files.get(path)
+    if key_file is None:
+        key_file = _key_files[path] = KeySetFile(path, settings.JWT_KEYS_RELOAD_SECONDS)
+    return key_file.current()
 
 
 # Generate a signed JWT token.
@@ -31,6 +58,11 @@ def create_access_token(
     if additional_claims:
         to_encode.update(additional_claims)
     
+    key_set = current_key_set()
+    if key_set is not None:
+        kid, algorithm, key = key_set.signing_key()
+        return jwt.encode(to_encode, key, algorithm=algorithm, headers={"kid": kid})
+
     encoded_jwt = jwt.encode(
         to_encode,
         settings.JWT_SECRET_KEY,
@@ -39,6 +71,38 @@ def create_access_token(
     
     return encoded_jwt
 
+# Verified-token cache.
+# A token that verified once is good until its exp, so its payload is kept
+# under a hash of the token (plus the keys it was checked with, so rotating
+# the secret or reloading the key set invalidates it) until then. Repeated
+# requests with the same token skip the signature check. Failures aren't
+# cached.
+
+_token_cache = TTLCache(settings.AUTH_TOKEN_CACHE_SIZE)
+
+def _verify(token: str, key_set: Optional[KeySet]) -> dict:
+    if key_set is None:
+        return jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+    # only the algorithm registered for the token's kid is accepted
+    algorithm, key = key_set.verification_key(jwt.get_unverified_header(token).get("kid"))
+    return jwt.decode(token, key, algorithms=[algorithm])
+
+def decode_access_token(token: str) -> dict:
+    """Decode and verify a JWT access token, raising jwt.InvalidTokenError (or a subclass) if it isn't valid"""
+    key_set = current_key_set()
+    keys = key_set if key_set is not None else (settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
+    key = (hashlib.sha256(token.encode()).digest(), keys)
+    payload = _token_cache.get(key)
+    if payload is None:
+        payload = _verify(token, key_set)
+        exp = payload.get("exp")
+        ttl = exp - time.time() if isinstance(exp, (int, float)) else UNBOUNDED_TOKEN_CACHE_SECONDS
+        _token_cache.set(key, payload, ttl)
+    return dict(payload)
+
+def clear_token_cache():
+    _token_cache.clear()
+
 # Validate and decode a JWT token.
 # Returns payload if valid, otherwise None.
 # Handles expired or tampered tokens gracefully.
@@ -46,15 +110,10 @@ def create_access_token(
 def verify_access_token(token: str) -> Optional[dict]:
     """Verify a JWT access token"""
     try:
-        payload = jwt.decode(
-            token,
-            settings.JWT_SECRET_KEY,
-            algorithms=[settings.JWT_ALGORITHM]
-        )
-        return payload
+        return decode_access_token(token)
     except ExpiredSignatureError:
-        print("Token expired")
+        logger.debug("Access token rejected", extra={"reason": "expired"})
         return None
     except (InvalidSignatureError, DecodeError):
-        print("Invalid token")
+        logger.debug("Access token rejected", extra={"reason": "invalid"})
         return None
\ No newline at end of file
@@ -0,0 +1,53 @@
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# Small in-process cache with a per-entry lifetime and a size bound.
+# Lookups are one dict access and a clock read. When full, expired entries
+# are dropped first, then the oldest insertions; entries are never refreshed
+# on read, so anything cached is re-derived at least once per lifetime.
+
+class TTLCache:
+    def __init__(self, max_size: int = 10000, clock=time.monotonic):
+        self.max_size = max_size
+        self.clock = clock
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry[0] <= self.clock():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: float):
+        if ttl <= 0 or self.max_size <= 0:
+            return
+        self._entries.pop(key, None)
+        if len(self._entries) >= self.max_size:
+            self._evict()
+        self._entries[key] = (self.clock() + ttl, value)
+
+    def pop(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self):
+        now = self.clock()
+        for key in [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]:
+            del self._entries[key]
+        # still full: drop the oldest quarter (dicts keep insertion order)
+        if len(self._entries) >= self.max_size:
+            for key in list(self._entries)[:max(1, self.max_size // 4)]:
+                del self._entries[key]
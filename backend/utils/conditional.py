@@ -0,0 +1,68 @@
+import hashlib
+from typing import Optional, Sequence, Set, Tuple
+
+from fastapi import Request, Response
+
+from services.event_bus import event_bus
+
+# Conditional GET for the polled listings.
+# A listing's ETag is the event bus' version token for the collections it
+# reads: while no event touched them since the client's copy, the request
+# is answered 304 before any query runs. With ?wait=N the request instead
+# holds for up to N seconds until the version moves (long-poll), then
+# answers as usual - a full response once something changed, 304 if not.
+# Cache-Control: no-cache makes browsers revalidate with If-None-Match on
+# their own, so plain polling clients get 304s without any changes.
+
+MAX_WAIT_SECONDS = 30.0
+NO_CACHE = "no-cache"
+
+def weak_etag(token: str) -> str:
+    return f'W/"{token}"'
+
+def content_etag(body: bytes) -> str:
+    """ETag for a response that depends on more than the versioned collections"""
+    return weak_etag(hashlib.sha1(body).hexdigest())
+
+def request_etags(request: Request) -> Set[str]:
+    """Entity tags listed in If-None-Match"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return set()
+    return {tag.strip() for tag in header.split(",") if tag.strip()}
+
+def etag_matches(request: Request, etag: str) -> bool:
+    tags = request_etags(request)
+    return etag in tags or "*" in tags
+
+def caching_headers(etag: Optional[str]) -> dict:
+    return {"ETag": etag, "Cache-Control": NO_CACHE} if etag else {}
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers=caching_headers(etag))
+
+# Returns (etag, response): a 304 response when the client's copy is still
+# current (after waiting up to `wait` seconds for a change), otherwise the
+# ETag to send with the full response - None when versions aren't tracked
+# (the outbox relay isn't running). `suffix` folds inputs other than the
+# collections (e.g. a time window) into the tag.
+
+async def check_not_modified(
+    request: Request,
+    collections: Sequence[str],
+    wait: float = 0,
+    suffix: str = ""
+) -> Tuple[Optional[str], Optional[Response]]:
+    """Answer a conditional GET from the collections' version, without touching the database"""
+    token = event_bus.version_token(collections)
+    if token is None:
+        return None, None
+    etag = weak_etag(token + suffix)
+    if not etag_matches(request, etag):
+        return etag, None
+
+    if wait <= 0 or not await event_bus.wait_for_change(collections, token, min(wait, MAX_WAIT_SECONDS)):
+        return etag, not_modified_response(etag)
+
+    token = event_bus.version_token(collections)
+    return (weak_etag(token + suffix) if token is not None else None), None
@@ -0,0 +1,181 @@
+import argparse
+import base64
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import jwt
+
+try:
+    from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+except ImportError:  # optional: only needed for RS256 / EdDSA keys
+    ed25519 = rsa = None
+
+# Local JWKS-style key set for signing and verifying access tokens.
+#
+# The key file is a JWK set with one extra member naming the signing key:
+#   {"active_kid": "2026-10", "keys": [{"kid": "2026-10", "alg": "EdDSA", ...}, ...]}
+# Tokens carry the signing key's kid in their header; verification looks the
+# kid up and only accepts the algorithm that key is registered for. Keys are
+# parsed once per file load, so a request never re-parses PEM/JWK material.
+# A service that only verifies can be given the public set (no private
+# members, no active_kid) - it needs no signing secret at all.
+#
+# Rotation without logging anyone out:
+#   1. add the new key (generate ... without --activate); reload everywhere
+#   2. make it active_kid: new tokens are signed with it, old ones still verify
+#   3. once tokens signed with the old key have expired (JWT_EXPIRATION_HOURS),
+#      remove the old key
+# Running processes pick up file changes within JWT_KEYS_RELOAD_SECONDS.
+
+PRIVATE_MEMBERS = ("d", "p", "q", "dp", "dq", "qi", "oth")
+
+
+class KeySet:
+    """Parsed keys by kid, plus the key new tokens are signed with"""
+
+    def __init__(self, verification_keys: Dict[str, Tuple[str, Any]], signing: Optional[Tuple[str, str, Any]] = None):
+        self.verification_keys = verification_keys
+        self.signing = signing
+
+    @classmethod
+    def from_jwks(cls, jwks: Dict) -> "KeySet":
+        verification_keys = {}
+        signing = None
+        active_kid = jwks.get("active_kid")
+        for jwk in jwks.get("keys", []):
+            kid = jwk.get("kid")
+            algorithm = jwk.get("alg")
+            if not kid or not algorithm:
+                raise ValueError("Every key needs a kid and an alg")
+            key = jwt.PyJWK(jwk, algorithm=algorithm).key
+            # private key objects verify through their public half
+            verification_keys[kid] = (algorithm, key.public_key() if hasattr(key, "public_key") else key)
+            if kid == active_kid:
+                if jwk.get("kty") != "oct" and not any(member in jwk for member in PRIVATE_MEMBERS):
+                    raise ValueError(f"Active key {kid} has no private part to sign with")
+                signing = (kid, algorithm, key)
+        if active_kid and signing is None:
+            raise ValueError(f"Active key {active_kid} is not in the key set")
+        return cls(verification_keys, signing)
+
+    def signing_key(self) -> Tuple[str, str, Any]:
+        """(kid, algorithm, key) for new tokens"""
+        if self.signing is None:
+            raise RuntimeError("The key set has no active signing key")
+        return self.signing
+
+    def verification_key(self, kid: Optional[str]) -> Tuple[str, Any]:
+        """(algorithm, key) for a token's kid"""
+        if kid is None or kid not in self.verification_keys:
+            raise jwt.InvalidSignatureError("Unknown signing key")
+        return self.verification_keys[kid]
+
+
+# The key file, re-read when it changes. Checking costs one stat() per
+# reload interval; in between current() returns the parsed set as is.
+
+class KeySetFile:
+    def __init__(self, path: str, reload_seconds: float = 30.0):
+        self.path = path
+        self.reload_seconds = reload_seconds
+        self._lock = threading.Lock()
+        self._key_set: Optional[KeySet] = None
+        self._stamp: Optional[tuple] = None
+        self._checked_at = 0.0
+
+    def current(self) -> KeySet:
+        now = time.monotonic()
+        if self._key_set is not None and now - self._checked_at < self.reload_seconds:
+            return self._key_set
+        with self._lock:
+            self._checked_at = now
+            stat = os.stat(self.path)
+            # a replaced file (see main below) is a new inode even within one mtime tick
+            stamp = (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+            if self._key_set is None or stamp != self._stamp:
+                with open(self.path) as f:
+                    self._key_set = KeySet.from_jwks(json.load(f))
+                self._stamp = stamp
+            return self._key_set
+
+
+def generate_jwk(algorithm: str, kid: str) -> Dict:
+    """A new private JWK for HS256/HS384/HS512, RS256 or EdDSA"""
+    if algorithm in ("HS256", "HS384", "HS512"):
+        secret = base64.urlsafe_b64encode(os.urandom(64)).rstrip(b"=").decode()
+        return {"kty": "oct", "kid": kid, "alg": algorithm, "use": "sig", "k": secret}
+    if rsa is None:
+        raise RuntimeError(f"{algorithm} keys need the 'cryptography' package")
+    if algorithm == "EdDSA":
+        jwk = json.loads(jwt.algorithms.OKPAlgorithm.to_jwk(ed25519.Ed25519PrivateKey.generate()))
+    elif algorithm == "RS256":
+        jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(rsa.generate_private_key(public_exponent=65537, key_size=2048)))
+    else:
+        raise ValueError(f"Unsupported algorithm {algorithm}")
+    jwk.update(kid=kid, alg=algorithm, use="sig")
+    return jwk
+
+
+def public_jwks(jwks: Dict) -> Dict:
+    """The verify-only set: asymmetric keys without their private members"""
+    return {"keys": [
+        {name: value for name, value in jwk.items() if name not in PRIVATE_MEMBERS}
+        for jwk in jwks.get("keys", [])
+        if jwk.get("kty") != "oct"
+    ]}
+
+
+# python -m utils.jwt_keys generate --file keys.json --alg EdDSA --kid 2026-10 [--activate]
+# python -m utils.jwt_keys activate --file keys.json --kid 2026-10
+# python -m utils.jwt_keys remove --file keys.json --kid 2026-04
+# python -m utils.jwt_keys public --file keys.json > public.json
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the JWT signing key set")
+    parser.add_argument("command", choices=["generate", "activate", "remove", "public"])
+    parser.add_argument("--file", required=True)
+    parser.add_argument("--alg", default="EdDSA")
+    parser.add_argument("--kid")
+    parser.add_argument("--activate", action="store_true", help="sign new tokens with the generated key")
+    args = parser.parse_args(argv)
+
+    jwks = {"keys": []}
+    if os.path.exists(args.file):
+        with open(args.file) as f:
+            jwks = json.load(f)
+
+    if args.command == "public":
+        json.dump(public_jwks(jwks), sys.stdout, indent=2)
+        return
+    if not args.kid:
+        parser.error("--kid is required")
+
+    kids = [jwk.get("kid") for jwk in jwks["keys"]]
+    if args.command == "generate":
+        if args.kid in kids:
+            parser.error(f"Key {args.kid} already exists")
+        jwks["keys"].append(generate_jwk(args.alg, args.kid))
+        if args.activate:
+            jwks["active_kid"] = args.kid
+    elif args.command == "activate":
+        if args.kid not in kids:
+            parser.error(f"No key {args.kid}")
+        jwks["active_kid"] = args.kid
+    elif args.command == "remove":
+        if jwks.get("active_kid") == args.kid:
+            parser.error("Activate another key before removing the active one")
+        jwks["keys"] = [jwk for jwk in jwks["keys"] if jwk.get("kid") != args.kid]
+
+    # write then rename, so a reloading process never reads half a file
+    tmp_path = f"{args.file}.tmp"
+    with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as f:
+        json.dump(jwks, f, indent=2)
+    os.replace(tmp_path, args.file)
+
+
+if __name__ == "__main__":
+    main()
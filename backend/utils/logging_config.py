@@ -0,0 +1,209 @@
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, TextIO
+
+from app.config import settings
+from utils import statement_timing
+from utils.metrics import Counter
+from utils.statement_timing import Statement
+from utils.tracing import install_log_context
+
+try:
+    import orjson
+except ImportError:  # optional: without it records are encoded with the stdlib
+    orjson = None
+
+# Logging pipeline for the app.
+#
+# Code that logs only pays for building the record and putting it on a
+# bounded queue; formatting and writing happen on the QueueListener's
+# thread. If the writer falls behind, the queue fills and records are
+# dropped and counted (log_records_dropped_total) - logging never blocks a
+# request. Warnings and errors are never sampled; below that, LOG_SAMPLING
+# keeps a share of a chatty logger's records, chosen by trace id so a
+# sampled request keeps all its lines.
+#
+# Records are JSON lines (LOG_FORMAT=json) or the plain text format
+# (LOG_FORMAT=text). Both carry the trace id and any `extra=` fields:
+#   logger.info("Transfer completed", extra={"transfer_id": transfer.id})
+
+LOG_RECORDS_DROPPED = Counter("log_records_dropped_total", "Log records dropped because the log queue was full")
+
+# attributes every LogRecord has; anything else came in through extra=
+_RECORD_ATTRIBUTES = frozenset(logging.makeLogRecord({}).__dict__) | {
+    "message", "asctime", "taskName", "trace_id", "span_id", "sample_rate",
+}
+
+
+def _extra_fields(record: logging.LogRecord) -> Dict:
+    return {key: value for key, value in record.__dict__.items() if key not in _RECORD_ATTRIBUTES}
+
+
+def _dumps(entry: Dict) -> str:
+    if orjson is not None:
+        return orjson.dumps(entry, default=str).decode()
+    return json.dumps(entry, default=str)
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        trace_id = getattr(record, "trace_id", "-")
+        if trace_id != "-":
+            entry["trace_id"] = trace_id
+            entry["span_id"] = record.span_id
+        if getattr(record, "sample_rate", None) is not None:
+            entry["sample_rate"] = record.sample_rate
+        entry.update(_extra_fields(record))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return _dumps(entry)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(levelname)s:%(name)s:%(message)s [trace_id=%(trace_id)s]")
+
+    def format(self, record: logging.LogRecord) -> str:
+        if not hasattr(record, "trace_id"):
+            record.trace_id = "-"
+        text = super().format(record)
+        fields = _extra_fields(record)
+        if fields:
+            text += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return text
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a share of records below WARNING, by logger (and its children)"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = dict(rates)
+        self._resolved: Dict[str, float] = {}
+
+    def rate_for(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate = 1.0
+            candidate = name
+            while candidate:
+                if candidate in self.rates:
+                    rate = self.rates[candidate]
+                    break
+                candidate = candidate.rpartition(".")[0]
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate_for(record.name)
+        if rate >= 1.0:
+            return True
+        trace_id = getattr(record, "trace_id", "-")
+        # by trace id, so all of a sampled request's lines are kept together
+        position = int(trace_id[:8], 16) / 0x100000000 if trace_id != "-" else random.random()
+        if position >= rate:
+            return False
+        record.sample_rate = rate
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render the message and traceback now (arguments may change once the
+        # caller moves on), but keep the record's fields for the formatter.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_listener: Optional[QueueListener] = None
+
+
+def configure_logging(
+    level: str = None,
+    log_format: str = None,
+    sampling: Dict[str, float] = None,
+    queue_size: int = None,
+    stream: TextIO = None
+) -> QueueListener:
+    """Route the root logger through the queue to one formatted stream handler"""
+    global _listener
+    stop_logging()
+    install_log_context()
+
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JsonFormatter() if (log_format or settings.LOG_FORMAT) == "json" else TextFormatter())
+
+    log_queue = queue.Queue(settings.LOG_QUEUE_SIZE if queue_size is None else queue_size)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(settings.LOG_SAMPLING if sampling is None else sampling))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(queue_handler)
+    root.setLevel(level or settings.LOG_LEVEL)
+
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """Write out queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+# --- SQL statements -----------------------------------------------------
+# Replaces SQLAlchemy's echo, which writes every statement synchronously
+# through its own handler. Statements slower than DATABASE_SLOW_QUERY_MS
+# (timed by utils/statement_timing.py) are logged as warnings - the only
+# place slow queries are logged; DATABASE_ECHO logs the rest at INFO (sample it
+# with LOG_SAMPLING {"sql": ...}). Both go through the pipeline above.
+
+sql_logger = logging.getLogger("sql")
+
+
+def _statement_finished(statement: Statement):
+    if statement.slow:
+        sql_logger.warning("Slow query", extra={"duration_ms": round(statement.duration_ms, 3), "statement": statement.text[:2000]})
+    elif settings.DATABASE_ECHO and sql_logger.isEnabledFor(logging.INFO):
+        sql_logger.info(statement.text, extra={
+            "duration_ms": round(statement.duration_ms, 3), "parameters": repr(statement.parameters)[:500]
+        })
+
+
+statement_timing.subscribe(on_end=_statement_finished)
@@ -0,0 +1,40 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional
+
+# Response header carrying the cursor for the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+class InvalidCursor(ValueError):
+    """A cursor that wasn't produced by encode_cursor"""
+
+# Turn the sort key of the last row on a page into an opaque cursor.
+# Clients pass it back unchanged to get the following page; they shouldn't
+# build or inspect it, so the key can change without breaking them.
+
+def encode_cursor(*values: Any) -> str:
+    """Encode a keyset position as a URL-safe token"""
+    key = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+# Reverse of encode_cursor; `types` converts each position back
+# (e.g. (datetime, str) for a (created_at, id) key).
+
+def decode_cursor(cursor: Optional[str], types: tuple) -> Optional[tuple]:
+    """Decode a cursor into a key tuple, or None when no cursor was given"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(key, list) or len(key) != len(types):
+            raise InvalidCursor("Invalid cursor")
+        return tuple(
+            datetime.fromisoformat(value) if kind is datetime else kind(value)
+            for kind, value in zip(types, key)
+        )
+    except (binascii.Error, json.JSONDecodeError, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise InvalidCursor("Invalid cursor") from e
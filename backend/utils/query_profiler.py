@@ -0,0 +1,277 @@
+import contextvars
+import logging
+import re
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event as sa_event
+
+from app.config import settings
+from utils import statement_timing
+from utils.metrics import route_label
+from utils.statement_timing import Statement
+
+logger = logging.getLogger(__name__)
+
+# Statement profiling for the app's engine (attached in app/database.py).
+#
+# Every statement, as timed by utils/statement_timing.py, is folded into
+# per-shape totals: its SQL with literals, placeholders and IN-lists
+# collapsed, so `id = 'a'` and `id = 'b'` count as one statement. On top of
+# that:
+#   - slow statements (the ones the SQL log warns about) are kept with their
+#     parameters redacted to type names, and with QUERY_EXPLAIN_SLOW the
+#     plan of a slow SELECT is captured once per shape
+#   - a request running one shape QUERY_N_PLUS_ONE_THRESHOLD or more times
+#     (a query per row of an earlier result) is flagged as an N+1
+# The admin API (routers/admin.py) serves all of it. Everything is per
+# process and bounded.
+
+MAX_SHAPES = 1000
+MAX_RECORDS = 100
+_MAX_STATEMENT_LENGTH = 2000
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|(?<![:\w]):\w+|\$\d+|\?")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def statement_shape(statement: str) -> str:
+    """The statement with whitespace, literals, placeholders and IN-lists normalised"""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _STRING.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    shape = _PLACEHOLDER.sub("?", shape)
+    return _VALUE_LIST.sub("(?, ...)", shape)
+
+
+def redact_parameters(parameters: Any, executemany: bool = False) -> Any:
+    """Parameter type names in place of their values"""
+    if executemany:
+        return f"<{len(parameters)} rows>"
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+# Explain prefixes per dialect; anything else has its slow queries recorded
+# without a plan. Never ANALYZE: that would run the statement again.
+EXPLAIN_PREFIXES = {
+    "sqlite": "EXPLAIN QUERY PLAN ",
+    "postgresql": "EXPLAIN ",
+    "mysql": "EXPLAIN ",
+    "mariadb": "EXPLAIN ",
+}
+
+
+class _RequestQueries:
+    __slots__ = ("shapes",)
+
+    def __init__(self):
+        self.shapes: Dict[str, int] = {}
+
+
+_request_queries: contextvars.ContextVar[Optional[_RequestQueries]] = contextvars.ContextVar(
+    "request_queries", default=None
+)
+
+
+class QueryProfiler:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._engines = set()
+        self._shapes: Dict[str, str] = {}  # statement text -> shape
+        self._stats: Dict[str, Dict] = {}
+        self._plans: Dict[str, Optional[List[str]]] = {}
+        self.slow_queries: deque = deque(maxlen=MAX_RECORDS)
+        self.n_plus_one: deque = deque(maxlen=MAX_RECORDS)
+
+    def attach(self, engine):
+        self._engines.add(engine)
+        statement_timing.subscribe(on_end=self._statement_finished)
+
+    def detach(self, engine):
+        self._engines.discard(engine)
+        if not self._engines:
+            statement_timing.unsubscribe(on_end=self._statement_finished)
+
+    def shape(self, statement: str) -> str:
+        shape = self._shapes.get(statement)
+        if shape is None:
+            shape = statement_shape(statement)
+            if len(self._shapes) < MAX_SHAPES * 4:
+                self._shapes[statement] = shape
+        return shape
+
+    def _statement_finished(self, statement: Statement):
+        if statement.conn.engine not in self._engines or not settings.QUERY_PROFILER_ENABLED:
+            return
+        duration_ms = statement.duration_ms
+        shape = self.shape(statement.text)
+
+        with self._lock:
+            stats = self._stats.get(shape)
+            if stats is None:
+                if len(self._stats) >= MAX_SHAPES:
+                    stats = self._stats.setdefault("<other>", {"calls": 0, "total_ms": 0.0, "max_ms": 0.0, "slow": 0})
+                else:
+                    stats = self._stats[shape] = {"calls": 0, "total_ms": 0.0, "max_ms": 0.0, "slow": 0}
+            stats["calls"] += 1
+            stats["total_ms"] += duration_ms
+            if duration_ms > stats["max_ms"]:
+                stats["max_ms"] = duration_ms
+            if statement.slow:
+                stats["slow"] += 1
+
+        queries = _request_queries.get()
+        if queries is not None:
+            queries.shapes[shape] = queries.shapes.get(shape, 0) + 1
+
+        if statement.slow:
+            self.slow_queries.append({
+                "statement": statement.text[:_MAX_STATEMENT_LENGTH],
+                "shape": shape,
+                "parameters": redact_parameters(statement.parameters, statement.executemany),
+                "duration_ms": round(duration_ms, 3),
+                "at": _now(),
+                "plan": self._plan(statement.conn, shape, statement.text, statement.parameters, statement.executemany),
+            })
+
+    # The plan of a slow SELECT, run on the same connection right after it
+    # (same transaction, same parameters), once per shape.
+    def _plan(self, conn, shape, statement, parameters, executemany) -> Optional[List[str]]:
+        if shape in self._plans:
+            return self._plans[shape]
+        prefix = EXPLAIN_PREFIXES.get(conn.dialect.name)
+        if not settings.QUERY_EXPLAIN_SLOW or prefix is None or executemany \
+                or not statement.lstrip()[:6].upper() == "SELECT":
+            return None
+        plan = None
+        try:
+            # the raw DBAPI cursor, so the EXPLAIN isn't profiled itself
+            cursor = conn.connection.cursor()
+            try:
+                cursor.execute(prefix + statement, parameters)
+                plan = [" | ".join(str(column) for column in row) for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+        except Exception as e:
+            logger.warning(f"Could not capture query plan: {str(e)}")
+        if len(self._plans) < MAX_SHAPES:
+            self._plans[shape] = plan
+        return plan
+
+    @contextmanager
+    def request(self, route: Optional[str] = None):
+        """Counts statement shapes run in the block (a job, a test); flags repeated ones on exit"""
+        queries = _RequestQueries()
+        token = _request_queries.set(queries)
+        try:
+            yield queries
+        finally:
+            _request_queries.reset(token)
+            self.check_repeats(queries, route)
+
+    def check_repeats(self, queries: _RequestQueries, route: Optional[str]):
+        threshold = settings.QUERY_N_PLUS_ONE_THRESHOLD
+        if threshold <= 0:
+            return
+        for shape, count in queries.shapes.items():
+            if count >= threshold:
+                self.n_plus_one.append({"route": route, "shape": shape, "count": count, "at": _now()})
+                logger.warning("Repeated query in one request", extra={"route": route, "count": count, "shape": shape})
+
+    def report(self, limit: int = 20) -> Dict:
+        with self._lock:
+            statements = [
+                {"shape": shape, **stats, "total_ms": round(stats["total_ms"], 3), "max_ms": round(stats["max_ms"], 3),
+                 "mean_ms": round(stats["total_ms"] / stats["calls"], 3)}
+                for shape, stats in self._stats.items()
+            ]
+        statements.sort(key=lambda s: s["total_ms"], reverse=True)
+        return {
+            "slow_threshold_ms": settings.DATABASE_SLOW_QUERY_MS,
+            "statements": statements[:limit],
+            "slow_queries": list(self.slow_queries)[::-1],
+            "n_plus_one": list(self.n_plus_one)[::-1],
+        }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._plans.clear()
+            self.slow_queries.clear()
+            self.n_plus_one.clear()
+
+
+# Pure ASGI middleware: one request scope per HTTP request, so repeated
+# statement shapes are flagged against the route that ran them.
+
+class QueryProfilerMiddleware:
+    def __init__(self, app, profiler: "QueryProfiler" = None):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.QUERY_PROFILER_ENABLED:
+            return await self.app(scope, receive, send)
+        profiler = self.profiler or query_profiler
+        queries = _RequestQueries()
+        token = _request_queries.set(queries)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_queries.reset(token)
+            # the route is only known once the request has been routed
+            profiler.check_repeats(queries, f"{scope['method']} {route_label(scope)}")
+
+
+# Test helper: the statements run on `engine` inside the block, failing the
+# test when there are more than `max_queries` or one shape repeats more than
+# `max_repeats` times.
+#
+#   with query_budget(engine, max_queries=2):
+#       await client.get("/routers/calls/")
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(engine, max_queries: int, max_repeats: Optional[int] = None):
+    statements: List[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    sa_event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        sa_event.remove(engine, "before_cursor_execute", record)
+
+    listing = "\n".join(f"  {statement}" for statement in statements)
+    if len(statements) > max_queries:
+        raise QueryBudgetExceeded(f"{len(statements)} queries, budget {max_queries}:\n{listing}")
+    if max_repeats is not None:
+        counts: Dict[str, int] = {}
+        for statement in statements:
+            shape = statement_shape(statement)
+            counts[shape] = counts.get(shape, 0) + 1
+        repeated = {shape: count for shape, count in counts.items() if count > max_repeats}
+        if repeated:
+            raise QueryBudgetExceeded(f"Repeated statements (more than {max_repeats}): {repeated}\n{listing}")
+
+
+query_profiler = QueryProfiler()
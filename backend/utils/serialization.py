@@ -0,0 +1,81 @@
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+import dataclasses
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # optional: without it responses use pydantic's / the stdlib encoder
+    orjson = None
+
+# Response serialization fast path.
+# FastAPI validates whatever a route returns against its response_model, then
+# walks the result with jsonable_encoder before json.dumps; a list built from
+# from_orm() is therefore validated twice and converted three times. Hot
+# routes return a Response from these helpers instead, which FastAPI sends
+# as is; the response_model stays on the route for the OpenAPI schema.
+
+# Default response class for the app: orjson renders plain dict/list returns
+class DefaultJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+@lru_cache(maxsize=None)
+def _adapter(annotation) -> TypeAdapter:
+    return TypeAdapter(annotation)
+
+# Field names of a model whose JSON is just its fields' values under their
+# own names; None when validators, serializers, computed fields or aliases
+# would change what model_response sends.
+@lru_cache(maxsize=None)
+def _plain_fields(model: Type[BaseModel]) -> Optional[tuple]:
+    decorators = model.__pydantic_decorators__
+    if any(getattr(decorators, info.name) for info in dataclasses.fields(decorators)):
+        return None
+    if any(field.alias or field.serialization_alias for field in model.model_fields.values()):
+        return None
+    return tuple(model.model_fields)
+
+def _json(body: bytes, status_code: int, headers: Optional[Dict[str, str]]) -> Response:
+    return Response(body, status_code=status_code, media_type="application/json", headers=headers)
+
+# Validate ORM objects (or any attribute-bearing rows) against `model` once,
+# in pydantic-core, and send pydantic-core's JSON for the validated value.
+
+def model_response(
+    model: Type[BaseModel],
+    data: Any,
+    many: bool = False,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """Validate data once against model (or List[model]) and return it as JSON"""
+    adapter = _adapter(List[model] if many else model)
+    # by alias, as FastAPI sends a response_model
+    body = adapter.dump_json(adapter.validate_python(data, from_attributes=True), by_alias=True)
+    return _json(body, status_code, headers)
+
+# Rows from a projection query whose columns are the model's fields (pinned
+# by tests) are trusted database values: with orjson they are encoded as is,
+# skipping validation altogether. A row missing one of the fields raises
+# rather than sending null. Models with validators, serializers or aliases,
+# and any model without orjson, go through model_response.
+
+def rows_response(
+    model: Type[BaseModel],
+    rows: Iterable[Any],
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """Encode projection rows shaped like model without re-validating them"""
+    fields = _plain_fields(model) if orjson is not None else None
+    if fields is None:
+        return model_response(model, list(rows), many=True, status_code=status_code, headers=headers)
+    body = orjson.dumps([{field: getattr(row, field) for field in fields} for row in rows])
+    return _json(body, status_code, headers)
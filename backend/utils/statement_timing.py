@@ -0,0 +1,98 @@
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import event as sa_event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+# The one timer for SQL statements, on every engine. Metrics
+# (utils/metrics.py), tracing (utils/tracing.py), the SQL log
+# (utils/logging_config.py) and the query profiler (utils/query_profiler.py)
+# subscribe here rather than each listening to cursor execution and timing
+# the statement again: a statement is timed once, and is slow
+# (DATABASE_SLOW_QUERY_MS) by one verdict for all of them.
+#
+# Subscribers are called in the order they subscribed:
+#   on_start(statement)       before it runs
+#   on_end(statement)         after it ran, with duration and slow set
+#   on_error(statement, exc)  when it failed, instead of on_end
+# A subscriber keeps whatever it needs between the calls in statement.state.
+
+StartHook = Callable[["Statement"], None]
+ErrorHook = Callable[["Statement", BaseException], None]
+
+_on_start: List[StartHook] = []
+_on_end: List[StartHook] = []
+_on_error: List[ErrorHook] = []
+
+
+class Statement:
+    __slots__ = ("conn", "text", "parameters", "executemany", "state", "started", "duration", "slow")
+
+    def __init__(self, conn, text: str, parameters: Any, executemany: bool):
+        self.conn = conn
+        self.text = text
+        self.parameters = parameters
+        self.executemany = executemany
+        self.state: Dict[str, Any] = {}
+        self.started = 0.0
+        self.duration = 0.0
+        self.slow = False
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration * 1000
+
+    @property
+    def kind(self) -> str:
+        """SELECT, INSERT, ... (the statement's first keyword)"""
+        return self.text.lstrip().split(None, 1)[0].upper() if self.text else "UNKNOWN"
+
+
+def subscribe(on_start: Optional[StartHook] = None, on_end: Optional[StartHook] = None,
+              on_error: Optional[ErrorHook] = None):
+    for hooks, hook in ((_on_start, on_start), (_on_end, on_end), (_on_error, on_error)):
+        if hook is not None and hook not in hooks:
+            hooks.append(hook)
+
+
+def unsubscribe(on_start: Optional[StartHook] = None, on_end: Optional[StartHook] = None,
+                on_error: Optional[ErrorHook] = None):
+    for hooks, hook in ((_on_start, on_start), (_on_end, on_end), (_on_error, on_error)):
+        if hook in hooks:
+            hooks.remove(hook)
+
+
+# A stack per connection: a statement can run while another's hooks do.
+
+@sa_event.listens_for(Engine, "before_cursor_execute")
+def _before_statement(conn, cursor, statement, parameters, context, executemany):
+    current = Statement(conn, statement, parameters, executemany)
+    for hook in _on_start:
+        hook(current)
+    conn.info.setdefault("statements", []).append(current)
+    current.started = time.perf_counter()
+
+
+@sa_event.listens_for(Engine, "after_cursor_execute")
+def _after_statement(conn, cursor, statement, parameters, context, executemany):
+    running = conn.info.get("statements")
+    if not running:
+        return
+    current = running.pop()
+    current.duration = time.perf_counter() - current.started
+    current.slow = current.duration_ms >= settings.DATABASE_SLOW_QUERY_MS > 0
+    for hook in _on_end:
+        hook(current)
+
+
+@sa_event.listens_for(Engine, "handle_error")
+def _failed_statement(context):
+    running = context.connection.info.get("statements") if context.connection is not None else None
+    if not running:
+        return
+    current = running.pop()
+    current.duration = time.perf_counter() - current.started
+    for hook in _on_error:
+        hook(current, context.original_exception)
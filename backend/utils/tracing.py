@@ -0,0 +1,397 @@
+import json
+import logging
+import queue
+import random
+import re
+import sys
+import threading
+import time
+import contextvars
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import settings
+from utils import statement_timing
+from utils.metrics import WORKER, route_label
+from utils.statement_timing import Statement
+
+# Lightweight request tracing, compatible with OpenTelemetry on the wire:
+# W3C trace context (traceparent) in and out, 128-bit trace ids and 64-bit
+# span ids, and finished spans exported as OTLP/JSON lines - one
+# ExportTraceServiceRequest per line, the format the OpenTelemetry
+# Collector's otlpjsonfile receiver reads. There is no SDK dependency.
+#
+# Every request gets a trace id (logs and the X-Trace-Id response header
+# carry it) whether or not spans are exported. With TRACING_EXPORTER unset
+# no span is recorded, so a span costs a context-variable lookup.
+
+SERVICE_NAME = "warm-transfer-backend"
+TRACE_ID_HEADER = "X-Trace-Id"
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+_STATUS_OK = 1
+_STATUS_ERROR = 2
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+def _new_id(bits: int) -> str:
+    return format(random.getrandbits(bits) or 1, f"0{bits // 4}x")
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """(trace_id, parent span_id, sampled) from a W3C traceparent header"""
+    match = _TRACEPARENT.match(header.strip().lower()) if header else None
+    if not match or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+class _Trace:
+    # finished spans of one local trace, exported together when its root ends
+    __slots__ = ("spans", "exported")
+
+    def __init__(self):
+        self.spans: List["Span"] = []
+        self.exported = False
+
+
+class Span:
+    __slots__ = (
+        "tracer", "name", "kind", "trace_id", "span_id", "parent_id", "sampled", "attributes",
+        "start_ns", "end_ns", "status", "message", "_trace", "_root", "_token",
+    )
+
+    def __init__(self, tracer, name, kind, trace_id, parent_id, sampled, trace, root, attributes=None):
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes = dict(attributes) if sampled and attributes else {}
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.status = None
+        self.message = None
+        self._trace = trace
+        self._root = root
+        self._token = None
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def set_attribute(self, key: str, value: Any):
+        if self.sampled:
+            self.attributes[key] = value
+
+    def record_error(self, exc: BaseException):
+        if self.sampled:
+            self.status = _STATUS_ERROR
+            self.message = str(exc)
+            self.attributes["exception.type"] = type(exc).__name__
+
+    def end(self):
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if not self.sampled:
+            return
+        trace = self._trace
+        if trace.exported:
+            # outlived its root (a background task): goes out on its own
+            self.tracer.export([self])
+            return
+        trace.spans.append(self)
+        if self._root:
+            trace.exported = True
+            self.tracer.export(trace.spans)
+
+    # with span: the span is current inside the block and ended after it
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.record_error(exc)
+        _current_span.reset(self._token)
+        self.end()
+
+
+class _Unrecorded:
+    # inside a trace that isn't sampled nested spans are not created at all;
+    # the enclosing span stays current, so logs keep its trace id
+    __slots__ = ("span",)
+
+    def __init__(self, span: Span):
+        self.span = span
+
+    def __enter__(self) -> Span:
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+# Exporters take lists of finished spans. The JSON lines exporter encodes
+# and writes them on a background thread, so the event loop never waits on
+# the file or the console.
+
+def _attribute_value(value: Any) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _attributes(values: Dict[str, Any]) -> List[Dict]:
+    return [{"key": key, "value": _attribute_value(value)} for key, value in values.items() if value is not None]
+
+
+def encode_spans(spans: List[Span]) -> Dict:
+    """An OTLP/JSON ExportTraceServiceRequest holding spans"""
+    encoded = []
+    for span in spans:
+        item = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": span.kind,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": _attributes(span.attributes),
+            "status": {"code": span.status or _STATUS_OK},
+        }
+        if span.parent_id:
+            item["parentSpanId"] = span.parent_id
+        if span.message:
+            item["status"]["message"] = span.message
+        encoded.append(item)
+    return {"resourceSpans": [{
+        "resource": {"attributes": _attributes({"service.name": SERVICE_NAME, "service.instance.id": WORKER})},
+        "scopeSpans": [{"scope": {"name": __name__}, "spans": encoded}],
+    }]}
+
+
+class InMemorySpanExporter:
+    """Keeps finished spans in a list (tests, debugging)"""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def export(self, spans: List[Span]):
+        self.spans.extend(spans)
+
+    def shutdown(self):
+        pass
+
+
+class JsonLinesSpanExporter:
+    def __init__(self, path: str = ""):
+        self.path = path  # "" writes to stderr
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                    self._thread.start()
+        self._queue.put(list(spans))
+
+    def _run(self):
+        stream = open(self.path, "a", encoding="utf-8") if self.path else sys.stderr
+        try:
+            while True:
+                spans = self._queue.get()
+                if spans is None:
+                    break
+                stream.write(json.dumps(encode_spans(spans), separators=(",", ":")) + "\n")
+                if self._queue.empty():
+                    stream.flush()
+        except Exception as e:
+            logging.getLogger(__name__).error(f"Span exporter stopped: {str(e)}")
+        finally:
+            if self.path:
+                stream.close()
+            else:
+                stream.flush()
+
+    def shutdown(self, timeout: float = 5.0):
+        """Write out everything exported so far"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+
+def create_span_exporter(kind: str = None, path: str = None):
+    kind = settings.TRACING_EXPORTER if kind is None else kind
+    if not kind:
+        return None
+    if kind == "console":
+        return JsonLinesSpanExporter()
+    if kind == "file":
+        return JsonLinesSpanExporter(path if path is not None else settings.TRACING_FILE)
+    raise ValueError(f"Unknown TRACING_EXPORTER: {kind}")
+
+
+class Tracer:
+    def __init__(self, exporter=None, sample_ratio: float = 1.0):
+        self.exporter = exporter
+        self.sample_ratio = sample_ratio
+
+    def configure(self, exporter, sample_ratio: float = 1.0):
+        self.exporter = exporter
+        self.sample_ratio = sample_ratio
+
+    def export(self, spans: List[Span]):
+        if self.exporter is not None:
+            self.exporter.export(spans)
+
+    def span(self, name: str, attributes: Optional[Dict[str, Any]] = None, kind: int = SPAN_KIND_INTERNAL,
+             remote_parent: Optional[Tuple[str, str, bool]] = None):
+        """A span under the current one (or a new trace), for use with `with`"""
+        parent = _current_span.get()
+        if parent is not None and remote_parent is None:
+            if not parent.sampled:
+                return _Unrecorded(parent)
+            return Span(self, name, kind, parent.trace_id, parent.span_id, True, parent._trace, False, attributes)
+
+        if remote_parent is not None:
+            trace_id, parent_id, parent_sampled = remote_parent
+            sampled = self.exporter is not None and parent_sampled
+        else:
+            trace_id, parent_id = _new_id(128), None
+            sampled = self.exporter is not None and random.random() < self.sample_ratio
+        return Span(self, name, kind, trace_id, parent_id, sampled, _Trace(), True, attributes)
+
+    def shutdown(self):
+        if self.exporter is not None:
+            self.exporter.shutdown()
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_trace_id() -> Optional[str]:
+    span = _current_span.get()
+    return span.trace_id if span is not None else None
+
+
+# --- log correlation ----------------------------------------------------
+# Every log record gets trace_id and span_id attributes ("-" outside a
+# trace), so formats and handlers can use them wherever the record was made.
+
+_base_record_factory = logging.getLogRecordFactory()
+
+
+def _record_factory(*args, **kwargs):
+    record = _base_record_factory(*args, **kwargs)
+    span = _current_span.get()
+    record.trace_id = span.trace_id if span is not None else "-"
+    record.span_id = span.span_id if span is not None else "-"
+    return record
+
+
+def install_log_context():
+    logging.setLogRecordFactory(_record_factory)
+
+
+# --- SQL statements -----------------------------------------------------
+# Statements run inside a recorded span get a child span each. Statements
+# outside any trace (background loops) are not traced.
+
+def _statement_started(statement: Statement):
+    parent = _current_span.get()
+    if parent is None or not parent.sampled:
+        return
+    statement.state["span"] = tracer.span("db.statement", {
+        "db.system": statement.conn.dialect.name,
+        "db.operation": statement.kind if statement.text else None,
+        "db.statement": statement.text[:500],
+    }, kind=SPAN_KIND_CLIENT)
+
+
+def _statement_finished(statement: Statement):
+    db_span = statement.state.get("span")
+    if db_span is not None:
+        db_span.end()
+
+
+def _statement_failed(statement: Statement, exc: BaseException):
+    db_span = statement.state.get("span")
+    if db_span is not None:
+        db_span.record_error(exc)
+        db_span.end()
+
+
+statement_timing.subscribe(on_start=_statement_started, on_end=_statement_finished, on_error=_statement_failed)
+
+
+# --- HTTP requests ------------------------------------------------------
+# Pure ASGI middleware: one server span per request, continuing an incoming
+# traceparent. The response carries the trace id and a traceresponse header.
+
+class TracingMiddleware:
+    def __init__(self, app, tracer: "Tracer" = None):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        remote_parent = None
+        for name, value in scope.get("headers", ()):
+            if name == b"traceparent":
+                remote_parent = parse_traceparent(value.decode("latin-1"))
+                break
+
+        request_span = (self.tracer or tracer).span(
+            f"{scope['method']} {scope['path']}",
+            {"http.request.method": scope["method"], "url.path": scope["path"]},
+            kind=SPAN_KIND_SERVER,
+            remote_parent=remote_parent,
+        )
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                request_span.set_attribute("http.response.status_code", message["status"])
+                if message["status"] >= 500:
+                    request_span.status = _STATUS_ERROR
+                headers = list(message.get("headers", ()))
+                headers.append((TRACE_ID_HEADER.lower().encode(), request_span.trace_id.encode()))
+                headers.append((b"traceresponse", request_span.traceparent.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        with request_span:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                # the route is only known once the request has been routed
+                route = route_label(scope)
+                request_span.name = f"{scope['method']} {route}"
+                request_span.set_attribute("http.route", route)
+
+
+def span(name: str, attributes: Optional[Dict[str, Any]] = None, kind: int = SPAN_KIND_INTERNAL):
+    """A span under the current one on the app's tracer"""
+    return tracer.span(name, attributes, kind)
+
+
+tracer = Tracer(create_span_exporter(), settings.TRACING_SAMPLE_RATIO)
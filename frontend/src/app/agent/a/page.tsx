@@ -6,6 +6,7 @@ import { useRouter } from 'next/navigation';
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
 import { Button } from '@/components/ui/button';
 import { useCall } from '@/hooks/useCall';
+import { useEventStream } from '@/hooks/useEvents';
 import { useLiveKit } from '@/hooks/useLiveKit';
 import { CallInterface } from '@/components/call/CallInterface';
 import { TransferButton } from '@/components/call/TransferButton';
@@ -70,6 +71,16 @@ export default function AgentAPage() {
     return () => { mounted = false; };
   }, [pageAgent]);
 
+  // Push updates: reload when a call or transfer changes; polling only runs while the stream is down
+  const loadCallsRef = useRef<() => void>(() => {});
+  const streamConnectedRef = useRef(false);
+  const { connected: streamConnected } = useEventStream({ agentId: pageAgent?.id }, (event) => {
+    if (event.type.startsWith('call.') || event.type.startsWith('transfer.')) {
+      loadCallsRef.current();
+    }
+  });
+  streamConnectedRef.current = streamConnected;
+
   // Load calls regardless of local agent resolution; prefer assigned, else show newest waiting
   useEffect(() => {
     let mounted = true;
@@ -160,6 +171,10 @@ export default function AgentAPage() {
         }
       }
     };
+    loadCallsRef.current = loadCalls;
+    const pollCalls = () => {
+      if (!streamConnectedRef.current) loadCalls();
+    };
     loadCalls();
     const onVisibility = () => {
       if (document.visibilityState === 'visible') {
@@ -168,15 +183,15 @@ export default function AgentAPage() {
     };
     document.addEventListener('visibilitychange', onVisibility);
     // Faster poll when tab is visible, slower when hidden
-    let intervalId = setInterval(loadCalls, 2000);
+    let intervalId = setInterval(pollCalls, 2000);
     const onFocus = () => {
       clearInterval(intervalId);
-      intervalId = setInterval(loadCalls, 1500);
-      loadCalls();
+      intervalId = setInterval(pollCalls, 1500);
+      pollCalls();
     };
     const onBlur = () => {
       clearInterval(intervalId);
-      intervalId = setInterval(loadCalls, 5000);
+      intervalId = setInterval(pollCalls, 5000);
     };
     window.addEventListener('focus', onFocus);
     window.addEventListener('blur', onBlur);
@@ -8,6 +8,7 @@ import { Button } from '@/components/ui/button';
 import { LoadingSpinner } from '@/components/common/LoadingSpinner';
 import { Phone, User, Clock } from 'lucide-react';
 import { useCall } from '@/hooks/useCall';
+import { useEventStream } from '@/hooks/useEvents';
 import { useLiveKit } from '@/hooks/useLiveKit';
 import { CallInterface } from '@/components/call/CallInterface';
 import { callsApi, agentsApi, roomsApi } from '@/lib/api';
@@ -60,6 +61,16 @@ export default function AgentBPage() {
     return () => { mounted = false; };
   }, [pageAgent]);
 
+  // Push updates: reload when a call or transfer changes; polling only runs while the stream is down
+  const loadCallsRef = useRef<() => void>(() => {});
+  const streamConnectedRef = useRef(false);
+  const { connected: streamConnected } = useEventStream({ agentId: pageAgent?.id }, (event) => {
+    if (event.type.startsWith('call.') || event.type.startsWith('transfer.')) {
+      loadCallsRef.current();
+    }
+  });
+  streamConnectedRef.current = streamConnected;
+
   // Load calls for Agent B. Prefer assigned active/waiting, else show first unassigned waiting (FCFS)
   useEffect(() => {
     let mounted = true;
@@ -138,6 +149,7 @@ export default function AgentBPage() {
         }
       }
     };
+    loadCallsRef.current = loadCalls;
     loadCalls();
     const onVisibility = () => {
       if (document.visibilityState === 'visible') {
@@ -145,7 +157,9 @@ export default function AgentBPage() {
       }
     };
     document.addEventListener('visibilitychange', onVisibility);
-    const id = setInterval(loadCalls, 3000);
+    const id = setInterval(() => {
+      if (!streamConnectedRef.current) loadCalls();
+    }, 3000);
     return () => {
       mounted = false;
       clearInterval(id);
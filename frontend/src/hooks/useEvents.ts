@@ -0,0 +1,45 @@
+// frontend/src/hooks/useEvents.ts
+import { useEffect, useRef, useState } from 'react';
+import { API_BASE_URL } from '@/lib/api';
+import { ServerEvent, ServerEventType } from '@/lib/types';
+
+const EVENT_TYPES = Object.values(ServerEventType);
+
+// Subscribe to the backend's server-sent event stream for an agent and/or room.
+// `connected` tells callers when they can stop polling; while the stream is
+// down the browser reconnects on its own and the backend replays missed events.
+export const useEventStream = (
+  filter: { agentId?: string | null; roomId?: string | null },
+  onEvent: (event: ServerEvent) => void,
+) => {
+  const [connected, setConnected] = useState(false);
+  const handlerRef = useRef(onEvent);
+  handlerRef.current = onEvent;
+
+  useEffect(() => {
+    if (typeof window === 'undefined' || typeof EventSource === 'undefined') return;
+
+    const params = new URLSearchParams();
+    if (filter.agentId) params.set('agent_id', filter.agentId);
+    if (filter.roomId) params.set('room_id', filter.roomId);
+    const source = new EventSource(`${API_BASE_URL}/routers/events/stream?${params.toString()}`);
+
+    const handle = (message: MessageEvent) => {
+      try {
+        handlerRef.current(JSON.parse(message.data) as ServerEvent);
+      } catch (e) {
+        console.warn('[events] could not handle event', e);
+      }
+    };
+    EVENT_TYPES.forEach((type) => source.addEventListener(type, handle as EventListener));
+    source.onopen = () => setConnected(true);
+    source.onerror = () => setConnected(false);
+
+    return () => {
+      source.close();
+      setConnected(false);
+    };
+  }, [filter.agentId, filter.roomId]);
+
+  return { connected };
+};
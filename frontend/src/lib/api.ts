@@ -1,7 +1,7 @@
 // frontend/src/lib/api.ts
 import axios from 'axios';
 
-const API_BASE_URL = process.env.NEXT_PUBLIC_BACKEND_URL || 'http://localhost:8000';
+export const API_BASE_URL = process.env.NEXT_PUBLIC_BACKEND_URL || 'http://localhost:8000';
 
 export const api = axios.create({
   baseURL: API_BASE_URL,
@@ -70,7 +70,9 @@ export const roomsApi = {
   getStats: (roomId: string, config?: any) => api.get(`/rooms/${roomId}/stats`, { ...(config || {}) }),
   close: (roomId: string, config?: any) => api.delete(`/rooms/${roomId}`, { ...(config || {}) }),
   muteParticipant: (roomId: string, participantIdentity: string, trackType?: string) =>
-    api.post(`/rooms/${roomId}/mute`, { participantIdentity, trackType }),
+    api.post(`/rooms/${roomId}/mute`, null, { params: { participant_identity: participantIdentity, track_type: trackType } }),
+  unmuteParticipant: (roomId: string, participantIdentity: string, trackType?: string) =>
+    api.post(`/rooms/${roomId}/unmute`, null, { params: { participant_identity: participantIdentity, track_type: trackType } }),
   removeParticipant: (roomId: string, participantIdentity: string) =>
     api.post(`/rooms/${roomId}/remove`, { participantIdentity }),
   sendData: (roomId: string, data: string, participantIdentity?: string) =>
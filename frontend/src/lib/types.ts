@@ -91,6 +91,27 @@ export enum PriorityLevel {
   URGENT = 'urgent',
 }
 
+export enum ServerEventType {
+  CALL_CREATED = 'call.created',
+  CALL_UPDATED = 'call.updated',
+  CALLS_ARCHIVED = 'call.archived',
+  AGENT_STATUS_CHANGED = 'agent.status_changed',
+  AGENT_UPDATED = 'agent.updated',
+  TRANSFER_INITIATED = 'transfer.initiated',
+  TRANSFER_IN_PROGRESS = 'transfer.in_progress',
+  TRANSFER_COMPLETED = 'transfer.completed',
+  TRANSFER_FAILED = 'transfer.failed',
+}
+
+export interface ServerEvent {
+  id: number;
+  type: ServerEventType;
+  room_ids: string[];
+  agent_ids: string[];
+  payload: Record<string, any>;
+  created_at: string | null;
+}
+
 export interface ApiResponse<T = any> {
   success: boolean;
   data?: T;